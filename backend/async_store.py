@@ -0,0 +1,376 @@
+"""``SQLiteStore`` を asyncio から利用するためのラッパー。
+
+SQLite の呼び出しは専用のスレッドで実行し、イベントループは結果を待つだけにする。
+書き込みは 1 本のスレッドに集約して順番に処理し、読み取りは ``concurrent_reads`` の場合に限り
+読み取り接続プールと同じ本数のスレッドで並列に処理する。待ちの要求はスレッドをふさがず
+各エグゼキューターのキューに積まれるため、同時実行数はデータベース側の上限で決まる。
+"""
+
+from __future__ import annotations
+
+import asyncio
+import time
+from collections.abc import AsyncIterator, Callable, Iterable, Iterator
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from functools import partial
+from itertools import islice
+from pathlib import Path
+from typing import TYPE_CHECKING, Any
+
+from .metrics import Histogram
+from .models import (
+    AggregateCheck,
+    BatchOperation,
+    BatchResponse,
+    ChangeEvent,
+    ImportReport,
+    LocationConflicts,
+    Material,
+    MaterialCreate,
+    MaterialUpdate,
+    Member,
+    MemberCreate,
+    MemberUpdate,
+    PartMaterialTotal,
+    PartMemberCount,
+    Schedule,
+    ScheduleCreate,
+    ScheduleUpdate,
+    SearchResult,
+    SnapshotSummary,
+    SyncChanges,
+    Task,
+    TaskCreate,
+    TaskOverlap,
+    TaskStatus,
+    TaskStatusCount,
+    TaskUpdate,
+    WaitStats,
+)
+
+if TYPE_CHECKING:
+    from .events import Subscription
+    from .store import JsonRow, SQLiteStore, TaskWindow
+
+# ストリーミング時に 1 回のスレッド往復でまとめて受け取る件数
+ASYNC_STREAM_CHUNK_SIZE = 500
+
+
+def _timed(waits: Histogram, func: Callable[[], Any]) -> Callable[[], Any]:
+    """実行開始時に、作成からの経過時間を ``waits`` に記録する呼び出しを返す。"""
+
+    submitted = time.perf_counter()
+
+    def run() -> Any:
+        waits.observe(time.perf_counter() - submitted)
+        return func()
+
+    return run
+
+
+class AsyncSQLiteStore:
+    """``SQLiteStore`` の各操作を await できるようにしたインターフェース。
+
+    インスタンスは ``SQLiteStore.aio`` から取得し、ストアの ``close()`` で一緒に停止する。
+    """
+
+    def __init__(self, store: SQLiteStore, reader_threads: int) -> None:
+        self._store = store
+        self._writer = ThreadPoolExecutor(max_workers=1, thread_name_prefix="sqlite-writer")
+        # 単一ロック構成では読み取りも書き込みと同じスレッドで処理する
+        self._reader = (
+            ThreadPoolExecutor(max_workers=reader_threads, thread_name_prefix="sqlite-reader")
+            if store.concurrent_reads
+            else self._writer
+        )
+        # 要求を積んでからスレッドで実行が始まるまでの待ち時間
+        self._read_waits = store.metrics.queue_wait.labels("read")
+        self._write_waits = store.metrics.queue_wait.labels("write")
+
+    @property
+    def store(self) -> SQLiteStore:
+        """ラップしている同期ストア。"""
+
+        return self._store
+
+    async def run_read(self, func: Callable[..., Any], *args: Any, **kwargs: Any) -> Any:
+        """読み取り用のスレッドで ``func`` を実行する。"""
+
+        loop = asyncio.get_running_loop()
+        call = _timed(self._read_waits, partial(func, *args, **kwargs))
+        return await loop.run_in_executor(self._reader, call)
+
+    async def run_write(self, func: Callable[..., Any], *args: Any, **kwargs: Any) -> Any:
+        """書き込み用のスレッドで ``func`` を実行する。"""
+
+        loop = asyncio.get_running_loop()
+        call = _timed(self._write_waits, partial(func, *args, **kwargs))
+        return await loop.run_in_executor(self._writer, call)
+
+    async def _stream(self, iterator: Iterator[Any]) -> AsyncIterator[Any]:
+        """同期イテレーターを読み取り用スレッドでまとめて進めながら返す。"""
+
+        while chunk := await self.run_read(lambda: list(islice(iterator, ASYNC_STREAM_CHUNK_SIZE))):
+            for item in chunk:
+                yield item
+
+    def queue_wait_stats(self) -> dict[str, WaitStats]:
+        """読み取り・書き込みそれぞれの、スレッドで実行が始まるまでの待ち時間の累積値を返す。"""
+
+        return {"read": self._read_waits.stats(), "write": self._write_waits.stats()}
+
+    def close(self) -> None:
+        """実行中の処理が終わるのを待ってスレッドを停止する。"""
+
+        self._writer.shutdown(wait=True)
+        if self._reader is not self._writer:
+            self._reader.shutdown(wait=True)
+
+    # -- Members -----------------------------------------------------------
+    async def list_members(
+        self, part: str | None = None, *, after: int | None = None, limit: int | None = None
+    ) -> list[Member]:
+        return await self.run_read(self._store.list_members, part, after=after, limit=limit)
+
+    async def list_members_json(
+        self, part: str | None = None, *, after: int | None = None, limit: int | None = None
+    ) -> list[JsonRow]:
+        return await self.run_read(self._store.list_members_json, part, after=after, limit=limit)
+
+    async def iter_members(
+        self, part: str | None = None, *, after: int | None = None
+    ) -> AsyncIterator[Member]:
+        """``iter_members`` の非同期版。引数の検証は呼び出し時に済ませる。"""
+
+        return self._stream(await self.run_read(self._store.iter_members, part, after=after))
+
+    async def get_member(self, member_id: int) -> Member:
+        return await self.run_read(self._store.get_member, member_id)
+
+    async def create_member(self, payload: MemberCreate) -> Member:
+        return await self.run_write(self._store.create_member, payload)
+
+    async def update_member(self, member_id: int, payload: MemberUpdate) -> Member:
+        return await self.run_write(self._store.update_member, member_id, payload)
+
+    async def delete_member(self, member_id: int) -> None:
+        await self.run_write(self._store.delete_member, member_id)
+
+    # -- Materials ---------------------------------------------------------
+    async def list_materials(
+        self, part: str | None = None, *, after: int | None = None, limit: int | None = None
+    ) -> list[Material]:
+        return await self.run_read(self._store.list_materials, part, after=after, limit=limit)
+
+    async def list_materials_json(
+        self, part: str | None = None, *, after: int | None = None, limit: int | None = None
+    ) -> list[JsonRow]:
+        return await self.run_read(self._store.list_materials_json, part, after=after, limit=limit)
+
+    async def iter_materials(
+        self, part: str | None = None, *, after: int | None = None
+    ) -> AsyncIterator[Material]:
+        return self._stream(await self.run_read(self._store.iter_materials, part, after=after))
+
+    async def get_material(self, material_id: int) -> Material:
+        return await self.run_read(self._store.get_material, material_id)
+
+    async def create_material(self, payload: MaterialCreate) -> Material:
+        return await self.run_write(self._store.create_material, payload)
+
+    async def update_material(self, material_id: int, payload: MaterialUpdate) -> Material:
+        return await self.run_write(self._store.update_material, material_id, payload)
+
+    async def delete_material(self, material_id: int) -> None:
+        await self.run_write(self._store.delete_material, material_id)
+
+    # -- Schedules ---------------------------------------------------------
+    async def list_schedules(
+        self, *, after: int | None = None, limit: int | None = None
+    ) -> list[Schedule]:
+        return await self.run_read(self._store.list_schedules, after=after, limit=limit)
+
+    async def list_schedules_json(
+        self, *, after: int | None = None, limit: int | None = None
+    ) -> list[JsonRow]:
+        return await self.run_read(self._store.list_schedules_json, after=after, limit=limit)
+
+    async def iter_schedules(self, *, after: int | None = None) -> AsyncIterator[Schedule]:
+        return self._stream(await self.run_read(self._store.iter_schedules, after=after))
+
+    async def get_schedule(self, schedule_id: int) -> Schedule:
+        return await self.run_read(self._store.get_schedule, schedule_id)
+
+    async def create_schedule(self, payload: ScheduleCreate) -> Schedule:
+        return await self.run_write(self._store.create_schedule, payload)
+
+    async def update_schedule(self, schedule_id: int, payload: ScheduleUpdate) -> Schedule:
+        return await self.run_write(self._store.update_schedule, schedule_id, payload)
+
+    async def delete_schedule(self, schedule_id: int) -> None:
+        await self.run_write(self._store.delete_schedule, schedule_id)
+
+    # -- Tasks -------------------------------------------------------------
+    async def list_tasks(
+        self,
+        schedule_id: int,
+        *,
+        stage: str | None = None,
+        status: TaskStatus | None = None,
+        window: TaskWindow | None = None,
+        after: int | None = None,
+        limit: int | None = None,
+    ) -> list[Task]:
+        return await self.run_read(
+            self._store.list_tasks,
+            schedule_id,
+            stage=stage,
+            status=status,
+            window=window,
+            after=after,
+            limit=limit,
+        )
+
+    async def list_tasks_json(
+        self,
+        schedule_id: int,
+        *,
+        stage: str | None = None,
+        status: TaskStatus | None = None,
+        window: TaskWindow | None = None,
+        after: int | None = None,
+        limit: int | None = None,
+    ) -> list[JsonRow]:
+        return await self.run_read(
+            self._store.list_tasks_json,
+            schedule_id,
+            stage=stage,
+            status=status,
+            window=window,
+            after=after,
+            limit=limit,
+        )
+
+    async def iter_tasks(
+        self,
+        schedule_id: int,
+        *,
+        stage: str | None = None,
+        status: TaskStatus | None = None,
+        window: TaskWindow | None = None,
+        after: int | None = None,
+    ) -> AsyncIterator[Task]:
+        iterator = await self.run_read(
+            self._store.iter_tasks,
+            schedule_id,
+            stage=stage,
+            status=status,
+            window=window,
+            after=after,
+        )
+        return self._stream(iterator)
+
+    async def list_active_tasks(
+        self,
+        at: datetime | None = None,
+        *,
+        stage: str | None = None,
+        status: TaskStatus | None = None,
+        after: int | None = None,
+        limit: int | None = None,
+    ) -> list[Task]:
+        return await self.run_read(
+            self._store.list_active_tasks, at, stage=stage, status=status, after=after, limit=limit
+        )
+
+    async def list_active_tasks_json(
+        self,
+        at: datetime | None = None,
+        *,
+        stage: str | None = None,
+        status: TaskStatus | None = None,
+        after: int | None = None,
+        limit: int | None = None,
+    ) -> list[JsonRow]:
+        return await self.run_read(
+            self._store.list_active_tasks_json,
+            at,
+            stage=stage,
+            status=status,
+            after=after,
+            limit=limit,
+        )
+
+    async def get_task(self, task_id: int) -> Task:
+        return await self.run_read(self._store.get_task, task_id)
+
+    async def create_task(self, schedule_id: int, payload: TaskCreate) -> Task:
+        return await self.run_write(self._store.create_task, schedule_id, payload)
+
+    async def update_task(self, task_id: int, payload: TaskUpdate) -> Task:
+        return await self.run_write(self._store.update_task, task_id, payload)
+
+    async def update_task_status(self, task_id: int, status: TaskStatus) -> Task:
+        return await self.run_write(self._store.update_task_status, task_id, status)
+
+    async def delete_task(self, task_id: int) -> None:
+        await self.run_write(self._store.delete_task, task_id)
+
+    async def find_conflicts(self, schedule_id: int) -> list[LocationConflicts]:
+        return await self.run_read(self._store.find_conflicts, schedule_id)
+
+    async def task_conflicts(self, task_id: int) -> list[TaskOverlap]:
+        return await self.run_read(self._store.task_conflicts, task_id)
+
+    async def search(self, query: str, *, limit: int = 20) -> list[SearchResult]:
+        return await self.run_read(self._store.search, query, limit=limit)
+
+    # -- Dashboard aggregates ----------------------------------------------
+    async def member_part_counts(self) -> list[PartMemberCount]:
+        return await self.run_read(self._store.member_part_counts)
+
+    async def material_part_totals(self) -> list[PartMaterialTotal]:
+        return await self.run_read(self._store.material_part_totals)
+
+    async def task_status_counts(self, schedule_id: int | None = None) -> list[TaskStatusCount]:
+        return await self.run_read(self._store.task_status_counts, schedule_id)
+
+    async def check_aggregates(self, *, repair: bool = False) -> AggregateCheck:
+        return await self.run_write(self._store.check_aggregates, repair=repair)
+
+    # -- Batch / import / sync ---------------------------------------------
+    async def apply_batch(self, operations: Iterable[BatchOperation]) -> BatchResponse:
+        return await self.run_write(self._store.apply_batch, operations)
+
+    async def import_members(self, rows: Iterable[object]) -> ImportReport:
+        """``rows`` の読み進め（本文の解析）も書き込み用スレッドで行う。"""
+
+        return await self.run_write(self._store.import_members, rows)
+
+    async def import_materials(self, rows: Iterable[object]) -> ImportReport:
+        return await self.run_write(self._store.import_materials, rows)
+
+    async def import_tasks(self, schedule_id: int, rows: Iterable[object]) -> ImportReport:
+        return await self.run_write(self._store.import_tasks, schedule_id, rows)
+
+    async def changes_since(self, since: int, epoch: str | None = None) -> SyncChanges:
+        return await self.run_read(self._store.changes_since, since, epoch)
+
+    async def subscribe_changes(self) -> tuple[Subscription, int]:
+        """実行中のイベントループで読み出す変更通知の購読を始める。"""
+
+        loop = asyncio.get_running_loop()
+        return await self.run_write(self._store.subscribe_changes, loop)
+
+    async def change_events(self, since: int, until: int) -> list[ChangeEvent] | None:
+        return await self.run_read(self._store.change_events, since, until)
+
+    # -- Snapshots -----------------------------------------------------------
+    async def write_snapshot(self, target: str | Path) -> None:
+        return await self.run_read(self._store.write_snapshot, target)
+
+    async def restore_snapshot(self, source: str | Path) -> SnapshotSummary:
+        """検査と差し替えを書き込み用スレッドで行い、復元中の書き込みを後ろに並ばせる。"""
+
+        return await self.run_write(self._store.restore_snapshot, source)
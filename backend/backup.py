@@ -0,0 +1,213 @@
+"""動作中のデータベースの定期バックアップ（``SQLiteStore.backups``）。
+
+``SQLiteStore.backup_online`` で数ページずつ、ステップの間はロックを手放しながら写すため、
+バックアップ中も書き込みは 1 ステップ分（数ミリ秒）しか待たない。バックアップはデータベースと
+同じ名前に日時を付けて保存し、新しいものから決まった件数だけ残す。書き出し途中のファイルは
+``.partial`` を付けて置き、写し終えてから名前を変える。
+"""
+
+from __future__ import annotations
+
+import logging
+import os
+import re
+import time
+from datetime import UTC, datetime
+from pathlib import Path
+from threading import Event, Lock, Thread
+from typing import TYPE_CHECKING
+
+from .models import BackupFile, BackupResult, BackupStatus
+
+if TYPE_CHECKING:
+    from .store import SQLiteStore
+
+logger = logging.getLogger(__name__)
+
+# 1 ステップで写すページ数（既定のページサイズ 4 KiB で 1 MiB）と、ステップの間に書き込みへ譲る秒数
+BACKUP_STEP_PAGES = 256
+BACKUP_STEP_PAUSE = 0.005
+# 定期バックアップの間隔（秒）と、残すバックアップの件数（既定の間隔で 6 時間分）
+DEFAULT_BACKUP_INTERVAL = 15 * 60.0
+DEFAULT_BACKUP_KEEP = 24
+# データベースのディレクトリの下に作る保存先
+BACKUP_DIRECTORY_NAME = "backups"
+_PARTIAL_SUFFIX = ".partial"
+# プロセス間で定期バックアップの実行を 1 回にまとめるための名前（``claim_scheduled_run``）
+_SCHEDULED_RUN_NAME = "backup"
+
+
+class BackupScheduler:
+    """``directory`` に ``<prefix>-<日時>.db`` のバックアップを作り、新しい ``keep`` 件だけ残す。
+
+    ``run()`` で 1 つ作り、``start()`` で一定間隔ごとに作るスレッド（``sqlite-backup``）を動かす。
+    同時に実行されたバックアップは順番に処理する。同じデータベースを開く複数のプロセスで
+    ``start()`` しても、定期バックアップは間隔ごとに 1 つのプロセスだけが作る。
+    """
+
+    def __init__(
+        self,
+        store: SQLiteStore,
+        directory: str | Path,
+        *,
+        prefix: str,
+        keep: int = DEFAULT_BACKUP_KEEP,
+        step_pages: int = BACKUP_STEP_PAGES,
+        pause: float = BACKUP_STEP_PAUSE,
+    ) -> None:
+        if keep < 1:
+            raise ValueError("keep は 1 以上を指定してください")
+        self._store = store
+        self.directory = Path(directory)
+        self.keep = keep
+        self.step_pages = step_pages
+        self.pause = pause
+        self._prefix = prefix
+        self._pattern = re.compile(rf"{re.escape(prefix)}-\d{{8}}-\d{{6}}-\d{{3}}\.db")
+        # 実行中のバックアップを 1 つに限る
+        self._running = Lock()
+        # 以下の状態を保護する
+        self._guard = Lock()
+        self._in_progress = False
+        self._pages_copied = 0
+        self._pages_total = 0
+        self._last: BackupResult | None = None
+        self._last_error: str | None = None
+        self._interval: float | None = None
+        self._thread: Thread | None = None
+        self._stopped = Event()
+
+    def run(self) -> BackupResult:
+        """バックアップを 1 つ作って古いものを消し、結果を返す。"""
+
+        with self._running:
+            self.directory.mkdir(parents=True, exist_ok=True)
+            # 途中で止まったバックアップの残骸を消す
+            for partial in self.directory.glob(f"{self._prefix}-*{_PARTIAL_SUFFIX}"):
+                partial.unlink(missing_ok=True)
+            started_at = datetime.now()
+            name = (
+                f"{self._prefix}-{started_at:%Y%m%d-%H%M%S}-{started_at.microsecond // 1000:03d}.db"
+            )
+            partial = self.directory / (name + _PARTIAL_SUFFIX)
+            with self._guard:
+                self._in_progress = True
+                self._pages_copied = self._pages_total = 0
+            started = time.perf_counter()
+            try:
+                copy = self._store.backup_online(
+                    partial, step_pages=self.step_pages, pause=self.pause, progress=self._progress
+                )
+                os.replace(partial, self.directory / name)
+            except Exception as exc:
+                partial.unlink(missing_ok=True)
+                logger.warning("バックアップに失敗しました: %s", exc)
+                with self._guard:
+                    self._in_progress = False
+                    self._last_error = str(exc)
+                raise
+            result = BackupResult(
+                name=name,
+                size=(self.directory / name).stat().st_size,
+                pages=copy.pages,
+                steps=copy.steps,
+                started_at=started_at,
+                duration_seconds=time.perf_counter() - started,
+                max_lock_hold_ms=copy.max_lock_hold * 1000,
+            )
+            with self._guard:
+                self._in_progress = False
+                self._last = result
+                self._last_error = None
+            self._rotate()
+        logger.info(
+            "バックアップ %s を作成しました（%d ページ、%d ステップ、%.2f 秒）",
+            name,
+            result.pages,
+            result.steps,
+            result.duration_seconds,
+        )
+        return result
+
+    def list_backups(self) -> list[BackupFile]:
+        """保存しているバックアップを新しい順に返す。"""
+
+        backups = []
+        for path in self._paths():
+            stat = path.stat()
+            backups.append(
+                BackupFile(
+                    name=path.name,
+                    size=stat.st_size,
+                    created_at=datetime.fromtimestamp(stat.st_mtime, UTC),
+                )
+            )
+        return backups
+
+    def status(self) -> BackupStatus:
+        """実行中のバックアップの進み具合、直近の結果、保存しているバックアップを返す。"""
+
+        backups = self.list_backups()
+        with self._guard:
+            return BackupStatus(
+                running=self._in_progress,
+                pages_copied=self._pages_copied,
+                pages_total=self._pages_total,
+                interval_seconds=self._interval,
+                keep=self.keep,
+                last=self._last,
+                last_error=self._last_error,
+                backups=backups,
+            )
+
+    def start(self, interval: float = DEFAULT_BACKUP_INTERVAL) -> None:
+        """``interval`` 秒ごとにバックアップを作るスレッドを始める（最初の 1 つは 1 間隔後）。"""
+
+        if interval <= 0:
+            raise ValueError("interval は正の秒数を指定してください")
+        self.stop()
+        with self._guard:
+            self._interval = interval
+            self._stopped.clear()
+            self._thread = Thread(
+                target=self._loop, args=(interval,), name="sqlite-backup", daemon=True
+            )
+            self._thread.start()
+
+    def stop(self) -> None:
+        """定期バックアップを止める。実行中のバックアップがあれば終わるまで待つ。"""
+
+        with self._guard:
+            thread, self._thread = self._thread, None
+            self._interval = None
+            self._stopped.set()
+        if thread is not None:
+            thread.join()
+
+    def _loop(self, interval: float) -> None:
+        while not self._stopped.wait(interval):
+            try:
+                # 複数のワーカーが同じデータベースを開いている場合は、そのうち 1 つだけが作る
+                if self._store.claim_scheduled_run(_SCHEDULED_RUN_NAME, interval):
+                    self.run()
+            except Exception:
+                # スレッドを止めずに次の間隔で作り直す。実行権の確認の失敗も含めて記録する
+                logger.exception("定期バックアップに失敗しました")
+
+    def _progress(self, copied: int, total: int) -> None:
+        with self._guard:
+            self._pages_copied = copied
+            self._pages_total = total
+
+    def _paths(self) -> list[Path]:
+        if not self.directory.is_dir():
+            return []
+        # 名前の日時の順が作成順になる
+        return sorted(
+            (path for path in self.directory.iterdir() if self._pattern.fullmatch(path.name)),
+            reverse=True,
+        )
+
+    def _rotate(self) -> None:
+        for path in self._paths()[self.keep :]:
+            path.unlink(missing_ok=True)
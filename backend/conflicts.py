@@ -0,0 +1,204 @@
+"""同じ場所で時間帯が重なるタスク（ダブルブッキング）の検出。
+
+重なりは場所ごとに掃引線で求める（開始時刻順に走査し、実施中の区間を終了時刻のヒープで持つ）。
+計算量は O(n log n + 重なりの組の数) で、総当たりの比較はしない。結果は ``ConflictIndex`` が
+スケジュール・場所ごとに保持し、書き込みで変わった場所だけを掃引し直す。
+"""
+
+from __future__ import annotations
+
+import heapq
+from collections.abc import Iterable, Mapping
+from datetime import UTC, datetime
+from threading import Lock
+from typing import NamedTuple
+
+from .models import TaskOverlap
+
+
+def utc_instant(value: datetime) -> datetime:
+    """タイムゾーンなしの日時を UTC とみなし、タイムゾーン付きの値と比較できるようにする。
+
+    SQLite の日時関数と同じ規則にそろえる。
+    """
+
+    return value if value.tzinfo is not None else value.replace(tzinfo=UTC)
+
+
+class ConflictInterval(NamedTuple):
+    """重なりの判定に使うタスクの実施時間帯（開始を含み終了を含まない）。"""
+
+    task_id: int
+    start: datetime
+    end: datetime
+
+
+def find_overlaps(intervals: Iterable[ConflictInterval]) -> list[TaskOverlap]:
+    """時間帯が重なるタスクの組をすべて返す。
+
+    長さが 0 以下の区間（終了が開始以前）は重ならないものとして除く。組は後から始まる方の
+    開始時刻順に並び、同じ時刻の中では先に始まる方の開始時刻・ID 順になる。
+    """
+
+    ordered = sorted(
+        (utc_instant(interval.start), interval.task_id, utc_instant(interval.end), interval)
+        for interval in intervals
+        if utc_instant(interval.start) < utc_instant(interval.end)
+    )
+    # 実施中の区間（終了時刻, ID, 開始時刻, 区間）
+    active: list[tuple[datetime, int, datetime, ConflictInterval]] = []
+    overlaps: list[TaskOverlap] = []
+    for start, task_id, end, current in ordered:
+        while active and active[0][0] <= start:
+            heapq.heappop(active)
+        for other_end, other_id, _, other in sorted(active, key=lambda entry: (entry[2], entry[1])):
+            overlaps.append(
+                TaskOverlap(
+                    first_task_id=other_id,
+                    second_task_id=task_id,
+                    overlap_start=current.start,
+                    overlap_end=current.end if end <= other_end else other.end,
+                )
+            )
+        heapq.heappush(active, (end, task_id, start, current))
+    return overlaps
+
+
+class ConflictChange(NamedTuple):
+    """重なりの再計算が必要になった変更。
+
+    ``task_id`` と ``location`` が共に ``None`` の場合はスケジュール全体（一括インポートや削除）。
+    ``location`` は変更後の場所で、変更前の場所は ``ConflictIndex`` が覚えている値を使う。
+    """
+
+    schedule_id: int
+    task_id: int | None = None
+    location: str | None = None
+
+
+class _ScheduleConflicts:
+    """1 つのスケジュールの計算結果。"""
+
+    __slots__ = ("overlaps", "location_tasks", "task_locations", "dirty")
+
+    def __init__(self) -> None:
+        # タスクのある場所ごとの重なり（重なりが無い場所は空のリスト）
+        self.overlaps: dict[str, list[TaskOverlap]] = {}
+        self.location_tasks: dict[str, list[int]] = {}
+        self.task_locations: dict[int, str] = {}
+        # 再計算が必要な場所
+        self.dirty: set[str] = set()
+
+    def replace(self, location: str, task_ids: list[int], overlaps: list[TaskOverlap]) -> None:
+        for task_id in self.location_tasks.pop(location, []):
+            if self.task_locations.get(task_id) == location:
+                del self.task_locations[task_id]
+        self.dirty.discard(location)
+        if not task_ids:
+            self.overlaps.pop(location, None)
+            return
+        self.overlaps[location] = overlaps
+        self.location_tasks[location] = task_ids
+        for task_id in task_ids:
+            self.task_locations[task_id] = location
+
+
+# 計算を始めた時点の世代（全体の世代, スケジュールの世代）
+Generation = tuple[int, int]
+
+
+class ConflictIndex:
+    """スケジュールごとに、場所ごとの重なりの計算結果を保持する。
+
+    書き込みのコミット後に ``invalidate`` で変更のあった場所だけを再計算の対象にする。読み出しと
+    コミットが競合した場合に古い結果を保存しないよう、スケジュールごとの世代が計算の開始時から
+    変わっていない場合に限り結果を保存する。
+    """
+
+    def __init__(self) -> None:
+        self._guard = Lock()
+        self._schedules: dict[int, _ScheduleConflicts] = {}
+        self._generations: dict[int, int] = {}
+        self._epoch = 0
+
+    def generation(self, schedule_id: int) -> Generation:
+        with self._guard:
+            return self._epoch, self._generations.get(schedule_id, 0)
+
+    def pending(self, schedule_id: int) -> set[str] | None:
+        """再計算が必要な場所を返す。スケジュール全体を読み直す必要がある場合は ``None``。"""
+
+        with self._guard:
+            state = self._schedules.get(schedule_id)
+            return None if state is None else set(state.dirty)
+
+    def cached(self, schedule_id: int, location: str) -> list[TaskOverlap] | None:
+        """計算済みで変更の無い場所の重なりを返す。再計算が必要な場合は ``None``。"""
+
+        with self._guard:
+            state = self._schedules.get(schedule_id)
+            if state is None or location in state.dirty:
+                return None
+            return list(state.overlaps.get(location, []))
+
+    def update(
+        self,
+        schedule_id: int,
+        generation: Generation,
+        intervals: Mapping[str, list[ConflictInterval]],
+        *,
+        complete: bool,
+    ) -> dict[str, list[TaskOverlap]]:
+        """読み直した場所の重なりを掃引し直し、場所ごとの重なりを返す。
+
+        ``complete`` の場合は ``intervals`` がスケジュールのすべての場所を含む。そうでない場合は
+        計算済みの結果に読み直した場所を上書きする（計算済みの結果が無ければ保存しない）。
+        """
+
+        computed = {
+            location: ([interval.task_id for interval in located], find_overlaps(located))
+            for location, located in intervals.items()
+        }
+        with self._guard:
+            fresh = (self._epoch, self._generations.get(schedule_id, 0)) == generation
+            state = self._schedules.get(schedule_id)
+            if complete and fresh:
+                state = self._schedules[schedule_id] = _ScheduleConflicts()
+            if state is None or not fresh:
+                # 途中で書き込まれた場合や計算済みの結果が無い場合は、保存せずに返す
+                merged = {} if complete or state is None else dict(state.overlaps)
+                for location, (task_ids, overlaps) in computed.items():
+                    if task_ids:
+                        merged[location] = overlaps
+                    else:
+                        merged.pop(location, None)
+                return merged
+            for location, (task_ids, overlaps) in computed.items():
+                state.replace(location, task_ids, overlaps)
+            return dict(state.overlaps)
+
+    def invalidate(self, changes: Iterable[ConflictChange]) -> None:
+        """コミット済みの変更を反映する。"""
+
+        with self._guard:
+            for change in changes:
+                schedule_id = change.schedule_id
+                self._generations[schedule_id] = self._generations.get(schedule_id, 0) + 1
+                state = self._schedules.get(schedule_id)
+                if state is None:
+                    continue
+                if change.task_id is None and change.location is None:
+                    del self._schedules[schedule_id]
+                    continue
+                if change.location is not None:
+                    state.dirty.add(change.location)
+                previous = state.task_locations.get(change.task_id) if change.task_id else None
+                if previous is not None:
+                    state.dirty.add(previous)
+
+    def clear(self) -> None:
+        """すべての結果を破棄する。計算中の結果も保存させない。"""
+
+        with self._guard:
+            self._schedules.clear()
+            self._epoch += 1
@@ -0,0 +1,530 @@
+"""レスポンスの圧縮（``Content-Encoding``）と、一覧 API 向けの MessagePack の列指向表現。
+
+会場の回線は 1 台の LTE ルーターを全端末で共有することが多い。一覧の JSON は同じキーや値が
+行ごとに繰り返されるため、``CompressionMiddleware`` で ``Accept-Encoding`` に応じて zstd
+（標準ライブラリの ``compression.zstd`` が使える Python 3.14 以降）か gzip で圧縮する。
+
+``Accept: application/msgpack`` を指定した一覧は、列名から値の配列へのマップ（列指向）を
+MessagePack で返す。キーが行ごとに繰り返されず、数値も文字列にしないため、圧縮前から小さい。
+計測部品（``backend.metrics``）と同じく外部ライブラリには依存せず、MessagePack は一覧で使う型
+（nil・真偽値・整数・浮動小数点数・文字列・バイト列・配列・マップ）だけを扱う。
+"""
+
+from __future__ import annotations
+
+import asyncio
+import functools
+import struct
+import zlib
+from collections.abc import Iterable, Iterator, Mapping, Sequence
+from typing import Any, Protocol
+
+from .metrics import ASGIApp, Message, Receive, Scope, Send
+
+try:  # Python 3.14 以降の標準ライブラリ
+    from compression import zstd as _zstd
+except ImportError:  # pragma: no cover - 実行環境の Python による
+    _zstd = None
+
+MSGPACK_MEDIA_TYPE = "application/msgpack"
+
+# これより小さい本文は圧縮しない（圧縮の手間とヘッダーの分に見合わない）
+COMPRESSION_MIN_SIZE = 1024
+# これ以上の本文はイベントループを止めないよう別スレッドで圧縮する
+COMPRESSION_THREAD_MIN_SIZE = 128 * 1024
+# 圧縮レベル。1 コアのサーバーでの圧縮時間と転送量の釣り合いで選んだ値
+GZIP_LEVEL = 6
+ZSTD_LEVEL = 3
+
+# 利用できる圧縮方式。クライアントの q 値が同じ場合は前にある方を選ぶ
+AVAILABLE_CODINGS: tuple[str, ...] = ("zstd", "gzip") if _zstd is not None else ("gzip",)
+
+# 圧縮しない Content-Type。配信を逐次届ける必要があるもの・圧縮済みのもの
+UNCOMPRESSED_MEDIA_TYPES = frozenset(
+    {"text/event-stream", "application/gzip", "application/zip", "application/zstd"}
+)
+UNCOMPRESSED_MEDIA_PREFIXES = ("image/", "audio/", "video/")
+
+
+# -- Content-Encoding の選択 -------------------------------------------------
+def negotiate_coding(
+    accept_encoding: str, available: Sequence[str] = AVAILABLE_CODINGS
+) -> str | None:
+    """``Accept-Encoding`` から使う圧縮方式を選ぶ。圧縮しない場合は ``None``。
+
+    q 値の最も高い方式を選び、同じ q 値ならサーバーの優先順（``available`` の順）に従う。
+    ``*`` は明示されていない方式の q 値として扱い、``q=0`` の方式は使わない。
+    """
+
+    weights: dict[str, float] = {}
+    for item in accept_encoding.split(","):
+        coding, _, parameters = item.partition(";")
+        coding = coding.strip().lower()
+        if not coding:
+            continue
+        weight = 1.0
+        for parameter in parameters.split(";"):
+            name, _, value = parameter.partition("=")
+            if name.strip().lower() == "q":
+                try:
+                    weight = float(value)
+                except ValueError:
+                    weight = 0.0
+        weights[coding] = weight
+    chosen, chosen_weight = None, 0.0
+    for coding in available:
+        weight = weights.get(coding, weights.get("*", 0.0))
+        if weight > chosen_weight:
+            chosen, chosen_weight = coding, weight
+    return chosen
+
+
+class _Compressor(Protocol):
+    def compress(self, data: bytes, *, final: bool) -> bytes: ...
+
+
+class _GzipCompressor:
+    def __init__(self, level: int = GZIP_LEVEL) -> None:
+        self._compressor = zlib.compressobj(level, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+
+    def compress(self, data: bytes, *, final: bool) -> bytes:
+        # ストリーミング中は届いた分をすぐ展開できるよう、区切りごとに出力を押し出す
+        mode = zlib.Z_FINISH if final else zlib.Z_SYNC_FLUSH
+        return self._compressor.compress(data) + self._compressor.flush(mode)
+
+
+class _ZstdCompressor:
+    def __init__(self, level: int = ZSTD_LEVEL) -> None:
+        assert _zstd is not None
+        self._compressor = _zstd.ZstdCompressor(level=level)
+
+    def compress(self, data: bytes, *, final: bool) -> bytes:
+        assert _zstd is not None
+        mode = _zstd.ZstdCompressor.FLUSH_FRAME if final else _zstd.ZstdCompressor.FLUSH_BLOCK
+        return self._compressor.compress(data, mode=mode)
+
+
+_COMPRESSORS: dict[str, type[_Compressor]] = {"gzip": _GzipCompressor, "zstd": _ZstdCompressor}
+
+
+def compress(data: bytes, coding: str) -> bytes:
+    """``data`` を ``coding``（``gzip``／``zstd``）で圧縮する。"""
+
+    return _COMPRESSORS[coding]().compress(data, final=True)
+
+
+def compress_chunks(chunks: Iterable[bytes], coding: str) -> Iterator[bytes]:
+    """チャンクの並びを ``coding`` の 1 つのストリームとして、読み進めながら圧縮する。"""
+
+    compressor = _COMPRESSORS[coding]()
+    for chunk in chunks:
+        if data := compressor.compress(chunk, final=False):
+            yield data
+    yield compressor.compress(b"", final=True)
+
+
+# 圧縮形式ごとのストリームの先頭のバイト列
+_MAGIC_NUMBERS = {"gzip": b"\x1f\x8b", "zstd": b"\x28\xb5\x2f\xfd"}
+
+
+class StreamDecoder:
+    """先頭のバイト列から圧縮形式（gzip／zstd／圧縮なし）を判定し、届いた分から展開する。"""
+
+    def __init__(self) -> None:
+        self._head = b""
+        self._decompressor: Any = None
+        self._started = False
+        # 判定した圧縮形式。圧縮されていなければ None
+        self.coding: str | None = None
+
+    def feed(self, data: bytes) -> bytes:
+        """``data`` を受け取り、展開できた分を返す。"""
+
+        if not self._started:
+            self._head += data
+            if len(self._head) < max(map(len, _MAGIC_NUMBERS.values())):
+                return b""
+            data, self._head = self._head, b""
+            self._start(data)
+        if self._decompressor is None:
+            return data
+        try:
+            return self._decompressor.decompress(data)
+        except Exception as exc:  # zlib.error と zstd.ZstdError
+            raise ValueError(f"{self.coding} のデータを展開できません: {exc}") from exc
+
+    def finish(self) -> bytes:
+        """入力の終わりを伝えて残りを返す。圧縮データが途中で終わっていれば ``ValueError``。"""
+
+        data = b""
+        if not self._started:
+            # 判定に必要な長さに届かないまま終わった入力
+            head, self._head = self._head, b""
+            self._start(head)
+            data = self.feed(head)
+        if self._decompressor is not None and not self._decompressor.eof:
+            raise ValueError(f"{self.coding} のデータが途中で終わっています")
+        return data
+
+    def _start(self, head: bytes) -> None:
+        self._started = True
+        for coding, magic in _MAGIC_NUMBERS.items():
+            if head.startswith(magic):
+                self.coding = coding
+        if self.coding == "gzip":
+            self._decompressor = zlib.decompressobj(16 + zlib.MAX_WBITS)
+        elif self.coding == "zstd":
+            if _zstd is None:
+                raise ValueError("この環境では zstd を展開できません")
+            self._decompressor = _zstd.ZstdDecompressor()
+
+
+def _header(headers: list[tuple[bytes, bytes]], name: bytes) -> bytes | None:
+    for key, value in headers:
+        if key.lower() == name:
+            return value
+    return None
+
+
+def _set_header(headers: list[tuple[bytes, bytes]], name: bytes, value: bytes | None) -> None:
+    """``name`` のヘッダーを ``value`` に置き換える（``None`` なら取り除く）。"""
+
+    headers[:] = [(key, current) for key, current in headers if key.lower() != name]
+    if value is not None:
+        headers.append((name, value))
+
+
+def _compressible(message: Message) -> bool:
+    if message["status"] in (204, 206, 304):
+        return False
+    headers = message.get("headers", [])
+    if _header(headers, b"content-encoding") is not None:
+        return False
+    media_type = (_header(headers, b"content-type") or b"").decode("latin-1")
+    media_type = media_type.partition(";")[0].strip().lower()
+    return media_type not in UNCOMPRESSED_MEDIA_TYPES and not media_type.startswith(
+        UNCOMPRESSED_MEDIA_PREFIXES
+    )
+
+
+class CompressionMiddleware:
+    """``Accept-Encoding`` に応じてレスポンスの本文を圧縮する ASGI ミドルウェア。
+
+    一括で送る本文は ``minimum_size`` 以上の場合だけ圧縮し、``Content-Length`` を付け直す。
+    ストリーミング（NDJSON など）は大きさが分からないため常に圧縮し、チャンクごとに出力を
+    押し出して逐次展開できるようにする。圧縮した表現は元の表現とバイト列が異なるため、
+    強い ETag は弱い ETag（``W/``）に変える。Server-Sent Events と圧縮済みの形式は圧縮しない。
+    """
+
+    def __init__(
+        self,
+        app: ASGIApp,
+        *,
+        minimum_size: int = COMPRESSION_MIN_SIZE,
+        codings: Sequence[str] = AVAILABLE_CODINGS,
+    ) -> None:
+        self.app = app
+        self.minimum_size = minimum_size
+        self.codings = tuple(codings)
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        accept_encoding = _header(scope.get("headers", []), b"accept-encoding") or b""
+        coding = negotiate_coding(accept_encoding.decode("latin-1"), self.codings)
+        await self.app(scope, receive, _CompressingSend(send, coding, self.minimum_size))
+
+
+class _CompressingSend:
+    """1 つのレスポンスの送信を仲介し、必要に応じて本文を圧縮する。"""
+
+    def __init__(self, send: Send, coding: str | None, minimum_size: int) -> None:
+        self._send = send
+        self._coding = coding
+        self._minimum_size = minimum_size
+        # 最初の本文を見るまで送らずに持っておくレスポンスの開始メッセージ
+        self._start: Message | None = None
+        self._passthrough = False
+        self._compressor: _Compressor | None = None
+
+    async def __call__(self, message: Message) -> None:
+        kind = message["type"]
+        if kind == "http.response.start":
+            if _compressible(message):
+                self._start = message
+            else:
+                self._passthrough = True
+                await self._send(message)
+            return
+        if kind != "http.response.body" or self._passthrough:
+            await self._send(message)
+            return
+        body = message.get("body", b"")
+        more_body = message.get("more_body", False)
+        start, self._start = self._start, None
+        if start is None:
+            # ストリーミングの 2 つ目以降のチャンク
+            await self._send({**message, "body": await self._compress(body, final=not more_body)})
+            return
+        headers = list(start.get("headers", []))
+        # 圧縮するかどうかはクライアントの Accept-Encoding で変わる
+        vary = _header(headers, b"vary")
+        if vary is None or b"accept-encoding" not in vary.lower():
+            _set_header(
+                headers, b"vary", b"Accept-Encoding" if not vary else vary + b", Accept-Encoding"
+            )
+        if self._coding is None or (not more_body and len(body) < self._minimum_size):
+            self._passthrough = True
+            await self._send({**start, "headers": headers})
+            await self._send(message)
+            return
+        self._compressor = _COMPRESSORS[self._coding]()
+        body = await self._compress(body, final=not more_body)
+        _set_header(headers, b"content-encoding", self._coding.encode("latin-1"))
+        _set_header(headers, b"content-length", None if more_body else str(len(body)).encode())
+        etag = _header(headers, b"etag")
+        if etag is not None and etag.startswith(b'"'):
+            _set_header(headers, b"etag", b"W/" + etag)
+        await self._send({**start, "headers": headers})
+        await self._send({**message, "body": body})
+
+    async def _compress(self, body: bytes, *, final: bool) -> bytes:
+        compressor = self._compressor
+        assert compressor is not None
+        if len(body) >= COMPRESSION_THREAD_MIN_SIZE:
+            return await asyncio.to_thread(compressor.compress, body, final=final)
+        return compressor.compress(body, final=final)
+
+
+# -- MessagePack ---------------------------------------------------------------
+_UINT8 = struct.Struct(">B")
+_UINT16 = struct.Struct(">H")
+_UINT32 = struct.Struct(">I")
+_UINT64 = struct.Struct(">Q")
+_INT8 = struct.Struct(">b")
+_INT16 = struct.Struct(">h")
+_INT32 = struct.Struct(">i")
+_INT64 = struct.Struct(">q")
+_FLOAT32 = struct.Struct(">f")
+_FLOAT64 = struct.Struct(">d")
+
+
+def packb(value: object) -> bytes:
+    """``value`` を MessagePack に符号化する。"""
+
+    out = bytearray()
+    _pack(value, out)
+    return bytes(out)
+
+
+# 長さ付きの型の先頭バイト: fix 形式の先頭と長さの上限、8／16／32 ビットの長さの型の符号
+# （その形式が無い場合は None）
+_STR_CODES = (0xA0, 32, 0xD9, 0xDA, 0xDB)
+_BIN_CODES = (None, 0, 0xC4, 0xC5, 0xC6)
+_ARRAY_CODES = (0x90, 16, None, 0xDC, 0xDD)
+_MAP_CODES = (0x80, 16, None, 0xDE, 0xDF)
+
+
+def _pack_header(
+    out: bytearray, length: int, codes: tuple[int | None, int, int | None, int, int]
+) -> None:
+    """長さ付きの型の先頭（fix 形式か、8／16／32 ビットの長さ）を書き込む。"""
+
+    fix, fix_limit, code8, code16, code32 = codes
+    if fix is not None and length < fix_limit:
+        out.append(fix | length)
+    elif code8 is not None and length <= 0xFF:
+        out.append(code8)
+        out += _UINT8.pack(length)
+    elif length <= 0xFFFF:
+        out.append(code16)
+        out += _UINT16.pack(length)
+    elif length <= 0xFFFFFFFF:
+        out.append(code32)
+        out += _UINT32.pack(length)
+    else:
+        raise ValueError("MessagePack で表せる長さを超えています")
+
+
+# 列指向の一覧では区分・状態などの同じ文字列が列の中で繰り返されるため、符号化した結果を使い回す
+@functools.lru_cache(maxsize=4096)
+def _packed_str(value: str) -> bytes:
+    data = value.encode("utf-8")
+    out = bytearray()
+    _pack_header(out, len(data), _STR_CODES)
+    return bytes(out + data)
+
+
+def _pack_int(value: int, out: bytearray) -> None:
+    if 0 <= value < 0x80:
+        out.append(value)
+    elif -0x20 <= value < 0:
+        out.append(value & 0xFF)
+    elif value >= 0:
+        for code, packer, limit in (
+            (0xCC, _UINT8, 0xFF),
+            (0xCD, _UINT16, 0xFFFF),
+            (0xCE, _UINT32, 0xFFFFFFFF),
+            (0xCF, _UINT64, 0xFFFFFFFFFFFFFFFF),
+        ):
+            if value <= limit:
+                out.append(code)
+                out += packer.pack(value)
+                return
+        raise OverflowError("MessagePack で表せない整数です")
+    else:
+        for code, packer, limit in (
+            (0xD0, _INT8, -0x80),
+            (0xD1, _INT16, -0x8000),
+            (0xD2, _INT32, -0x80000000),
+            (0xD3, _INT64, -0x8000000000000000),
+        ):
+            if value >= limit:
+                out.append(code)
+                out += packer.pack(value)
+                return
+        raise OverflowError("MessagePack で表せない整数です")
+
+
+def _pack(value: object, out: bytearray) -> None:
+    if value is None:
+        out.append(0xC0)
+    elif value is True:
+        out.append(0xC3)
+    elif value is False:
+        out.append(0xC2)
+    elif isinstance(value, int):
+        _pack_int(value, out)
+    elif isinstance(value, float):
+        out.append(0xCB)
+        out += _FLOAT64.pack(value)
+    elif isinstance(value, str):
+        out += _packed_str(value)
+    elif isinstance(value, bytes | bytearray):
+        _pack_header(out, len(value), _BIN_CODES)
+        out += value
+    elif isinstance(value, list | tuple):
+        _pack_header(out, len(value), _ARRAY_CODES)
+        for item in value:
+            _pack(item, out)
+    elif isinstance(value, Mapping):
+        _pack_header(out, len(value), _MAP_CODES)
+        for key, item in value.items():
+            _pack(key, out)
+            _pack(item, out)
+    else:
+        raise TypeError(f"MessagePack で表せない値です: {type(value).__name__}")
+
+
+def unpackb(data: bytes) -> Any:
+    """MessagePack を復号する（``packb`` が扱う型に加え、float32 も読む）。"""
+
+    value, offset = _unpack(memoryview(data), 0)
+    if offset != len(data):
+        raise ValueError("MessagePack の後ろに余分なデータがあります")
+    return value
+
+
+# 先頭バイトから型が決まる固定長の値（符号・読み出す構造体）
+_FIXED: dict[int, struct.Struct] = {
+    0xCA: _FLOAT32,
+    0xCB: _FLOAT64,
+    0xCC: _UINT8,
+    0xCD: _UINT16,
+    0xCE: _UINT32,
+    0xCF: _UINT64,
+    0xD0: _INT8,
+    0xD1: _INT16,
+    0xD2: _INT32,
+    0xD3: _INT64,
+}
+# 長さ付きの値（符号 → 種類・長さの構造体）
+_SIZED: dict[int, tuple[str, struct.Struct]] = {
+    0xC4: ("bin", _UINT8),
+    0xC5: ("bin", _UINT16),
+    0xC6: ("bin", _UINT32),
+    0xD9: ("str", _UINT8),
+    0xDA: ("str", _UINT16),
+    0xDB: ("str", _UINT32),
+    0xDC: ("array", _UINT16),
+    0xDD: ("array", _UINT32),
+    0xDE: ("map", _UINT16),
+    0xDF: ("map", _UINT32),
+}
+_CONSTANTS = {0xC0: None, 0xC2: False, 0xC3: True}
+
+
+def _unpack(data: memoryview, offset: int) -> tuple[Any, int]:
+    code = data[offset]
+    offset += 1
+    if code < 0x80:
+        return code, offset
+    if code >= 0xE0:
+        return code - 0x100, offset
+    if code in _CONSTANTS:
+        return _CONSTANTS[code], offset
+    if code in _FIXED:
+        packer = _FIXED[code]
+        return packer.unpack_from(data, offset)[0], offset + packer.size
+    if 0xA0 <= code <= 0xBF:
+        kind, length = "str", code & 0x1F
+    elif 0x90 <= code <= 0x9F:
+        kind, length = "array", code & 0x0F
+    elif 0x80 <= code <= 0x8F:
+        kind, length = "map", code & 0x0F
+    elif code in _SIZED:
+        kind, packer = _SIZED[code]
+        length = packer.unpack_from(data, offset)[0]
+        offset += packer.size
+    else:
+        raise ValueError(f"対応していない MessagePack の型です: 0x{code:02x}")
+    if kind in ("str", "bin"):
+        if offset + length > len(data):
+            raise ValueError("MessagePack のデータが途中で終わっています")
+        raw = bytes(data[offset : offset + length])
+        return (raw.decode("utf-8") if kind == "str" else raw), offset + length
+    if kind == "array":
+        items = []
+        for _ in range(length):
+            item, offset = _unpack(data, offset)
+            items.append(item)
+        return items, offset
+    mapping = {}
+    for _ in range(length):
+        key, offset = _unpack(data, offset)
+        mapping[key], offset = _unpack(data, offset)
+    return mapping, offset
+
+
+# -- 列指向の表現 ---------------------------------------------------------------
+def columnar(rows: Sequence[Mapping[str, Any]]) -> dict[str, Any]:
+    """行（マップ）の並びを、列名から値の配列へのマップにする。0 行なら空のマップ。
+
+    すべての行でマップになっている項目（メンバーの ``contact`` など）は、入れ子の列指向の
+    マップにする。
+    """
+
+    if not rows:
+        return {}
+    columns: dict[str, Any] = {}
+    for key in rows[0]:
+        values = [row[key] for row in rows]
+        if all(isinstance(value, Mapping) for value in values):
+            columns[key] = columnar(values)
+        else:
+            columns[key] = values
+    return columns
+
+
+def from_columnar(columns: Mapping[str, Any]) -> list[dict[str, Any]]:
+    """``columnar`` の逆変換。列指向のマップを行（マップ）の並びに戻す。"""
+
+    if not columns:
+        return []
+    expanded = {
+        key: from_columnar(values) if isinstance(values, Mapping) else values
+        for key, values in columns.items()
+    }
+    count = len(next(iter(expanded.values())))
+    return [{key: values[index] for key, values in expanded.items()} for index in range(count)]
@@ -0,0 +1,178 @@
+"""書き込みの変更通知を Server-Sent Events で配信するためのプロセス内 publish/subscribe。
+
+``SQLiteStore`` はコミットのたびに ``change_log`` の新しい行を ``ChangeHub.publish`` に渡し、
+ハブは SSE の 1 件分の文字列（フレーム）を購読者の数によらず 1 度だけ組み立てて各購読者の
+キューに配る。購読者はイベントループ上の ``asyncio.Queue`` で待つだけなので、接続ごとの
+スレッドは使わない。キューがあふれた購読者には ``resync`` を送って配信を打ち切り、
+``GET /sync`` での取り直しを促す。
+"""
+
+from __future__ import annotations
+
+import asyncio
+from collections.abc import AsyncIterator, Callable, Iterable
+from threading import Lock
+
+from .models import ChangeEvent
+
+# 購読者ごとのキューに溜められるイベント数の既定値
+DEFAULT_QUEUE_SIZE = 256
+# 無通信の接続がプロキシに切断されないよう、コメント行を送る間隔（秒）
+KEEPALIVE_SECONDS = 15.0
+# EventSource が切断後に再接続するまでの待ち時間（ミリ秒）
+RETRY_MILLISECONDS = 3000
+
+SSE_MEDIA_TYPE = "text/event-stream"
+LAST_EVENT_ID_HEADER = "Last-Event-ID"
+
+_KEEPALIVE_FRAME = ": keepalive\n\n"
+# 配信の終了を表す目印
+_CLOSED = ""
+
+
+def change_frame(event: ChangeEvent) -> str:
+    """変更 1 件の SSE フレーム。``id`` はバージョンで、再接続時の ``Last-Event-ID`` になる。"""
+
+    return f"id: {event.version}\nevent: change\ndata: {event.model_dump_json()}\n\n"
+
+
+def resync_frame(version: int) -> str:
+    """差分の配信を続けられないことを知らせるフレーム。受け取ったら同期し直す。"""
+
+    return f'id: {version}\nevent: resync\ndata: {{"version":{version}}}\n\n'
+
+
+class Subscription:
+    """1 つの接続の購読。キューの操作はすべて ``loop`` のスレッドで行う。"""
+
+    def __init__(self, hub: ChangeHub, loop: asyncio.AbstractEventLoop, queue_size: int) -> None:
+        self._hub = hub
+        self.loop = loop
+        # 上限は _offer で判定する（resync と終了の目印は上限を超えても積めるようにする）
+        self._limit = queue_size
+        self._queue: asyncio.Queue[str] = asyncio.Queue()
+        self.closed = False
+
+    def _offer(self, frames: list[str], version: int) -> None:
+        """フレームを積む。あふれる場合は溜まった分を捨てて resync を送り、配信を打ち切る。"""
+
+        if self.closed:
+            return
+        if self._queue.qsize() + len(frames) > self._limit:
+            self.resync(version)
+            return
+        for frame in frames:
+            self._queue.put_nowait(frame)
+
+    def resync(self, version: int) -> None:
+        """``version`` で resync を送って配信を打ち切る。"""
+
+        if self.closed:
+            return
+        while not self._queue.empty():
+            self._queue.get_nowait()
+        self._finish(resync_frame(version))
+
+    def close(self) -> None:
+        """溜まっている分を送り終えたら配信を終える。"""
+
+        if not self.closed:
+            self._finish()
+
+    def _finish(self, *frames: str) -> None:
+        for frame in (*frames, _CLOSED):
+            self._queue.put_nowait(frame)
+        self.closed = True
+        self._hub.unsubscribe(self)
+
+    async def frames(
+        self,
+        replay: Iterable[ChangeEvent] = (),
+        *,
+        keepalive: float = KEEPALIVE_SECONDS,
+    ) -> AsyncIterator[str]:
+        """配信するフレームを返す。``replay``（再接続前の取りこぼし）を先に送る。
+
+        クライアントが切断するとジェネレーターが閉じられ、購読も解除される。
+        """
+
+        try:
+            yield f"retry: {RETRY_MILLISECONDS}\n\n"
+            for event in replay:
+                yield change_frame(event)
+            while True:
+                try:
+                    frame = await asyncio.wait_for(self._queue.get(), keepalive)
+                except TimeoutError:
+                    yield _KEEPALIVE_FRAME
+                    continue
+                if frame == _CLOSED:
+                    return
+                yield frame
+        finally:
+            self.closed = True
+            self._hub.unsubscribe(self)
+
+
+class ChangeHub:
+    """変更イベントの購読者を管理する。``publish`` などはどのスレッドからでも呼べる。"""
+
+    def __init__(self, queue_size: int = DEFAULT_QUEUE_SIZE) -> None:
+        self.queue_size = queue_size
+        self._guard = Lock()
+        self._subscribers: set[Subscription] = set()
+
+    @property
+    def subscriber_count(self) -> int:
+        return len(self._subscribers)
+
+    def subscribe(self, loop: asyncio.AbstractEventLoop) -> Subscription:
+        """``loop`` で読み出す購読を始める。"""
+
+        subscription = Subscription(self, loop, self.queue_size)
+        with self._guard:
+            self._subscribers.add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription: Subscription) -> None:
+        with self._guard:
+            self._subscribers.discard(subscription)
+
+    def publish(self, events: list[ChangeEvent]) -> None:
+        """バージョン順の変更イベントを全購読者に配る。"""
+
+        if not events:
+            return
+        frames = [change_frame(event) for event in events]
+        version = events[-1].version
+        self._dispatch(lambda subscription: subscription._offer(frames, version))
+
+    def resync(self, version: int) -> None:
+        """全購読者に resync を送って配信を打ち切る（一括インポートなど変更が多すぎる場合）。"""
+
+        self._dispatch(lambda subscription: subscription.resync(version))
+
+    def close(self) -> None:
+        """全購読者の配信を終える。"""
+
+        self._dispatch(Subscription.close)
+
+    def _dispatch(self, deliver: Callable[[Subscription], None]) -> None:
+        with self._guard:
+            subscribers = list(self._subscribers)
+        by_loop: dict[asyncio.AbstractEventLoop, list[Subscription]] = {}
+        for subscription in subscribers:
+            by_loop.setdefault(subscription.loop, []).append(subscription)
+        for loop, targets in by_loop.items():
+            try:
+                # スレッドをまたぐのはイベントループごとに 1 回だけ
+                loop.call_soon_threadsafe(_deliver_all, deliver, targets)
+            except RuntimeError:
+                # イベントループが既に閉じている
+                with self._guard:
+                    self._subscribers.difference_update(targets)
+
+
+def _deliver_all(deliver: Callable[[Subscription], None], targets: list[Subscription]) -> None:
+    for subscription in targets:
+        deliver(subscription)
@@ -0,0 +1,149 @@
+"""一括インポート用のストリーミングパーサー。
+
+いずれの関数もバイト列のチャンクを受け取り、1 行ずつ辞書を返すジェネレーターになっている。
+ファイル全体を読み込まないため、入力サイズに関わらずメモリ使用量はほぼ一定になる。
+"""
+
+from __future__ import annotations
+
+import codecs
+import csv
+import json
+from collections.abc import Iterable, Iterator
+from itertools import chain
+from typing import BinaryIO
+
+# 読み込み時のチャンクサイズ（バイト）
+READ_CHUNK_SIZE = 64 * 1024
+# 文字コードの既定値。Excel が付与する BOM も取り除く
+DEFAULT_ENCODING = "utf-8-sig"
+
+
+def iter_file_chunks(file: BinaryIO, size: int = READ_CHUNK_SIZE) -> Iterator[bytes]:
+    """ファイルオブジェクトを先頭から一定サイズずつ読み出す。"""
+
+    while chunk := file.read(size):
+        yield chunk
+
+
+def _iter_text(chunks: Iterable[bytes], encoding: str) -> Iterator[str]:
+    """チャンクの境界でマルチバイト文字が分断されても正しくデコードする。"""
+
+    decoder = codecs.getincrementaldecoder(encoding)()
+    for chunk in chunks:
+        text = decoder.decode(chunk)
+        if text:
+            yield text
+    tail = decoder.decode(b"", final=True)
+    if tail:
+        yield tail
+
+
+def _iter_lines(chunks: Iterable[bytes], encoding: str) -> Iterator[str]:
+    """LF で区切り、改行を保持したまま 1 行ずつ返す（CRLF の CR も行に残る）。
+
+    ``str.splitlines`` は U+2028 などの LF 以外の文字でも区切るが、これらは JSON の文字列の中に
+    エスケープせずに書けるため、区切りには使わない。
+    """
+
+    pending = ""
+    for text in _iter_text(chunks, encoding):
+        pending += text
+        lines = pending.split("\n")
+        # 末尾が改行で終わっていない行は次のチャンクと連結する
+        pending = lines.pop()
+        for line in lines:
+            yield line + "\n"
+    if pending:
+        yield pending
+
+
+def iter_csv_rows(
+    chunks: Iterable[bytes], encoding: str = DEFAULT_ENCODING
+) -> Iterator[dict[str, object]]:
+    """ヘッダー付き CSV を 1 行ずつ辞書に変換する。
+
+    空のセルは項目ごと省略してモデルの既定値に任せる。``contact.phone`` のようにドットを含む
+    ヘッダーは入れ子の辞書に展開する。
+    """
+
+    reader = csv.DictReader(_iter_lines(chunks, encoding))
+    for record in reader:
+        row: dict[str, object] = {}
+        for key, value in record.items():
+            if key is None or value is None or value == "":
+                continue
+            parent, dot, child = key.strip().partition(".")
+            if dot:
+                nested = row.setdefault(parent, {})
+                if isinstance(nested, dict):
+                    nested[child] = value
+            else:
+                row[parent] = value
+        yield row
+
+
+def iter_ndjson_rows(chunks: Iterable[bytes], encoding: str = DEFAULT_ENCODING) -> Iterator[object]:
+    """1 行 1 JSON の NDJSON を順に読み出す。空行は無視する。"""
+
+    for line in _iter_lines(chunks, encoding):
+        if line.strip():
+            try:
+                yield json.loads(line)
+            except json.JSONDecodeError as exc:
+                raise ValueError(f"NDJSON の行を解析できません: {exc.msg}") from exc
+
+
+def iter_json_rows(chunks: Iterable[bytes], encoding: str = DEFAULT_ENCODING) -> Iterator[object]:
+    """トップレベルが配列の JSON を要素ごとに読み出す。
+
+    要素を 1 つ読み終えるたびにバッファを切り詰めるため、配列全体を保持しない。
+    """
+
+    decoder = json.JSONDecoder()
+    buffer = ""
+    pos = 0
+    state = "start"  # start -> first -> (item -> next)* -> end
+    # 末尾の None で入力の終端を知らせる
+    texts: Iterable[str | None] = chain(_iter_text(chunks, encoding), [None])
+    for text in texts:
+        final = text is None
+        if text:
+            buffer = buffer[pos:] + text
+            pos = 0
+        while True:
+            while pos < len(buffer) and buffer[pos].isspace():
+                pos += 1
+            if pos >= len(buffer):
+                break
+            char = buffer[pos]
+            if state == "start":
+                if char != "[":
+                    raise ValueError("JSON の一括インポートは配列で指定してください")
+                pos += 1
+                state = "first"
+            elif state in ("first", "next") and char == "]":
+                pos += 1
+                state = "end"
+            elif state == "next":
+                if char != ",":
+                    raise ValueError("JSON 配列の要素の区切りが不正です")
+                pos += 1
+                state = "item"
+            elif state in ("first", "item"):
+                try:
+                    value, end = decoder.raw_decode(buffer, pos)
+                except json.JSONDecodeError as exc:
+                    if final:
+                        raise ValueError(f"JSON を解析できません: {exc.msg}") from exc
+                    break
+                if end == len(buffer) and not final and not isinstance(value, dict | list | str):
+                    # 数値やリテラルはチャンク境界で途切れている可能性がある
+                    break
+                yield value
+                pos = end
+                state = "next"
+            else:
+                raise ValueError("JSON 配列の後ろに余分なデータがあります")
+        if final and state != "end":
+            raise ValueError("JSON 配列が閉じられていません")
@@ -2,31 +2,116 @@
 
 from __future__ import annotations
 
+import asyncio
+import codecs
+import json
+import os
+from collections.abc import AsyncIterator, Awaitable, Callable, Iterable, Iterator
+from contextlib import asynccontextmanager
+from datetime import datetime
+from functools import partial
 from pathlib import Path
-from typing import Annotated
+from tempfile import SpooledTemporaryFile, mkstemp
+from typing import Annotated, Any
 
-from fastapi import Depends, FastAPI, HTTPException, Query, status
+from fastapi import Depends, FastAPI, HTTPException, Query, Request, Response, status
 from fastapi.middleware.cors import CORSMiddleware
-
+from fastapi.responses import StreamingResponse
+from pydantic import BaseModel
+
+from .async_store import AsyncSQLiteStore
+from .backup import DEFAULT_BACKUP_INTERVAL
+from .encoding import (
+    MSGPACK_MEDIA_TYPE,
+    CompressionMiddleware,
+    StreamDecoder,
+    columnar,
+    compress_chunks,
+    packb,
+)
+from .events import LAST_EVENT_ID_HEADER, SSE_MEDIA_TYPE
+from .importers import (
+    DEFAULT_ENCODING,
+    iter_csv_rows,
+    iter_file_chunks,
+    iter_json_rows,
+    iter_ndjson_rows,
+)
+from .metrics import (
+    PROMETHEUS_CONTENT_TYPE,
+    HttpMetrics,
+    RequestMetricsMiddleware,
+    render,
+)
 from .models import (
+    AggregateCheck,
+    BackupResult,
+    BackupStatus,
+    BatchRequest,
+    BatchResponse,
+    EventDatabase,
+    ImportReport,
+    LocationConflicts,
     Material,
     MaterialCreate,
     MaterialUpdate,
     Member,
     MemberCreate,
     MemberUpdate,
+    PartMaterialTotal,
+    PartMemberCount,
     Schedule,
     ScheduleCreate,
     ScheduleUpdate,
+    SearchResult,
+    SnapshotSummary,
+    StoreRegistryStats,
+    SyncChanges,
     Task,
     TaskCreate,
     TaskStatus,
+    TaskStatusCount,
     TaskStatusUpdate,
     TaskUpdate,
+    TraceSettings,
+    TraceSnapshot,
 )
-from .store import SQLiteStore
+from .registry import (
+    EVENT_KEY_HEADER,
+    EVENT_KEY_SCOPE,
+    EventPathMiddleware,
+    StoreRegistry,
+)
+from .store import (
+    MATERIALS_SCOPE,
+    MEMBERS_SCOPE,
+    SCHEDULES_SCOPE,
+    TASKS_SCOPE,
+    JsonRow,
+    SQLiteStore,
+    TaskWindow,
+)
+
+# 共有ストアを定期的にバックアップする間隔（秒）
+BACKUP_INTERVAL = DEFAULT_BACKUP_INTERVAL
 
-app = FastAPI(title="EventCompass Backend", version="1.0.0")
+
+@asynccontextmanager
+async def lifespan(app: FastAPI) -> AsyncIterator[None]:
+    """起動している間は共有ストアの定期バックアップと、使われないイベントのストアの後始末を動かす。"""
+
+    _store.backups.start(BACKUP_INTERVAL)
+    _registry.start()
+    try:
+        yield
+    finally:
+        _registry.close()
+        _store.backups.stop()
+
+
+app = FastAPI(title="EventCompass Backend", version="1.0.0", lifespan=lifespan)
+# /events/<event_key>/... をイベントを指定した既存のルートとして扱う。ルーティングの直前で書き換える
+app.add_middleware(EventPathMiddleware)
 app.add_middleware(
     CORSMiddleware,
     allow_origins=[
@@ -35,20 +120,97 @@ app.add_middleware(
     ],
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Next-After", "ETag", "X-Task-Conflicts"],
+    # allow_headers が "*" のため、X-Event-Key ヘッダーもプリフライトで許可される
 )
+# 大きなレスポンスは Accept-Encoding に応じて zstd／gzip で圧縮する
+app.add_middleware(CompressionMiddleware)
+# ルートごとのリクエスト数とレイテンシ。CORS の処理も含めて計測するよう最も外側に置く
+HTTP_METRICS = HttpMetrics()
+app.add_middleware(RequestMetricsMiddleware, metrics=HTTP_METRICS)
 _default_db_path = Path(__file__).resolve().parent / "eventcompass.db"
-# アプリ全体で再利用する単一のストアインスタンス
-_store = SQLiteStore(_default_db_path)
+# 共有ストアで保持する読み取りキャッシュの件数
+APP_CACHE_SIZE = 1024
+# アプリ全体で再利用する単一のストアインスタンス。読み取りは WAL の接続プールで並列化し、
+# 繰り返される同じ読み取りはキャッシュから返す
+_store = SQLiteStore(_default_db_path, concurrent_reads=True, cache_size=APP_CACHE_SIZE)
+
 
+# イベントごとのデータベースを置くディレクトリ
+_events_directory = _default_db_path.parent / "events"
 
-def get_store() -> SQLiteStore:
-    """依存解決用に共有しているストアを返す。"""
+
+def _open_event_store(path: Path) -> SQLiteStore:
+    """イベントのストアを共有ストアと同じ構成で開き、開いている間は定期バックアップを取る。"""
+
+    store = SQLiteStore(path, concurrent_reads=True, cache_size=APP_CACHE_SIZE)
+    store.backups.start(BACKUP_INTERVAL)
+    return store
+
+
+# イベントごとのストア。使われた時点で開き、使われなくなったものは閉じる
+_registry = StoreRegistry(_events_directory, open_store=_open_event_store)
+EVENT_NOT_FOUND_DETAIL = "イベントが見つかりません"
+
+
+async def get_registry() -> StoreRegistry:
+    """依存解決用にイベントごとのストアのレジストリを返す。"""
+
+    return _registry
+
+
+RegistryDep = Annotated[StoreRegistry, Depends(get_registry)]
+
+
+async def get_store() -> SQLiteStore:
+    """依存解決用に、既定のイベントの共有しているストアを返す。"""
 
     return _store
 
 
+async def resolve_store(
+    request: Request,
+    registry: RegistryDep,
+    default: Annotated[SQLiteStore, Depends(get_store)],
+) -> AsyncIterator[SQLiteStore]:
+    """リクエストで指定されたイベントのストアを返す。
+
+    ``/events/<event_key>/...`` のパスか ``X-Event-Key`` ヘッダーでイベントを指定した場合は
+    レジストリから借り、レスポンスを送り終えてから返す。指定が無ければ既定のストアを使う。
+    ストリーミングの本文（変更通知・NDJSON・スナップショット）を送る間も借りたままにするため、
+    yield の依存関係の後始末がレスポンスの送信後に動く FastAPI 0.118 以降を前提とする。
+    """
+
+    key = request.scope.get(EVENT_KEY_SCOPE) or request.headers.get(EVENT_KEY_HEADER)
+    if key is None:
+        yield default
+        return
+    store = registry.acquire_open(key)
+    if store is None:
+        # データベースを開く間はイベントループを止めない
+        try:
+            store = await asyncio.to_thread(registry.acquire, key)
+        except ValueError as exc:
+            raise _bad_request(exc) from exc
+        except KeyError as exc:
+            raise _not_found(EVENT_NOT_FOUND_DETAIL) from exc
+    try:
+        yield store
+    finally:
+        registry.release(key)
+
+
 # 依存性注入やクエリパラメータの型定義に使うエイリアス
-StoreDep = Annotated[SQLiteStore, Depends(get_store)]
+StoreDep = Annotated[SQLiteStore, Depends(resolve_store)]
+
+
+async def get_async_store(store: StoreDep) -> AsyncSQLiteStore:
+    """ストアの非同期インターフェースを返す。"""
+
+    return store.aio
+
+
+AsyncStoreDep = Annotated[AsyncSQLiteStore, Depends(get_async_store)]
 MemberPartFilter = Annotated[str | None, Query(description="担当パートによるフィルタ")]
 MaterialPartFilter = Annotated[str | None, Query(description="担当パートによるフィルタ")]
 TaskStageFilter = Annotated[str | None, Query(description="タスクのステージによるフィルタ")]
@@ -56,6 +218,55 @@ TaskStatusFilter = Annotated[
     TaskStatus | None,
     Query(description="タスクの状態によるフィルタ"),
 ]
+TaskActiveFrom = Annotated[
+    datetime | None,
+    Query(alias="from", description="この日時以降に実施中のタスクに絞る"),
+]
+TaskActiveTo = Annotated[
+    datetime | None,
+    Query(
+        alias="to", description="この日時より前に実施中のタスクに絞る（from と同じ場合はその時点）"
+    ),
+]
+TaskActiveAt = Annotated[
+    datetime | None,
+    Query(description="実施中か判定する日時。未指定の場合はサーバーの現在時刻（タイムゾーンなし）"),
+]
+PageAfter = Annotated[
+    int | None,
+    Query(description="前ページ最後の行の ID。指定した行より後ろを返す"),
+]
+PageLimit = Annotated[
+    int | None,
+    Query(ge=1, le=1000, description="1 ページの最大件数。未指定の場合は全件"),
+]
+SyncSinceParam = Annotated[
+    int,
+    Query(ge=0, description="前回の同期で受け取った version。0 の場合は全件を返す"),
+]
+SyncEpochParam = Annotated[
+    str | None,
+    Query(description="前回の同期で受け取った epoch。現在の世代と違えば（復元後など）全件を返す"),
+]
+SearchQuery = Annotated[
+    str,
+    Query(
+        min_length=1,
+        max_length=200,
+        description="検索語。空白で区切った語をすべて含む行を返す（部分一致）",
+    ),
+]
+SearchLimit = Annotated[int, Query(ge=1, le=100, description="返す件数の上限")]
+DashboardScheduleFilter = Annotated[
+    int | None, Query(description="指定したスケジュールのタスクだけを集計する")
+]
+EventsSinceParam = Annotated[
+    int | None,
+    Query(
+        ge=0,
+        description="この version より後の変更を先に再送する（Last-Event-ID ヘッダーを優先）",
+    ),
+]
 
 
 def _not_found(detail: str) -> HTTPException:
@@ -64,170 +275,502 @@ def _not_found(detail: str) -> HTTPException:
     return HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=detail)
 
 
+def _bad_request(exc: ValueError) -> HTTPException:
+    """400 応答を組み立てるヘルパー。"""
+
+    return HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(exc))
+
+
+# 一覧 API のページングとストリーミング
+NDJSON_MEDIA_TYPE = "application/x-ndjson"
+NEXT_AFTER_HEADER = "X-Next-After"
+# 一覧の JSON を SQLite 側で組み立てる高速経路を使うか。出力はレスポンスモデル経由と同一
+SQL_JSON_LISTS = True
+ETAG_HEADER = "ETag"
+
+
+def _wants_ndjson(request: Request) -> bool:
+    """Accept ヘッダーで NDJSON のストリーミングが要求されているか判定する。"""
+
+    return NDJSON_MEDIA_TYPE in request.headers.get("accept", "")
+
+
+def _wants_msgpack(request: Request) -> bool:
+    """Accept ヘッダーで MessagePack（列指向）の一覧が要求されているか判定する。"""
+
+    return MSGPACK_MEDIA_TYPE in request.headers.get("accept", "")
+
+
+def _fetch_limit(limit: int | None) -> int | None:
+    """続きの有無を判定するため、ページサイズより 1 件多く取得する。"""
+
+    return None if limit is None else limit + 1
+
+
+def _page(items: list[Any], limit: int | None, response: Response) -> list[Any]:
+    """``limit`` を超えた分を切り詰め、続きがあれば次の ``after`` をヘッダーで知らせる。"""
+
+    if limit is not None and len(items) > limit:
+        items = items[:limit]
+        response.headers[NEXT_AFTER_HEADER] = str(items[-1].id)
+    return items
+
+
+def _msgpack_response(rows: list[dict[str, Any]], response: Response) -> Response:
+    """JSON と同じ値の行を列指向の MessagePack で返す。"""
+
+    raw = Response(packb(columnar(rows)), media_type=MSGPACK_MEDIA_TYPE)
+    raw.headers.update(response.headers)
+    return raw
+
+
+def _model_page(
+    request: Request, items: list[BaseModel], limit: int | None, response: Response
+) -> list[Any] | Response:
+    """``_page`` で切り詰めた一覧を返す。MessagePack が要求されていれば列指向で符号化する。"""
+
+    items = _page(items, limit, response)
+    if _wants_msgpack(request):
+        return _msgpack_response([item.model_dump(mode="json") for item in items], response)
+    return items
+
+
+def _json_page(
+    request: Request, rows: list[JsonRow], limit: int | None, response: Response
+) -> Response:
+    """SQLite で JSON 化済みの行を配列に連結し、レスポンスモデルを介さずに返す。
+
+    MessagePack が要求されていれば、連結した配列を解析して列指向で符号化する（JSON の
+    解析はモデルの組み立てより速い）。
+    """
+
+    if limit is not None and len(rows) > limit:
+        rows = rows[:limit]
+        response.headers[NEXT_AFTER_HEADER] = str(rows[-1][0])
+    body = "[" + ",".join(body for _, body in rows) + "]"
+    if _wants_msgpack(request):
+        return _msgpack_response(json.loads(body), response)
+    raw = Response(body, media_type="application/json")
+    # Response を直接返すと依存関数で設定したヘッダー（ETag など）が引き継がれないため写す
+    raw.headers.update(response.headers)
+    return raw
+
+
+async def _ndjson_lines(items: AsyncIterator[BaseModel], limit: int | None) -> AsyncIterator[str]:
+    sent = 0
+    async for item in items:
+        if limit is not None and sent >= limit:
+            break
+        yield item.model_dump_json() + "\n"
+        sent += 1
+
+
+def _ndjson_response(
+    items: AsyncIterator[BaseModel], limit: int | None, etag: str
+) -> StreamingResponse:
+    """1 行 1 件の NDJSON として、読み出した順に送信する。"""
+
+    return StreamingResponse(
+        _ndjson_lines(items, limit),
+        media_type=NDJSON_MEDIA_TYPE,
+        headers={ETAG_HEADER: etag},
+    )
+
+
+# 条件付き GET
+
+
+def _etag_matches(if_none_match: str, etag: str) -> bool:
+    """If-None-Match の値が ``etag`` に一致するか判定する（弱い比較）。"""
+
+    for candidate in if_none_match.split(","):
+        candidate = candidate.strip()
+        if candidate == "*" or candidate.removeprefix("W/") == etag:
+            return True
+    return False
+
+
+def _apply_etag(request: Request, response: Response, tag: str) -> str:
+    """ETag を付与し、クライアントの持つ版と一致すれば 304 で打ち切る。"""
+
+    variant = "-ndjson" if _wants_ndjson(request) else "-msgpack" if _wants_msgpack(request) else ""
+    etag = f'"{tag}{variant}"'
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match is not None and _etag_matches(if_none_match, etag):
+        raise HTTPException(status_code=status.HTTP_304_NOT_MODIFIED, headers={ETAG_HEADER: etag})
+    response.headers[ETAG_HEADER] = etag
+    return etag
+
+
+def _conditional_get(scope: str) -> Callable[[Request, Response, SQLiteStore], Awaitable[str]]:
+    """テーブル単位のバージョンで ETag を判定する依存関数を作る。
+
+    バージョンはストアがメモリ上で管理しているため、304 を返す場合はデータベースに触れない。
+    """
+
+    async def dependency(request: Request, response: Response, store: StoreDep) -> str:
+        return _apply_etag(request, response, f"{scope}-{store.version_token(scope)}")
+
+    return dependency
+
+
+async def _conditional_get_tasks(
+    schedule_id: int, request: Request, response: Response, store: StoreDep
+) -> str:
+    """スケジュール単位のタスクのバージョンで ETag を判定する。"""
+
+    token = store.version_token(TASKS_SCOPE, schedule_id)
+    return _apply_etag(request, response, f"{TASKS_SCOPE}-{schedule_id}-{token}")
+
+
+_members_etag = _conditional_get(MEMBERS_SCOPE)
+_materials_etag = _conditional_get(MATERIALS_SCOPE)
+_schedules_etag = _conditional_get(SCHEDULES_SCOPE)
+_tasks_etag = _conditional_get(TASKS_SCOPE)
+MembersETag = Annotated[str, Depends(_members_etag)]
+MaterialsETag = Annotated[str, Depends(_materials_etag)]
+SchedulesETag = Annotated[str, Depends(_schedules_etag)]
+ScheduleTasksETag = Annotated[str, Depends(_conditional_get_tasks)]
+
+
 MEMBER_NOT_FOUND_DETAIL = "メンバーが見つかりません"
 MATERIAL_NOT_FOUND_DETAIL = "資材が見つかりません"
 SCHEDULE_NOT_FOUND_DETAIL = "スケジュールが見つかりません"
 TASK_NOT_FOUND_DETAIL = "タスクが見つかりません"
+UNSUPPORTED_IMPORT_DETAIL = (
+    "インポートは text/csv, application/json, application/x-ndjson のいずれかで送信してください"
+)
+
+# タスクの作成・更新時に、同じ場所で時間帯が重なる他のタスクの ID を知らせるヘッダー
+CONFLICTS_HEADER = "X-Task-Conflicts"
+
+
+async def _report_conflicts(task: Task, response: Response, store: AsyncSQLiteStore) -> None:
+    """書き込んだタスクの場所だけを検査し、重なる他のタスクがあればヘッダーに列挙する。"""
+
+    if task.location is None:
+        return
+    try:
+        overlaps = await store.task_conflicts(task.id)
+    except KeyError:
+        # 直後に他の要求で削除された
+        return
+    others = [
+        overlap.second_task_id if overlap.first_task_id == task.id else overlap.first_task_id
+        for overlap in overlaps
+    ]
+    if others:
+        response.headers[CONFLICTS_HEADER] = ",".join(str(task_id) for task_id in others)
+
+
+# 一括インポートの本文をメモリに保持する上限。超えた分は一時ファイルに書き出す
+IMPORT_SPOOL_MAX_SIZE = 1024 * 1024
+_IMPORT_PARSERS: dict[str, Callable[..., Iterator[object]]] = {
+    "text/csv": iter_csv_rows,
+    "application/json": iter_json_rows,
+    "application/x-ndjson": iter_ndjson_rows,
+}
+
+
+def _import_parser(content_type: str | None) -> Callable[[Iterable[bytes]], Iterator[object]]:
+    """Content-Type から一括インポート用のパーサーを選ぶ。"""
+
+    media_type, _, params = (content_type or "").partition(";")
+    parser = _IMPORT_PARSERS.get(media_type.strip().lower())
+    encoding = DEFAULT_ENCODING
+    for param in params.split(";"):
+        key, _, value = param.strip().partition("=")
+        if key.lower() == "charset" and value:
+            encoding = value.strip('"')
+    try:
+        if codecs.lookup(encoding).name == "utf-8":
+            # BOM 付き UTF-8 も受け付ける
+            encoding = DEFAULT_ENCODING
+    except LookupError:
+        parser = None
+    if parser is None:
+        raise HTTPException(
+            status_code=status.HTTP_415_UNSUPPORTED_MEDIA_TYPE,
+            detail=UNSUPPORTED_IMPORT_DETAIL,
+        )
+    return partial(parser, encoding=encoding)
+
+
+async def _run_import(
+    request: Request,
+    importer: Callable[[Iterable[object]], Awaitable[ImportReport]],
+) -> ImportReport:
+    """リクエスト本文を一時領域に受け取り、ストリーミングで解析しながら一括登録する。
+
+    受信を終えてから書き込みを始めるため、遅い回線のアップロード中に書き込みロックを握らない。
+    """
+
+    parse = _import_parser(request.headers.get("content-type"))
+    with SpooledTemporaryFile(max_size=IMPORT_SPOOL_MAX_SIZE) as body:
+        async for chunk in request.stream():
+            body.write(chunk)
+        body.seek(0)
+        try:
+            return await importer(parse(iter_file_chunks(body)))
+        except ValueError as exc:
+            raise _bad_request(exc) from exc
 
 
 # -- Member endpoints ------------------------------------------------------
 @app.get("/members", response_model=list[Member])
-def list_members(store: StoreDep, part: MemberPartFilter = None) -> list[Member]:
+async def list_members(
+    request: Request,
+    response: Response,
+    store: AsyncStoreDep,
+    etag: MembersETag,
+    part: MemberPartFilter = None,
+    after: PageAfter = None,
+    limit: PageLimit = None,
+) -> list[Member] | Response:
     """メンバー一覧を取得する。"""
 
-    return store.list_members(part=part)
+    if _wants_ndjson(request):
+        return _ndjson_response(await store.iter_members(part=part, after=after), limit, etag)
+    if SQL_JSON_LISTS:
+        rows = await store.list_members_json(part=part, after=after, limit=_fetch_limit(limit))
+        return _json_page(request, rows, limit, response)
+    members = await store.list_members(part=part, after=after, limit=_fetch_limit(limit))
+    return _model_page(request, members, limit, response)
 
 
-@app.get("/members/{member_id}", response_model=Member)
-def get_member(member_id: int, store: StoreDep) -> Member:
+@app.post("/members/import", response_model=ImportReport)
+async def import_members(request: Request, store: AsyncStoreDep) -> ImportReport:
+    """CSV／JSON／NDJSON からメンバーを一括登録する。"""
+
+    return await _run_import(request, store.import_members)
+
+
+@app.get("/members/{member_id}", response_model=Member, dependencies=[Depends(_members_etag)])
+async def get_member(member_id: int, store: AsyncStoreDep) -> Member:
     """メンバー詳細を取得する。"""
 
     try:
-        return store.get_member(member_id)
+        return await store.get_member(member_id)
     except KeyError as exc:  # pragma: no cover - defensive
         raise _not_found(MEMBER_NOT_FOUND_DETAIL) from exc
 
 
 @app.post("/members", response_model=Member, status_code=status.HTTP_201_CREATED)
-def create_member(payload: MemberCreate, store: StoreDep) -> Member:
+async def create_member(payload: MemberCreate, store: AsyncStoreDep) -> Member:
     """メンバーを新規登録する。"""
 
-    return store.create_member(payload)
+    return await store.create_member(payload)
 
 
 @app.put("/members/{member_id}", response_model=Member)
-def update_member(
+async def update_member(
     member_id: int,
     payload: MemberUpdate,
-    store: StoreDep,
+    store: AsyncStoreDep,
 ) -> Member:
     """メンバー情報を更新する。"""
 
     try:
-        return store.update_member(member_id, payload)
+        return await store.update_member(member_id, payload)
     except KeyError as exc:
         raise _not_found(MEMBER_NOT_FOUND_DETAIL) from exc
 
 
 @app.delete("/members/{member_id}", status_code=status.HTTP_204_NO_CONTENT)
-def delete_member(member_id: int, store: StoreDep) -> None:
+async def delete_member(member_id: int, store: AsyncStoreDep) -> None:
     """メンバーを削除する。"""
 
     try:
-        store.delete_member(member_id)
+        await store.delete_member(member_id)
     except KeyError as exc:
         raise _not_found(MEMBER_NOT_FOUND_DETAIL) from exc
 
 
 # -- Material endpoints ----------------------------------------------------
 @app.get("/materials", response_model=list[Material])
-def list_materials(store: StoreDep, part: MaterialPartFilter = None) -> list[Material]:
+async def list_materials(
+    request: Request,
+    response: Response,
+    store: AsyncStoreDep,
+    etag: MaterialsETag,
+    part: MaterialPartFilter = None,
+    after: PageAfter = None,
+    limit: PageLimit = None,
+) -> list[Material] | Response:
     """資材一覧を取得する。"""
 
-    return store.list_materials(part=part)
+    if _wants_ndjson(request):
+        return _ndjson_response(await store.iter_materials(part=part, after=after), limit, etag)
+    if SQL_JSON_LISTS:
+        rows = await store.list_materials_json(part=part, after=after, limit=_fetch_limit(limit))
+        return _json_page(request, rows, limit, response)
+    materials = await store.list_materials(part=part, after=after, limit=_fetch_limit(limit))
+    return _model_page(request, materials, limit, response)
+
 
+@app.post("/materials/import", response_model=ImportReport)
+async def import_materials(request: Request, store: AsyncStoreDep) -> ImportReport:
+    """CSV／JSON／NDJSON から資材を一括登録する。"""
 
-@app.get("/materials/{material_id}", response_model=Material)
-def get_material(material_id: int, store: StoreDep) -> Material:
+    return await _run_import(request, store.import_materials)
+
+
+@app.get(
+    "/materials/{material_id}", response_model=Material, dependencies=[Depends(_materials_etag)]
+)
+async def get_material(material_id: int, store: AsyncStoreDep) -> Material:
     """資材詳細を取得する。"""
 
     try:
-        return store.get_material(material_id)
+        return await store.get_material(material_id)
     except KeyError as exc:  # pragma: no cover - defensive
         raise _not_found(MATERIAL_NOT_FOUND_DETAIL) from exc
 
 
 @app.post("/materials", response_model=Material, status_code=status.HTTP_201_CREATED)
-def create_material(payload: MaterialCreate, store: StoreDep) -> Material:
+async def create_material(payload: MaterialCreate, store: AsyncStoreDep) -> Material:
     """資材を新規登録する。"""
 
-    return store.create_material(payload)
+    return await store.create_material(payload)
 
 
 @app.put("/materials/{material_id}", response_model=Material)
-def update_material(
+async def update_material(
     material_id: int,
     payload: MaterialUpdate,
-    store: StoreDep,
+    store: AsyncStoreDep,
 ) -> Material:
     """資材情報を更新する。"""
 
     try:
-        return store.update_material(material_id, payload)
+        return await store.update_material(material_id, payload)
     except KeyError as exc:
         raise _not_found(MATERIAL_NOT_FOUND_DETAIL) from exc
 
 
 @app.delete("/materials/{material_id}", status_code=status.HTTP_204_NO_CONTENT)
-def delete_material(material_id: int, store: StoreDep) -> None:
+async def delete_material(material_id: int, store: AsyncStoreDep) -> None:
     """資材を削除する。"""
 
     try:
-        store.delete_material(material_id)
+        await store.delete_material(material_id)
     except KeyError as exc:
         raise _not_found(MATERIAL_NOT_FOUND_DETAIL) from exc
 
 
 # -- Schedule endpoints ----------------------------------------------------
 @app.get("/schedules", response_model=list[Schedule])
-def list_schedules(store: StoreDep) -> list[Schedule]:
+async def list_schedules(
+    request: Request,
+    response: Response,
+    store: AsyncStoreDep,
+    etag: SchedulesETag,
+    after: PageAfter = None,
+    limit: PageLimit = None,
+) -> list[Schedule] | Response:
     """スケジュール一覧を取得する。"""
 
-    return store.list_schedules()
-
-
-@app.get("/schedules/{schedule_id}", response_model=Schedule)
-def get_schedule(schedule_id: int, store: StoreDep) -> Schedule:
+    try:
+        if _wants_ndjson(request):
+            return _ndjson_response(await store.iter_schedules(after=after), limit, etag)
+        if SQL_JSON_LISTS:
+            rows = await store.list_schedules_json(after=after, limit=_fetch_limit(limit))
+            return _json_page(request, rows, limit, response)
+        schedules = await store.list_schedules(after=after, limit=_fetch_limit(limit))
+    except ValueError as exc:
+        raise _bad_request(exc) from exc
+    return _model_page(request, schedules, limit, response)
+
+
+@app.get(
+    "/schedules/{schedule_id}", response_model=Schedule, dependencies=[Depends(_schedules_etag)]
+)
+async def get_schedule(schedule_id: int, store: AsyncStoreDep) -> Schedule:
     """スケジュールの詳細を取得する。"""
 
     try:
-        return store.get_schedule(schedule_id)
+        return await store.get_schedule(schedule_id)
     except KeyError as exc:  # pragma: no cover - defensive
         raise _not_found(SCHEDULE_NOT_FOUND_DETAIL) from exc
 
 
 @app.post("/schedules", response_model=Schedule, status_code=status.HTTP_201_CREATED)
-def create_schedule(payload: ScheduleCreate, store: StoreDep) -> Schedule:
+async def create_schedule(payload: ScheduleCreate, store: AsyncStoreDep) -> Schedule:
     """スケジュールを新規登録する。"""
 
-    return store.create_schedule(payload)
+    return await store.create_schedule(payload)
 
 
 @app.put("/schedules/{schedule_id}", response_model=Schedule)
-def update_schedule(
-    schedule_id: int, payload: ScheduleUpdate, store: StoreDep
+async def update_schedule(
+    schedule_id: int, payload: ScheduleUpdate, store: AsyncStoreDep
 ) -> Schedule:
     """スケジュール情報を更新する。"""
 
     try:
-        return store.update_schedule(schedule_id, payload)
+        return await store.update_schedule(schedule_id, payload)
     except KeyError as exc:
         raise _not_found(SCHEDULE_NOT_FOUND_DETAIL) from exc
 
 
 @app.delete("/schedules/{schedule_id}", status_code=status.HTTP_204_NO_CONTENT)
-def delete_schedule(schedule_id: int, store: StoreDep) -> None:
+async def delete_schedule(schedule_id: int, store: AsyncStoreDep) -> None:
     """スケジュールを削除する。"""
 
     try:
-        store.delete_schedule(schedule_id)
+        await store.delete_schedule(schedule_id)
     except KeyError as exc:
         raise _not_found(SCHEDULE_NOT_FOUND_DETAIL) from exc
 
 
 @app.get("/schedules/{schedule_id}/tasks", response_model=list[Task])
-def list_tasks(
+async def list_tasks(
     schedule_id: int,
-    store: StoreDep,
+    request: Request,
+    response: Response,
+    store: AsyncStoreDep,
+    etag: ScheduleTasksETag,
     stage: TaskStageFilter = None,
     status: TaskStatusFilter = None,
-) -> list[Task]:
-    """スケジュールに紐づくタスク一覧を取得する。"""
-
+    active_from: TaskActiveFrom = None,
+    active_to: TaskActiveTo = None,
+    after: PageAfter = None,
+    limit: PageLimit = None,
+) -> list[Task] | Response:
+    """スケジュールに紐づくタスク一覧を取得する。``from``／``to`` で実施時間帯に絞り込める。"""
+
+    window = (
+        None if active_from is None and active_to is None else TaskWindow(active_from, active_to)
+    )
     try:
-        return store.list_tasks(schedule_id, stage=stage, status=status)
+        if _wants_ndjson(request):
+            tasks = await store.iter_tasks(
+                schedule_id, stage=stage, status=status, window=window, after=after
+            )
+            return _ndjson_response(tasks, limit, etag)
+        if SQL_JSON_LISTS:
+            rows = await store.list_tasks_json(
+                schedule_id,
+                stage=stage,
+                status=status,
+                window=window,
+                after=after,
+                limit=_fetch_limit(limit),
+            )
+            return _json_page(request, rows, limit, response)
+        page = await store.list_tasks(
+            schedule_id,
+            stage=stage,
+            status=status,
+            window=window,
+            after=after,
+            limit=_fetch_limit(limit),
+        )
     except KeyError as exc:
         raise _not_found(SCHEDULE_NOT_FOUND_DETAIL) from exc
+    except ValueError as exc:
+        raise _bad_request(exc) from exc
+    return _model_page(request, page, limit, response)
 
 
 @app.post(
@@ -235,52 +778,375 @@ def list_tasks(
     response_model=Task,
     status_code=status.HTTP_201_CREATED,
 )
-def create_task(schedule_id: int, payload: TaskCreate, store: StoreDep) -> Task:
-    """指定したスケジュールにタスクを追加する。"""
+async def create_task(
+    schedule_id: int, payload: TaskCreate, response: Response, store: AsyncStoreDep
+) -> Task:
+    """指定したスケジュールにタスクを追加する。同じ場所で重なるタスクはヘッダーで知らせる。"""
+
+    try:
+        task = await store.create_task(schedule_id, payload)
+    except KeyError as exc:
+        raise _not_found(SCHEDULE_NOT_FOUND_DETAIL) from exc
+    await _report_conflicts(task, response, store)
+    return task
+
+
+@app.get(
+    "/schedules/{schedule_id}/conflicts",
+    response_model=list[LocationConflicts],
+    dependencies=[Depends(_conditional_get_tasks)],
+)
+async def list_conflicts(schedule_id: int, store: AsyncStoreDep) -> list[LocationConflicts]:
+    """同じ場所で時間帯が重なるタスクの組を場所ごとに取得する。"""
+
+    try:
+        return await store.find_conflicts(schedule_id)
+    except KeyError as exc:
+        raise _not_found(SCHEDULE_NOT_FOUND_DETAIL) from exc
+
+
+@app.post("/schedules/{schedule_id}/tasks/import", response_model=ImportReport)
+async def import_tasks(schedule_id: int, request: Request, store: AsyncStoreDep) -> ImportReport:
+    """CSV／JSON／NDJSON から指定したスケジュールにタスクを一括登録する。"""
 
     try:
-        return store.create_task(schedule_id, payload)
+        return await _run_import(request, partial(store.import_tasks, schedule_id))
     except KeyError as exc:
         raise _not_found(SCHEDULE_NOT_FOUND_DETAIL) from exc
 
 
-@app.get("/tasks/{task_id}", response_model=Task)
-def get_task(task_id: int, store: StoreDep) -> Task:
+# /tasks/{task_id} より先に登録する
+@app.get("/tasks/active", response_model=list[Task])
+async def list_active_tasks(
+    request: Request,
+    response: Response,
+    store: AsyncStoreDep,
+    at: TaskActiveAt = None,
+    stage: TaskStageFilter = None,
+    status: TaskStatusFilter = None,
+    after: PageAfter = None,
+    limit: PageLimit = None,
+) -> list[Task] | Response:
+    """全スケジュールから、指定した時点に実施中のタスクを開始時刻順に取得する。"""
+
+    try:
+        if SQL_JSON_LISTS:
+            rows = await store.list_active_tasks_json(
+                at, stage=stage, status=status, after=after, limit=_fetch_limit(limit)
+            )
+            return _json_page(request, rows, limit, response)
+        page = await store.list_active_tasks(
+            at, stage=stage, status=status, after=after, limit=_fetch_limit(limit)
+        )
+    except ValueError as exc:
+        raise _bad_request(exc) from exc
+    return _model_page(request, page, limit, response)
+
+
+@app.get("/tasks/{task_id}", response_model=Task, dependencies=[Depends(_tasks_etag)])
+async def get_task(task_id: int, store: AsyncStoreDep) -> Task:
     """タスク詳細を取得する。"""
 
     try:
-        return store.get_task(task_id)
+        return await store.get_task(task_id)
     except KeyError as exc:  # pragma: no cover - defensive
         raise _not_found(TASK_NOT_FOUND_DETAIL) from exc
 
 
 @app.put("/tasks/{task_id}", response_model=Task)
-def update_task(task_id: int, payload: TaskUpdate, store: StoreDep) -> Task:
-    """タスク情報を更新する。"""
+async def update_task(
+    task_id: int, payload: TaskUpdate, response: Response, store: AsyncStoreDep
+) -> Task:
+    """タスク情報を更新する。同じ場所で重なるタスクはヘッダーで知らせる。"""
 
     try:
-        return store.update_task(task_id, payload)
+        task = await store.update_task(task_id, payload)
     except KeyError as exc:
         raise _not_found(TASK_NOT_FOUND_DETAIL) from exc
+    await _report_conflicts(task, response, store)
+    return task
 
 
 @app.patch("/tasks/{task_id}/status", response_model=Task)
-def update_task_status(
-    task_id: int, payload: TaskStatusUpdate, store: StoreDep
-) -> Task:
+async def update_task_status(task_id: int, payload: TaskStatusUpdate, store: AsyncStoreDep) -> Task:
     """タスクの状態のみを更新する。"""
 
     try:
-        return store.update_task_status(task_id, payload.status)
+        return await store.update_task_status(task_id, payload.status)
     except KeyError as exc:
         raise _not_found(TASK_NOT_FOUND_DETAIL) from exc
 
 
 @app.delete("/tasks/{task_id}", status_code=status.HTTP_204_NO_CONTENT)
-def delete_task(task_id: int, store: StoreDep) -> None:
+async def delete_task(task_id: int, store: AsyncStoreDep) -> None:
     """タスクを削除する。"""
 
     try:
-        store.delete_task(task_id)
+        await store.delete_task(task_id)
     except KeyError as exc:
         raise _not_found(TASK_NOT_FOUND_DETAIL) from exc
+
+
+# -- Batch endpoints -------------------------------------------------------
+@app.post("/batch", response_model=BatchResponse)
+async def apply_batch(payload: BatchRequest, store: AsyncStoreDep) -> BatchResponse:
+    """複数の作成・更新・削除操作を 1 トランザクションでまとめて適用する。"""
+
+    return await store.apply_batch(payload.operations)
+
+
+# -- Search endpoints ------------------------------------------------------
+@app.get("/search", response_model=list[SearchResult])
+async def search(
+    q: SearchQuery, store: AsyncStoreDep, limit: SearchLimit = 20
+) -> list[SearchResult]:
+    """メンバー・資材・タスクを横断して名前などを部分一致で検索し、関連度の高い順に返す。"""
+
+    try:
+        return await store.search(q, limit=limit)
+    except ValueError as exc:
+        raise _bad_request(exc) from exc
+
+
+# -- Dashboard endpoints ---------------------------------------------------
+@app.get(
+    "/dashboard/members",
+    response_model=list[PartMemberCount],
+    dependencies=[Depends(_members_etag)],
+)
+async def member_part_counts(store: AsyncStoreDep) -> list[PartMemberCount]:
+    """担当パートごとのメンバー数を取得する。"""
+
+    return await store.member_part_counts()
+
+
+@app.get(
+    "/dashboard/materials",
+    response_model=list[PartMaterialTotal],
+    dependencies=[Depends(_materials_etag)],
+)
+async def material_part_totals(store: AsyncStoreDep) -> list[PartMaterialTotal]:
+    """担当パートごとの資材の件数と数量の合計を取得する。"""
+
+    return await store.material_part_totals()
+
+
+@app.get(
+    "/dashboard/tasks",
+    response_model=list[TaskStatusCount],
+    dependencies=[Depends(_tasks_etag)],
+)
+async def task_status_counts(
+    store: AsyncStoreDep, schedule_id: DashboardScheduleFilter = None
+) -> list[TaskStatusCount]:
+    """スケジュール・ステージ・状態ごとのタスク数を取得する。"""
+
+    return await store.task_status_counts(schedule_id)
+
+
+# -- Sync endpoints --------------------------------------------------------
+@app.get("/sync", response_model=SyncChanges)
+async def sync_changes(
+    store: AsyncStoreDep, since: SyncSinceParam = 0, epoch: SyncEpochParam = None
+) -> SyncChanges:
+    """指定したバージョン以降に変更されたデータと削除済み ID を取得する。"""
+
+    return await store.changes_since(since, epoch)
+
+
+# -- Snapshot endpoints ----------------------------------------------------
+SNAPSHOT_MEDIA_TYPE = "application/gzip"
+# スナップショットのファイルを読み書きする単位
+SNAPSHOT_CHUNK_SIZE = 1024 * 1024
+
+
+def _snapshot_file() -> Path:
+    descriptor, name = mkstemp(prefix="eventcompass-", suffix=".db")
+    os.close(descriptor)
+    return Path(name)
+
+
+def _snapshot_chunks(path: Path) -> Iterator[bytes]:
+    """スナップショットのファイルを gzip で圧縮しながら読み出し、読み終えたら消す。"""
+
+    try:
+        with path.open("rb") as file:
+            chunks = iter(partial(file.read, SNAPSHOT_CHUNK_SIZE), b"")
+            yield from compress_chunks(chunks, "gzip")
+    finally:
+        path.unlink(missing_ok=True)
+
+
+@app.get("/snapshot", response_class=StreamingResponse)
+async def export_snapshot(store: AsyncStoreDep) -> StreamingResponse:
+    """データベース全体の一貫したコピーを、gzip で圧縮した 1 ファイルとして返す。
+
+    コピーは SQLite の backup API で一時ファイルに取り、圧縮しながら送る。
+    """
+
+    path = _snapshot_file()
+    try:
+        await store.write_snapshot(path)
+    except BaseException:
+        path.unlink(missing_ok=True)
+        raise
+    filename = f"eventcompass-{datetime.now():%Y%m%d-%H%M%S}.db.gz"
+    return StreamingResponse(
+        _snapshot_chunks(path),
+        media_type=SNAPSHOT_MEDIA_TYPE,
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'},
+    )
+
+
+@app.post("/snapshot", response_model=SnapshotSummary)
+async def restore_snapshot(request: Request, store: AsyncStoreDep) -> SnapshotSummary:
+    """``GET /snapshot`` のファイル（gzip／zstd／圧縮なしの SQLite）で全データを置き換える。
+
+    本文は受け取りながら展開して一時ファイルに書き、受信を終えてから差し替える。
+    壊れたファイルや別形式のファイルは 400 とし、元のデータはそのまま残す。
+    """
+
+    path = _snapshot_file()
+    try:
+        decoder = StreamDecoder()
+        try:
+            with path.open("wb") as file:
+                async for chunk in request.stream():
+                    file.write(decoder.feed(chunk))
+                file.write(decoder.finish())
+            return await store.restore_snapshot(path)
+        except ValueError as exc:
+            raise _bad_request(exc) from exc
+    finally:
+        path.unlink(missing_ok=True)
+
+
+# -- Backup endpoints ------------------------------------------------------
+@app.get("/backups", response_model=BackupStatus)
+async def backup_status(store: StoreDep) -> BackupStatus:
+    """定期バックアップの状態（実行中の進み具合、直近の結果、保存しているバックアップ）を返す。"""
+
+    try:
+        return store.backups.status()
+    except ValueError as exc:
+        raise _bad_request(exc) from exc
+
+
+@app.post("/backups", response_model=BackupResult, status_code=status.HTTP_201_CREATED)
+async def create_backup(store: StoreDep) -> BackupResult:
+    """その場でバックアップを 1 つ作り、完了してから結果を返す。
+
+    書き込みを長く止めないよう数ページずつ写すため、専用のスレッドで実行する。
+    他のバックアップの実行中はその完了を待ってから作る。
+    """
+
+    try:
+        return await asyncio.to_thread(store.backups.run)
+    except ValueError as exc:
+        raise _bad_request(exc) from exc
+    except RuntimeError as exc:
+        # 復元でデータベースが差し替えられた
+        raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail=str(exc)) from exc
+
+
+# -- Event database endpoints ----------------------------------------------
+@app.put("/events/{event_key}", response_model=EventDatabase)
+async def create_event(event_key: str, response: Response, registry: RegistryDep) -> EventDatabase:
+    """イベントのデータベースを用意する。新たに作った場合は 201、既にあれば 200 を返す。
+
+    作成後は ``/events/{event_key}/members`` のように、既存の API の前に付けて使う。
+    """
+
+    try:
+        created = not registry.exists(event_key)
+        await asyncio.to_thread(registry.acquire, event_key, create=True)
+    except ValueError as exc:
+        raise _bad_request(exc) from exc
+    registry.release(event_key)
+    if created:
+        response.status_code = status.HTTP_201_CREATED
+    return EventDatabase(key=event_key, created=created)
+
+
+# -- Change event endpoint -------------------------------------------------
+def _resume_version(request: Request, since: int | None) -> int | None:
+    """再送を始めるバージョン。EventSource が再接続時に送る ``Last-Event-ID`` を優先する。"""
+
+    last_event_id = request.headers.get(LAST_EVENT_ID_HEADER)
+    if last_event_id is not None and last_event_id.isdecimal():
+        return int(last_event_id)
+    return since
+
+
+@app.get("/events", response_class=StreamingResponse)
+async def change_events(
+    request: Request, store: AsyncStoreDep, since: EventsSinceParam = None
+) -> StreamingResponse:
+    """書き込みの変更通知を Server-Sent Events で配信する。
+
+    各変更は ``event: change`` で ``{entity, id, action, version}`` を送る。配信が追いつかない場合や
+    再送しきれない場合は ``event: resync`` を送って接続を閉じるため、``GET /sync`` で同期し直す。
+    """
+
+    resume = _resume_version(request, since)
+    subscription, version = await store.subscribe_changes()
+    try:
+        replay = [] if resume is None else await store.change_events(resume, version)
+    except BaseException:
+        subscription.close()
+        raise
+    if replay is None:
+        subscription.resync(version)
+        replay = []
+    return StreamingResponse(
+        subscription.frames(replay),
+        media_type=SSE_MEDIA_TYPE,
+        # 途中のプロキシにバッファリングさせない
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+# -- Metrics endpoint ------------------------------------------------------
+@app.get("/metrics", include_in_schema=False)
+async def metrics(store: StoreDep) -> Response:
+    """リクエストとストアの計測値を Prometheus のテキスト形式で返す。"""
+
+    body = render([*HTTP_METRICS.families(), *store.metrics.families()])
+    return Response(content=body, media_type=PROMETHEUS_CONTENT_TYPE)
+
+
+# -- Debug endpoints -------------------------------------------------------
+@app.get("/debug/trace", response_model=TraceSnapshot, include_in_schema=False)
+async def get_trace(store: StoreDep) -> TraceSnapshot:
+    """遅い SQL とロックの取得履歴を返す。トレースが無効の間は空のまま。"""
+
+    return store.trace_snapshot()
+
+
+@app.get("/debug/stores", response_model=StoreRegistryStats, include_in_schema=False)
+async def store_registry_stats(registry: RegistryDep) -> StoreRegistryStats:
+    """開いているイベントのストアと、開いた・閉じた回数を返す。"""
+
+    return registry.stats()
+
+
+@app.get("/debug/aggregates", response_model=AggregateCheck, include_in_schema=False)
+async def check_aggregates(store: AsyncStoreDep) -> AggregateCheck:
+    """ダッシュボードの集計表を元のテーブルから集計し直した結果と比べる。"""
+
+    return await store.check_aggregates()
+
+
+@app.post("/debug/aggregates/rebuild", response_model=AggregateCheck, include_in_schema=False)
+async def rebuild_aggregates(store: AsyncStoreDep) -> AggregateCheck:
+    """ダッシュボードの集計表を検査し、食い違いがあれば集計し直した値で置き換える。"""
+
+    return await store.check_aggregates(repair=True)
+
+
+@app.put("/debug/trace", response_model=TraceSettings, include_in_schema=False)
+async def configure_trace(payload: TraceSettings, store: StoreDep) -> TraceSettings:
+    """トレースの設定を変更する。``slow_query_ms`` を null、``lock_history`` を 0 にすると無効。"""
+
+    store.configure_tracing(payload)
+    return store.tracer.settings
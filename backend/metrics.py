@@ -0,0 +1,321 @@
+"""リクエストとストアの処理時間を集計し、Prometheus のテキスト形式で出力する計測部品。
+
+集計はすべてプロセス内で行い、外部ライブラリには依存しない。ヒストグラムのバケットは
+生成時に確保し、観測時はバケットの位置を二分探索して加算するだけにする。
+"""
+
+from __future__ import annotations
+
+import time
+from bisect import bisect_left
+from collections.abc import Awaitable, Callable, Iterable, Sequence
+from threading import Lock
+from typing import Any
+
+from .models import WaitStats
+
+# レイテンシ用の既定バケット（秒）。ロック待ちのような短い待ちから遅いリクエストまでを覆う
+DEFAULT_BUCKETS = (
+    0.0001,
+    0.00025,
+    0.0005,
+    0.001,
+    0.0025,
+    0.005,
+    0.01,
+    0.025,
+    0.05,
+    0.1,
+    0.25,
+    0.5,
+    1.0,
+    2.5,
+    5.0,
+    10.0,
+)
+
+# Prometheus のテキスト形式の Content-Type
+PROMETHEUS_CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+_INF_LABEL = 'le="+Inf"'
+
+# どのルートにも一致しなかったリクエストのラベル（パスをそのまま使うと種類が際限なく増えるため）
+UNMATCHED_ROUTE = "<unmatched>"
+
+# ASGI の型（Starlette に依存しないよう最小限に定義する）
+Scope = dict[str, Any]
+Message = dict[str, Any]
+Receive = Callable[[], Awaitable[Message]]
+Send = Callable[[Message], Awaitable[None]]
+ASGIApp = Callable[[Scope, Receive, Send], Awaitable[None]]
+
+
+class Histogram:
+    """固定バケットのヒストグラム。件数・合計・最大値も保持する。
+
+    観測は複数スレッドから呼ばれるため、内部のロックで保護する。
+    """
+
+    __slots__ = ("_bounds", "_counts", "_count", "_sum", "_max", "_guard")
+
+    def __init__(self, buckets: Sequence[float] = DEFAULT_BUCKETS) -> None:
+        self._bounds = tuple(buckets)
+        # 末尾は最大のバケットを超えた値（+Inf）の件数
+        self._counts = [0] * (len(self._bounds) + 1)
+        self._count = 0
+        self._sum = 0.0
+        self._max = 0.0
+        self._guard = Lock()
+
+    def observe(self, value: float) -> None:
+        index = bisect_left(self._bounds, value)
+        with self._guard:
+            self._counts[index] += 1
+            self._count += 1
+            self._sum += value
+            if value > self._max:
+                self._max = value
+
+    def stats(self) -> WaitStats:
+        with self._guard:
+            return WaitStats(count=self._count, total_seconds=self._sum, max_seconds=self._max)
+
+    def snapshot(self) -> tuple[list[int], int, float]:
+        """``(上限ごとの累積件数, 件数, 合計)`` を返す。累積件数の並びはバケットの上限と同じ。"""
+
+        with self._guard:
+            counts, count, total = list(self._counts), self._count, self._sum
+        cumulative: list[int] = []
+        running = 0
+        for bucket in counts[:-1]:
+            running += bucket
+            cumulative.append(running)
+        return cumulative, count, total
+
+    @property
+    def bounds(self) -> tuple[float, ...]:
+        return self._bounds
+
+    def reset(self) -> None:
+        with self._guard:
+            self._counts = [0] * (len(self._bounds) + 1)
+            self._count = 0
+            self._sum = 0.0
+            self._max = 0.0
+
+
+class Counter:
+    """単調増加するカウンター。"""
+
+    __slots__ = ("_value", "_guard")
+
+    def __init__(self) -> None:
+        self._value = 0.0
+        self._guard = Lock()
+
+    def inc(self, amount: float = 1.0) -> None:
+        with self._guard:
+            self._value += amount
+
+    @property
+    def value(self) -> float:
+        return self._value
+
+
+class _Family:
+    """ラベルの組ごとに子の指標を持つ指標群。子は初回の観測時に 1 度だけ作る。"""
+
+    kind = ""
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str]) -> None:
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._children: dict[tuple[str, ...], object] = {}
+        self._guard = Lock()
+
+    def _child(self, values: tuple[str, ...], create: Callable[[], object]) -> object:
+        child = self._children.get(values)
+        if child is None:
+            if len(values) != len(self.labelnames):
+                raise ValueError(f"{self.name} のラベルは {self.labelnames} です")
+            with self._guard:
+                child = self._children.setdefault(values, create())
+        return child
+
+    def _labels(self, values: tuple[str, ...], extra: str = "") -> str:
+        pairs = [
+            f'{name}="{_escape(value)}"'
+            for name, value in zip(self.labelnames, values, strict=True)
+        ]
+        if extra:
+            pairs.append(extra)
+        return "{" + ",".join(pairs) + "}" if pairs else ""
+
+    def _header(self) -> list[str]:
+        return [
+            f"# HELP {self.name} {self.documentation}",
+            f"# TYPE {self.name} {self.kind}",
+        ]
+
+    def render(self) -> list[str]:
+        raise NotImplementedError
+
+    def reset(self) -> None:
+        with self._guard:
+            self._children.clear()
+
+
+class HistogramFamily(_Family):
+    kind = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Sequence[str] = (),
+        buckets: Sequence[float] = DEFAULT_BUCKETS,
+    ) -> None:
+        super().__init__(name, documentation, labelnames)
+        self._buckets = tuple(buckets)
+
+    def labels(self, *values: str) -> Histogram:
+        child = self._children.get(values)
+        if child is None:
+            child = self._child(values, lambda: Histogram(self._buckets))
+        return child  # type: ignore[return-value]
+
+    def render(self) -> list[str]:
+        lines = self._header()
+        for values, child in sorted(self._children.items()):
+            assert isinstance(child, Histogram)
+            cumulative, count, total = child.snapshot()
+            for bound, running in zip(child.bounds, cumulative, strict=True):
+                labels = self._labels(values, f'le="{_format_value(bound)}"')
+                lines.append(f"{self.name}_bucket{labels} {running}")
+            lines.append(f"{self.name}_bucket{self._labels(values, _INF_LABEL)} {count}")
+            lines.append(f"{self.name}_sum{self._labels(values)} {_format_value(total)}")
+            lines.append(f"{self.name}_count{self._labels(values)} {count}")
+        return lines
+
+
+class CounterFamily(_Family):
+    kind = "counter"
+
+    def labels(self, *values: str) -> Counter:
+        child = self._children.get(values)
+        if child is None:
+            child = self._child(values, Counter)
+        return child  # type: ignore[return-value]
+
+    def render(self) -> list[str]:
+        lines = self._header()
+        for values, child in sorted(self._children.items()):
+            assert isinstance(child, Counter)
+            lines.append(f"{self.name}{self._labels(values)} {_format_value(child.value)}")
+        return lines
+
+
+class HttpMetrics:
+    """ルートのテンプレート・メソッド・ステータスごとのリクエスト数とレイテンシ。"""
+
+    def __init__(self) -> None:
+        self.requests = CounterFamily(
+            "eventcompass_http_requests_total",
+            "Total HTTP requests by route template, method and status code.",
+            ("method", "route", "status"),
+        )
+        self.duration = HistogramFamily(
+            "eventcompass_http_request_duration_seconds",
+            "HTTP request latency by route template, method and status code.",
+            ("method", "route", "status"),
+        )
+
+    def observe(self, method: str, route: str, status: str, seconds: float) -> None:
+        key = (method, route, status)
+        self.requests.labels(*key).inc()
+        self.duration.labels(*key).observe(seconds)
+
+    def families(self) -> list[_Family]:
+        return [self.requests, self.duration]
+
+    def reset(self) -> None:
+        for family in self.families():
+            family.reset()
+
+
+class StoreMetrics:
+    """``SQLiteStore`` のロック・実行待ち・SQL 実行時間。"""
+
+    def __init__(self) -> None:
+        self.lock_wait = HistogramFamily(
+            "eventcompass_store_lock_wait_seconds",
+            "Time spent waiting to acquire the store lock.",
+        )
+        self.lock_hold = HistogramFamily(
+            "eventcompass_store_lock_hold_seconds",
+            "Time the store lock was held.",
+        )
+        self.queue_wait = HistogramFamily(
+            "eventcompass_store_queue_wait_seconds",
+            "Time async store calls waited for an executor thread.",
+            ("pool",),
+        )
+        self.query = HistogramFamily(
+            "eventcompass_store_query_seconds",
+            "SQL execution time (statement and fetch) by query kind.",
+            ("kind",),
+        )
+
+    def families(self) -> list[_Family]:
+        return [self.lock_wait, self.lock_hold, self.queue_wait, self.query]
+
+
+class RequestMetricsMiddleware:
+    """HTTP リクエストの件数とレイテンシをルートのテンプレート単位で記録する ASGI ミドルウェア。
+
+    ルートはルーターが ``scope["route"]`` に設定したものを使うため、パスパラメータの値ごとに
+    ラベルが増えることはない。レイテンシはレスポンス本文の送信完了までを含む。
+    """
+
+    def __init__(self, app: ASGIApp, metrics: HttpMetrics) -> None:
+        self.app = app
+        self.metrics = metrics
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        started = time.perf_counter()
+        status_code = 500
+
+        async def send_with_status(message: Message) -> None:
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            route = getattr(scope.get("route"), "path", UNMATCHED_ROUTE)
+            self.metrics.observe(
+                scope["method"], route, str(status_code), time.perf_counter() - started
+            )
+
+
+def render(families: Iterable[_Family]) -> str:
+    """指標群を Prometheus のテキスト形式に変換する。"""
+
+    lines: list[str] = []
+    for family in families:
+        lines.extend(family.render())
+    return "\n".join(lines) + "\n"
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _format_value(value: float) -> str:
+    return repr(float(value)) if value != int(value) else str(int(value))
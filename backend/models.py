@@ -3,9 +3,10 @@
 from __future__ import annotations
 
 from datetime import date, datetime
-from enum import Enum
+from enum import Enum, StrEnum
+from typing import Any
 
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
 
 
 class ContactInfo(BaseModel):
@@ -150,3 +151,323 @@ class TaskStatusUpdate(BaseModel):
     """タスクの状態のみを更新するためのリクエストボディ。"""
 
     status: TaskStatus
+
+
+class TaskOverlap(BaseModel):
+    """同じ場所で時間帯が重なる 2 つのタスク。``first_task_id`` が先に始まる方。"""
+
+    first_task_id: int
+    second_task_id: int
+    overlap_start: datetime
+    overlap_end: datetime
+
+
+class LocationConflicts(BaseModel):
+    """1 つの場所で重なっているタスクの組の一覧。"""
+
+    location: str
+    overlaps: list[TaskOverlap]
+
+
+class SyncDeleted(BaseModel):
+    """差分同期で削除が確認されたエンティティの ID 一覧。"""
+
+    members: list[int] = []
+    materials: list[int] = []
+    schedules: list[int] = []
+    tasks: list[int] = []
+
+
+class SyncChanges(BaseModel):
+    """差分同期 API のレスポンス。``version`` と ``epoch`` を次回の ``since``／``epoch`` に使う。
+
+    ``epoch`` はスナップショットの復元や ``reset()`` でデータが丸ごと入れ替わるたびに変わる。
+    """
+
+    version: int
+    epoch: str
+    full: bool
+    members: list[Member]
+    materials: list[Material]
+    schedules: list[Schedule]
+    tasks: list[Task]
+    deleted: SyncDeleted
+
+
+class SearchResult(BaseModel):
+    """全文検索の 1 件。
+
+    ``entity`` は ``member`` / ``material`` / ``task``。``snippet`` は一致箇所を ``<mark>`` で囲んだ
+    抜粋で、元の文字列はエスケープしない。``score`` は関連度（大きいほど関連が高い）で、
+    2 文字以下の語だけで検索した場合は ``None``。
+    """
+
+    entity: str
+    id: int
+    name: str
+    snippet: str
+    score: float | None = None
+
+
+class PartMemberCount(BaseModel):
+    """担当パートごとのメンバー数。"""
+
+    part: str
+    members: int
+
+
+class PartMaterialTotal(BaseModel):
+    """担当パートごとの資材の件数と数量の合計。"""
+
+    part: str
+    materials: int
+    quantity: int
+
+
+class TaskStatusCount(BaseModel):
+    """スケジュール・ステージ・状態ごとのタスク数。"""
+
+    schedule_id: int
+    stage: str
+    status: TaskStatus
+    tasks: int
+
+
+class AggregateMismatch(BaseModel):
+    """集計表と元のテーブルの集計が食い違ったグループ。
+
+    ``group`` はグループの列の値、``expected``（集計し直した値）と ``stored``（集計表の値）は
+    集計値の列の値の並び。片方にしか無いグループは、もう片方を 0 として表す。
+    """
+
+    summary: str
+    group: list[int | str]
+    expected: list[int]
+    stored: list[int]
+
+
+class AggregateCheck(BaseModel):
+    """集計表の整合性検査の結果。``repaired`` は集計し直した値で置き換えたかどうか。"""
+
+    groups: int
+    mismatches: list[AggregateMismatch]
+    repaired: bool
+
+
+class SnapshotSummary(BaseModel):
+    """スナップショットから復元したデータの件数と、復元後の変更履歴のバージョン。"""
+
+    members: int
+    materials: int
+    schedules: int
+    tasks: int
+    version: int
+
+
+class BackupResult(BaseModel):
+    """作成したバックアップ 1 つ分の結果。
+
+    ``max_lock_hold_ms`` は 1 ステップで書き込みロックを保持した最長の時間。
+    """
+
+    name: str
+    size: int
+    pages: int
+    steps: int
+    started_at: datetime
+    duration_seconds: float
+    max_lock_hold_ms: float
+
+
+class BackupFile(BaseModel):
+    """保存しているバックアップのファイル。"""
+
+    name: str
+    size: int
+    created_at: datetime
+
+
+class BackupStatus(BaseModel):
+    """定期バックアップの状態。
+
+    ``running`` の間は ``pages_copied``／``pages_total`` で進み具合を表す。``interval_seconds`` は
+    定期バックアップを止めていれば ``None``。``backups`` は保存しているものを新しい順に並べる。
+    """
+
+    running: bool
+    pages_copied: int
+    pages_total: int
+    interval_seconds: float | None
+    keep: int
+    last: BackupResult | None
+    last_error: str | None
+    backups: list[BackupFile]
+
+
+class StoreRegistryStats(BaseModel):
+    """イベントごとのストアのレジストリの状態。
+
+    ``open`` は開いているイベントのキー（最も長く使われていないものが先頭）、``leased`` はそのうち
+    リクエストで使用中の数。``opened``／``evicted``／``closed_idle`` は起動してからストアを
+    開いた回数、上限を超えて閉じた回数、使われないまま時間が過ぎて閉じた回数。
+    """
+
+    open: list[str]
+    leased: int
+    max_open: int
+    idle_timeout_seconds: float
+    opened: int
+    evicted: int
+    closed_idle: int
+
+
+class EventDatabase(BaseModel):
+    """``PUT /events/{event_key}`` の結果。``created`` はデータベースを新たに作ったかどうか。"""
+
+    key: str
+    created: bool
+
+
+class ChangeEvent(BaseModel):
+    """``GET /events`` で配信する変更通知。
+
+    ``entity`` は ``member`` / ``material`` / ``schedule`` / ``task``、``action`` は ``upsert`` か
+    ``delete``。``version`` は変更履歴のバージョンで、``GET /sync`` の ``since`` と同じ値。
+    """
+
+    entity: str
+    id: int
+    action: str
+    version: int
+
+
+class BatchEntity(StrEnum):
+    """一括処理で扱うエンティティの種類。"""
+
+    MEMBER = "member"
+    MATERIAL = "material"
+    SCHEDULE = "schedule"
+    TASK = "task"
+
+
+class BatchAction(StrEnum):
+    """一括処理で実行する操作。"""
+
+    CREATE = "create"
+    UPDATE = "update"
+    DELETE = "delete"
+
+
+class BatchOperation(BaseModel):
+    """一括処理に含める 1 件の操作。
+
+    ``ref_id`` は更新・削除の対象 ID。作成時はクライアント側の仮 ID（負数）を指定すると、
+    同じバッチ内の同じエンティティへの後続操作から ``ref_id`` として（スケジュールはタスクの
+    ``schedule_id`` としても）参照できる。負数以外の仮 ID を指定した作成操作は ``invalid`` になる。
+    """
+
+    entity: BatchEntity
+    action: BatchAction
+    ref_id: int | None = None
+    schedule_id: int | None = None
+    payload: dict[str, Any] | None = None
+
+
+class BatchRequest(BaseModel):
+    """一括処理のリクエストボディ。操作は記載順に適用する。"""
+
+    operations: list[BatchOperation] = Field(max_length=1000)
+
+
+class BatchStatus(StrEnum):
+    """一括処理における各操作の結果。"""
+
+    OK = "ok"
+    NOT_FOUND = "not_found"
+    INVALID = "invalid"
+
+
+class BatchOperationResult(BaseModel):
+    """一括処理の 1 操作ごとの結果。"""
+
+    index: int
+    status: BatchStatus
+    id: int | None = None
+    data: Member | Material | Schedule | Task | None = None
+    detail: Any = None
+
+
+class BatchResponse(BaseModel):
+    """一括処理のレスポンス。``id_map`` はエンティティごとの仮 ID からサーバー採番 ID への対応。"""
+
+    results: list[BatchOperationResult]
+    id_map: dict[BatchEntity, dict[int, int]]
+
+
+class ImportRowError(BaseModel):
+    """一括インポートで登録できなかった行。``row`` はデータ行の 1 始まりの番号。"""
+
+    row: int
+    detail: Any
+
+
+class ImportReport(BaseModel):
+    """一括インポートの結果。``errors`` には先頭から一定件数までの行エラーを含める。"""
+
+    imported: int
+    error_count: int
+    errors: list[ImportRowError]
+
+
+class CacheStats(BaseModel):
+    """読み取りキャッシュの統計情報。"""
+
+    hits: int
+    misses: int
+    evictions: int
+    size: int
+    max_size: int
+
+
+class TraceSettings(BaseModel):
+    """ストアのトレース設定。``slow_query_ms`` が未指定かつ ``lock_history`` が 0 なら無効。"""
+
+    slow_query_ms: float | None = Field(default=None, gt=0)
+    lock_history: int = Field(default=0, ge=0, le=100_000)
+
+
+class SlowQuery(BaseModel):
+    """閾値を超えた SQL。``parameters`` には値ではなく型の並びだけを残す。"""
+
+    recorded_at: datetime
+    method: str
+    sql: str
+    parameters: list[str]
+    duration_ms: float
+    plan: list[str]
+
+
+class LockEvent(BaseModel):
+    """ストアのロックを取得してから解放するまでの 1 回分の記録。"""
+
+    acquired_at: datetime
+    method: str
+    thread: str
+    wait_ms: float
+    hold_ms: float
+
+
+class TraceSnapshot(BaseModel):
+    """トレースの設定と、直近の遅い SQL・ロックの取得履歴（古い順）。"""
+
+    settings: TraceSettings
+    slow_queries: list[SlowQuery]
+    lock_events: list[LockEvent]
+
+
+class WaitStats(BaseModel):
+    """ロックや実行待ちの待ち時間の累積値。``max_seconds`` は計測開始以降の最大値。"""
+
+    count: int
+    total_seconds: float
+    max_seconds: float
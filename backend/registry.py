@@ -0,0 +1,259 @@
+"""イベントごとのデータベースを開くストアのレジストリ（``StoreRegistry``）。
+
+イベントはキー（``event_key``）で選び、``<directory>/<event_key>.db`` を 1 つの ``SQLiteStore`` で
+開く。ストアは最初に使われた時点で開き、開いている数が上限を超えたら最も長く使われていない
+ものから閉じる。使われないまま一定時間が過ぎたストアも閉じるため、誰も見ていない過去の
+イベントは接続・スレッド・キャッシュのどれも持たない。貸し出し中のストアは閉じない。
+
+リクエストでのイベントの指定は ``/events/<event_key>/...`` のパスか ``X-Event-Key`` ヘッダーで行う。
+パスの場合は ``EventPathMiddleware`` が先頭を取り除いてから既存のルートに渡す。
+"""
+
+from __future__ import annotations
+
+import logging
+import re
+import time
+from collections import OrderedDict
+from collections.abc import Callable
+from pathlib import Path
+from threading import Event, Lock, Thread
+
+from .metrics import ASGIApp, Receive, Scope, Send
+from .models import StoreRegistryStats
+from .store import SQLiteStore
+
+logger = logging.getLogger(__name__)
+
+# 同時に開いておくストアの上限と、使われないストアを閉じるまでの秒数
+DEFAULT_MAX_OPEN_STORES = 8
+DEFAULT_IDLE_TIMEOUT = 10 * 60.0
+# 使われないストアを探す間隔（秒）
+DEFAULT_SWEEP_INTERVAL = 60.0
+EVENT_KEY_HEADER = "X-Event-Key"
+# ``EventPathMiddleware`` がパスから取り出したキーを置く scope のキー
+EVENT_KEY_SCOPE = "eventcompass.event_key"
+EVENT_PATH_PREFIX = "/events/"
+# ファイル名にそのまま使うため、英小文字・数字・``-``・``_`` に限る
+_EVENT_KEY = re.compile(r"[a-z0-9][a-z0-9_-]{0,63}")
+
+
+def validate_event_key(key: str) -> str:
+    """ファイル名に使えるイベントのキーならそのまま返し、そうでなければ ``ValueError``。"""
+
+    if not _EVENT_KEY.fullmatch(key):
+        raise ValueError(
+            "イベントのキーは英小文字・数字・'-'・'_' の 64 文字以内で指定してください"
+        )
+    return key
+
+
+class _Entry:
+    __slots__ = ("store", "leases", "last_used")
+
+    def __init__(self, store: SQLiteStore) -> None:
+        self.store = store
+        self.leases = 0
+        self.last_used = time.monotonic()
+
+
+class StoreRegistry:
+    """イベントのキーごとに ``SQLiteStore`` を必要な時だけ開いておく。
+
+    ``acquire()`` で貸し出したストアは ``release()`` で返す。貸し出し中のストアは閉じないため、
+    すべて貸し出し中なら一時的に ``max_open`` を超えて開き、返された時点で上限まで閉じる。
+    ``open_store`` はデータベースのパスからストアを作る関数。
+    """
+
+    def __init__(
+        self,
+        directory: str | Path,
+        *,
+        open_store: Callable[[Path], SQLiteStore] = SQLiteStore,
+        max_open: int = DEFAULT_MAX_OPEN_STORES,
+        idle_timeout: float = DEFAULT_IDLE_TIMEOUT,
+    ) -> None:
+        if max_open < 1:
+            raise ValueError("max_open は 1 以上を指定してください")
+        self.directory = Path(directory)
+        self.max_open = max_open
+        self.idle_timeout = idle_timeout
+        self._open_store = open_store
+        # 開いているストア。最も長く使われていないものが先頭
+        self._entries: OrderedDict[str, _Entry] = OrderedDict()
+        # 開いている途中のキーごとのロック
+        self._opening: dict[str, Lock] = {}
+        self._guard = Lock()
+        self._opened = 0
+        self._evicted = 0
+        self._closed_idle = 0
+        self._thread: Thread | None = None
+        self._stopped = Event()
+
+    def path(self, key: str) -> Path:
+        return self.directory / f"{validate_event_key(key)}.db"
+
+    def exists(self, key: str) -> bool:
+        return self.path(key).exists()
+
+    def acquire_open(self, key: str) -> SQLiteStore | None:
+        """既に開いているストアなら貸し出し、開いていなければ ``None`` を返す（待たない）。"""
+
+        with self._guard:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            self._entries.move_to_end(key)
+            entry.leases += 1
+            return entry.store
+
+    def acquire(self, key: str, *, create: bool = False) -> SQLiteStore:
+        """``key`` のストアを貸し出す。開いていなければ開く。
+
+        データベースが無い場合は ``create`` なら作り、そうでなければ ``KeyError``。
+        キーが不正なら ``ValueError``。
+        """
+
+        store = self.acquire_open(key)
+        if store is not None:
+            return store
+        path = self.path(key)
+        if not create and not path.exists():
+            raise KeyError(key)
+        self.directory.mkdir(parents=True, exist_ok=True)
+        # 同じキーを同時に開かないよう、キーごとのロックを取ってから開く。開いている間も
+        # 他のキーの貸し出しは止めない
+        while True:
+            with self._guard:
+                opening = self._opening.setdefault(key, Lock())
+            with opening:
+                store = self.acquire_open(key)
+                if store is not None:
+                    return store
+                with self._guard:
+                    # 待っている間に先の呼び出しが開けずにロックを片付けていれば、新しい
+                    # ロックを取り直す。古いロックのまま開くと、後から来た呼び出しと重なる
+                    if self._opening.get(key) is not opening:
+                        continue
+                try:
+                    entry = _Entry(self._open_store(path))
+                except BaseException:
+                    # 開けなくてもロックは残さない。待っていた呼び出しは開き直す
+                    with self._guard:
+                        self._opening.pop(key, None)
+                    raise
+                entry.leases = 1
+                with self._guard:
+                    self._entries[key] = entry
+                    self._opening.pop(key, None)
+                    self._opened += 1
+                    evicted = self._evict()
+            break
+        logger.info("イベント %s のデータベースを開きました", key)
+        self._close(evicted)
+        return entry.store
+
+    def release(self, key: str) -> None:
+        """``acquire()`` で借りたストアを返す。"""
+
+        with self._guard:
+            entry = self._entries[key]
+            entry.leases -= 1
+            entry.last_used = time.monotonic()
+            evicted = self._evict()
+        self._close(evicted)
+
+    def close_idle(self) -> int:
+        """貸し出し中でなく ``idle_timeout`` 秒以上使われていないストアを閉じ、閉じた数を返す。"""
+
+        deadline = time.monotonic() - self.idle_timeout
+        with self._guard:
+            idle = [
+                key
+                for key, entry in self._entries.items()
+                if entry.leases == 0 and entry.last_used <= deadline
+            ]
+            stores = [self._entries.pop(key).store for key in idle]
+            self._closed_idle += len(stores)
+        self._close(stores)
+        return len(stores)
+
+    def stats(self) -> StoreRegistryStats:
+        with self._guard:
+            return StoreRegistryStats(
+                open=list(self._entries),
+                leased=sum(1 for entry in self._entries.values() if entry.leases),
+                max_open=self.max_open,
+                idle_timeout_seconds=self.idle_timeout,
+                opened=self._opened,
+                evicted=self._evicted,
+                closed_idle=self._closed_idle,
+            )
+
+    def start(self, interval: float = DEFAULT_SWEEP_INTERVAL) -> None:
+        """``interval`` 秒ごとに使われないストアを閉じるスレッドを始める。"""
+
+        self.stop()
+        self._stopped.clear()
+        self._thread = Thread(
+            target=self._sweep, args=(interval,), name="store-registry", daemon=True
+        )
+        self._thread.start()
+
+    def stop(self) -> None:
+        thread, self._thread = self._thread, None
+        self._stopped.set()
+        if thread is not None:
+            thread.join()
+
+    def close(self) -> None:
+        """スレッドを止め、貸し出し中のものも含めてすべてのストアを閉じる。"""
+
+        self.stop()
+        with self._guard:
+            stores = [entry.store for entry in self._entries.values()]
+            self._entries.clear()
+        self._close(stores)
+
+    def _sweep(self, interval: float) -> None:
+        while not self._stopped.wait(interval):
+            self.close_idle()
+
+    def _evict(self) -> list[SQLiteStore]:
+        """上限を超えた分を古い順に取り除き、閉じるストアを返す。ロックを保持して呼ぶ。"""
+
+        excess = len(self._entries) - self.max_open
+        if excess <= 0:
+            return []
+        keys = [key for key, entry in self._entries.items() if entry.leases == 0][:excess]
+        self._evicted += len(keys)
+        return [self._entries.pop(key).store for key in keys]
+
+    @staticmethod
+    def _close(stores: list[SQLiteStore]) -> None:
+        # スレッドの停止を待つことがあるため、ロックの外で閉じる
+        for store in stores:
+            store.close()
+
+
+class EventPathMiddleware:
+    """``/events/<event_key>/<path>`` を ``/<path>`` に書き換え、キーを scope に残すミドルウェア。
+
+    ``/events/<event_key>/members`` は既定のイベントの ``/members`` と同じルートで処理される。
+    ``/events`` と ``/events/<event_key>`` のように続きの無いパスは書き換えない。ルーターが
+    ルートを書き込む scope をそのまま使うため、外側の計測でもルートのテンプレートで集計される。
+    """
+
+    def __init__(self, app: ASGIApp) -> None:
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] == "http" and scope["path"].startswith(EVENT_PATH_PREFIX):
+            key, separator, rest = scope["path"][len(EVENT_PATH_PREFIX) :].partition("/")
+            if separator and key:
+                scope[EVENT_KEY_SCOPE] = key
+                scope["path"] = "/" + rest
+                raw_path = scope.get("raw_path")
+                if raw_path is not None:
+                    scope["raw_path"] = b"/" + raw_path[len(EVENT_PATH_PREFIX) :].partition(b"/")[2]
+        await self.app(scope, receive, send)
@@ -2,47 +2,1082 @@
 
 from __future__ import annotations
 
+import asyncio
+import json
+import os
+import re
+import secrets
+import shutil
 import sqlite3
-from collections.abc import Iterable
-from datetime import date, datetime
+import sys
+import tempfile
+import time
+from collections import OrderedDict
+from collections.abc import Callable, Hashable, Iterable, Iterator
+from contextlib import ExitStack, contextmanager
+from datetime import UTC, date, datetime
+from functools import lru_cache
 from pathlib import Path
-from threading import Lock
+from queue import Empty, LifoQueue
+from threading import BoundedSemaphore, Event, Lock, Thread
+from typing import Any, NamedTuple, TypeVar
 
+from pydantic import ValidationError
+
+from .async_store import AsyncSQLiteStore
+from .backup import BACKUP_DIRECTORY_NAME, BACKUP_STEP_PAGES, BACKUP_STEP_PAUSE, BackupScheduler
+from .conflicts import ConflictChange, ConflictIndex, ConflictInterval, utc_instant
+from .events import ChangeHub, Subscription
+from .metrics import HistogramFamily, StoreMetrics
 from .models import (
+    AggregateCheck,
+    AggregateMismatch,
+    BatchAction,
+    BatchEntity,
+    BatchOperation,
+    BatchOperationResult,
+    BatchResponse,
+    BatchStatus,
+    CacheStats,
+    ChangeEvent,
     ContactInfo,
+    ImportReport,
+    ImportRowError,
+    LocationConflicts,
     Material,
     MaterialCreate,
     MaterialUpdate,
     Member,
     MemberCreate,
     MemberUpdate,
+    PartMaterialTotal,
+    PartMemberCount,
     Schedule,
     ScheduleCreate,
     ScheduleUpdate,
+    SearchResult,
+    SnapshotSummary,
+    SyncChanges,
+    SyncDeleted,
     Task,
     TaskCreate,
+    TaskOverlap,
     TaskStatus,
+    TaskStatusCount,
     TaskUpdate,
+    TraceSettings,
+    TraceSnapshot,
+    WaitStats,
+)
+from .tracing import StoreTracer
+
+# 一括インポートで検証に使う作成用モデル
+CreateModelT = TypeVar("CreateModelT", MemberCreate, MaterialCreate, TaskCreate)
+
+# 行から組み立てるレスポンスモデル
+ModelT = TypeVar("ModelT")
+# keyset ページングのカーソル（並び順に使う列の値の組）
+PageCursor = tuple[object, ...]
+
+# スナップショットに必ず含まれるテーブル
+_SNAPSHOT_TABLES = ("members", "materials", "schedules", "tasks")
+# SQLite のデータベースファイルの先頭
+SQLITE_HEADER = b"SQLite format 3\x00"
+
+# ストリーミング読み出しで 1 回に取得する行数
+STREAM_BATCH_SIZE = 500
+
+# 読み取り専用接続プールの既定サイズ
+DEFAULT_READER_POOL_SIZE = 4
+
+# 読み取りキャッシュの既定の上限件数（0 で無効）
+DEFAULT_CACHE_SIZE = 0
+
+# 他の接続（別のプロセス）がロックを握っている間、失敗にせず待つ秒数
+DEFAULT_BUSY_TIMEOUT = 5.0
+# 変更通知の購読者がいる間、他のプロセスのコミットを確認する間隔（秒）
+DEFAULT_CHANGE_POLL_INTERVAL = 0.1
+
+# 一括インポートで executemany にまとめる行数
+IMPORT_CHUNK_SIZE = 500
+# 一括インポートの結果に含める行エラーの上限
+MAX_IMPORT_ERRORS = 100
+
+_MEMBER_INSERT_SQL = (
+    "INSERT INTO members (name, part, position, contact_phone, contact_email, contact_note)"
+    " VALUES (?, ?, ?, ?, ?, ?)"
+)
+_MATERIAL_INSERT_SQL = "INSERT INTO materials (name, part, quantity) VALUES (?, ?, ?)"
+_TASK_INSERT_SQL = (
+    "INSERT INTO tasks (schedule_id, name, stage, start_time, end_time, location, status, note)"
+    " VALUES (?, ?, ?, ?, ?, ?, ?, ?)"
+)
+
+# 条件付き GET のバージョン管理に使うスコープ名
+MEMBERS_SCOPE = "members"
+MATERIALS_SCOPE = "materials"
+SCHEDULES_SCOPE = "schedules"
+TASKS_SCOPE = "tasks"
+
+# バージョンを数える単位（スコープ名と、スケジュール単位の場合はその ID）
+VersionKey = tuple[str, int | None]
+
+# スコープごとのバージョンと ETag の世代。同じデータベースを開くすべてのプロセスで共有する。
+# バージョンはコミットごとに全スコープ共通の通し番号から採り、確認済みの番号より後の行だけを
+# 読み直せるようにする。スケジュール単位でないスコープの key は 0
+_VERSION_SCHEMA = """
+CREATE TABLE IF NOT EXISTS scope_versions (
+    scope TEXT NOT NULL,
+    key INTEGER NOT NULL,
+    version INTEGER NOT NULL,
+    PRIMARY KEY (scope, key)
+) WITHOUT ROWID;
+
+CREATE INDEX IF NOT EXISTS idx_scope_versions_version ON scope_versions(version);
+
+CREATE TABLE IF NOT EXISTS store_epoch (
+    id INTEGER PRIMARY KEY CHECK (id = 1),
+    epoch TEXT NOT NULL
+);
+
+CREATE TABLE IF NOT EXISTS scheduled_runs (
+    name TEXT PRIMARY KEY,
+    ran_at REAL NOT NULL
+);
+"""
+
+# 一覧のフィルタと並び順を支えるインデックス。
+# フィルタは lower(列) = lower(?) で比較するため、同じ式のインデックスを張る。
+# タスクは schedule_id を先頭にした複合インデックスで絞り込みと start_time 順の並びを兼ねる。
+# 場所の索引は重なりの検出で、変更のあった場所のタスクだけを読み直すために使う。
+_INDEX_SCHEMA = """
+DROP INDEX IF EXISTS idx_tasks_schedule;
+CREATE INDEX IF NOT EXISTS idx_members_part ON members(lower(part), id);
+CREATE INDEX IF NOT EXISTS idx_materials_part ON materials(lower(part), id);
+CREATE INDEX IF NOT EXISTS idx_schedules_event_date ON schedules(event_date, id);
+CREATE INDEX IF NOT EXISTS idx_tasks_schedule_start ON tasks(schedule_id, start_time, id);
+CREATE INDEX IF NOT EXISTS idx_tasks_schedule_stage
+    ON tasks(schedule_id, lower(stage), start_time, id);
+CREATE INDEX IF NOT EXISTS idx_tasks_schedule_status ON tasks(schedule_id, status, start_time, id);
+CREATE INDEX IF NOT EXISTS idx_tasks_schedule_location
+    ON tasks(schedule_id, location, start_time, id);
+"""
+
+# 一覧の SELECT 句。JSON 高速経路では同じ行を SQLite 側で JSON に変換する
+_MEMBER_COLUMNS = "id, name, part, position, contact_phone, contact_email, contact_note"
+_MATERIAL_COLUMNS = "id, name, part, quantity"
+_SCHEDULE_COLUMNS = "id, name, event_date"
+_TASK_COLUMNS = "id, schedule_id, name, stage, start_time, end_time, location, status, note"
+
+
+def _json_datetime(column: str) -> str:
+    """保存済みの ISO 8601 文字列を Pydantic の出力形式に合わせる（UTC は ``Z`` で表す）。"""
+
+    return (
+        f"CASE WHEN {column} LIKE '%+00:00'"
+        f" THEN substr({column}, 1, length({column}) - 6) || 'Z' ELSE {column} END"
+    )
+
+
+# キーの順序はレスポンスモデルのフィールド定義順（継承元のフィールドが先）に合わせる
+_MEMBER_JSON_COLUMNS = (
+    "id, json_object('name', name, 'part', part, 'position', position,"
+    " 'contact', json_object('phone', contact_phone, 'email', contact_email,"
+    " 'note', contact_note), 'id', id) AS json"
+)
+_MATERIAL_JSON_COLUMNS = (
+    "id, json_object('name', name, 'part', part, 'quantity', quantity, 'id', id) AS json"
+)
+_SCHEDULE_JSON_COLUMNS = "id, json_object('name', name, 'event_date', event_date, 'id', id) AS json"
+_TASK_JSON_COLUMNS = (
+    "id, json_object('name', name, 'stage', stage,"
+    f" 'start_time', {_json_datetime('start_time')},"
+    f" 'end_time', {_json_datetime('end_time')},"
+    " 'location', location, 'status', status, 'note', note,"
+    " 'id', id, 'schedule_id', schedule_id) AS json"
+)
+
+# JSON 高速経路の 1 行（ID と、その行をレスポンスと同じ形に直列化した JSON）
+JsonRow = tuple[int, str]
+
+
+def _returning_row(conn: sqlite3.Connection, sql: str, params: Iterable[object]) -> Any:
+    """``RETURNING`` 付きの文を実行し、書き込んだ行（無ければ ``None``）を返す。
+
+    結果を読み切って文を完了させ、コミット時に実行中の文が残らないようにする。
+    """
+
+    rows = conn.execute(sql, tuple(params)).fetchall()
+    return rows[0] if rows else None
+
+
+def _json_row(row: sqlite3.Row) -> JsonRow:
+    return (row["id"], row["json"])
+
+
+def _row_to_change_event(row: sqlite3.Row) -> ChangeEvent:
+    return ChangeEvent(
+        entity=row["entity"], id=row["entity_id"], action=row["action"], version=row["version"]
+    )
+
+
+# 変更履歴を記録するテーブルと、同期 API で使うエンティティ名の対応
+_TRACKED_TABLES: tuple[tuple[str, str], ...] = (
+    ("members", "member"),
+    ("materials", "material"),
+    ("schedules", "schedule"),
+    ("tasks", "task"),
+)
+
+
+def _change_log_schema() -> str:
+    """変更履歴テーブルと、各テーブルの更新を記録するトリガーの DDL を組み立てる。
+
+    エンティティごとに最新の変更だけを残し、削除は ``action = 'delete'`` の墓標として保持する。
+    ``INSERT OR REPLACE`` で古い行を置き換えるため、``version`` は常に単調増加する。
+    """
+
+    statements = [
+        """
+        CREATE TABLE IF NOT EXISTS change_log (
+            version INTEGER PRIMARY KEY AUTOINCREMENT,
+            entity TEXT NOT NULL,
+            entity_id INTEGER NOT NULL,
+            action TEXT NOT NULL CHECK(action IN ('upsert', 'delete'))
+        );
+
+        CREATE UNIQUE INDEX IF NOT EXISTS idx_change_log_entity
+            ON change_log(entity, entity_id);
+        """
+    ]
+    for table, entity in _TRACKED_TABLES:
+        for event, row, action in (
+            ("INSERT", "NEW", "upsert"),
+            ("UPDATE", "NEW", "upsert"),
+            ("DELETE", "OLD", "delete"),
+        ):
+            statements.append(
+                f"""
+                CREATE TRIGGER IF NOT EXISTS trg_{table}_{event.lower()}_log
+                AFTER {event} ON {table}
+                BEGIN
+                    INSERT OR REPLACE INTO change_log (entity, entity_id, action)
+                    VALUES ('{entity}', {row}.id, '{action}');
+                END;
+                """
+            )
+    return "\n".join(statements)
+
+
+# 実施時間帯の R*Tree の時刻座標の原点（2000-01-01 のユリウス日）。座標はこの原点からの分
+_INTERVAL_ORIGIN_JULIAN_DAY = 2451544.5
+
+
+def _interval_minutes(value: str) -> str:
+    """日時の式を R*Tree の時刻座標（原点からの分）に変換する式を返す。
+
+    タイムゾーンなしの日時は SQLite の規則どおり UTC として扱う（比較の両辺で同じ規則になる）。
+    """
+
+    return f"(julianday({value}) - {_INTERVAL_ORIGIN_JULIAN_DAY}) * 1440"
+
+
+def _interval_row(row: str) -> str:
+    """``task_intervals`` の 1 行の値（スケジュール ID の範囲と時刻の範囲）を組み立てる。
+
+    終了が開始より前のタスクも登録できるよう、小さい方を下限にする。
+    """
+
+    start, end = _interval_minutes(f"{row}.start_time"), _interval_minutes(f"{row}.end_time")
+    return f"{row}.schedule_id, {row}.schedule_id, min({start}, {end}), max({start}, {end})"
+
+
+# タスクの実施時間帯の R*Tree と、tasks の変更に追従させるトリガー。
+# 次元はスケジュール ID と時刻。座標は 32 ビット浮動小数点に外側へ丸めて保存される
+# （分単位の誤差がある）ため候補の絞り込みにだけ使い、境界は tasks の列で判定し直す。
+_INTERVAL_SCHEMA = f"""
+CREATE VIRTUAL TABLE IF NOT EXISTS task_intervals
+    USING rtree(task_id, schedule_lo, schedule_hi, starts_at, ends_at);
+
+CREATE TRIGGER IF NOT EXISTS trg_tasks_insert_interval
+AFTER INSERT ON tasks
+BEGIN
+    INSERT INTO task_intervals VALUES (NEW.id, {_interval_row("NEW")});
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_tasks_update_interval
+AFTER UPDATE OF schedule_id, start_time, end_time ON tasks
+BEGIN
+    INSERT OR REPLACE INTO task_intervals VALUES (NEW.id, {_interval_row("NEW")});
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_tasks_delete_interval
+AFTER DELETE ON tasks
+BEGIN
+    DELETE FROM task_intervals WHERE task_id = OLD.id;
+END;
+"""
+
+
+# 全文検索の対象（テーブル, エンティティ名, 種類の番号, 名前の式, その他の項目を連結する式,
+# 索引に関わる列）。式の {row} は NEW／OLD などの行の別名に置き換える
+_SEARCH_SOURCES: tuple[tuple[str, str, int, str, str, str], ...] = (
+    (
+        "members",
+        "member",
+        1,
+        "{row}.name",
+        "{row}.part || ' ' || {row}.position || COALESCE(' ' || {row}.contact_phone, '')"
+        " || COALESCE(' ' || {row}.contact_email, '') || COALESCE(' ' || {row}.contact_note, '')",
+        "name, part, position, contact_phone, contact_email, contact_note",
+    ),
+    ("materials", "material", 2, "{row}.name", "{row}.part", "name, part"),
+    (
+        "tasks",
+        "task",
+        3,
+        "{row}.name",
+        "{row}.stage || COALESCE(' ' || {row}.location, '') || COALESCE(' ' || {row}.note, '')",
+        "name, stage, location, note",
+    ),
+)
+# search_index の rowid は「元の行の ID × 4 + 種類の番号」。行の ID から索引の行を直接引ける
+_SEARCH_KIND_BITS = 2
+_SEARCH_ENTITIES = {kind: entity for _, entity, kind, *_ in _SEARCH_SOURCES}
+
+
+def _search_row(table: str, row: str) -> tuple[str, str, str]:
+    """``search_index`` に書き込む (rowid, name, detail) の式を返す。"""
+
+    _, _, kind, name, detail, _ = next(source for source in _SEARCH_SOURCES if source[0] == table)
+    return (
+        f"({row}.id << {_SEARCH_KIND_BITS}) | {kind}",
+        name.format(row=row),
+        detail.format(row=row),
+    )
+
+
+# search_pending にこのキーがある間は、トリガーが索引を直接更新せずに変更のあった行を記録する
+_SEARCH_DEFER_KEY = 0
+_SEARCH_DEFERRED = f"EXISTS (SELECT 1 FROM search_pending WHERE key = {_SEARCH_DEFER_KEY})"
+
+
+def _search_schema() -> str:
+    """全文検索の FTS5 テーブルと、各テーブルの変更に追従させるトリガーの DDL を組み立てる。
+
+    trigram トークナイザーは 3 文字ずつの部分文字列を索引にするため、分かち書きの無い日本語でも
+    名前の途中から一致する。メンバー・資材・タスクを 1 つの表にまとめ、関連度を共通の尺度で比べる。
+
+    FTS5 はトリガーからの書き込みのたびに書き込み途中の索引をディスクへ書き出すため、一括
+    インポートなど多数の行を書き込む間は索引の更新を後回しにする（``_SEARCH_DEFERRED`` の間は
+    行のキーを ``search_pending`` に記録し、``_SEARCH_FLUSH`` でまとめて反映する）。
+    """
+
+    statements = [
+        """
+        CREATE VIRTUAL TABLE IF NOT EXISTS search_index
+            USING fts5(name, detail, tokenize = 'trigram');
+
+        CREATE TABLE IF NOT EXISTS search_pending (key INTEGER PRIMARY KEY);
+        """
+    ]
+    for table, _, _, _, _, columns in _SEARCH_SOURCES:
+        rowid, name, detail = _search_row(table, "NEW")
+        old_rowid = _search_row(table, "OLD")[0]
+        values = f"{rowid}, {name}, {detail}"
+        for event, of_columns, key, action in (
+            (
+                "INSERT",
+                "",
+                rowid,
+                f"INSERT INTO search_index (rowid, name, detail) VALUES ({values})",
+            ),
+            (
+                "UPDATE",
+                f" OF {columns}",
+                rowid,
+                f"UPDATE search_index SET name = {name}, detail = {detail} WHERE rowid = {rowid}",
+            ),
+            ("DELETE", "", old_rowid, f"DELETE FROM search_index WHERE rowid = {old_rowid}"),
+        ):
+            trigger = f"trg_{table}_{event.lower()}_search"
+            statements.append(
+                f"""
+                CREATE TRIGGER IF NOT EXISTS {trigger}
+                AFTER {event}{of_columns} ON {table} WHEN NOT {_SEARCH_DEFERRED}
+                BEGIN
+                    {action};
+                END;
+
+                CREATE TRIGGER IF NOT EXISTS {trigger}_deferred
+                AFTER {event}{of_columns} ON {table} WHEN {_SEARCH_DEFERRED}
+                BEGIN
+                    INSERT OR IGNORE INTO search_pending VALUES ({key});
+                END;
+                """
+            )
+    return "\n".join(statements)
+
+
+def _search_flush() -> tuple[str, ...]:
+    """``search_pending`` に記録された行を索引に反映する文（古い行を消し、現在の行を入れ直す）。"""
+
+    statements = ["DELETE FROM search_index WHERE rowid IN (SELECT key FROM search_pending)"]
+    for table, _, kind, *_ in _SEARCH_SOURCES:
+        rowid, name, detail = _search_row(table, table)
+        statements.append(
+            f"INSERT INTO search_index (rowid, name, detail) SELECT {rowid}, {name}, {detail}"
+            f" FROM search_pending JOIN {table}"
+            f" ON {table}.id = search_pending.key >> {_SEARCH_KIND_BITS}"
+            f" WHERE search_pending.key & {(1 << _SEARCH_KIND_BITS) - 1} = {kind}"
+        )
+    # 後回しの指定（_SEARCH_DEFER_KEY）もここで消える
+    statements.append("DELETE FROM search_pending")
+    return tuple(statements)
+
+
+_SEARCH_FLUSH = _search_flush()
+
+
+# trigram の索引で探せる検索語の最短の文字数。より短い語は索引を使わず部分一致で絞り込む
+_TRIGRAM_LENGTH = 3
+# 検索結果の抜粋で一致箇所を囲む文字列と、省略記号・抜粋の長さ（trigram では文字数の目安）
+SEARCH_MARK_OPEN = "<mark>"
+SEARCH_MARK_CLOSE = "</mark>"
+SEARCH_ELLIPSIS = "…"
+SEARCH_SNIPPET_LENGTH = 24
+# 関連度（bm25）の計算で名前の一致をその他の項目より重く扱う倍率
+_SEARCH_NAME_WEIGHT = 10.0
+
+
+def _position(column: str, term: str) -> str:
+    """``column`` の中の検索語の位置（無ければ 0）を求める式。検索語は 1 つのパラメーターで渡す。
+
+    英字を含む語だけ ``lower()`` で大文字・小文字をそろえる（SQLite の ``lower()`` は ASCII のみ
+    変換する）。日本語や数字の語は列をそのまま比べ、全件を調べる場合の変換のコストを省く。
+    """
+
+    if term.lower() == term.upper():
+        return f"instr({column}, ?)"
+    return f"instr(lower({column}), lower(?))"
+
+
+def _fts_phrase(term: str) -> str:
+    """検索語を FTS5 のフレーズ（演算子として解釈されない文字列）にする。"""
+
+    return '"' + term.replace('"', '""') + '"'
+
+
+def _highlight(text: str, term: str) -> str:
+    """``term`` の最初の出現を囲み、前後を抜粋の長さに切り詰める（索引を使わない検索用）。"""
+
+    position = text.lower().find(term.lower())
+    if position < 0:
+        return text[:SEARCH_SNIPPET_LENGTH] + (
+            SEARCH_ELLIPSIS if len(text) > SEARCH_SNIPPET_LENGTH else ""
+        )
+    end = position + len(term)
+    margin = max(0, (SEARCH_SNIPPET_LENGTH - len(term)) // 2)
+    start = max(0, position - margin)
+    stop = min(len(text), end + margin)
+    return (
+        (SEARCH_ELLIPSIS if start > 0 else "")
+        + text[start:position]
+        + SEARCH_MARK_OPEN
+        + text[position:end]
+        + SEARCH_MARK_CLOSE
+        + text[end:stop]
+        + (SEARCH_ELLIPSIS if stop < len(text) else "")
+    )
+
+
+class _Aggregate(NamedTuple):
+    """ダッシュボードの集計表 1 つの定義。
+
+    ``measures`` は集計値の列と元の行の値の式（``{row}`` は NEW／OLD などの行の別名に置き換える）。
+    集計値は元の行の値の合計で、先頭は行数（1 の合計）とし、0 になったグループは集計表から消す。
+    ``columns`` は集計に関わる元のテーブルの列。
+    """
+
+    summary: str
+    table: str
+    groups: tuple[tuple[str, str], ...]
+    measures: tuple[tuple[str, str], ...]
+    columns: str
+
+    @property
+    def keys(self) -> str:
+        return ", ".join(name for name, _ in self.groups)
+
+    def values(self, row: str) -> tuple[str, ...]:
+        """行 ``row`` のグループの値と集計値の式。"""
+
+        return (
+            *(f"{row}.{name}" for name, _ in self.groups),
+            *(expression.format(row=row) for _, expression in self.measures),
+        )
+
+
+_AGGREGATES = (
+    _Aggregate("member_part_counts", "members", (("part", "TEXT"),), (("members", "1"),), "part"),
+    _Aggregate(
+        "material_part_totals",
+        "materials",
+        (("part", "TEXT"),),
+        (("materials", "1"), ("quantity", "{row}.quantity")),
+        "part, quantity",
+    ),
+    _Aggregate(
+        "task_status_counts",
+        "tasks",
+        (("schedule_id", "INTEGER"), ("stage", "TEXT"), ("status", "TEXT")),
+        (("tasks", "1"),),
+        "schedule_id, stage, status",
+    ),
 )
+_AGGREGATES_BY_SUMMARY = {aggregate.summary: aggregate for aggregate in _AGGREGATES}
+
+
+def _aggregate_triggers(aggregate: _Aggregate) -> str:
+    """元のテーブルの INSERT／UPDATE／DELETE で集計表を差分更新するトリガーの DDL。
+
+    UPDATE では古い行の分を引いてから新しい行の分を足す。
+    """
+
+    summary, table, groups, measures, columns = aggregate
+    count = measures[0][0]
+    all_columns = ", ".join((*(name for name, _ in groups), *(name for name, _ in measures)))
+    increments = ", ".join(f"{name} = {name} + excluded.{name}" for name, _ in measures)
+
+    def add(row: str) -> str:
+        return (
+            f"INSERT INTO {summary} ({all_columns}) VALUES ({', '.join(aggregate.values(row))})"
+            f" ON CONFLICT ({aggregate.keys}) DO UPDATE SET {increments};"
+        )
+
+    def remove(row: str) -> str:
+        decrements = ", ".join(
+            f"{name} = {name} - {expression.format(row=row)}" for name, expression in measures
+        )
+        where = " AND ".join(f"{name} = {row}.{name}" for name, _ in groups)
+        return (
+            f"UPDATE {summary} SET {decrements} WHERE {where};"
+            f" DELETE FROM {summary} WHERE {where} AND {count} = 0;"
+        )
+
+    return "\n".join(
+        f"""
+        CREATE TRIGGER IF NOT EXISTS trg_{table}_{event.lower()}_{summary}
+        AFTER {event}{of_columns} ON {table}
+        BEGIN
+            {body}
+        END;
+        """
+        for event, of_columns, body in (
+            ("INSERT", "", add("NEW")),
+            ("UPDATE", f" OF {columns}", remove("OLD") + " " + add("NEW")),
+            ("DELETE", "", remove("OLD")),
+        )
+    )
+
+
+def _aggregate_schema() -> str:
+    """ダッシュボードの集計表と、元のテーブルの変更で差分更新するトリガーの DDL を組み立てる。
+
+    集計表はグループごとに 1 行なので、ダッシュボードの読み出しは元の行数ではなくグループ数に
+    比例する。
+    """
+
+    statements = []
+    for aggregate in _AGGREGATES:
+        columns = ", ".join(
+            (
+                *(f"{name} {kind} NOT NULL" for name, kind in aggregate.groups),
+                *(f"{name} INTEGER NOT NULL" for name, _ in aggregate.measures),
+            )
+        )
+        statements.append(
+            f"CREATE TABLE IF NOT EXISTS {aggregate.summary}"
+            f" ({columns}, PRIMARY KEY ({aggregate.keys})) WITHOUT ROWID;"
+        )
+        statements.append(_aggregate_triggers(aggregate))
+    return "\n".join(statements)
+
+
+def _aggregate_rebuild(aggregate: _Aggregate) -> str:
+    """元のテーブルを集計し直し、集計表と同じ列の並びで返す SELECT。"""
+
+    table = aggregate.table
+    totals = ", ".join(
+        f"sum({expression.format(row=table)})" for _, expression in aggregate.measures
+    )
+    return f"SELECT {aggregate.keys}, {totals} FROM {table} GROUP BY {aggregate.keys}"
+
+
+class BackupCopy(NamedTuple):
+    """``backup_online`` で写したページ数・ステップ数と、1 ステップでロックを保持した最長の秒数。"""
+
+    pages: int
+    steps: int
+    max_lock_hold: float
+
+
+class TaskWindow(NamedTuple):
+    """実施時間帯によるタスクの絞り込み。
+
+    ``start`` 以降・``end`` より前のどこかで実施中（開始 < ``end`` かつ 終了 > ``start``）の
+    タスクを選ぶ。``start`` と ``end`` が同じ場合は、その時点で実施中（開始 <= 時点 < 終了）の
+    タスクを選ぶ。どちらかが ``None`` の場合はその側を制限しない。
+    """
+
+    start: datetime | None = None
+    end: datetime | None = None
+
+    @classmethod
+    def at(cls, moment: datetime) -> TaskWindow:
+        return cls(moment, moment)
+
+    @property
+    def is_instant(self) -> bool:
+        return (
+            self.start is not None
+            and self.end is not None
+            and utc_instant(self.start) == utc_instant(self.end)
+        )
+
+    def validate(self) -> None:
+        if (
+            self.start is not None
+            and self.end is not None
+            and utc_instant(self.start) > utc_instant(self.end)
+        ):
+            raise ValueError("from には to 以前の日時を指定してください")
+
+
+# 問い合わせの種類の判定に使う、文が対象とするテーブル名
+_QUERY_TABLE = re.compile(r"\b(?:FROM|INTO|UPDATE)\s+(\w+)", re.IGNORECASE)
+
+
+@lru_cache(maxsize=512)
+def _query_kind(sql: str) -> str:
+    """SQL 文を ``select_tasks`` のような「操作_テーブル」の種類に分類する。
+
+    ``BEGIN`` や ``PRAGMA`` などテーブルを持たない文は先頭のキーワードだけを返す。
+    """
+
+    verb = sql.lstrip().split(None, 1)[0].lower() if sql.strip() else "empty"
+    if verb in ("select", "insert", "update", "delete", "with"):
+        match = _QUERY_TABLE.search(sql)
+        if match is not None:
+            return f"{verb}_{match.group(1).lower()}"
+    return verb
+
+
+# 呼び出し元の判定で飛ばす、計測付きの接続・カーソルのメソッド名
+_TIMED_METHODS = frozenset({"execute", "executemany", "fetchone", "fetchall"})
+
+
+def _caller_method() -> str:
+    """呼び出し元のうち、最も内側にある ``SQLiteStore`` の公開メソッド名を返す（トレース用）。
+
+    公開メソッドが見つからない場合（内部ヘルパーを直接呼んだ場合）は最初の内部関数名を返す。
+    """
+
+    frame = sys._getframe(1)
+    found = "<unknown>"
+    while frame is not None:
+        if frame.f_globals.get("__name__") == __name__:
+            name = frame.f_code.co_name
+            if name[0] not in "_<" and name not in _TIMED_METHODS:
+                return name
+            if found == "<unknown>":
+                found = name
+        frame = frame.f_back
+    return found
+
+
+class _TimedCursor(sqlite3.Cursor):
+    """文の実行から結果の読み出しまでの時間を、問い合わせの種類ごとに記録するカーソル。
+
+    行を返す文は ``fetchone``／``fetchall`` が終わった時点で実行時間と合算して 1 回記録する。
+    トレースが有効なら、閾値を超えた文を ``StoreTracer`` に渡す。
+    """
+
+    # (ヒストグラム, ここまでの経過秒, SQL, パラメーター)
+    _pending: tuple[Any, float, str, Any] | None = None
+
+    def execute(self, sql: str, parameters: Any = (), /) -> _TimedCursor:
+        histogram = self.connection.query_metrics.labels(_query_kind(sql))  # type: ignore[attr-defined]
+        started = time.perf_counter()
+        try:
+            super().execute(sql, parameters)
+        except BaseException:
+            histogram.observe(time.perf_counter() - started)
+            raise
+        elapsed = time.perf_counter() - started
+        if self.description is None:
+            self._observe(histogram, elapsed, sql, parameters)
+        else:
+            self._pending = (histogram, elapsed, sql, parameters)
+        return self
+
+    def executemany(self, sql: str, parameters: Any, /) -> _TimedCursor:
+        histogram = self.connection.query_metrics.labels(_query_kind(sql))  # type: ignore[attr-defined]
+        started = time.perf_counter()
+        try:
+            super().executemany(sql, parameters)
+        except BaseException:
+            histogram.observe(time.perf_counter() - started)
+            raise
+        self._observe(histogram, time.perf_counter() - started, sql, None, many=True)
+        return self
+
+    def fetchone(self) -> Any:
+        started = time.perf_counter()
+        row = super().fetchone()
+        self._finish(time.perf_counter() - started)
+        return row
+
+    def fetchall(self) -> list[Any]:
+        started = time.perf_counter()
+        rows = super().fetchall()
+        self._finish(time.perf_counter() - started)
+        return rows
+
+    def _finish(self, elapsed: float) -> None:
+        pending = self._pending
+        if pending is not None:
+            self._pending = None
+            histogram, executed, sql, parameters = pending
+            self._observe(histogram, executed + elapsed, sql, parameters)
+
+    def _observe(
+        self, histogram: Any, seconds: float, sql: str, parameters: Any, *, many: bool = False
+    ) -> None:
+        histogram.observe(seconds)
+        tracer: StoreTracer = self.connection.tracer  # type: ignore[attr-defined]
+        threshold = tracer.slow_query_seconds
+        if threshold is not None and seconds >= threshold:
+            tracer.record_slow_query(
+                self.connection, _caller_method(), sql, parameters, seconds, many=many
+            )
+
+
+class _TimedConnection(sqlite3.Connection):
+    """``execute``／``executemany`` を ``_TimedCursor`` で実行する接続。"""
+
+    query_metrics: HistogramFamily
+    tracer: StoreTracer
+
+    def execute(self, sql: str, parameters: Any = (), /) -> _TimedCursor:
+        return self.cursor(_TimedCursor).execute(sql, parameters)
+
+    def executemany(self, sql: str, parameters: Any, /) -> _TimedCursor:
+        return self.cursor(_TimedCursor).executemany(sql, parameters)
+
+
+def _connect(
+    database: str, query_metrics: HistogramFamily, tracer: StoreTracer, busy_timeout: float
+) -> sqlite3.Connection:
+    """SQL の実行時間を ``query_metrics`` に、遅い SQL を ``tracer`` に記録する接続を開く。
+
+    他の接続がロックを握っている場合は ``busy_timeout`` 秒まで待ってから失敗する。
+    """
+
+    conn = sqlite3.connect(
+        database, timeout=busy_timeout, check_same_thread=False, factory=_TimedConnection
+    )
+    conn.query_metrics = query_metrics
+    conn.tracer = tracer
+    # クエリ結果を辞書風に扱えるようにする
+    conn.row_factory = sqlite3.Row
+    return conn
+
+
+def _run_script(conn: sqlite3.Connection, script: str) -> None:
+    """複数の文を 1 文ずつ実行する。
+
+    ``executescript`` と違って実行前にコミットしないため、実行中のトランザクションの中で使える。
+    """
+
+    statement = ""
+    for line in script.splitlines(keepends=True):
+        statement += line
+        if sqlite3.complete_statement(statement):
+            conn.execute(statement)
+            statement = ""
+    if statement.strip():
+        conn.execute(statement)
+
+
+class _ReaderPool:
+    """WAL モードの読み取り専用接続を貸し出す上限付きプール。
+
+    接続は必要になった時点で作成し、同時に貸し出せる数をセマフォで制限する。
+    """
+
+    def __init__(
+        self,
+        database: str,
+        size: int,
+        query_metrics: HistogramFamily,
+        tracer: StoreTracer,
+        busy_timeout: float,
+    ) -> None:
+        if size < 1:
+            raise ValueError("reader_pool_size は 1 以上を指定してください")
+        self._database = database
+        self._query_metrics = query_metrics
+        self._tracer = tracer
+        self._busy_timeout = busy_timeout
+        self._size = size
+        self._slots = BoundedSemaphore(size)
+        self._idle: LifoQueue[sqlite3.Connection] = LifoQueue()
+        self._opened: list[sqlite3.Connection] = []
+        self._guard = Lock()
+
+    def _open(self) -> sqlite3.Connection:
+        conn = _connect(self._database, self._query_metrics, self._tracer, self._busy_timeout)
+        # 誤って書き込みが紛れ込んでも失敗するようにする
+        conn.execute("PRAGMA query_only = ON")
+        with self._guard:
+            self._opened.append(conn)
+        return conn
+
+    def acquire(self) -> sqlite3.Connection:
+        """空いている接続を取得する。上限に達している場合は返却を待つ。"""
+
+        self._slots.acquire()
+        try:
+            return self._idle.get_nowait()
+        except Empty:
+            pass
+        try:
+            return self._open()
+        except BaseException:
+            self._slots.release()
+            raise
+
+    def release(self, conn: sqlite3.Connection) -> None:
+        """接続をプールへ返却する。"""
+
+        self._idle.put(conn)
+        self._slots.release()
+
+    def close(self) -> None:
+        """作成済みの接続をすべてクローズする。"""
+
+        with self._guard:
+            for conn in self._opened:
+                conn.close()
+            self._opened.clear()
+
+
+class _BackupRestartedError(Exception):
+    """他の接続の書き込みで SQLite がバックアップを最初からやり直した。"""
+
+
+class _ReadCache:
+    """書き込みバージョンで無効化する LRU キャッシュ。
+
+    各エントリは読み出し直前のバージョンと共に保存し、取得時にバージョンが進んでいれば
+    古いものとして捨てる。読み出し中に書き込みがコミットされても、古い結果が新しい
+    バージョンで保存されることはない。
+    """
+
+    def __init__(self, max_size: int) -> None:
+        if max_size < 1:
+            raise ValueError("cache_size は 1 以上を指定してください")
+        self._max_size = max_size
+        self._entries: OrderedDict[Hashable, tuple[str, Any]] = OrderedDict()
+        self._guard = Lock()
+        self._hits = 0
+        self._misses = 0
+        self._evictions = 0
+
+    def get(self, key: Hashable, version: str) -> tuple[bool, Any]:
+        """``(ヒットしたか, 値)`` を返す。"""
+
+        with self._guard:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] == version:
+                self._entries.move_to_end(key)
+                self._hits += 1
+                return True, entry[1]
+            if entry is not None:
+                del self._entries[key]
+            self._misses += 1
+            return False, None
+
+    def put(self, key: Hashable, version: str, value: Any) -> None:
+        with self._guard:
+            self._entries[key] = (version, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self._max_size:
+                self._entries.popitem(last=False)
+                self._evictions += 1
+
+    def clear(self) -> None:
+        with self._guard:
+            self._entries.clear()
+
+    def stats(self) -> CacheStats:
+        with self._guard:
+            return CacheStats(
+                hits=self._hits,
+                misses=self._misses,
+                evictions=self._evictions,
+                size=len(self._entries),
+                max_size=self._max_size,
+            )
+
+
+def _id_key(row: sqlite3.Row) -> PageCursor:
+    return (row["id"],)
+
+
+def _validation_detail(exc: ValidationError) -> list[dict[str, object]]:
+    """ValidationError を JSON に変換できるエラー一覧へ整形する。"""
+
+    return json.loads(exc.json(include_url=False))
 
 
 class SQLiteStore:
-    """SQLite3 を利用したシンプルなストア実装。"""
+    """SQLite3 を利用したシンプルなストア実装。
+
+    ``concurrent_reads=True`` を指定すると WAL モードで動作し、``list_*``/``get_*`` は
+    読み取り専用接続のプールから並列に処理される。書き込みは従来通り単一の接続と
+    ロックで直列化する。
+
+    ``cache_size`` に 1 以上を指定すると ``list_*``/``get_*`` の結果をその件数まで
+    メモリに保持する。キャッシュから返すモデルは共有されるため、呼び出し側で変更しないこと。
+
+    ``trace`` を指定すると、閾値を超えた SQL とロックの取得履歴を記録する（``configure_tracing``
+    で後から切り替えることもできる）。
 
-    def __init__(self, database: str | Path) -> None:
+    同じファイルを複数のプロセス（``uvicorn --workers``）で開いてよい。書き込みは
+    ``BEGIN IMMEDIATE`` で始め、他のプロセスの書き込み中は ``busy_timeout`` 秒まで待つ。
+    ETag のバージョンはデータベースに置いて共有し、``PRAGMA data_version`` で他のプロセスの
+    コミットに気付いた時点で読み直すため、キャッシュ・ETag・重なりの計算結果・変更通知は
+    どのプロセスの書き込みにも追従する。
+    """
+
+    def __init__(
+        self,
+        database: str | Path,
+        *,
+        concurrent_reads: bool = False,
+        reader_pool_size: int = DEFAULT_READER_POOL_SIZE,
+        cache_size: int = DEFAULT_CACHE_SIZE,
+        trace: TraceSettings | None = None,
+        busy_timeout: float = DEFAULT_BUSY_TIMEOUT,
+    ) -> None:
         self._database = str(database)
-        # 複数スレッドから同時にアクセスされても整合性を保つためのロック
+        self._busy_timeout = busy_timeout
+        if concurrent_reads and self._database == ":memory:":
+            raise ValueError("インメモリデータベースでは concurrent_reads を利用できません")
+        # ロック待ち・保持時間と SQL の実行時間。``GET /metrics`` で公開する
+        self.metrics = StoreMetrics()
+        self._lock_waits = self.metrics.lock_wait.labels()
+        self._lock_holds = self.metrics.lock_hold.labels()
+        # 遅い SQL とロックの取得履歴の記録（既定では無効）
+        self.tracer = StoreTracer()
+        if trace is not None:
+            self.tracer.configure(trace)
+        # 書き込み（既定モードでは読み取りも）を直列化するためのロック
         self._lock = Lock()
-        self._conn: sqlite3.Connection | None = sqlite3.connect(
-            self._database, check_same_thread=False
-        )
-        # クエリ結果を辞書風に扱えるようにする
-        self._conn.row_factory = sqlite3.Row
-        # 外部キー制約を有効化する
-        self._conn.execute("PRAGMA foreign_keys = ON")
+        self._conn: sqlite3.Connection | None = self._open_writer(wal=concurrent_reads)
+        self._readers: _ReaderPool | None = None
+        self._reader_pool_size = reader_pool_size
+        self._aio: AsyncSQLiteStore | None = None
+        self._aio_guard = Lock()
+        self._backups: BackupScheduler | None = None
+        # テーブル（またはスケジュール）ごとのバージョン（``scope_versions`` の写し）。ETag に使う
+        self._versions: dict[VersionKey, int] = {}
+        # 読み込み済みのバージョンの最大値と、最後に確認した ``PRAGMA data_version``
+        self._version_seen = 0
+        self._data_version: int | None = None
+        # 他のプロセスのコミットを確認するための接続（インメモリでは共有する相手がいないため無し）
+        # と、バージョンの写しを保護するロック
+        self._watch: sqlite3.Connection | None = None
+        self._version_guard = Lock()
+        self._watcher: Thread | None = None
+        self._watch_stopped = Event()
+        # コミット待ちの書き込みが触れたスコープ
+        self._pending_touches: set[VersionKey] = set()
+        # 場所ごとのタスクの重なりの計算結果と、コミット待ちの書き込みで再計算が必要になったもの
+        self._conflicts = ConflictIndex()
+        self._pending_conflicts: list[ConflictChange] = []
+        # 書き込み中のトランザクションが全文検索の索引の更新を後回しにしているか
+        self._search_deferred = False
+        # 変更通知の配信先と、配信済みの変更履歴のバージョン（購読者がいない間は None）と
+        # その時点の世代
+        self.changes = ChangeHub()
+        self._published_version: int | None = None
+        self._published_epoch = ""
+        # 復元や reset の前後で ETag が衝突しないよう、データを丸ごと入れ替えるたびに変える世代
+        # （``store_epoch``）
+        self._epoch = ""
+        # このプロセスで復元・reset した回数。バックアップ中の差し替えの検出に使う
+        self._restarts = 0
+        self._cache = _ReadCache(cache_size) if cache_size else None
+        if concurrent_reads:
+            self._readers = _ReaderPool(
+                self._database, reader_pool_size, self.metrics.query, self.tracer, busy_timeout
+            )
         self._init_schema()
+        if self._database == ":memory:":
+            self._epoch = self._read_epoch(self._connection())
+        else:
+            self._watch = sqlite3.connect(
+                self._database, timeout=busy_timeout, check_same_thread=False
+            )
+            self._watch.execute("PRAGMA query_only = ON")
+            with self._version_guard:
+                self._sync_versions()
+
+    @property
+    def concurrent_reads(self) -> bool:
+        """読み取り専用接続プールを使っているかどうか。"""
+
+        return self._readers is not None
+
+    @property
+    def aio(self) -> AsyncSQLiteStore:
+        """asyncio から利用するためのインターフェース。初回アクセス時に専用スレッドを用意する。"""
+
+        with self._aio_guard:
+            if self._aio is None:
+                self._aio = AsyncSQLiteStore(self, self._reader_pool_size)
+            return self._aio
+
+    @property
+    def backups(self) -> BackupScheduler:
+        """定期バックアップ。データベースと同じディレクトリの ``backups`` に保存する。"""
+
+        if self._database == ":memory:":
+            raise ValueError("インメモリデータベースはバックアップできません")
+        with self._aio_guard:
+            if self._backups is None:
+                database = Path(self._database)
+                self._backups = BackupScheduler(
+                    self, database.parent / BACKUP_DIRECTORY_NAME, prefix=database.stem
+                )
+            return self._backups
 
     # -- 内部ユーティリティ -------------------------------------------------
+    def _open_writer(self, *, wal: bool) -> sqlite3.Connection:
+        """書き込み（既定モードでは読み取りも）に使う接続を開く。"""
+
+        conn = _connect(self._database, self.metrics.query, self.tracer, self._busy_timeout)
+        # 外部キー制約を有効化する
+        conn.execute("PRAGMA foreign_keys = ON")
+        if wal:
+            # WAL では読み取りが書き込みを待たないため、同期は NORMAL で十分
+            conn.execute("PRAGMA journal_mode = WAL")
+            conn.execute("PRAGMA synchronous = NORMAL")
+        return conn
+
     def _connection(self) -> sqlite3.Connection:
         """閉じていない SQLite 接続を取得する。"""
 
@@ -51,113 +1086,507 @@ class SQLiteStore:
             raise RuntimeError("ストアは既にクローズされています")
         return conn
 
-    def _init_schema(self) -> None:
-        """必要なテーブルが無ければ作成する。"""
+    @contextmanager
+    def _read(self) -> Iterator[sqlite3.Connection]:
+        """読み取り用の接続を貸し出す。
 
+        既定モードでは書き込みと同じロックを取り、WAL モードではプールの接続を使う。
+        """
+
+        readers = self._readers
+        if readers is None:
+            with self._locked():
+                yield self._connection()
+            return
+        conn = readers.acquire()
+        try:
+            yield conn
+        finally:
+            readers.release(conn)
+
+    @contextmanager
+    def _locked(self) -> Iterator[None]:
+        """書き込みロックを取得し、取得までに待った時間と保持していた時間を記録する。"""
+
+        started = time.perf_counter()
         with self._lock:
+            acquired = time.perf_counter()
+            self._lock_waits.observe(acquired - started)
+            try:
+                yield
+            finally:
+                held = time.perf_counter() - acquired
+                self._lock_holds.observe(held)
+                if self.tracer.traces_locks:
+                    self.tracer.record_lock(_caller_method(), acquired - started, held)
+
+    @contextmanager
+    def _write(self) -> Iterator[sqlite3.Connection]:
+        """書き込み用の接続をロック付きで貸し出し、抜ける際にコミットする。
+
+        ブロック内で例外が起きた場合はロールバックしてから再送出する。
+        """
+
+        with self._locked():
             conn = self._connection()
-            conn.executescript(
-                """
-                CREATE TABLE IF NOT EXISTS members (
-                    id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    name TEXT NOT NULL,
-                    part TEXT NOT NULL,
-                    position TEXT NOT NULL,
-                    contact_phone TEXT,
-                    contact_email TEXT,
-                    contact_note TEXT
-                );
-
-                CREATE TABLE IF NOT EXISTS materials (
-                    id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    name TEXT NOT NULL,
-                    part TEXT NOT NULL,
-                    quantity INTEGER NOT NULL CHECK(quantity >= 0)
-                );
-
-                CREATE TABLE IF NOT EXISTS schedules (
-                    id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    name TEXT NOT NULL,
-                    event_date TEXT NOT NULL
-                );
-
-                CREATE TABLE IF NOT EXISTS tasks (
-                    id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    schedule_id INTEGER NOT NULL,
-                    name TEXT NOT NULL,
-                    stage TEXT NOT NULL,
-                    start_time TEXT NOT NULL,
-                    end_time TEXT NOT NULL,
-                    location TEXT,
-                    status TEXT NOT NULL,
-                    note TEXT,
-                    FOREIGN KEY(schedule_id) REFERENCES schedules(id) ON DELETE CASCADE
-                );
-
-                CREATE INDEX IF NOT EXISTS idx_tasks_schedule ON tasks(schedule_id);
-                """
+            try:
+                # 読んでから書く処理の途中で他のプロセスに先を越されないよう、最初に書き込みの
+                # ロックを取る（取れるまで busy_timeout 秒待つ）
+                conn.execute("BEGIN IMMEDIATE")
+                yield conn
+                if self._search_deferred:
+                    self._flush_search(conn)
+                versions = self._bump_versions(conn)
+            except BaseException:
+                conn.rollback()
+                self._search_deferred = False
+                self._pending_touches.clear()
+                self._pending_conflicts.clear()
+                raise
+            # conn.commit() と同じ動作だが、execute を通して実行時間の計測とトレースの対象にする
+            if conn.in_transaction:
+                conn.execute("COMMIT")
+            # コミット済みの変更だけをバージョンに反映する
+            self._apply_versions(versions)
+            changed = bool(self._pending_touches)
+            self._pending_touches.clear()
+            self._conflicts.invalidate(self._pending_conflicts)
+            self._pending_conflicts.clear()
+            if changed and self._published_version is not None:
+                self._publish_changes(conn)
+
+    def _bump_versions(self, conn: sqlite3.Connection) -> dict[VersionKey, int]:
+        """書き込み中のトランザクションが触れたスコープに次の通し番号を振り、振った値を返す。"""
+
+        if not self._pending_touches:
+            return {}
+        touched = json.dumps([[scope, key or 0] for scope, key in self._pending_touches])
+        # 触れたスコープをまとめて 1 文で書く（WHERE true は ON CONFLICT との構文の曖昧さを避ける）
+        version = conn.execute(
+            "INSERT INTO scope_versions (scope, key, version)"
+            " SELECT json_extract(value, '$[0]'), json_extract(value, '$[1]'),"
+            " (SELECT COALESCE(MAX(version), 0) + 1 FROM scope_versions)"
+            " FROM json_each(?) WHERE true"
+            " ON CONFLICT (scope, key) DO UPDATE SET version = excluded.version"
+            " RETURNING version",
+            (touched,),
+        ).fetchall()[0][0]
+        return dict.fromkeys(self._pending_touches, version)
+
+    def _apply_versions(self, versions: dict[VersionKey, int]) -> None:
+        """コミット済みのバージョンを写しに反映する。読み直しと前後しても古い値には戻さない。
+
+        確認済みの位置（``_version_seen``）は進めない。このプロセスの番号より前に他の
+        プロセスが振った番号をまだ読んでいない場合があり、進めると次の読み直しで飛ばされる。
+        """
+
+        with self._version_guard:
+            for key, version in versions.items():
+                if version > self._versions.get(key, 0):
+                    self._versions[key] = version
+
+    def _sync_versions(self) -> bool:
+        """他のプロセスのコミットがあればバージョンを読み直し、読み直したかどうかを返す。
+
+        ``PRAGMA data_version`` が変わっていなければデータベースの表は読まない（数マイクロ秒）。
+        変わっていれば確認済みより新しいバージョンだけを読み、このプロセスが知らない
+        スケジュールのタスクの変更は重なりの計算結果から捨てる。世代が変わっていれば（他の
+        プロセスでの復元・reset）バージョンを丸ごと読み直し、キャッシュと計算結果を捨てる。
+        ``_version_guard`` を保持したまま呼ぶ。
+        """
+
+        watch = self._watch
+        if watch is None:
+            return False
+        data_version = watch.execute("PRAGMA data_version").fetchone()[0]
+        if data_version == self._data_version:
+            return False
+        # 世代とバージョンを同じ時点のものとして読む
+        watch.execute("BEGIN")
+        try:
+            epoch = self._read_epoch(watch)
+            restarted = epoch != self._epoch
+            rows = watch.execute(
+                "SELECT scope, key, version FROM scope_versions WHERE version > ?",
+                (0 if restarted else self._version_seen,),
+            ).fetchall()
+        finally:
+            watch.execute("COMMIT")
+        if restarted:
+            self._forget_versions(epoch)
+        self._data_version = data_version
+        changes = []
+        for scope, key, version in rows:
+            scope_key = (scope, key or None)
+            if version > self._versions.get(scope_key, 0):
+                self._versions[scope_key] = version
+                if scope == TASKS_SCOPE and key:
+                    changes.append(ConflictChange(key, None, None))
+            self._version_seen = max(self._version_seen, version)
+        # このプロセスのコミットは反映済みのため、ここで捨てるのは他のプロセスが変えたものだけ
+        self._conflicts.invalidate(changes)
+        return True
+
+    def _refresh_versions(self) -> None:
+        """他のプロセスのコミットをバージョンと重なりの計算結果に反映する。"""
+
+        with self._version_guard:
+            self._sync_versions()
+
+    @staticmethod
+    def _read_epoch(conn: sqlite3.Connection) -> str:
+        return conn.execute("SELECT epoch FROM store_epoch").fetchone()[0]
+
+    def _forget_versions(self, epoch: str) -> None:
+        """世代を ``epoch`` に切り替え、バージョン・キャッシュ・重なりの計算結果を捨てる。
+
+        ``_version_guard`` を保持したまま呼ぶ。
+        """
+
+        self._epoch = epoch
+        self._versions = {}
+        self._version_seen = 0
+        # 次の確認でバージョンを読み直させる
+        self._data_version = None
+        self._conflicts.clear()
+        if self._cache is not None:
+            self._cache.clear()
+
+    def _defer_search(self, conn: sqlite3.Connection) -> None:
+        """多数の行を書き込む間、全文検索の索引の更新をコミット直前まで後回しにする。"""
+
+        if not self._search_deferred:
+            conn.execute("INSERT OR IGNORE INTO search_pending VALUES (?)", (_SEARCH_DEFER_KEY,))
+            self._search_deferred = True
+
+    def _flush_search(self, conn: sqlite3.Connection) -> None:
+        """後回しにした行を全文検索の索引に反映する。"""
+
+        for statement in _SEARCH_FLUSH:
+            conn.execute(statement)
+        self._search_deferred = False
+
+    def _touch(self, scope: str, key: int | None = None) -> None:
+        """書き込み中のトランザクションが ``scope`` を変更したことを記録する。"""
+
+        self._pending_touches.add((scope, key))
+
+    def _touch_tasks(self, schedule_id: int) -> None:
+        self._touch(TASKS_SCOPE)
+        self._touch(TASKS_SCOPE, schedule_id)
+
+    def _touch_conflicts(
+        self, schedule_id: int, task_id: int | None = None, location: str | None = None
+    ) -> None:
+        """タスクの場所の重なりを再計算させる。``task_id`` を省略するとスケジュール全体。"""
+
+        self._pending_conflicts.append(ConflictChange(schedule_id, task_id, location))
+
+    def version_token(self, scope: str, key: int | None = None) -> str:
+        """``scope``（と任意でスケジュール ID）の現在のバージョンを表す文字列を返す。
+
+        書き込みがコミットされるたびに値が変わるため、そのまま ETag に利用できる。
+        値は同じデータベースを開くすべてのプロセスで一致する。他のプロセスのコミットを
+        ``PRAGMA data_version`` で確認するだけで、表はその場合にしか読まない。
+        """
+
+        with self._version_guard:
+            self._sync_versions()
+            return f"{self._epoch}.{self._versions.get((scope, key), 0)}"
+
+    def _cached(self, scope: VersionKey, key: Hashable, load: Callable[[], Any]) -> Any:
+        """``scope`` のバージョンで無効化されるキャッシュを通して ``load`` を呼ぶ。
+
+        例外（見つからない場合の ``KeyError`` など）はキャッシュしない。
+        """
+
+        cache = self._cache
+        if cache is None:
+            return load()
+        # 読み出しより前にバージョンを取得し、途中で書き込まれた場合は次回に取り直させる
+        version = self.version_token(*scope)
+        hit, value = cache.get(key, version)
+        if hit:
+            return value
+        value = load()
+        cache.put(key, version, value)
+        return value
+
+    def cache_stats(self) -> CacheStats | None:
+        """読み取りキャッシュのヒット・ミス・追い出し件数を返す。無効の場合は ``None``。"""
+
+        return None if self._cache is None else self._cache.stats()
+
+    def lock_wait_stats(self) -> WaitStats:
+        """書き込みロック（単一ロック構成では読み取りも）の取得待ち時間の累積値を返す。"""
+
+        return self._lock_waits.stats()
+
+    def configure_tracing(self, settings: TraceSettings) -> None:
+        """遅い SQL とロックの取得履歴の記録を設定する。実行中に切り替えてよい。"""
+
+        self.tracer.configure(settings)
+
+    def trace_snapshot(self) -> TraceSnapshot:
+        """トレースの設定と、直近の遅い SQL・ロックの取得履歴を返す。"""
+
+        return self.tracer.snapshot()
+
+    def dump_trace(self, path: str | Path) -> None:
+        """``trace_snapshot()`` の内容を JSON ファイルに書き出す。"""
+
+        self.tracer.dump(path)
+
+    def _init_schema(self) -> None:
+        """必要なテーブルが無ければ作成する。"""
+
+        with self._write() as conn:
+            self._create_schema(conn)
+
+    def _create_schema(self, conn: sqlite3.Connection) -> None:
+        """テーブル・索引・トリガーを作成し、後から追加した表には既存の行を登録する。
+
+        書き込み中のトランザクションの中で呼ぶ。複数のプロセスが同時に開いても、表の有無の
+        確認から既存の行の登録までを 1 つのプロセスだけが行う。
+        """
+
+        _run_script(
+            conn,
+            """
+            CREATE TABLE IF NOT EXISTS members (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                name TEXT NOT NULL,
+                part TEXT NOT NULL,
+                position TEXT NOT NULL,
+                contact_phone TEXT,
+                contact_email TEXT,
+                contact_note TEXT
+            );
+
+            CREATE TABLE IF NOT EXISTS materials (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                name TEXT NOT NULL,
+                part TEXT NOT NULL,
+                quantity INTEGER NOT NULL CHECK(quantity >= 0)
+            );
+
+            CREATE TABLE IF NOT EXISTS schedules (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                name TEXT NOT NULL,
+                event_date TEXT NOT NULL
+            );
+
+            CREATE TABLE IF NOT EXISTS tasks (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                schedule_id INTEGER NOT NULL,
+                name TEXT NOT NULL,
+                stage TEXT NOT NULL,
+                start_time TEXT NOT NULL,
+                end_time TEXT NOT NULL,
+                location TEXT,
+                status TEXT NOT NULL,
+                note TEXT,
+                FOREIGN KEY(schedule_id) REFERENCES schedules(id) ON DELETE CASCADE
+            );
+
+            """,
+        )
+        # 既存のデータベースにも後からインデックスを追加する
+        _run_script(conn, _INDEX_SCHEMA)
+        _run_script(conn, _VERSION_SCHEMA)
+        conn.execute(
+            "INSERT OR IGNORE INTO store_epoch (id, epoch) VALUES (1, ?)", (secrets.token_hex(4),)
+        )
+        has_change_log = (
+            conn.execute(
+                "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'change_log'"
+            ).fetchone()
+            is not None
+        )
+        _run_script(conn, _change_log_schema())
+        if not has_change_log:
+            # 既存データベースの行を初回同期で取りこぼさないよう変更履歴へ登録する
+            for table, entity in _TRACKED_TABLES:
+                conn.execute(
+                    "INSERT INTO change_log (entity, entity_id, action)"
+                    f" SELECT ?, id, 'upsert' FROM {table} ORDER BY id",
+                    (entity,),
+                )
+        has_intervals = (
+            conn.execute(
+                "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'task_intervals'"
+            ).fetchone()
+            is not None
+        )
+        _run_script(conn, _INTERVAL_SCHEMA)
+        if not has_intervals:
+            # 既存データベースのタスクも時間帯で検索できるよう登録する
+            conn.execute(
+                f"INSERT INTO task_intervals SELECT tasks.id, {_interval_row('tasks')} FROM tasks"
             )
-            conn.commit()
+        has_search = (
+            conn.execute(
+                "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'search_index'"
+            ).fetchone()
+            is not None
+        )
+        _run_script(conn, _search_schema())
+        if not has_search:
+            # 既存データベースの行も全文検索で見つかるよう登録する
+            for table, *_ in _SEARCH_SOURCES:
+                rowid, name, detail = _search_row(table, table)
+                conn.execute(
+                    "INSERT INTO search_index (rowid, name, detail)"
+                    f" SELECT {rowid}, {name}, {detail} FROM {table}"
+                )
+        missing_aggregates = [
+            aggregate
+            for aggregate in _AGGREGATES
+            if conn.execute(
+                "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = ?",
+                (aggregate.summary,),
+            ).fetchone()
+            is None
+        ]
+        _run_script(conn, _aggregate_schema())
+        for aggregate in missing_aggregates:
+            # 既存データベースの行を集計して、ダッシュボードの集計表を作る
+            conn.execute(f"INSERT INTO {aggregate.summary} {_aggregate_rebuild(aggregate)}")
 
     # -- Member operations -------------------------------------------------
-    def list_members(self, part: str | None = None) -> list[Member]:
-        query = (
-            "SELECT id, name, part, position, contact_phone, contact_email, contact_note"
-            " FROM members"
+    def list_members(
+        self,
+        part: str | None = None,
+        *,
+        after: int | None = None,
+        limit: int | None = None,
+    ) -> list[Member]:
+        return list(
+            self._cached(
+                (MEMBERS_SCOPE, None),
+                ("list_members", part, after, limit),
+                lambda: self._load_members(
+                    part, after, limit, _MEMBER_COLUMNS, self._row_to_member
+                ),
+            )
+        )
+
+    def list_members_json(
+        self,
+        part: str | None = None,
+        *,
+        after: int | None = None,
+        limit: int | None = None,
+    ) -> list[JsonRow]:
+        """``list_members`` と同じ行を、モデルを介さず SQLite で JSON 化して返す。"""
+
+        return self._cached(
+            (MEMBERS_SCOPE, None),
+            ("list_members_json", part, after, limit),
+            lambda: self._load_members(part, after, limit, _MEMBER_JSON_COLUMNS, _json_row),
         )
-        params: Iterable[object] = ()
+
+    def _load_members(
+        self,
+        part: str | None,
+        after: int | None,
+        limit: int | None,
+        columns: str,
+        convert: Callable[[sqlite3.Row], Any],
+    ) -> list[Any]:
+        cursor = None if after is None else (after,)
+        with self._read() as conn:
+            rows = self._select_members(conn, part, cursor, limit, columns)
+        return [convert(row) for row in rows]
+
+    def iter_members(
+        self,
+        part: str | None = None,
+        *,
+        after: int | None = None,
+        batch_size: int = STREAM_BATCH_SIZE,
+    ) -> Iterator[Member]:
+        """メンバーを ID 順に ``batch_size`` 件ずつ読み出しながら返す。"""
+
+        return self._iter_pages(
+            lambda conn, cursor, limit: self._select_members(conn, part, cursor, limit),
+            None if after is None else (after,),
+            batch_size,
+            _id_key,
+            self._row_to_member,
+        )
+
+    def _select_members(
+        self,
+        conn: sqlite3.Connection,
+        part: str | None,
+        cursor: PageCursor | None,
+        limit: int | None,
+        columns: str = _MEMBER_COLUMNS,
+    ) -> list[sqlite3.Row]:
+        filters: list[str] = []
+        params: list[object] = []
         if part is not None:
             # LOWER 比較で大文字小文字を区別せずにフィルタする
-            query += " WHERE lower(part) = lower(?)"
-            params = (part,)
-        query += " ORDER BY id"
-        with self._lock:
-            rows = self._connection().execute(query, params).fetchall()
-        return [self._row_to_member(row) for row in rows]
+            filters.append("lower(part) = lower(?)")
+            params.append(part)
+        query = f"SELECT {columns} FROM members"
+        return self._select_page(conn, query, filters, params, "id", cursor, limit)
 
     def get_member(self, member_id: int) -> Member:
-        with self._lock:
-            row = (
-                self._connection()
-                .execute(
-                    "SELECT id, name, part, position, contact_phone, contact_email, contact_note"
-                    " FROM members WHERE id = ?",
-                    (member_id,),
-                )
-                .fetchone()
-            )
+        return self._cached(
+            (MEMBERS_SCOPE, None),
+            ("get_member", member_id),
+            lambda: self._read_one(self._fetch_member, member_id),
+        )
+
+    def create_member(self, payload: MemberCreate) -> Member:
+        with self._write() as conn:
+            return self._insert_member(conn, payload)
+
+    def update_member(self, member_id: int, payload: MemberUpdate) -> Member:
+        with self._write() as conn:
+            return self._update_member(conn, member_id, payload)
+
+    def delete_member(self, member_id: int) -> None:
+        with self._write() as conn:
+            self._delete_member(conn, member_id)
+
+    def _fetch_member(self, conn: sqlite3.Connection, member_id: int) -> Member:
+        row = conn.execute(
+            f"SELECT {_MEMBER_COLUMNS} FROM members WHERE id = ?",
+            (member_id,),
+        ).fetchone()
         if row is None:
             raise KeyError(member_id)
         return self._row_to_member(row)
 
-    def create_member(self, payload: MemberCreate) -> Member:
+    def _insert_member(self, conn: sqlite3.Connection, payload: MemberCreate) -> Member:
+        row = _returning_row(
+            conn, f"{_MEMBER_INSERT_SQL} RETURNING {_MEMBER_COLUMNS}", self._member_params(payload)
+        )
+        self._touch(MEMBERS_SCOPE)
+        return self._row_to_member(row)
+
+    @staticmethod
+    def _member_params(payload: MemberCreate) -> tuple[object, ...]:
         contact = payload.contact
-        with self._lock:
-            cursor = self._connection().execute(
-                (
-                    "INSERT INTO members (name, part, position, contact_phone, contact_email, "
-                    "contact_note) VALUES (?, ?, ?, ?, ?, ?)"
-                ),
-                (
-                    payload.name,
-                    payload.part,
-                    payload.position,
-                    contact.phone,
-                    contact.email,
-                    contact.note,
-                ),
-            )
-            self._connection().commit()
-            member_id = cursor.lastrowid
-        data = payload.model_dump()
-        data["id"] = member_id
-        return Member(**data)
+        return (
+            payload.name,
+            payload.part,
+            payload.position,
+            contact.phone,
+            contact.email,
+            contact.note,
+        )
 
-    def update_member(self, member_id: int, payload: MemberUpdate) -> Member:
+    def _update_member(
+        self, conn: sqlite3.Connection, member_id: int, payload: MemberUpdate
+    ) -> Member:
         update_data = payload.model_dump(exclude_unset=True)
         if not update_data:
             # 変更が無ければ既存データをそのまま返す
-            return self.get_member(member_id)
+            return self._fetch_member(conn, member_id)
 
         columns: list[str] = []
         params: list[object] = []
@@ -186,25 +1615,24 @@ class SQLiteStore:
                 ]
             )
             params.extend([contact_model.phone, contact_model.email, contact_model.note])
-        with self._lock:
-            cursor = self._connection().execute(
-                f"UPDATE members SET {', '.join(columns)} WHERE id = ?",
-                (*params, member_id),
-            )
-            if cursor.rowcount == 0:
-                raise KeyError(member_id)
-            self._connection().commit()
-        return self.get_member(member_id)
+        row = _returning_row(
+            conn,
+            f"UPDATE members SET {', '.join(columns)} WHERE id = ? RETURNING {_MEMBER_COLUMNS}",
+            (*params, member_id),
+        )
+        if row is None:
+            raise KeyError(member_id)
+        self._touch(MEMBERS_SCOPE)
+        return self._row_to_member(row)
 
-    def delete_member(self, member_id: int) -> None:
-        with self._lock:
-            cursor = self._connection().execute(
-                "DELETE FROM members WHERE id = ?",
-                (member_id,),
-            )
-            if cursor.rowcount == 0:
-                raise KeyError(member_id)
-            self._connection().commit()
+    def _delete_member(self, conn: sqlite3.Connection, member_id: int) -> None:
+        cursor = conn.execute(
+            "DELETE FROM members WHERE id = ?",
+            (member_id,),
+        )
+        if cursor.rowcount == 0:
+            raise KeyError(member_id)
+        self._touch(MEMBERS_SCOPE)
 
     def _row_to_member(self, row: sqlite3.Row) -> Member:
         """行データから Member モデルを構築する。"""
@@ -223,47 +1651,131 @@ class SQLiteStore:
         )
 
     # -- Material operations ----------------------------------------------
-    def list_materials(self, part: str | None = None) -> list[Material]:
-        query = "SELECT id, name, part, quantity FROM materials"
-        params: Iterable[object] = ()
+    def list_materials(
+        self,
+        part: str | None = None,
+        *,
+        after: int | None = None,
+        limit: int | None = None,
+    ) -> list[Material]:
+        return list(
+            self._cached(
+                (MATERIALS_SCOPE, None),
+                ("list_materials", part, after, limit),
+                lambda: self._load_materials(
+                    part, after, limit, _MATERIAL_COLUMNS, self._row_to_material
+                ),
+            )
+        )
+
+    def list_materials_json(
+        self,
+        part: str | None = None,
+        *,
+        after: int | None = None,
+        limit: int | None = None,
+    ) -> list[JsonRow]:
+        """``list_materials`` と同じ行を SQLite で JSON 化して返す。"""
+
+        return self._cached(
+            (MATERIALS_SCOPE, None),
+            ("list_materials_json", part, after, limit),
+            lambda: self._load_materials(part, after, limit, _MATERIAL_JSON_COLUMNS, _json_row),
+        )
+
+    def _load_materials(
+        self,
+        part: str | None,
+        after: int | None,
+        limit: int | None,
+        columns: str,
+        convert: Callable[[sqlite3.Row], Any],
+    ) -> list[Any]:
+        cursor = None if after is None else (after,)
+        with self._read() as conn:
+            rows = self._select_materials(conn, part, cursor, limit, columns)
+        return [convert(row) for row in rows]
+
+    def iter_materials(
+        self,
+        part: str | None = None,
+        *,
+        after: int | None = None,
+        batch_size: int = STREAM_BATCH_SIZE,
+    ) -> Iterator[Material]:
+        """資材を ID 順に ``batch_size`` 件ずつ読み出しながら返す。"""
+
+        return self._iter_pages(
+            lambda conn, cursor, limit: self._select_materials(conn, part, cursor, limit),
+            None if after is None else (after,),
+            batch_size,
+            _id_key,
+            self._row_to_material,
+        )
+
+    def _select_materials(
+        self,
+        conn: sqlite3.Connection,
+        part: str | None,
+        cursor: PageCursor | None,
+        limit: int | None,
+        columns: str = _MATERIAL_COLUMNS,
+    ) -> list[sqlite3.Row]:
+        filters: list[str] = []
+        params: list[object] = []
         if part is not None:
-            query += " WHERE lower(part) = lower(?)"
-            params = (part,)
-        query += " ORDER BY id"
-        with self._lock:
-            rows = self._connection().execute(query, params).fetchall()
-        return [self._row_to_material(row) for row in rows]
+            filters.append("lower(part) = lower(?)")
+            params.append(part)
+        query = f"SELECT {columns} FROM materials"
+        return self._select_page(conn, query, filters, params, "id", cursor, limit)
 
     def get_material(self, material_id: int) -> Material:
-        with self._lock:
-            row = (
-                self._connection()
-                .execute(
-                    "SELECT id, name, part, quantity FROM materials WHERE id = ?",
-                    (material_id,),
-                )
-                .fetchone()
-            )
+        return self._cached(
+            (MATERIALS_SCOPE, None),
+            ("get_material", material_id),
+            lambda: self._read_one(self._fetch_material, material_id),
+        )
+
+    def create_material(self, payload: MaterialCreate) -> Material:
+        with self._write() as conn:
+            return self._insert_material(conn, payload)
+
+    def update_material(self, material_id: int, payload: MaterialUpdate) -> Material:
+        with self._write() as conn:
+            return self._update_material(conn, material_id, payload)
+
+    def delete_material(self, material_id: int) -> None:
+        with self._write() as conn:
+            self._delete_material(conn, material_id)
+
+    def _fetch_material(self, conn: sqlite3.Connection, material_id: int) -> Material:
+        row = conn.execute(
+            f"SELECT {_MATERIAL_COLUMNS} FROM materials WHERE id = ?",
+            (material_id,),
+        ).fetchone()
         if row is None:
             raise KeyError(material_id)
         return self._row_to_material(row)
 
-    def create_material(self, payload: MaterialCreate) -> Material:
-        with self._lock:
-            cursor = self._connection().execute(
-                "INSERT INTO materials (name, part, quantity) VALUES (?, ?, ?)",
-                (payload.name, payload.part, payload.quantity),
-            )
-            self._connection().commit()
-            material_id = cursor.lastrowid
-        data = payload.model_dump()
-        data["id"] = material_id
-        return Material(**data)
+    def _insert_material(self, conn: sqlite3.Connection, payload: MaterialCreate) -> Material:
+        row = _returning_row(
+            conn,
+            f"{_MATERIAL_INSERT_SQL} RETURNING {_MATERIAL_COLUMNS}",
+            self._material_params(payload),
+        )
+        self._touch(MATERIALS_SCOPE)
+        return self._row_to_material(row)
 
-    def update_material(self, material_id: int, payload: MaterialUpdate) -> Material:
+    @staticmethod
+    def _material_params(payload: MaterialCreate) -> tuple[object, ...]:
+        return (payload.name, payload.part, payload.quantity)
+
+    def _update_material(
+        self, conn: sqlite3.Connection, material_id: int, payload: MaterialUpdate
+    ) -> Material:
         update_data = payload.model_dump(exclude_unset=True)
         if not update_data:
-            return self.get_material(material_id)
+            return self._fetch_material(conn, material_id)
 
         columns: list[str] = []
         params: list[object] = []
@@ -277,25 +1789,24 @@ class SQLiteStore:
             columns.append("quantity = ?")
             params.append(update_data["quantity"])
 
-        with self._lock:
-            cursor = self._connection().execute(
-                f"UPDATE materials SET {', '.join(columns)} WHERE id = ?",
-                (*params, material_id),
-            )
-            if cursor.rowcount == 0:
-                raise KeyError(material_id)
-            self._connection().commit()
-        return self.get_material(material_id)
+        row = _returning_row(
+            conn,
+            f"UPDATE materials SET {', '.join(columns)} WHERE id = ? RETURNING {_MATERIAL_COLUMNS}",
+            (*params, material_id),
+        )
+        if row is None:
+            raise KeyError(material_id)
+        self._touch(MATERIALS_SCOPE)
+        return self._row_to_material(row)
 
-    def delete_material(self, material_id: int) -> None:
-        with self._lock:
-            cursor = self._connection().execute(
-                "DELETE FROM materials WHERE id = ?",
-                (material_id,),
-            )
-            if cursor.rowcount == 0:
-                raise KeyError(material_id)
-            self._connection().commit()
+    def _delete_material(self, conn: sqlite3.Connection, material_id: int) -> None:
+        cursor = conn.execute(
+            "DELETE FROM materials WHERE id = ?",
+            (material_id,),
+        )
+        if cursor.rowcount == 0:
+            raise KeyError(material_id)
+        self._touch(MATERIALS_SCOPE)
 
     def _row_to_material(self, row: sqlite3.Row) -> Material:
         """行データから Material モデルを構築する。"""
@@ -308,42 +1819,120 @@ class SQLiteStore:
         )
 
     # -- Schedule operations ----------------------------------------------
-    def list_schedules(self) -> list[Schedule]:
-        query = "SELECT id, name, event_date FROM schedules ORDER BY event_date, id"
-        with self._lock:
-            rows = self._connection().execute(query).fetchall()
-        return [self._row_to_schedule(row) for row in rows]
+    def list_schedules(
+        self, *, after: int | None = None, limit: int | None = None
+    ) -> list[Schedule]:
+        return list(
+            self._cached(
+                (SCHEDULES_SCOPE, None),
+                ("list_schedules", after, limit),
+                lambda: self._load_schedules(
+                    after, limit, _SCHEDULE_COLUMNS, self._row_to_schedule
+                ),
+            )
+        )
+
+    def list_schedules_json(
+        self, *, after: int | None = None, limit: int | None = None
+    ) -> list[JsonRow]:
+        """``list_schedules`` と同じ行を SQLite で JSON 化して返す。"""
+
+        return self._cached(
+            (SCHEDULES_SCOPE, None),
+            ("list_schedules_json", after, limit),
+            lambda: self._load_schedules(after, limit, _SCHEDULE_JSON_COLUMNS, _json_row),
+        )
+
+    def _load_schedules(
+        self,
+        after: int | None,
+        limit: int | None,
+        columns: str,
+        convert: Callable[[sqlite3.Row], Any],
+    ) -> list[Any]:
+        with self._read() as conn:
+            cursor = None if after is None else self._schedule_cursor(conn, after)
+            rows = self._select_schedules(conn, cursor, limit, columns)
+        return [convert(row) for row in rows]
+
+    def iter_schedules(
+        self, *, after: int | None = None, batch_size: int = STREAM_BATCH_SIZE
+    ) -> Iterator[Schedule]:
+        """スケジュールを開催日順に ``batch_size`` 件ずつ読み出しながら返す。"""
+
+        with self._read() as conn:
+            cursor = None if after is None else self._schedule_cursor(conn, after)
+        return self._iter_pages(
+            self._select_schedules,
+            cursor,
+            batch_size,
+            lambda row: (row["event_date"], row["id"]),
+            self._row_to_schedule,
+        )
+
+    def _select_schedules(
+        self,
+        conn: sqlite3.Connection,
+        cursor: PageCursor | None,
+        limit: int | None,
+        columns: str = _SCHEDULE_COLUMNS,
+    ) -> list[sqlite3.Row]:
+        query = f"SELECT {columns} FROM schedules"
+        return self._select_page(conn, query, [], [], "event_date, id", cursor, limit)
+
+    def _schedule_cursor(self, conn: sqlite3.Connection, schedule_id: int) -> PageCursor:
+        """``after`` に指定されたスケジュールの並び順キーを取得する。"""
+
+        row = conn.execute(
+            "SELECT event_date, id FROM schedules WHERE id = ?", (schedule_id,)
+        ).fetchone()
+        if row is None:
+            raise ValueError(f"after に指定したスケジュール {schedule_id} が見つかりません")
+        return (row["event_date"], row["id"])
 
     def get_schedule(self, schedule_id: int) -> Schedule:
-        with self._lock:
-            row = (
-                self._connection()
-                .execute(
-                    "SELECT id, name, event_date FROM schedules WHERE id = ?",
-                    (schedule_id,),
-                )
-                .fetchone()
-            )
+        return self._cached(
+            (SCHEDULES_SCOPE, None),
+            ("get_schedule", schedule_id),
+            lambda: self._read_one(self._fetch_schedule, schedule_id),
+        )
+
+    def create_schedule(self, payload: ScheduleCreate) -> Schedule:
+        with self._write() as conn:
+            return self._insert_schedule(conn, payload)
+
+    def update_schedule(self, schedule_id: int, payload: ScheduleUpdate) -> Schedule:
+        with self._write() as conn:
+            return self._update_schedule(conn, schedule_id, payload)
+
+    def delete_schedule(self, schedule_id: int) -> None:
+        with self._write() as conn:
+            self._delete_schedule(conn, schedule_id)
+
+    def _fetch_schedule(self, conn: sqlite3.Connection, schedule_id: int) -> Schedule:
+        row = conn.execute(
+            f"SELECT {_SCHEDULE_COLUMNS} FROM schedules WHERE id = ?",
+            (schedule_id,),
+        ).fetchone()
         if row is None:
             raise KeyError(schedule_id)
         return self._row_to_schedule(row)
 
-    def create_schedule(self, payload: ScheduleCreate) -> Schedule:
-        with self._lock:
-            cursor = self._connection().execute(
-                "INSERT INTO schedules (name, event_date) VALUES (?, ?)",
-                (payload.name, payload.event_date.isoformat()),
-            )
-            self._connection().commit()
-            schedule_id = cursor.lastrowid
-        data = payload.model_dump()
-        data["id"] = schedule_id
-        return Schedule(**data)
+    def _insert_schedule(self, conn: sqlite3.Connection, payload: ScheduleCreate) -> Schedule:
+        row = _returning_row(
+            conn,
+            f"INSERT INTO schedules (name, event_date) VALUES (?, ?) RETURNING {_SCHEDULE_COLUMNS}",
+            (payload.name, payload.event_date.isoformat()),
+        )
+        self._touch(SCHEDULES_SCOPE)
+        return self._row_to_schedule(row)
 
-    def update_schedule(self, schedule_id: int, payload: ScheduleUpdate) -> Schedule:
+    def _update_schedule(
+        self, conn: sqlite3.Connection, schedule_id: int, payload: ScheduleUpdate
+    ) -> Schedule:
         update_data = payload.model_dump(exclude_unset=True)
         if not update_data:
-            return self.get_schedule(schedule_id)
+            return self._fetch_schedule(conn, schedule_id)
 
         columns: list[str] = []
         params: list[object] = []
@@ -358,25 +1947,29 @@ class SQLiteStore:
             else:  # pragma: no cover - defensive
                 params.append(str(event_date_val))
 
-        with self._lock:
-            cursor = self._connection().execute(
-                f"UPDATE schedules SET {', '.join(columns)} WHERE id = ?",
-                (*params, schedule_id),
-            )
-            if cursor.rowcount == 0:
-                raise KeyError(schedule_id)
-            self._connection().commit()
-        return self.get_schedule(schedule_id)
+        row = _returning_row(
+            conn,
+            f"UPDATE schedules SET {', '.join(columns)} WHERE id = ? RETURNING {_SCHEDULE_COLUMNS}",
+            (*params, schedule_id),
+        )
+        if row is None:
+            raise KeyError(schedule_id)
+        self._touch(SCHEDULES_SCOPE)
+        return self._row_to_schedule(row)
 
-    def delete_schedule(self, schedule_id: int) -> None:
-        with self._lock:
-            cursor = self._connection().execute(
-                "DELETE FROM schedules WHERE id = ?",
-                (schedule_id,),
-            )
-            if cursor.rowcount == 0:
-                raise KeyError(schedule_id)
-            self._connection().commit()
+    def _delete_schedule(self, conn: sqlite3.Connection, schedule_id: int) -> None:
+        # カスケード削除されるタスクの分の索引の更新をまとめる
+        self._defer_search(conn)
+        cursor = conn.execute(
+            "DELETE FROM schedules WHERE id = ?",
+            (schedule_id,),
+        )
+        if cursor.rowcount == 0:
+            raise KeyError(schedule_id)
+        self._touch(SCHEDULES_SCOPE)
+        # 配下のタスクもカスケード削除される
+        self._touch_tasks(schedule_id)
+        self._touch_conflicts(schedule_id)
 
     # -- Task operations ---------------------------------------------------
     def list_tasks(
@@ -385,71 +1978,300 @@ class SQLiteStore:
         *,
         stage: str | None = None,
         status: TaskStatus | None = None,
+        window: TaskWindow | None = None,
+        after: int | None = None,
+        limit: int | None = None,
+    ) -> list[Task]:
+        # after の行は他のスケジュールに属している可能性があるため、その場合は全タスクの版で判定する
+        scope: VersionKey = (TASKS_SCOPE, schedule_id if after is None else None)
+        return list(
+            self._cached(
+                scope,
+                ("list_tasks", schedule_id, stage, status, window, after, limit),
+                lambda: self._load_tasks(
+                    schedule_id,
+                    stage,
+                    status,
+                    window,
+                    after,
+                    limit,
+                    _TASK_COLUMNS,
+                    self._row_to_task,
+                ),
+            )
+        )
+
+    def list_tasks_json(
+        self,
+        schedule_id: int,
+        *,
+        stage: str | None = None,
+        status: TaskStatus | None = None,
+        window: TaskWindow | None = None,
+        after: int | None = None,
+        limit: int | None = None,
+    ) -> list[JsonRow]:
+        """``list_tasks`` と同じ行を SQLite で JSON 化して返す。"""
+
+        scope: VersionKey = (TASKS_SCOPE, schedule_id if after is None else None)
+        return self._cached(
+            scope,
+            ("list_tasks_json", schedule_id, stage, status, window, after, limit),
+            lambda: self._load_tasks(
+                schedule_id, stage, status, window, after, limit, _TASK_JSON_COLUMNS, _json_row
+            ),
+        )
+
+    def list_active_tasks(
+        self,
+        at: datetime | None = None,
+        *,
+        stage: str | None = None,
+        status: TaskStatus | None = None,
+        after: int | None = None,
+        limit: int | None = None,
     ) -> list[Task]:
-        filters: list[str] = ["schedule_id = ?"]
-        params: list[object] = [schedule_id]
+        """全スケジュールから ``at``（既定は現在時刻）に実施中のタスクを開始時刻順に返す。
+
+        タイムゾーンなしの ``at`` は、保存済みの日時と同じく UTC とみなす。
+        """
+
+        return list(
+            self._active_tasks(
+                "list_active_tasks",
+                at,
+                stage,
+                status,
+                after,
+                limit,
+                _TASK_COLUMNS,
+                self._row_to_task,
+            )
+        )
+
+    def list_active_tasks_json(
+        self,
+        at: datetime | None = None,
+        *,
+        stage: str | None = None,
+        status: TaskStatus | None = None,
+        after: int | None = None,
+        limit: int | None = None,
+    ) -> list[JsonRow]:
+        """``list_active_tasks`` と同じ行を SQLite で JSON 化して返す。"""
+
+        return self._active_tasks(
+            "list_active_tasks_json", at, stage, status, after, limit, _TASK_JSON_COLUMNS, _json_row
+        )
+
+    def _active_tasks(
+        self,
+        name: str,
+        at: datetime | None,
+        stage: str | None,
+        status: TaskStatus | None,
+        after: int | None,
+        limit: int | None,
+        columns: str,
+        convert: Callable[[sqlite3.Row], Any],
+    ) -> list[Any]:
+        if at is None:
+            # 現在時刻は呼び出しごとに変わるため、キャッシュには載せない。サーバーの
+            # タイムゾーンによらないよう、タイムゾーン付きの UTC で比べる
+            now = TaskWindow.at(datetime.now(UTC))
+            return self._load_tasks(None, stage, status, now, after, limit, columns, convert)
+        return self._cached(
+            (TASKS_SCOPE, None),
+            (name, at, stage, status, after, limit),
+            lambda: self._load_tasks(
+                None, stage, status, TaskWindow.at(at), after, limit, columns, convert
+            ),
+        )
+
+    def _load_tasks(
+        self,
+        schedule_id: int | None,
+        stage: str | None,
+        status: TaskStatus | None,
+        window: TaskWindow | None,
+        after: int | None,
+        limit: int | None,
+        columns: str,
+        convert: Callable[[sqlite3.Row], Any],
+    ) -> list[Any]:
+        if window is not None:
+            window.validate()
+        with self._read() as conn:
+            if schedule_id is not None and not self._schedule_exists(conn, schedule_id):
+                raise KeyError(schedule_id)
+            cursor = None if after is None else self._task_cursor(conn, after)
+            rows = self._select_tasks(
+                conn, schedule_id, stage, status, cursor, limit, columns, window
+            )
+        return [convert(row) for row in rows]
+
+    def iter_tasks(
+        self,
+        schedule_id: int,
+        *,
+        stage: str | None = None,
+        status: TaskStatus | None = None,
+        window: TaskWindow | None = None,
+        after: int | None = None,
+        batch_size: int = STREAM_BATCH_SIZE,
+    ) -> Iterator[Task]:
+        """タスクを開始時刻順に ``batch_size`` 件ずつ読み出しながら返す。"""
+
+        if window is not None:
+            window.validate()
+        with self._read() as conn:
+            if not self._schedule_exists(conn, schedule_id):
+                raise KeyError(schedule_id)
+            cursor = None if after is None else self._task_cursor(conn, after)
+        return self._iter_pages(
+            lambda conn, cursor, limit: self._select_tasks(
+                conn, schedule_id, stage, status, cursor, limit, window=window
+            ),
+            cursor,
+            batch_size,
+            lambda row: (row["start_time"], row["id"]),
+            self._row_to_task,
+        )
+
+    def _select_tasks(
+        self,
+        conn: sqlite3.Connection,
+        schedule_id: int | None,
+        stage: str | None,
+        status: TaskStatus | None,
+        cursor: PageCursor | None,
+        limit: int | None,
+        columns: str = _TASK_COLUMNS,
+        window: TaskWindow | None = None,
+    ) -> list[sqlite3.Row]:
+        filters: list[str] = []
+        params: list[object] = []
+        query = f"SELECT {columns} FROM tasks"
+        if window is not None:
+            # R*Tree で候補を絞ってから主キーで tasks を引く。件数はタスク総数ではなく
+            # 該当件数に比例する（CROSS JOIN で R*Tree を先に走査させる）
+            query = (
+                f"SELECT {columns} FROM task_intervals"
+                " CROSS JOIN tasks ON tasks.id = task_intervals.task_id"
+            )
+            if schedule_id is not None:
+                filters.extend(["schedule_lo <= ?", "schedule_hi >= ?"])
+                params.extend([schedule_id, schedule_id])
+            window_filters, window_params = self._window_filters(window)
+            filters.extend(window_filters)
+            params.extend(window_params)
+        if schedule_id is not None:
+            filters.append("schedule_id = ?")
+            params.append(schedule_id)
         if stage is not None:
             filters.append("lower(stage) = lower(?)")
             params.append(stage)
         if status is not None:
             filters.append("status = ?")
             params.append(status.value)
+        return self._select_page(conn, query, filters, params, "start_time, id", cursor, limit)
 
-        query = (
-            "SELECT id, schedule_id, name, stage, start_time, end_time, location, "
-            "status, note FROM tasks WHERE " + " AND ".join(filters) + " ORDER BY start_time, id"
-        )
-        with self._lock:
-            if not self._schedule_exists(schedule_id):
-                raise KeyError(schedule_id)
-            rows = self._connection().execute(query, params).fetchall()
-        return [self._row_to_task(row) for row in rows]
+    @staticmethod
+    def _window_filters(window: TaskWindow) -> tuple[list[str], list[object]]:
+        """時間帯の条件を、R*Tree で候補を選ぶ条件と tasks の列で厳密に判定する条件の組にする。"""
+
+        filters: list[str] = []
+        params: list[object] = []
+        if window.end is not None:
+            end = window.end.isoformat()
+            operator = "<=" if window.is_instant else "<"
+            filters.append(f"starts_at <= {_interval_minutes('?')}")
+            filters.append(f"julianday(start_time) {operator} julianday(?)")
+            params.extend([end, end])
+        if window.start is not None:
+            start = window.start.isoformat()
+            filters.append(f"ends_at >= {_interval_minutes('?')}")
+            filters.append("julianday(end_time) > julianday(?)")
+            params.extend([start, start])
+        return filters, params
+
+    def _task_cursor(self, conn: sqlite3.Connection, task_id: int) -> PageCursor:
+        """``after`` に指定されたタスクの並び順キーを取得する。"""
+
+        row = conn.execute("SELECT start_time, id FROM tasks WHERE id = ?", (task_id,)).fetchone()
+        if row is None:
+            raise ValueError(f"after に指定したタスク {task_id} が見つかりません")
+        return (row["start_time"], row["id"])
 
     def get_task(self, task_id: int) -> Task:
-        with self._lock:
-            row = (
-                self._connection()
-                .execute(
-                    "SELECT id, schedule_id, name, stage, start_time, end_time, location, "
-                    "status, note FROM tasks WHERE id = ?",
-                    (task_id,),
-                )
-                .fetchone()
+        return self._cached(
+            (TASKS_SCOPE, None),
+            ("get_task", task_id),
+            lambda: self._read_one(self._fetch_task, task_id),
+        )
+
+    def create_task(self, schedule_id: int, payload: TaskCreate) -> Task:
+        with self._write() as conn:
+            return self._insert_task(conn, schedule_id, payload)
+
+    def update_task(self, task_id: int, payload: TaskUpdate) -> Task:
+        with self._write() as conn:
+            return self._update_task(conn, task_id, payload)
+
+    def update_task_status(self, task_id: int, status: TaskStatus) -> Task:
+        with self._write() as conn:
+            row = _returning_row(
+                conn,
+                f"UPDATE tasks SET status = ? WHERE id = ? RETURNING {_TASK_COLUMNS}",
+                (status.value, task_id),
             )
+            if row is None:
+                raise KeyError(task_id)
+            self._touch_tasks(row["schedule_id"])
+            return self._row_to_task(row)
+
+    def delete_task(self, task_id: int) -> None:
+        with self._write() as conn:
+            self._delete_task(conn, task_id)
+
+    def _fetch_task(self, conn: sqlite3.Connection, task_id: int) -> Task:
+        row = conn.execute(
+            f"SELECT {_TASK_COLUMNS} FROM tasks WHERE id = ?",
+            (task_id,),
+        ).fetchone()
         if row is None:
             raise KeyError(task_id)
         return self._row_to_task(row)
 
-    def create_task(self, schedule_id: int, payload: TaskCreate) -> Task:
-        with self._lock:
-            if not self._schedule_exists(schedule_id):
-                raise KeyError(schedule_id)
-            cursor = self._connection().execute(
-                (
-                    "INSERT INTO tasks (schedule_id, name, stage, start_time, end_time, "
-                    "location, status, note) VALUES (?, ?, ?, ?, ?, ?, ?, ?)"
-                ),
-                (
-                    schedule_id,
-                    payload.name,
-                    payload.stage,
-                    payload.start_time.isoformat(),
-                    payload.end_time.isoformat(),
-                    payload.location,
-                    payload.status.value,
-                    payload.note,
-                ),
-            )
-            self._connection().commit()
-            task_id = cursor.lastrowid
-        data = payload.model_dump()
-        data.update({"id": task_id, "schedule_id": schedule_id})
-        return Task(**data)
+    def _insert_task(self, conn: sqlite3.Connection, schedule_id: int, payload: TaskCreate) -> Task:
+        if not self._schedule_exists(conn, schedule_id):
+            raise KeyError(schedule_id)
+        row = _returning_row(
+            conn,
+            f"{_TASK_INSERT_SQL} RETURNING {_TASK_COLUMNS}",
+            self._task_params(schedule_id, payload),
+        )
+        self._touch_tasks(schedule_id)
+        self._touch_conflicts(schedule_id, row["id"], row["location"])
+        return self._row_to_task(row)
 
-    def update_task(self, task_id: int, payload: TaskUpdate) -> Task:
+    @staticmethod
+    def _task_params(schedule_id: int, payload: TaskCreate) -> tuple[object, ...]:
+        return (
+            schedule_id,
+            payload.name,
+            payload.stage,
+            payload.start_time.isoformat(),
+            payload.end_time.isoformat(),
+            payload.location,
+            payload.status.value,
+            payload.note,
+        )
+
+    def _update_task(self, conn: sqlite3.Connection, task_id: int, payload: TaskUpdate) -> Task:
         update_data = payload.model_dump(exclude_unset=True)
         if not update_data:
-            return self.get_task(task_id)
+            return self._fetch_task(conn, task_id)
 
         columns: list[str] = []
         params: list[object] = []
@@ -487,38 +2309,719 @@ class SQLiteStore:
             columns.append("note = ?")
             params.append(update_data["note"])
 
-        with self._lock:
-            cursor = self._connection().execute(
-                f"UPDATE tasks SET {', '.join(columns)} WHERE id = ?",
-                (*params, task_id),
+        row = _returning_row(
+            conn,
+            f"UPDATE tasks SET {', '.join(columns)} WHERE id = ? RETURNING {_TASK_COLUMNS}",
+            (*params, task_id),
+        )
+        if row is None:
+            raise KeyError(task_id)
+        self._touch_tasks(row["schedule_id"])
+        if {"start_time", "end_time", "location"} & update_data.keys():
+            self._touch_conflicts(row["schedule_id"], task_id, row["location"])
+        return self._row_to_task(row)
+
+    def _delete_task(self, conn: sqlite3.Connection, task_id: int) -> None:
+        row = _returning_row(
+            conn, "DELETE FROM tasks WHERE id = ? RETURNING schedule_id", (task_id,)
+        )
+        if row is None:
+            raise KeyError(task_id)
+        self._touch_tasks(row["schedule_id"])
+        self._touch_conflicts(row["schedule_id"], task_id)
+
+    # -- Conflict detection ------------------------------------------------
+    def find_conflicts(self, schedule_id: int) -> list[LocationConflicts]:
+        """スケジュール内で、同じ場所で時間帯が重なるタスクの組を場所ごとに返す。
+
+        初回はスケジュールのタスクを場所ごとに掃引し、以降は書き込みで変わった場所だけを読み直す。
+        場所は完全一致で比較し、場所の無いタスクは対象外とする。
+        """
+
+        self._refresh_versions()
+        generation = self._conflicts.generation(schedule_id)
+        pending = self._conflicts.pending(schedule_id)
+        with self._read() as conn:
+            if not self._schedule_exists(conn, schedule_id):
+                raise KeyError(schedule_id)
+            if pending is None:
+                intervals = self._load_conflict_intervals(conn, schedule_id, None)
+            else:
+                intervals = {}
+                for location in pending:
+                    intervals.update(self._load_conflict_intervals(conn, schedule_id, location))
+                    intervals.setdefault(location, [])
+        overlaps = self._conflicts.update(
+            schedule_id, generation, intervals, complete=pending is None
+        )
+        return [
+            LocationConflicts(location=location, overlaps=located)
+            for location, located in sorted(overlaps.items())
+            if located
+        ]
+
+    def task_conflicts(self, task_id: int) -> list[TaskOverlap]:
+        """タスクと同じ場所で時間帯が重なる組を返す。読み直すのはそのタスクの場所だけ。"""
+
+        task = self.get_task(task_id)
+        if task.location is None:
+            return []
+        schedule_id, location = task.schedule_id, task.location
+        overlaps = self._conflicts.cached(schedule_id, location)
+        if overlaps is None:
+            generation = self._conflicts.generation(schedule_id)
+            with self._read() as conn:
+                intervals = self._load_conflict_intervals(conn, schedule_id, location)
+            intervals.setdefault(location, [])
+            overlaps = self._conflicts.update(
+                schedule_id, generation, intervals, complete=False
+            ).get(location, [])
+        return [
+            overlap
+            for overlap in overlaps
+            if task_id in (overlap.first_task_id, overlap.second_task_id)
+        ]
+
+    @staticmethod
+    def _load_conflict_intervals(
+        conn: sqlite3.Connection, schedule_id: int, location: str | None
+    ) -> dict[str, list[ConflictInterval]]:
+        """場所ごとのタスクの時間帯を読み出す。``location`` が ``None`` ならすべての場所。"""
+
+        if location is None:
+            rows = conn.execute(
+                "SELECT id, location, start_time, end_time FROM tasks"
+                " WHERE schedule_id = ? AND location IS NOT NULL",
+                (schedule_id,),
             )
-            if cursor.rowcount == 0:
-                raise KeyError(task_id)
-            self._connection().commit()
-        return self.get_task(task_id)
+        else:
+            rows = conn.execute(
+                "SELECT id, location, start_time, end_time FROM tasks"
+                " WHERE schedule_id = ? AND location = ?",
+                (schedule_id, location),
+            )
+        intervals: dict[str, list[ConflictInterval]] = {}
+        for row in rows.fetchall():
+            intervals.setdefault(row["location"], []).append(
+                ConflictInterval(
+                    row["id"],
+                    datetime.fromisoformat(row["start_time"]),
+                    datetime.fromisoformat(row["end_time"]),
+                )
+            )
+        return intervals
 
-    def update_task_status(self, task_id: int, status: TaskStatus) -> Task:
-        with self._lock:
-            cursor = self._connection().execute(
-                "UPDATE tasks SET status = ? WHERE id = ?",
-                (status.value, task_id),
+    # -- Full-text search --------------------------------------------------
+    def search(self, query: str, *, limit: int = 20) -> list[SearchResult]:
+        """メンバー・資材・タスクを名前などの部分一致で検索し、関連度の高い順に返す。
+
+        空白で区切った語をすべて含む行を返す。3 文字以上の語は trigram の索引で探して bm25 で
+        順位を付け（名前の一致を重く扱う）、2 文字以下の語は索引で絞り込んだ候補を部分一致で
+        確かめる。すべての語が 2 文字以下の場合は索引を使えないため全件を部分一致で調べ、
+        名前に一致する行・名前の短い行を先に返す。大文字・小文字は ASCII に限り区別しない。
+        """
+
+        terms = query.split()
+        if not terms:
+            raise ValueError("検索語を指定してください")
+        indexed = [term for term in terms if len(term) >= _TRIGRAM_LENGTH]
+        short = [term for term in terms if len(term) < _TRIGRAM_LENGTH]
+        filters = [
+            f"({_position('name', term)} > 0 OR {_position('detail', term)} > 0)" for term in short
+        ]
+        params: list[object] = [value for term in short for value in (term, term)]
+        if indexed:
+            sql = (
+                "SELECT rowid, name,"
+                " snippet(search_index, -1, ?, ?, ?, ?) AS snippet,"
+                f" bm25(search_index, {_SEARCH_NAME_WEIGHT}, 1.0) AS rank"
+                " FROM search_index WHERE search_index MATCH ?"
             )
-            if cursor.rowcount == 0:
-                raise KeyError(task_id)
-            self._connection().commit()
-        return self.get_task(task_id)
+            params = [
+                SEARCH_MARK_OPEN,
+                SEARCH_MARK_CLOSE,
+                SEARCH_ELLIPSIS,
+                SEARCH_SNIPPET_LENGTH,
+                " ".join(_fts_phrase(term) for term in indexed),
+                *params,
+            ]
+            order_by = "rank, rowid"
+        else:
+            sql = "SELECT rowid, name, detail, NULL AS rank FROM search_index WHERE 1"
+            order_by = f"{_position('name', short[0])} = 0, length(name), rowid"
+            params.append(short[0])
+        where = "".join(f" AND {condition}" for condition in filters)
+        with self._read() as conn:
+            rows = conn.execute(
+                f"{sql}{where} ORDER BY {order_by} LIMIT ?", (*params, limit)
+            ).fetchall()
+        return [self._row_to_search_result(row, short) for row in rows]
 
-    def delete_task(self, task_id: int) -> None:
-        with self._lock:
-            cursor = self._connection().execute(
-                "DELETE FROM tasks WHERE id = ?",
-                (task_id,),
+    @staticmethod
+    def _row_to_search_result(row: sqlite3.Row, short: list[str]) -> SearchResult:
+        rowid = row["rowid"]
+        if row["rank"] is None:
+            name = row["name"]
+            text = name if short[0].lower() in name.lower() else row["detail"]
+            snippet = _highlight(text, short[0])
+            score = None
+        else:
+            snippet = row["snippet"]
+            # bm25 は関連が高いほど小さい（負の）値になるため、符号を反転して返す
+            score = -row["rank"]
+        return SearchResult(
+            entity=_SEARCH_ENTITIES[rowid & ((1 << _SEARCH_KIND_BITS) - 1)],
+            id=rowid >> _SEARCH_KIND_BITS,
+            name=row["name"],
+            snippet=snippet,
+            score=score,
+        )
+
+    # -- Dashboard aggregates ----------------------------------------------
+    def member_part_counts(self) -> list[PartMemberCount]:
+        """担当パートごとのメンバー数を返す。"""
+
+        return self._cached(
+            (MEMBERS_SCOPE, None),
+            ("member_part_counts",),
+            lambda: self._load_aggregate("member_part_counts", PartMemberCount),
+        )
+
+    def material_part_totals(self) -> list[PartMaterialTotal]:
+        """担当パートごとの資材の件数と数量の合計を返す。"""
+
+        return self._cached(
+            (MATERIALS_SCOPE, None),
+            ("material_part_totals",),
+            lambda: self._load_aggregate("material_part_totals", PartMaterialTotal),
+        )
+
+    def task_status_counts(self, schedule_id: int | None = None) -> list[TaskStatusCount]:
+        """スケジュール・ステージ・状態ごとのタスク数を返す。``schedule_id`` で絞り込める。"""
+
+        if schedule_id is None:
+            return self._cached(
+                (TASKS_SCOPE, None),
+                ("task_status_counts", None),
+                lambda: self._load_aggregate("task_status_counts", TaskStatusCount),
             )
-            if cursor.rowcount == 0:
-                raise KeyError(task_id)
-            self._connection().commit()
+        return self._cached(
+            (TASKS_SCOPE, schedule_id),
+            ("task_status_counts", schedule_id),
+            lambda: self._load_aggregate(
+                "task_status_counts", TaskStatusCount, "schedule_id = ?", (schedule_id,)
+            ),
+        )
+
+    def _load_aggregate(
+        self,
+        summary: str,
+        model: Callable[..., ModelT],
+        condition: str = "1",
+        params: tuple[object, ...] = (),
+    ) -> list[ModelT]:
+        """集計表を読み出す。集計表の列名はレスポンスモデルの項目名と同じにしてある。
+
+        元のテーブルの行は読まないため、行数ではなくグループ数に比例する時間で返せる。
+        """
+
+        aggregate = _AGGREGATES_BY_SUMMARY[summary]
+        with self._read() as conn:
+            rows = conn.execute(
+                f"SELECT * FROM {summary} WHERE {condition} ORDER BY {aggregate.keys}", params
+            ).fetchall()
+        return [model(**dict(row)) for row in rows]
+
+    def check_aggregates(self, *, repair: bool = False) -> AggregateCheck:
+        """集計表を元のテーブルから集計し直した結果と比べ、食い違うグループを返す。
+
+        書き込みロックを取ったまま比べるため、途中の書き込みで食い違って見えることはない。
+        ``repair`` を指定すると、食い違いのあった集計表を集計し直した値で置き換える。
+        """
+
+        mismatches: list[AggregateMismatch] = []
+        groups = 0
+        with self._write() as conn:
+            for aggregate in _AGGREGATES:
+                width = len(aggregate.groups)
+                measures = ", ".join(name for name, _ in aggregate.measures)
+                expected = {
+                    tuple(row[:width]): tuple(row[width:])
+                    for row in conn.execute(_aggregate_rebuild(aggregate)).fetchall()
+                }
+                stored = {
+                    tuple(row[:width]): tuple(row[width:])
+                    for row in conn.execute(
+                        f"SELECT {aggregate.keys}, {measures} FROM {aggregate.summary}"
+                    ).fetchall()
+                }
+                groups += len(expected)
+                # 片方にしか無いグループは、もう片方の集計値を 0 として報告する
+                zero = (0,) * len(aggregate.measures)
+                found = [
+                    AggregateMismatch(
+                        summary=aggregate.summary,
+                        group=list(key),
+                        expected=list(expected.get(key, zero)),
+                        stored=list(stored.get(key, zero)),
+                    )
+                    for key in sorted(expected.keys() | stored.keys())
+                    if expected.get(key) != stored.get(key)
+                ]
+                if found and repair:
+                    conn.execute(f"DELETE FROM {aggregate.summary}")
+                    conn.execute(f"INSERT INTO {aggregate.summary} {_aggregate_rebuild(aggregate)}")
+                    self._touch_aggregate(aggregate, found)
+                mismatches.extend(found)
+        return AggregateCheck(
+            groups=groups, mismatches=mismatches, repaired=repair and bool(mismatches)
+        )
+
+    def _touch_aggregate(self, aggregate: _Aggregate, mismatches: list[AggregateMismatch]) -> None:
+        """集計表を置き換えたことを、読み出しのキャッシュと ETag に反映させる。"""
+
+        if aggregate.table == "members":
+            self._touch(MEMBERS_SCOPE)
+        elif aggregate.table == "materials":
+            self._touch(MATERIALS_SCOPE)
+        else:
+            for mismatch in mismatches:
+                self._touch_tasks(int(mismatch.group[0]))
+
+    # -- Batch operations --------------------------------------------------
+    def apply_batch(self, operations: Iterable[BatchOperation]) -> BatchResponse:
+        """複数の操作を 1 つのトランザクションで順に適用し、最後に 1 度だけコミットする。
+
+        各操作はセーブポイントで囲み、失敗した操作だけを取り消して結果に理由を残す。
+        作成操作で指定された仮 ID（負数）はエンティティごとに採番した ID に対応付け、後続の操作から
+        参照できるようにする。
+        """
+
+        results: list[BatchOperationResult] = []
+        id_map: dict[BatchEntity, dict[int, int]] = {}
+        with self._write() as conn:
+            for index, operation in enumerate(operations):
+                conn.execute("SAVEPOINT batch_operation")
+                result: BatchOperationResult
+                try:
+                    target_id, data = self._apply_batch_operation(conn, operation, id_map)
+                except KeyError:
+                    result = BatchOperationResult(index=index, status=BatchStatus.NOT_FOUND)
+                except ValidationError as exc:
+                    result = BatchOperationResult(
+                        index=index, status=BatchStatus.INVALID, detail=_validation_detail(exc)
+                    )
+                except (ValueError, sqlite3.IntegrityError) as exc:
+                    result = BatchOperationResult(
+                        index=index, status=BatchStatus.INVALID, detail=str(exc)
+                    )
+                else:
+                    result = BatchOperationResult(
+                        index=index, status=BatchStatus.OK, id=target_id, data=data
+                    )
+                if result.status is not BatchStatus.OK:
+                    # 失敗した操作の変更だけを取り消し、後続の操作は続行する
+                    conn.execute("ROLLBACK TO batch_operation")
+                conn.execute("RELEASE batch_operation")
+                results.append(result)
+        return BatchResponse(results=results, id_map=id_map)
+
+    def _apply_batch_operation(
+        self,
+        conn: sqlite3.Connection,
+        operation: BatchOperation,
+        id_map: dict[BatchEntity, dict[int, int]],
+    ) -> tuple[int, Member | Material | Schedule | Task | None]:
+        """一括処理の 1 操作を適用し、対象 ID と作成・更新後のデータを返す。"""
+
+        entity = operation.entity
+        payload = operation.payload or {}
+        if operation.action is BatchAction.CREATE:
+            # 0 以上の仮 ID は既存の行の ID と区別できず、後続の操作の対象を取り違えるため
+            # 受け付けない
+            if operation.ref_id is not None and operation.ref_id >= 0:
+                raise ValueError("作成操作の ref_id には負数の仮 ID を指定してください")
+            created: Member | Material | Schedule | Task
+            if entity is BatchEntity.MEMBER:
+                created = self._insert_member(conn, MemberCreate.model_validate(payload))
+            elif entity is BatchEntity.MATERIAL:
+                created = self._insert_material(conn, MaterialCreate.model_validate(payload))
+            elif entity is BatchEntity.SCHEDULE:
+                created = self._insert_schedule(conn, ScheduleCreate.model_validate(payload))
+            else:
+                schedule_id = self._resolve_ref(
+                    operation.schedule_id, id_map.get(BatchEntity.SCHEDULE, {})
+                )
+                created = self._insert_task(conn, schedule_id, TaskCreate.model_validate(payload))
+            if operation.ref_id is not None:
+                id_map.setdefault(entity, {})[operation.ref_id] = created.id
+            return created.id, created
+
+        target_id = self._resolve_ref(operation.ref_id, id_map.get(entity, {}))
+        updated: Member | Material | Schedule | Task
+        if operation.action is BatchAction.UPDATE:
+            if entity is BatchEntity.MEMBER:
+                updated = self._update_member(conn, target_id, MemberUpdate.model_validate(payload))
+            elif entity is BatchEntity.MATERIAL:
+                updated = self._update_material(
+                    conn, target_id, MaterialUpdate.model_validate(payload)
+                )
+            elif entity is BatchEntity.SCHEDULE:
+                updated = self._update_schedule(
+                    conn, target_id, ScheduleUpdate.model_validate(payload)
+                )
+            else:
+                updated = self._update_task(conn, target_id, TaskUpdate.model_validate(payload))
+            return target_id, updated
+
+        if entity is BatchEntity.MEMBER:
+            self._delete_member(conn, target_id)
+        elif entity is BatchEntity.MATERIAL:
+            self._delete_material(conn, target_id)
+        elif entity is BatchEntity.SCHEDULE:
+            self._delete_schedule(conn, target_id)
+        else:
+            self._delete_task(conn, target_id)
+        return target_id, None
+
+    def _resolve_ref(self, ref_id: int | None, id_map: dict[int, int]) -> int:
+        """仮 ID を ``id_map``（同じエンティティの対応）で採番済み ID に読み替える。"""
+
+        if ref_id is None:
+            raise ValueError("対象の ID が指定されていません")
+        return id_map.get(ref_id, ref_id)
+
+    # -- Bulk import -------------------------------------------------------
+    def import_members(
+        self, rows: Iterable[object], *, chunk_size: int = IMPORT_CHUNK_SIZE
+    ) -> ImportReport:
+        """メンバーを一括登録する。``rows`` は 1 行ずつ検証してから登録する。"""
+
+        with self._write() as conn:
+            self._touch(MEMBERS_SCOPE)
+            return self._import_rows(
+                conn, rows, MemberCreate, self._member_params, _MEMBER_INSERT_SQL, chunk_size
+            )
+
+    def import_materials(
+        self, rows: Iterable[object], *, chunk_size: int = IMPORT_CHUNK_SIZE
+    ) -> ImportReport:
+        """資材を一括登録する。"""
+
+        with self._write() as conn:
+            self._touch(MATERIALS_SCOPE)
+            return self._import_rows(
+                conn, rows, MaterialCreate, self._material_params, _MATERIAL_INSERT_SQL, chunk_size
+            )
+
+    def import_tasks(
+        self,
+        schedule_id: int,
+        rows: Iterable[object],
+        *,
+        chunk_size: int = IMPORT_CHUNK_SIZE,
+    ) -> ImportReport:
+        """指定したスケジュールにタスクを一括登録する。"""
+
+        with self._write() as conn:
+            if not self._schedule_exists(conn, schedule_id):
+                raise KeyError(schedule_id)
+            self._touch_tasks(schedule_id)
+            self._touch_conflicts(schedule_id)
+            return self._import_rows(
+                conn,
+                rows,
+                TaskCreate,
+                lambda payload: self._task_params(schedule_id, payload),
+                _TASK_INSERT_SQL,
+                chunk_size,
+            )
+
+    def _import_rows(
+        self,
+        conn: sqlite3.Connection,
+        rows: Iterable[object],
+        model: type[CreateModelT],
+        to_params: Callable[[CreateModelT], tuple[object, ...]],
+        insert_sql: str,
+        chunk_size: int,
+    ) -> ImportReport:
+        """行を検証し、``chunk_size`` 件ごとに executemany で登録する。
+
+        呼び出し側のトランザクション内で動作し、コミットは 1 度だけになる。検証に失敗した行や
+        制約違反の行は登録せずにエラーとして報告する。
+        """
+
+        self._defer_search(conn)
+        imported = 0
+        error_count = 0
+        errors: list[ImportRowError] = []
+
+        def record_error(row_number: int, detail: object) -> None:
+            nonlocal error_count
+            error_count += 1
+            if len(errors) < MAX_IMPORT_ERRORS:
+                errors.append(ImportRowError(row=row_number, detail=detail))
+
+        def flush(chunk: list[tuple[int, tuple[object, ...]]]) -> None:
+            nonlocal imported
+            conn.execute("SAVEPOINT import_chunk")
+            try:
+                conn.executemany(insert_sql, [params for _, params in chunk])
+            except sqlite3.IntegrityError:
+                # 制約違反の行を特定するため、このチャンクだけ 1 行ずつ登録し直す
+                conn.execute("ROLLBACK TO import_chunk")
+                for row_number, params in chunk:
+                    try:
+                        conn.execute(insert_sql, params)
+                    except sqlite3.IntegrityError as exc:
+                        record_error(row_number, str(exc))
+                    else:
+                        imported += 1
+            else:
+                imported += len(chunk)
+            conn.execute("RELEASE import_chunk")
+            chunk.clear()
+
+        chunk: list[tuple[int, tuple[object, ...]]] = []
+        for row_number, row in enumerate(rows, start=1):
+            try:
+                payload = model.model_validate(row)
+            except ValidationError as exc:
+                record_error(row_number, _validation_detail(exc))
+                continue
+            chunk.append((row_number, to_params(payload)))
+            if len(chunk) >= chunk_size:
+                flush(chunk)
+        if chunk:
+            flush(chunk)
+        return ImportReport(imported=imported, error_count=error_count, errors=errors)
+
+    # -- Change log ----------------------------------------------------------
+    def current_version(self) -> int:
+        """変更履歴の最新バージョン（高水位点）を返す。"""
+
+        with self._read() as conn:
+            return self._current_version(conn)
+
+    def changes_since(self, since: int, epoch: str | None = None) -> SyncChanges:
+        """``since`` より後に変更された行と削除済み ID を返す。
+
+        結果は読み取り開始時点の最新バージョンまでに揃えるため、途中で書き込みがあっても
+        取りこぼしは次回の同期で回収される。``since`` が 0 またはサーバーより新しい場合と、
+        ``epoch`` が現在の世代と違う場合は全件を返し、``full`` を立ててクライアントに
+        置き換えを促す。復元ではスナップショットの変更履歴に戻り、バージョンが巻き戻って
+        以前の番号が再び使われるため、``since`` だけでは復元前のバージョンを見分けられない。
+        """
+
+        with self._read() as conn:
+            version = self._current_version(conn)
+            current_epoch = self._read_epoch(conn)
+            full = since <= 0 or since > version or epoch not in (None, current_epoch)
+            lower = 0 if full else since
+            window = (lower, version)
+            members = [
+                self._row_to_member(row)
+                for row in self._changed_rows(conn, "members", "member", window)
+            ]
+            materials = [
+                self._row_to_material(row)
+                for row in self._changed_rows(conn, "materials", "material", window)
+            ]
+            schedules = [
+                self._row_to_schedule(row)
+                for row in self._changed_rows(conn, "schedules", "schedule", window)
+            ]
+            tasks = [
+                self._row_to_task(row) for row in self._changed_rows(conn, "tasks", "task", window)
+            ]
+            tombstones: dict[str, list[int]] = {entity: [] for _, entity in _TRACKED_TABLES}
+            if not full:
+                rows = conn.execute(
+                    "SELECT entity, entity_id FROM change_log"
+                    " WHERE action = 'delete' AND version > ? AND version <= ?"
+                    " ORDER BY version",
+                    window,
+                ).fetchall()
+                for row in rows:
+                    tombstones[row["entity"]].append(row["entity_id"])
+        return SyncChanges(
+            version=version,
+            epoch=current_epoch,
+            full=full,
+            members=members,
+            materials=materials,
+            schedules=schedules,
+            tasks=tasks,
+            deleted=SyncDeleted(
+                members=tombstones["member"],
+                materials=tombstones["material"],
+                schedules=tombstones["schedule"],
+                tasks=tombstones["task"],
+            ),
+        )
+
+    def _current_version(self, conn: sqlite3.Connection) -> int:
+        return conn.execute("SELECT COALESCE(MAX(version), 0) FROM change_log").fetchone()[0]
+
+    # -- Change events -------------------------------------------------------
+    def subscribe_changes(self, loop: asyncio.AbstractEventLoop) -> tuple[Subscription, int]:
+        """変更通知の購読を始め、購読開始時点の変更履歴のバージョンと共に返す。
+
+        返したバージョンより後の変更はすべて購読に配信される。それ以前の取りこぼしは
+        ``change_events`` で補う。書き込みロックを取るため、イベントループからは
+        ``aio`` 経由で呼ぶ。他のプロセスの変更は、初回の購読で始めるスレッド（``sqlite-watch``）が
+        ``DEFAULT_CHANGE_POLL_INTERVAL`` 秒ごとに確認して配る。
+        """
+
+        with self._locked():
+            if self._published_version is None:
+                with self._version_guard:
+                    self._sync_versions()
+                self._published_version = self._current_version(self._connection())
+                self._published_epoch = self._epoch
+            if self._watch is not None and self._watcher is None:
+                self._watcher = Thread(
+                    target=self._watch_changes,
+                    args=(DEFAULT_CHANGE_POLL_INTERVAL,),
+                    name="sqlite-watch",
+                    daemon=True,
+                )
+                self._watcher.start()
+            return self.changes.subscribe(loop), self._published_version
+
+    def change_events(self, since: int, until: int) -> list[ChangeEvent] | None:
+        """``since`` より後、``until`` 以下のバージョンの変更をバージョン順に返す。
+
+        エンティティごとに最新の変更だけが残るため、同じ行の古い変更は含まれない。
+        ``since`` が ``until`` より新しい（データが初期化された）場合や、件数が購読のキューの
+        上限を超える場合は ``None`` を返し、差分ではなく同期し直すことを促す。
+        """
+
+        if since > until:
+            return None
+        limit = self.changes.queue_size
+        with self._read() as conn:
+            rows = conn.execute(
+                "SELECT version, entity, entity_id, action FROM change_log"
+                " WHERE version > ? AND version <= ? ORDER BY version LIMIT ?",
+                (since, until, limit + 1),
+            ).fetchall()
+        if len(rows) > limit:
+            return None
+        return [_row_to_change_event(row) for row in rows]
+
+    def _watch_changes(self, interval: float) -> None:
+        """他のプロセスのコミットを ``interval`` 秒ごとに確認し、購読者に配る。"""
+
+        while not self._watch_stopped.wait(interval):
+            with self._version_guard:
+                changed = self._sync_versions()
+            if changed and self.changes.subscriber_count:
+                with self._locked():
+                    if self._conn is not None and self._published_version is not None:
+                        self._publish_changes(self._conn)
+
+    def _publish_changes(self, conn: sqlite3.Connection) -> None:
+        """コミット済みで未配信の変更を購読者に配る。書き込みロックを保持したまま呼ぶ。"""
+
+        if not self.changes.subscriber_count:
+            # 購読者がいない間は変更履歴を読まない
+            self._published_version = None
+            return
+        if self._published_epoch != self._epoch:
+            # 他のプロセスで復元・reset された
+            self._published_version = self._current_version(conn)
+            self._published_epoch = self._epoch
+            self.changes.resync(self._published_version)
+            return
+        published = self._published_version or 0
+        limit = self.changes.queue_size
+        rows = conn.execute(
+            "SELECT version, entity, entity_id, action FROM change_log"
+            " WHERE version > ? ORDER BY version LIMIT ?",
+            (published, limit + 1),
+        ).fetchall()
+        if len(rows) > limit:
+            # 一括インポートなど、1 回で配りきれない変更は同期し直してもらう
+            self._published_version = self._current_version(conn)
+            self.changes.resync(self._published_version)
+        elif rows:
+            self._published_version = rows[-1]["version"]
+            self.changes.publish([_row_to_change_event(row) for row in rows])
+
+    def _changed_rows(
+        self,
+        conn: sqlite3.Connection,
+        table: str,
+        entity: str,
+        window: tuple[int, int],
+    ) -> list[sqlite3.Row]:
+        """変更履歴の範囲内で追加・更新された行を ID 順に取得する。"""
+
+        return conn.execute(
+            f"SELECT t.* FROM change_log AS c JOIN {table} AS t ON t.id = c.entity_id"
+            " WHERE c.entity = ? AND c.action = 'upsert' AND c.version > ? AND c.version <= ?"
+            " ORDER BY t.id",
+            (entity, *window),
+        ).fetchall()
 
     # -- Internal helpers --------------------------------------------------
+    def _read_one(self, fetch: Callable[[sqlite3.Connection, int], Any], item_id: int) -> Any:
+        with self._read() as conn:
+            return fetch(conn, item_id)
+
+    def _select_page(
+        self,
+        conn: sqlite3.Connection,
+        query: str,
+        filters: list[str],
+        params: list[object],
+        order_by: str,
+        cursor: PageCursor | None,
+        limit: int | None,
+    ) -> list[sqlite3.Row]:
+        """絞り込み条件に keyset ページングの条件と並び順を加えて実行する。
+
+        ``cursor`` は ``order_by`` と同じ列の値の組で、その行より後ろだけを返す。
+        """
+
+        conditions = list(filters)
+        values = list(params)
+        if cursor is not None:
+            placeholders = ", ".join("?" for _ in cursor)
+            conditions.append(f"({order_by}) > ({placeholders})")
+            values.extend(cursor)
+        if conditions:
+            query += " WHERE " + " AND ".join(conditions)
+        query += f" ORDER BY {order_by}"
+        if limit is not None:
+            query += " LIMIT ?"
+            values.append(limit)
+        return conn.execute(query, values).fetchall()
+
+    def _iter_pages(
+        self,
+        fetch: Callable[[sqlite3.Connection, PageCursor | None, int], list[sqlite3.Row]],
+        cursor: PageCursor | None,
+        batch_size: int,
+        key: Callable[[sqlite3.Row], PageCursor],
+        convert: Callable[[sqlite3.Row], ModelT],
+    ) -> Iterator[ModelT]:
+        """keyset ページングで少しずつ読み出しながら 1 件ずつ返す。
+
+        ページの取得ごとに接続を返却するため、読み出し側が遅くてもロックや接続を占有しない。
+        """
+
+        while True:
+            with self._read() as conn:
+                rows = fetch(conn, cursor, batch_size)
+            for row in rows:
+                yield convert(row)
+            if len(rows) < batch_size:
+                return
+            cursor = key(rows[-1])
+
     def _row_to_schedule(self, row: sqlite3.Row) -> Schedule:
         return Schedule(
             id=row["id"],
@@ -539,37 +3042,296 @@ class SQLiteStore:
             note=row["note"],
         )
 
-    def _schedule_exists(self, schedule_id: int) -> bool:
-        row = (
-            self._connection()
-            .execute(
-                "SELECT 1 FROM schedules WHERE id = ?",
-                (schedule_id,),
-            )
-            .fetchone()
-        )
+    def _schedule_exists(self, conn: sqlite3.Connection, schedule_id: int) -> bool:
+        row = conn.execute(
+            "SELECT 1 FROM schedules WHERE id = ?",
+            (schedule_id,),
+        ).fetchone()
         return row is not None
 
+    # -- Snapshots ---------------------------------------------------------
+    def write_snapshot(self, target: str | Path) -> None:
+        """データベース全体の一貫したコピーを ``target`` に書き出す（既存のファイルは置き換える）。
+
+        backup API で 1 つの読み取りトランザクションのまま全ページを写す。WAL 構成ではプールの
+        接続から読むため書き込みを止めず、単一ロック構成では他の読み取りと同じくコピーの間だけ
+        ロックを取る。コピーは WAL を使わない 1 ファイルのデータベースになる。
+        """
+
+        Path(target).unlink(missing_ok=True)
+        destination = sqlite3.connect(target)
+        try:
+            with self._read() as conn:
+                conn.backup(destination)
+            destination.execute("PRAGMA journal_mode = DELETE")
+        finally:
+            destination.close()
+
+    def restore_snapshot(self, source: str | Path) -> SnapshotSummary:
+        """``source`` のスナップショットで全データを置き換え、復元した件数を返す。
+
+        ``source`` はデータベースと同じディレクトリへ移して検査し、足りない表やトリガーの追加と
+        ETag の世代の更新を済ませてから、backup API で書き込み用の接続へ全ページを写す（``source``
+        は残らない）。写し込みは 1 つの書き込みトランザクションで原子的に行われ、ファイルを
+        差し替えないため、同じデータベースを開いている他のプロセスも通常のコミットと同じく
+        復元後のデータを読む。検査に通らないファイルは ``ValueError`` とし、元のデータには触れない。
+        """
+
+        if self._database == ":memory:":
+            raise ValueError("インメモリデータベースにはスナップショットを復元できません")
+        database = Path(self._database)
+        descriptor, name = tempfile.mkstemp(
+            dir=database.parent, prefix=f".{database.name}.", suffix=".restore"
+        )
+        os.close(descriptor)
+        staged = Path(name)
+        try:
+            shutil.move(source, staged)
+            summary, epoch = self._prepare_snapshot(staged)
+            snapshot = sqlite3.connect(staged)
+            try:
+                with self._locked():
+                    # WAL 構成の読み取りは写し込みの間も写す前のデータを読み続ける
+                    snapshot.backup(self._connection())
+                    self._restarted(epoch, summary.version)
+            finally:
+                snapshot.close()
+        finally:
+            staged.unlink(missing_ok=True)
+        return summary
+
+    def _prepare_snapshot(self, path: Path) -> tuple[SnapshotSummary, str]:
+        """スナップショットが壊れておらず、必要なテーブルを持つことを確かめ、復元できる形に整える。
+
+        足りない表やトリガーを追加して ETag の新しい世代を書き込み、件数と世代を返す。
+        ページサイズとジャーナルモードはこのストアのデータベースに合わせて書き換える（WAL の
+        データベースにはページサイズの異なるファイルを backup API で写せないため）。
+        """
+
+        with path.open("rb") as file:
+            if file.read(len(SQLITE_HEADER)) != SQLITE_HEADER:
+                raise ValueError("SQLite のデータベースではありません")
+        conn = sqlite3.connect(path)
+        try:
+            problems = [row[0] for row in conn.execute("PRAGMA quick_check")]
+            if problems != ["ok"]:
+                raise ValueError(f"スナップショットが壊れています: {problems[0]}")
+            tables = {
+                row[0]
+                for row in conn.execute("SELECT name FROM sqlite_master WHERE type = 'table'")
+            }
+            missing = [table for table in _SNAPSHOT_TABLES if table not in tables]
+            if missing:
+                raise ValueError(f"スナップショットにテーブルがありません: {', '.join(missing)}")
+            if conn.execute("PRAGMA foreign_key_check").fetchone() is not None:
+                raise ValueError("スナップショットに参照先の無い行があります")
+            page_size = self._connection().execute("PRAGMA page_size").fetchone()[0]
+            if conn.execute("PRAGMA page_size").fetchone()[0] != page_size:
+                conn.execute("PRAGMA journal_mode = DELETE")
+                conn.execute(f"PRAGMA page_size = {page_size}")
+                conn.execute("VACUUM")
+            with conn:
+                conn.execute("BEGIN IMMEDIATE")
+                self._create_schema(conn)
+                epoch = self._new_epoch(conn)
+                summary = SnapshotSummary(
+                    **{
+                        table: conn.execute(f"SELECT count(*) FROM {table}").fetchone()[0]
+                        for table in _SNAPSHOT_TABLES
+                    },
+                    version=self._current_version(conn),
+                )
+            conn.execute(f"PRAGMA journal_mode = {'WAL' if self.concurrent_reads else 'DELETE'}")
+        except sqlite3.DatabaseError as exc:
+            raise ValueError(f"スナップショットを読み込めません: {exc}") from exc
+        finally:
+            conn.close()
+        return summary, epoch
+
+    def backup_online(
+        self,
+        target: str | Path,
+        *,
+        step_pages: int = BACKUP_STEP_PAGES,
+        pause: float = BACKUP_STEP_PAUSE,
+        progress: Callable[[int, int], None] | None = None,
+    ) -> BackupCopy:
+        """動作中のデータベースを ``step_pages`` ページずつ ``target`` に写す。
+
+        書き込み用の接続を写し元にし、各ステップの実行中だけ書き込みロックを取って、ステップの
+        合間は ``pause`` 秒ロックを手放す。合間に同じ接続で行われた書き込みは SQLite が写し先にも
+        反映するため、コピーをやり直さずに完了時点の内容になる。既存の ``target`` は置き換える。
+        ``progress`` にはステップごとに写したページ数と全ページ数を渡す。途中でこのストアに
+        スナップショットが復元されたら ``RuntimeError``。
+
+        他のプロセスが書き込むと SQLite はコピーを最初からやり直す。WAL 構成ではやり直しに
+        気付いた時点で、読み取りプールの接続で読み取りトランザクションを開いたまま、同じく
+        ``step_pages`` ページずつ写し直す。コピーはその時点の内容になり、以降の書き込みでは
+        やり直さず、書き込みロックも取らない。単一ロック構成では書き込みを止めずに写し直す
+        手段が無いため、``RuntimeError`` で中断する（次の実行でやり直す）。
+        """
+
+        Path(target).unlink(missing_ok=True)
+        destination = sqlite3.connect(target)
+        # 最後のステップのコミットでディスクへの同期を待つと、その間ロックを握ったままになる。
+        # 写し先は同期せずに書き、ロックを手放してからまとめて同期する
+        destination.execute("PRAGMA synchronous = OFF")
+        lock = ExitStack()
+        steps = 0
+        copied = 0
+        longest = 0.0
+        restarts = self._restarts
+        try:
+            lock.enter_context(self._locked())
+            source = self._connection()
+            acquired = time.perf_counter()
+
+            def step(status: int, remaining: int, total: int) -> None:
+                nonlocal acquired, steps, copied, longest
+                steps += 1
+                longest = max(longest, time.perf_counter() - acquired)
+                lock.close()
+                if remaining and total - remaining <= copied:
+                    raise _BackupRestartedError
+                copied = total - remaining
+                if progress is not None:
+                    progress(copied, total)
+                if remaining:
+                    time.sleep(pause)
+                lock.enter_context(self._locked())
+                acquired = time.perf_counter()
+                if self._restarts != restarts:
+                    raise RuntimeError("バックアップ中にデータベースが差し替えられました")
+
+            try:
+                source.backup(destination, pages=step_pages, progress=step)
+                pages = source.execute("PRAGMA page_count").fetchone()[0]
+            except _BackupRestartedError:
+                lock.close()
+                if self._readers is None:
+                    raise RuntimeError(
+                        "他のプロセスの書き込みでバックアップが最初からやり直されました"
+                    ) from None
+
+                def snapshot_step(status: int, remaining: int, total: int) -> None:
+                    nonlocal steps
+                    steps += 1
+                    if progress is not None:
+                        progress(total - remaining, total)
+                    if remaining:
+                        time.sleep(pause)
+                    if self._restarts != restarts:
+                        raise RuntimeError("バックアップ中にデータベースが差し替えられました")
+
+                with self._read() as conn:
+                    # 読み取りトランザクションを開いたままなら、他の接続の書き込みがあっても
+                    # 開始時点の内容のまま最後まで写せる（WAL では書き込みを止めない）
+                    conn.execute("BEGIN")
+                    try:
+                        pages = conn.execute("PRAGMA page_count").fetchone()[0]
+                        conn.backup(destination, pages=step_pages, progress=snapshot_step)
+                    finally:
+                        conn.execute("COMMIT")
+            lock.close()
+            destination.execute("PRAGMA journal_mode = DELETE")
+        finally:
+            lock.close()
+            destination.close()
+        with open(target, "rb+") as file:
+            os.fsync(file.fileno())
+        return BackupCopy(pages, steps, longest)
+
+    def claim_scheduled_run(self, name: str, interval: float) -> bool:
+        """``interval`` 秒ごとの定期処理 ``name`` を、今回このプロセスで実行するかどうかを決める。
+
+        同じデータベースを開くプロセスのうち、間隔の半分より最近の実行の記録が無い場合に限り
+        記録して ``True`` を返す。複数のワーカーが同じ間隔で動かしても、実行は 1 回にまとまる。
+        """
+
+        now = time.time()
+        with self._write() as conn:
+            row = conn.execute(
+                "SELECT ran_at FROM scheduled_runs WHERE name = ?", (name,)
+            ).fetchone()
+            if row is not None and now - row["ran_at"] < interval / 2:
+                return False
+            conn.execute(
+                "INSERT OR REPLACE INTO scheduled_runs (name, ran_at) VALUES (?, ?)", (name, now)
+            )
+            return True
+
     # -- Utilities ---------------------------------------------------------
     def reset(self) -> None:
         """テスト用に全データとオートインクリメントを初期化する。"""
 
-        with self._lock:
-            conn = self._connection()
+        with self._write() as conn:
+            self._defer_search(conn)
             conn.execute("DELETE FROM members")
             conn.execute("DELETE FROM materials")
             conn.execute("DELETE FROM tasks")
             conn.execute("DELETE FROM schedules")
+            conn.execute("DELETE FROM change_log")
             conn.execute(
                 "DELETE FROM sqlite_sequence WHERE name IN "
-                "('members', 'materials', 'schedules', 'tasks')"
+                "('members', 'materials', 'schedules', 'tasks', 'change_log')"
             )
-            conn.commit()
+            epoch = self._new_epoch(conn)
+        with self._locked():
+            # 変更履歴のバージョンが 0 に戻る
+            self._restarted(epoch, 0)
+
+    @staticmethod
+    def _new_epoch(conn: sqlite3.Connection) -> str:
+        """バージョンを捨てて ETag の新しい世代を書き込み、その世代を返す。
+
+        書き込み中のトランザクションの中で呼ぶ。
+        """
+
+        epoch = secrets.token_hex(4)
+        conn.execute("DELETE FROM scope_versions")
+        conn.execute("UPDATE store_epoch SET epoch = ?", (epoch,))
+        return epoch
+
+    def _restarted(self, epoch: str, version: int) -> None:
+        """データを丸ごと入れ替えたコミットの後、ETag・キャッシュ・重なりの計算結果を捨てる。
+
+        購読者には変更履歴の ``version`` から同期し直してもらう。書き込みロックを保持したまま呼ぶ。
+        """
+
+        self._restarts += 1
+        with self._version_guard:
+            # 先に読み直していれば、その後のコミットのバージョンも反映済み
+            if self._epoch != epoch:
+                self._forget_versions(epoch)
+        if self._published_version is not None:
+            self._published_version = version
+            self._published_epoch = epoch
+            self.changes.resync(version)
 
     def close(self) -> None:
         """接続をクローズする。"""
 
+        # 実行待ちの処理がロックを取れるよう、先にスレッドを停止させる
+        with self._aio_guard:
+            aio, self._aio = self._aio, None
+            backups = self._backups
+        if backups is not None:
+            backups.stop()
+        if aio is not None:
+            aio.close()
+        with self._lock:
+            watcher, self._watcher = self._watcher, None
+        self._watch_stopped.set()
+        if watcher is not None:
+            watcher.join()
+        self.changes.close()
         with self._lock:
+            if self._readers is not None:
+                self._readers.close()
             if self._conn is not None:
                 self._conn.close()
                 self._conn = None
+        with self._version_guard:
+            if self._watch is not None:
+                self._watch.close()
+                self._watch = None
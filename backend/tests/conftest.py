@@ -56,11 +56,21 @@ def _seed_materials(store: SQLiteStore) -> None:
         store.create_material(material)
 
 
-@pytest.fixture()
-def seeded_store(tmp_path: Path) -> Iterator[SQLiteStore]:
-    """一時ディレクトリに SQLiteStore を構成し、サンプルデータを保存する。"""
-
-    store = SQLiteStore(tmp_path / "eventcompass.db")
+@pytest.fixture(
+    params=[(False, 0), (True, 0), (True, 64)],
+    ids=["single_lock", "concurrent_reads", "cached"],
+)
+def seeded_store(tmp_path: Path, request: pytest.FixtureRequest) -> Iterator[SQLiteStore]:
+    """一時ディレクトリに SQLiteStore を構成し、サンプルデータを保存する。
+
+    既定の単一ロック構成、WAL + 読み取り接続プール構成、さらに読み取りキャッシュを
+    有効にした構成で同じテストを実行する。
+    """
+
+    concurrent_reads, cache_size = request.param
+    store = SQLiteStore(
+        tmp_path / "eventcompass.db", concurrent_reads=concurrent_reads, cache_size=cache_size
+    )
     _seed_members(store)
     _seed_materials(store)
     try:
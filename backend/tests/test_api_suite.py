@@ -0,0 +1,38 @@
+"""API ベンチマークスイート（``benchmarks.api_suite``）の動作確認テスト。"""
+
+from __future__ import annotations
+
+from benchmarks.api_suite import app_routes, compare, missing_scenarios, run
+from benchmarks.datagen import LARGE_EVENT
+
+
+def test_every_route_has_a_scenario() -> None:
+    assert missing_scenarios() == []
+
+
+def test_suite_runs_all_routes_without_errors() -> None:
+    results = run(size=LARGE_EVENT.scaled(0.002), iterations=3, warmup=1)
+
+    assert results["meta"]["size"]["tasks"] == 200
+    assert len(results["routes"]) == len(app_routes())
+    for route, result in results["routes"].items():
+        assert result["errors"] == 0, route
+        assert result["p50_ms"] <= result["p95_ms"] <= result["p99_ms"] <= result["max_ms"]
+        assert result["throughput_rps"] > 0
+
+
+def test_compare_reports_only_regressions_past_threshold() -> None:
+    baseline = {"routes": {"GET /a": {"p95_ms": 10.0}, "GET /b": {"p95_ms": 10.0}}}
+    current = {
+        "routes": {
+            "GET /a": {"p95_ms": 14.0},
+            "GET /b": {"p95_ms": 12.0},
+            "GET /new": {"p95_ms": 99.0},
+        }
+    }
+
+    regressions = compare(current, baseline, threshold=0.25)
+
+    assert len(regressions) == 1
+    assert regressions[0].startswith("GET /a: p95_ms 10.00 ms -> 14.00 ms")
+    assert compare(current, baseline, threshold=0.25, min_delta_ms=5.0) == []
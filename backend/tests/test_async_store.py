@@ -0,0 +1,87 @@
+"""非同期ストアと非同期エンドポイントのテスト。"""
+
+from __future__ import annotations
+
+import asyncio
+import inspect
+import threading
+from pathlib import Path
+
+from fastapi.routing import APIRoute
+
+from backend.main import app
+from backend.models import MaterialCreate, MaterialUpdate
+from backend.store import SQLiteStore
+
+
+def test_async_store_round_trips_through_executor(seeded_store: SQLiteStore) -> None:
+    async def scenario() -> list[str]:
+        aio = seeded_store.aio
+        created = await aio.create_material(MaterialCreate(name="Cone", part="Course", quantity=3))
+        await aio.update_material(created.id, MaterialUpdate(quantity=4))
+        assert (await aio.get_material(created.id)).quantity == 4
+        names = [item.name async for item in await aio.iter_materials(part="course")]
+        assert names == [item.name for item in await aio.list_materials(part="course")]
+        return names
+
+    assert asyncio.run(scenario()) == ["Traffic Cone", "Cone"]
+
+
+def test_writes_run_on_single_dedicated_thread(seeded_store: SQLiteStore) -> None:
+    async def scenario() -> set[str]:
+        aio = seeded_store.aio
+        names = await asyncio.gather(
+            *(aio.run_write(lambda: threading.current_thread().name) for _ in range(20))
+        )
+        return set(names)
+
+    names = asyncio.run(scenario())
+    assert len(names) == 1
+    assert next(iter(names)).startswith("sqlite-writer")
+
+
+def test_many_pending_reads_do_not_grow_threads(tmp_path: Path) -> None:
+    store = SQLiteStore(tmp_path / "async.db", concurrent_reads=True, reader_pool_size=2)
+    store.create_material(MaterialCreate(name="Tent", part="Reception", quantity=2))
+
+    async def scenario() -> set[str]:
+        def reader_thread() -> str:
+            store.list_materials()
+            return threading.current_thread().name
+
+        return set(await asyncio.gather(*(store.aio.run_read(reader_thread) for _ in range(50))))
+
+    try:
+        # 書き込みロックを握っていても読み取りは進み、スレッド数はプールの本数に収まる
+        with store._lock:
+            threads = asyncio.run(scenario())
+        assert 1 <= len(threads) <= 2
+        assert all(name.startswith("sqlite-reader") for name in threads)
+    finally:
+        store.close()
+
+
+def test_close_stops_executor_threads(tmp_path: Path) -> None:
+    store = SQLiteStore(tmp_path / "async.db")
+    asyncio.run(store.aio.list_members())
+    store.close()
+    assert not any(thread.name.startswith("sqlite-") for thread in threading.enumerate())
+
+
+def test_all_routes_are_coroutines() -> None:
+    endpoints = [route.endpoint for route in app.routes if isinstance(route, APIRoute)]
+    assert endpoints
+    assert all(inspect.iscoroutinefunction(endpoint) for endpoint in endpoints)
+
+
+def test_queue_wait_stats_count_executed_calls(seeded_store: SQLiteStore) -> None:
+    async def scenario() -> None:
+        aio = seeded_store.aio
+        await asyncio.gather(*(aio.list_members() for _ in range(5)))
+        await aio.create_material(MaterialCreate(name="Cone", part="Course", quantity=3))
+
+    asyncio.run(scenario())
+    stats = seeded_store.aio.queue_wait_stats()
+    assert stats["read"].count == 5
+    assert stats["write"].count == 1
+    assert stats["write"].total_seconds >= 0
@@ -0,0 +1,191 @@
+"""オンラインバックアップ（``SQLiteStore.backup_online`` と ``backend.backup``）のテスト。"""
+
+from __future__ import annotations
+
+import logging
+import sqlite3
+import time
+from pathlib import Path
+
+import pytest
+from fastapi.testclient import TestClient
+
+from backend.backup import BACKUP_DIRECTORY_NAME, BackupScheduler
+from backend.main import app, get_store
+from backend.models import ContactInfo, MemberCreate
+from backend.store import SQLiteStore
+
+
+def _member(name: str) -> MemberCreate:
+    return MemberCreate(name=name, part="Medical", position="Support", contact=ContactInfo())
+
+
+def _member_names(path: Path) -> list[str]:
+    with sqlite3.connect(path) as conn:
+        return [row[0] for row in conn.execute("SELECT name FROM members ORDER BY id")]
+
+
+def test_backup_releases_the_lock_between_steps(seeded_store: SQLiteStore, tmp_path: Path) -> None:
+    target = tmp_path / "backup.db"
+    progress: list[tuple[int, int]] = []
+
+    def step(copied: int, total: int) -> None:
+        # ステップの合間は書き込みロックを握っていないため、書き込みがすぐに通る
+        assert not seeded_store._lock.locked()
+        if not progress:
+            seeded_store.create_member(_member("Aoi"))
+        progress.append((copied, total))
+
+    copy = seeded_store.backup_online(target, step_pages=1, pause=0, progress=step)
+
+    assert copy.steps == len(progress) > 1
+    assert progress[-1] == (copy.pages, copy.pages)
+    assert [copied for copied, _ in progress] == sorted(copied for copied, _ in progress)
+    assert copy.max_lock_hold < 1
+    # 途中の書き込みもコピーをやり直さずに反映される
+    assert _member_names(target)[-1] == "Aoi"
+    with sqlite3.connect(target) as conn:
+        assert conn.execute("PRAGMA journal_mode").fetchone()[0] == "delete"
+        assert conn.execute("PRAGMA integrity_check").fetchone()[0] == "ok"
+
+
+def test_backup_stops_when_the_database_is_replaced(
+    seeded_store: SQLiteStore, tmp_path: Path
+) -> None:
+    snapshot = tmp_path / "snapshot.db"
+    seeded_store.write_snapshot(snapshot)
+
+    def restore(copied: int, total: int) -> None:
+        if snapshot.exists():
+            seeded_store.restore_snapshot(snapshot)
+
+    with pytest.raises(RuntimeError, match="差し替えられました"):
+        seeded_store.backup_online(tmp_path / "backup.db", step_pages=1, progress=restore)
+    # 差し替え後のデータベースもバックアップできる
+    seeded_store.backup_online(tmp_path / "backup.db")
+    assert len(_member_names(tmp_path / "backup.db")) == 3
+
+
+def test_backups_are_rotated(seeded_store: SQLiteStore, tmp_path: Path) -> None:
+    scheduler = BackupScheduler(seeded_store, tmp_path / "rotated", prefix="event", keep=2)
+    (tmp_path / "rotated").mkdir()
+    stale = tmp_path / "rotated" / "event-20230101-000000-000.db.partial"
+    stale.write_bytes(b"")
+    unrelated = tmp_path / "rotated" / "notes.txt"
+    unrelated.write_text("keep me")
+
+    results = []
+    for name in ["Aoi", "Ren", "Yui"]:
+        seeded_store.create_member(_member(name))
+        results.append(scheduler.run())
+        time.sleep(0.002)
+
+    backups = scheduler.list_backups()
+    assert [backup.name for backup in backups] == [results[2].name, results[1].name]
+    assert all(backup.name.startswith("event-") for backup in backups)
+    assert backups[0].size == results[2].size
+    assert _member_names(tmp_path / "rotated" / results[2].name)[-1] == "Yui"
+    assert not stale.exists()
+    assert unrelated.exists()
+    status = scheduler.status()
+    assert not status.running
+    assert status.last == results[2]
+    assert status.pages_copied == status.pages_total == results[2].pages
+    assert status.last_error is None
+    with pytest.raises(ValueError):
+        BackupScheduler(seeded_store, tmp_path, prefix="event", keep=0)
+
+
+def test_failed_backups_are_reported(
+    seeded_store: SQLiteStore, tmp_path: Path, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    scheduler = seeded_store.backups
+    snapshot = tmp_path / "snapshot.db"
+    seeded_store.write_snapshot(snapshot)
+
+    def restore(copied: int, total: int) -> None:
+        # 復元でデータベースを差し替え、実行中のバックアップを失敗させる
+        if snapshot.exists():
+            seeded_store.restore_snapshot(snapshot)
+
+    monkeypatch.setattr(scheduler, "step_pages", 1)
+    monkeypatch.setattr(scheduler, "_progress", restore)
+
+    with pytest.raises(RuntimeError):
+        scheduler.run()
+
+    status = scheduler.status()
+    assert status.last is None
+    assert "差し替えられました" in (status.last_error or "")
+    assert status.backups == []
+    assert list((tmp_path / BACKUP_DIRECTORY_NAME).iterdir()) == []
+
+
+def test_scheduler_runs_on_an_interval(seeded_store: SQLiteStore) -> None:
+    scheduler = seeded_store.backups
+    scheduler.start(0.05)
+    assert scheduler.status().interval_seconds == 0.05
+
+    deadline = time.monotonic() + 5
+    while len(scheduler.list_backups()) < 2 and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert len(scheduler.list_backups()) >= 2
+
+    # close() が定期バックアップのスレッドを止める
+    seeded_store.close()
+    assert scheduler.status().interval_seconds is None
+    count = len(scheduler.list_backups())
+    time.sleep(0.15)
+    assert len(scheduler.list_backups()) == count
+    with pytest.raises(ValueError):
+        scheduler.start(0)
+
+
+def test_scheduler_logs_failures_and_keeps_running(
+    seeded_store: SQLiteStore, monkeypatch: pytest.MonkeyPatch, caplog: pytest.LogCaptureFixture
+) -> None:
+    scheduler = seeded_store.backups
+    calls: list[str] = []
+
+    def claim(name: str, interval: float) -> bool:
+        calls.append(name)
+        raise sqlite3.OperationalError("database is locked")
+
+    monkeypatch.setattr(seeded_store, "claim_scheduled_run", claim)
+
+    with caplog.at_level(logging.ERROR, logger="backend.backup"):
+        scheduler.start(0.01)
+        deadline = time.monotonic() + 5
+        while len(calls) < 2 and time.monotonic() < deadline:
+            time.sleep(0.01)
+        scheduler.stop()
+
+    # 失敗してもスレッドは止まらず、例外はトレースバック付きで記録される
+    assert len(calls) >= 2
+    records = [record for record in caplog.records if record.name == "backend.backup"]
+    assert records
+    assert records[0].message == "定期バックアップに失敗しました"
+    assert records[0].exc_info is not None
+    assert scheduler.list_backups() == []
+
+
+def test_backup_endpoints(client: TestClient, seeded_store: SQLiteStore) -> None:
+    created = client.post("/backups")
+
+    assert created.status_code == 201
+    result = created.json()
+    assert result["pages"] > 0
+    assert result["name"].startswith("eventcompass-")
+    status = client.get("/backups").json()
+    assert status["running"] is False
+    assert status["last"] == result
+    assert [backup["name"] for backup in status["backups"]] == [result["name"]]
+    assert status["keep"] == seeded_store.backups.keep
+
+    memory = SQLiteStore(":memory:")
+    app.dependency_overrides[get_store] = lambda: memory
+    try:
+        assert client.get("/backups").status_code == 400
+        assert client.post("/backups").status_code == 400
+    finally:
+        memory.close()
@@ -0,0 +1,200 @@
+"""一括処理 API のテスト。"""
+
+from __future__ import annotations
+
+from fastapi.testclient import TestClient
+
+from backend.models import BatchAction, BatchEntity, BatchOperation
+from backend.store import SQLiteStore
+
+
+def test_batch_applies_operations_in_order_with_temporary_ids(client: TestClient) -> None:
+    response = client.post(
+        "/batch",
+        json={
+            "operations": [
+                {
+                    "entity": "member",
+                    "action": "create",
+                    "ref_id": -1,
+                    "payload": {
+                        "name": "Offline Member",
+                        "part": "Finish",
+                        "position": "Support",
+                        "contact": {},
+                    },
+                },
+                {
+                    "entity": "member",
+                    "action": "update",
+                    "ref_id": -1,
+                    "payload": {"position": "Leader"},
+                },
+                {"entity": "material", "action": "update", "ref_id": 1, "payload": {"quantity": 9}},
+                {"entity": "material", "action": "delete", "ref_id": 3},
+            ]
+        },
+    )
+    assert response.status_code == 200
+    body = response.json()
+    assert [result["status"] for result in body["results"]] == ["ok"] * 4
+    assert body["id_map"] == {"member": {"-1": 4}}
+    assert body["results"][1]["data"]["position"] == "Leader"
+    assert body["results"][3]["id"] == 3
+
+    assert client.get("/members/4").json()["position"] == "Leader"
+    assert client.get("/materials/1").json()["quantity"] == 9
+    assert client.get("/materials/3").status_code == 404
+
+
+def test_batch_creates_tasks_under_schedule_created_in_same_batch(client: TestClient) -> None:
+    response = client.post(
+        "/batch",
+        json={
+            "operations": [
+                {
+                    "entity": "schedule",
+                    "action": "create",
+                    "ref_id": -10,
+                    "payload": {"name": "大会当日", "event_date": "2023-10-01"},
+                },
+                {
+                    "entity": "task",
+                    "action": "create",
+                    "ref_id": -11,
+                    "schedule_id": -10,
+                    "payload": {
+                        "name": "受付開始",
+                        "stage": "Reception",
+                        "start_time": "2023-10-01T08:00:00",
+                        "end_time": "2023-10-01T09:00:00",
+                    },
+                },
+                {
+                    "entity": "task",
+                    "action": "update",
+                    "ref_id": -11,
+                    "payload": {"status": "in_progress"},
+                },
+            ]
+        },
+    )
+    body = response.json()
+    schedule_id = body["id_map"]["schedule"]["-10"]
+    task = body["results"][2]["data"]
+    assert task["schedule_id"] == schedule_id
+    assert task["status"] == "in_progress"
+    assert len(client.get(f"/schedules/{schedule_id}/tasks").json()) == 1
+
+
+def test_batch_reports_failures_per_operation_and_keeps_others(client: TestClient) -> None:
+    response = client.post(
+        "/batch",
+        json={
+            "operations": [
+                {"entity": "member", "action": "delete", "ref_id": 999},
+                {"entity": "material", "action": "create", "payload": {"name": "Tent"}},
+                {
+                    "entity": "material",
+                    "action": "create",
+                    "payload": {"name": "Broken", "part": "Course", "quantity": -1},
+                },
+                {"entity": "material", "action": "update", "ref_id": 2, "payload": {"quantity": 1}},
+            ]
+        },
+    )
+    assert response.status_code == 200
+    results = response.json()["results"]
+    assert [result["status"] for result in results] == ["not_found", "invalid", "invalid", "ok"]
+    assert results[1]["detail"][0]["loc"] == ["part"]
+    assert client.get("/materials/2").json()["quantity"] == 1
+    assert len(client.get("/materials").json()) == 3
+
+
+def test_batch_rejects_non_negative_temporary_ids(client: TestClient) -> None:
+    member = {"name": "Offline Member", "part": "Finish", "position": "Support", "contact": {}}
+    response = client.post(
+        "/batch",
+        json={
+            "operations": [
+                {"entity": "member", "action": "create", "ref_id": 1, "payload": member},
+                # 既存のメンバー 1 を指す。作成した行に読み替えてはいけない
+                {"entity": "member", "action": "delete", "ref_id": 1},
+            ]
+        },
+    )
+    body = response.json()
+    assert [result["status"] for result in body["results"]] == ["invalid", "ok"]
+    assert "負数" in body["results"][0]["detail"]
+    assert body["id_map"] == {}
+    assert client.get("/members/1").status_code == 404
+    # 取り消された作成操作の行は残らない
+    assert len(client.get("/members").json()) == 2
+
+
+def test_batch_temporary_ids_are_scoped_by_entity(client: TestClient) -> None:
+    response = client.post(
+        "/batch",
+        json={
+            "operations": [
+                {
+                    "entity": "schedule",
+                    "action": "create",
+                    "ref_id": -1,
+                    "payload": {"name": "大会当日", "event_date": "2023-10-01"},
+                },
+                {
+                    "entity": "member",
+                    "action": "create",
+                    "ref_id": -1,
+                    "payload": {
+                        "name": "Aoi",
+                        "part": "Finish",
+                        "position": "Support",
+                        "contact": {},
+                    },
+                },
+                {
+                    "entity": "task",
+                    "action": "create",
+                    "schedule_id": -1,
+                    "payload": {
+                        "name": "受付開始",
+                        "stage": "Reception",
+                        "start_time": "2023-10-01T08:00:00",
+                        "end_time": "2023-10-01T09:00:00",
+                    },
+                },
+                {"entity": "member", "action": "update", "ref_id": -1, "payload": {"part": "Goal"}},
+            ]
+        },
+    )
+    body = response.json()
+    assert [result["status"] for result in body["results"]] == ["ok"] * 4
+    schedule_id = body["id_map"]["schedule"]["-1"]
+    member_id = body["id_map"]["member"]["-1"]
+    # 同じ仮 ID でも、タスクはスケジュールの、更新はメンバーの対応で読み替える
+    assert body["results"][2]["data"]["schedule_id"] == schedule_id
+    assert body["results"][3]["id"] == member_id
+    assert client.get(f"/members/{member_id}").json()["part"] == "Goal"
+
+
+def test_batch_commits_once(seeded_store: SQLiteStore) -> None:
+    statements: list[str] = []
+    seeded_store._connection().set_trace_callback(statements.append)
+    try:
+        seeded_store.apply_batch(
+            [
+                BatchOperation(
+                    entity=BatchEntity.MATERIAL,
+                    action=BatchAction.UPDATE,
+                    ref_id=material_id,
+                    payload={"quantity": material_id * 10},
+                )
+                for material_id in (1, 2, 3)
+            ]
+        )
+    finally:
+        seeded_store._connection().set_trace_callback(None)
+    assert sum(1 for sql in statements if sql.strip().upper() == "COMMIT") == 1
+    assert [item.quantity for item in seeded_store.list_materials()] == [10, 20, 30]
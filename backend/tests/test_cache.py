@@ -0,0 +1,108 @@
+"""読み取りキャッシュのテスト。"""
+
+from __future__ import annotations
+
+from collections.abc import Iterator
+from datetime import date, datetime
+from pathlib import Path
+
+import pytest
+
+from backend.models import MemberUpdate, ScheduleCreate, TaskCreate, TaskStatus, TaskUpdate
+from backend.store import SQLiteStore
+
+
+@pytest.fixture()
+def cached_store(tmp_path: Path) -> Iterator[SQLiteStore]:
+    store = SQLiteStore(tmp_path / "cache.db", cache_size=4)
+    try:
+        yield store
+    finally:
+        store.close()
+
+
+def _task(name: str, hour: int) -> TaskCreate:
+    return TaskCreate(
+        name=name,
+        stage="Course",
+        start_time=datetime(2023, 10, 1, hour),
+        end_time=datetime(2023, 10, 1, hour, 30),
+    )
+
+
+def test_repeated_reads_hit_cache_without_querying(cached_store: SQLiteStore) -> None:
+    schedule = cached_store.create_schedule(
+        ScheduleCreate(name="初日", event_date=date(2023, 10, 1))
+    )
+    task = cached_store.create_task(schedule.id, _task("巡回", 9))
+    assert cached_store.get_task(task.id) == task
+
+    statements: list[str] = []
+    cached_store._connection().set_trace_callback(statements.append)
+    try:
+        assert cached_store.get_task(task.id) == task
+        assert cached_store.get_task(task.id) == task
+    finally:
+        cached_store._connection().set_trace_callback(None)
+    assert statements == []
+    stats = cached_store.cache_stats()
+    assert stats is not None
+    assert (stats.hits, stats.misses) == (2, 1)
+
+
+def test_writes_invalidate_only_their_schedule(cached_store: SQLiteStore) -> None:
+    first = cached_store.create_schedule(ScheduleCreate(name="初日", event_date=date(2023, 10, 1)))
+    second = cached_store.create_schedule(
+        ScheduleCreate(name="二日目", event_date=date(2023, 10, 2))
+    )
+    task = cached_store.create_task(first.id, _task("受付", 8))
+    cached_store.create_task(second.id, _task("撤収", 17))
+    cached_store.list_tasks(first.id, status=TaskStatus.PLANNED)
+    cached_store.list_tasks(second.id)
+
+    cached_store.update_task(task.id, TaskUpdate(status=TaskStatus.COMPLETED))
+
+    assert cached_store.list_tasks(first.id, status=TaskStatus.PLANNED) == []
+    cached_store.list_tasks(second.id)
+    stats = cached_store.cache_stats()
+    assert stats is not None
+    assert (stats.hits, stats.misses) == (1, 3)
+
+
+def test_member_update_is_visible_through_cache(seeded_store: SQLiteStore) -> None:
+    assert seeded_store.get_member(1).position == "Leader"
+    seeded_store.update_member(1, MemberUpdate(position="Support"))
+    assert seeded_store.get_member(1).position == "Support"
+    assert [member.id for member in seeded_store.list_members(part="reception")] == [1, 3]
+
+
+def test_least_recently_used_entries_are_evicted(cached_store: SQLiteStore) -> None:
+    schedules = [
+        cached_store.create_schedule(
+            ScheduleCreate(name=f"{day} 日目", event_date=date(2023, 10, day))
+        )
+        for day in range(1, 6)
+    ]
+    for schedule in schedules:
+        cached_store.get_schedule(schedule.id)
+    # 最初のエントリは上限 4 件を超えた時点で追い出されている
+    cached_store.get_schedule(schedules[0].id)
+    stats = cached_store.cache_stats()
+    assert stats is not None
+    assert (stats.hits, stats.misses, stats.evictions, stats.size) == (0, 6, 2, 4)
+
+
+def test_missing_rows_are_not_cached(cached_store: SQLiteStore) -> None:
+    with pytest.raises(KeyError):
+        cached_store.get_member(1)
+    stats = cached_store.cache_stats()
+    assert stats is not None
+    assert stats.size == 0
+
+
+def test_cache_is_disabled_by_default(tmp_path: Path) -> None:
+    store = SQLiteStore(tmp_path / "plain.db")
+    try:
+        assert store.cache_stats() is None
+    finally:
+        store.close()
@@ -0,0 +1,232 @@
+"""同じ場所で重なるタスクの検出（``backend.conflicts``）のテスト。"""
+
+from __future__ import annotations
+
+import itertools
+import random
+from datetime import UTC, date, datetime, timedelta, timezone
+
+import httpx
+import pytest
+from fastapi.testclient import TestClient
+
+from backend.conflicts import ConflictInterval, find_overlaps
+from backend.models import (
+    BatchAction,
+    BatchEntity,
+    BatchOperation,
+    ScheduleCreate,
+    TaskCreate,
+    TaskUpdate,
+    TraceSettings,
+)
+from backend.store import SQLiteStore
+
+
+def _at(hour: int, minute: int = 0) -> datetime:
+    return datetime(2023, 10, 1, hour, minute)
+
+
+def _task(name: str, start: datetime, end: datetime, location: str | None) -> TaskCreate:
+    return TaskCreate(name=name, stage="Course", start_time=start, end_time=end, location=location)
+
+
+def _pairs(overlaps: list) -> list[tuple[int, int]]:
+    return [(overlap.first_task_id, overlap.second_task_id) for overlap in overlaps]
+
+
+def test_find_overlaps_reports_each_pair_once() -> None:
+    overlaps = find_overlaps(
+        [
+            ConflictInterval(1, _at(8), _at(12)),
+            ConflictInterval(2, _at(9), _at(10)),
+            ConflictInterval(3, _at(9, 30), _at(11)),
+            # 終了時刻ちょうどに始まる区間は重ならない
+            ConflictInterval(4, _at(12), _at(13)),
+            # 長さ 0・終了が開始より前の区間は対象外
+            ConflictInterval(5, _at(9), _at(9)),
+            ConflictInterval(6, _at(11), _at(10)),
+        ]
+    )
+
+    assert _pairs(overlaps) == [(1, 2), (1, 3), (2, 3)]
+    assert (overlaps[2].overlap_start, overlaps[2].overlap_end) == (_at(9, 30), _at(10))
+
+
+def test_find_overlaps_compares_timezones_as_instants() -> None:
+    jst = timezone(timedelta(hours=9))
+    overlaps = find_overlaps(
+        [
+            ConflictInterval(1, datetime(2023, 10, 1, 17, tzinfo=jst), _at(9)),
+            ConflictInterval(2, datetime(2023, 10, 1, 8, 30, tzinfo=UTC), _at(10)),
+        ]
+    )
+
+    assert _pairs(overlaps) == [(1, 2)]
+
+
+def test_sweep_matches_pairwise_comparison() -> None:
+    rng = random.Random(17)
+    intervals = []
+    for task_id in range(300):
+        start = _at(5) + timedelta(minutes=rng.randrange(0, 15 * 60, 5))
+        intervals.append(
+            ConflictInterval(task_id, start, start + timedelta(minutes=rng.choice([0, 15, 60])))
+        )
+
+    expected = {
+        frozenset((a.task_id, b.task_id))
+        for a, b in itertools.combinations(intervals, 2)
+        if a.start < b.end and b.start < a.end and a.start < a.end and b.start < b.end
+    }
+    pairs = _pairs(find_overlaps(intervals))
+    assert len(pairs) == len(expected)
+    assert {frozenset(pair) for pair in pairs} == expected
+
+
+@pytest.fixture()
+def schedule_id(seeded_store: SQLiteStore) -> int:
+    return seeded_store.create_schedule(
+        ScheduleCreate(name="初日", event_date=date(2023, 10, 1))
+    ).id
+
+
+def test_conflicts_are_grouped_by_location(seeded_store: SQLiteStore, schedule_id: int) -> None:
+    tent = seeded_store.create_task(schedule_id, _task("受付", _at(7), _at(9), "本部テント"))
+    briefing = seeded_store.create_task(schedule_id, _task("説明会", _at(8), _at(10), "本部テント"))
+    start = seeded_store.create_task(schedule_id, _task("整列", _at(8), _at(9), "スタート地点"))
+    seeded_store.create_task(schedule_id, _task("号砲", _at(8, 30), _at(8, 45), "スタート地点"))
+    # 場所の無いタスクと、表記の異なる場所は比較しない
+    seeded_store.create_task(schedule_id, _task("巡回", _at(8), _at(9), None))
+    seeded_store.create_task(schedule_id, _task("設営", _at(8), _at(9), "本部テント "))
+
+    conflicts = seeded_store.find_conflicts(schedule_id)
+
+    assert [group.location for group in conflicts] == ["スタート地点", "本部テント"]
+    assert _pairs(conflicts[1].overlaps) == [(tent.id, briefing.id)]
+    assert conflicts[0].overlaps[0].first_task_id == start.id
+    with pytest.raises(KeyError):
+        seeded_store.find_conflicts(999)
+
+
+def test_edit_rechecks_only_affected_locations(seeded_store: SQLiteStore, schedule_id: int) -> None:
+    first = seeded_store.create_task(schedule_id, _task("受付", _at(7), _at(9), "本部テント"))
+    second = seeded_store.create_task(schedule_id, _task("説明会", _at(8), _at(10), "本部テント"))
+    seeded_store.create_task(schedule_id, _task("給水", _at(8), _at(12), "5km 給水所"))
+    seeded_store.create_task(schedule_id, _task("補充", _at(9), _at(10), "5km 給水所"))
+    seeded_store.find_conflicts(schedule_id)
+    # 実行された SELECT をトレーサーで記録する
+    seeded_store.configure_tracing(TraceSettings(slow_query_ms=0.000001))
+
+    seeded_store.update_task(second.id, TaskUpdate(location="ゴール地点"))
+    conflicts = seeded_store.find_conflicts(schedule_id)
+
+    assert [group.location for group in conflicts] == ["5km 給水所"]
+    reads = [
+        entry.parameters
+        for entry in seeded_store.trace_snapshot().slow_queries
+        if entry.sql.startswith("SELECT id, location")
+    ]
+    # 移動元と移動先の 2 か所だけを読み直す
+    assert reads == [["int", "str"], ["int", "str"]]
+
+    seeded_store.update_task(second.id, TaskUpdate(location="本部テント"))
+    assert _pairs(seeded_store.task_conflicts(first.id)) == [(first.id, second.id)]
+    seeded_store.delete_task(second.id)
+    assert seeded_store.task_conflicts(first.id) == []
+
+
+def test_status_only_updates_keep_cached_result(
+    seeded_store: SQLiteStore, schedule_id: int
+) -> None:
+    task = seeded_store.create_task(schedule_id, _task("受付", _at(7), _at(9), "本部テント"))
+    seeded_store.find_conflicts(schedule_id)
+    seeded_store.configure_tracing(TraceSettings(slow_query_ms=0.000001))
+
+    seeded_store.update_task(task.id, TaskUpdate(note="雨天時はテント内"))
+    seeded_store.find_conflicts(schedule_id)
+
+    assert not any(
+        entry.sql.startswith("SELECT id, location")
+        for entry in seeded_store.trace_snapshot().slow_queries
+    )
+
+
+def test_bulk_changes_refresh_results(seeded_store: SQLiteStore, schedule_id: int) -> None:
+    task = seeded_store.create_task(schedule_id, _task("受付", _at(7), _at(9), "本部テント"))
+    assert seeded_store.find_conflicts(schedule_id) == []
+
+    seeded_store.import_tasks(
+        schedule_id,
+        [
+            {
+                "name": "説明会",
+                "stage": "Course",
+                "start_time": "2023-10-01T08:00:00",
+                "end_time": "2023-10-01T10:00:00",
+                "location": "本部テント",
+            }
+        ],
+    )
+    assert len(seeded_store.find_conflicts(schedule_id)) == 1
+
+    # 一括処理での変更も反映される
+    seeded_store.apply_batch(
+        [
+            BatchOperation(
+                entity=BatchEntity.TASK,
+                action=BatchAction.UPDATE,
+                ref_id=task.id,
+                payload={"location": "ゴール地点"},
+            )
+        ]
+    )
+    assert seeded_store.find_conflicts(schedule_id) == []
+
+    seeded_store.delete_schedule(schedule_id)
+    with pytest.raises(KeyError):
+        seeded_store.find_conflicts(schedule_id)
+
+
+def test_conflict_endpoints(client: TestClient) -> None:
+    schedule_id = client.post(
+        "/schedules", json={"name": "初日", "event_date": "2023-10-01"}
+    ).json()["id"]
+
+    def create(name: str, start: str, end: str) -> httpx.Response:
+        return client.post(
+            f"/schedules/{schedule_id}/tasks",
+            json={
+                "name": name,
+                "stage": "Finish",
+                "start_time": f"2023-10-01T{start}:00",
+                "end_time": f"2023-10-01T{end}:00",
+                "location": "ゴール地点",
+            },
+        )
+
+    first = create("計測", "10:00", "12:00")
+    assert "X-Task-Conflicts" not in first.headers
+    second = create("表彰式", "11:30", "12:30")
+    assert second.headers["X-Task-Conflicts"] == str(first.json()["id"])
+
+    response = client.get(f"/schedules/{schedule_id}/conflicts")
+    assert response.status_code == 200
+    assert response.json() == [
+        {
+            "location": "ゴール地点",
+            "overlaps": [
+                {
+                    "first_task_id": first.json()["id"],
+                    "second_task_id": second.json()["id"],
+                    "overlap_start": "2023-10-01T11:30:00",
+                    "overlap_end": "2023-10-01T12:00:00",
+                }
+            ],
+        }
+    ]
+
+    moved = client.put(f"/tasks/{second.json()['id']}", json={"start_time": "2023-10-01T12:00:00"})
+    assert "X-Task-Conflicts" not in moved.headers
+    assert client.get(f"/schedules/{schedule_id}/conflicts").json() == []
+    assert client.get("/schedules/999/conflicts").status_code == 404
@@ -0,0 +1,283 @@
+"""ダッシュボードの集計表（トリガーで差分更新する集計）のテスト。"""
+
+from __future__ import annotations
+
+import sqlite3
+from datetime import date, datetime
+from pathlib import Path
+
+import pytest
+from fastapi.testclient import TestClient
+
+from backend.models import (
+    BatchAction,
+    BatchEntity,
+    BatchOperation,
+    ContactInfo,
+    MaterialUpdate,
+    MemberCreate,
+    MemberUpdate,
+    ScheduleCreate,
+    TaskCreate,
+    TaskStatus,
+    TaskUpdate,
+    TraceSettings,
+)
+from backend.store import SQLiteStore
+
+
+def _task(name: str, stage: str = "Course") -> TaskCreate:
+    return TaskCreate(
+        name=name,
+        stage=stage,
+        start_time=datetime(2023, 10, 1, 8),
+        end_time=datetime(2023, 10, 1, 9),
+    )
+
+
+def _task_counts(store: SQLiteStore, schedule_id: int | None = None) -> list[tuple]:
+    return [
+        (count.schedule_id, count.stage, count.status, count.tasks)
+        for count in store.task_status_counts(schedule_id)
+    ]
+
+
+def _assert_consistent(store: SQLiteStore) -> None:
+    check = store.check_aggregates()
+    assert check.mismatches == []
+    assert not check.repaired
+
+
+@pytest.fixture()
+def schedule_id(seeded_store: SQLiteStore) -> int:
+    return seeded_store.create_schedule(
+        ScheduleCreate(name="初日", event_date=date(2023, 10, 1))
+    ).id
+
+
+def test_member_and_material_totals_follow_writes(seeded_store: SQLiteStore) -> None:
+    assert [(count.part, count.members) for count in seeded_store.member_part_counts()] == [
+        ("Course", 1),
+        ("Reception", 2),
+    ]
+    assert [
+        (total.part, total.materials, total.quantity)
+        for total in seeded_store.material_part_totals()
+    ] == [("Course", 1, 20), ("Reception", 2, 7)]
+
+    seeded_store.update_member(1, MemberUpdate(part="Course"))
+    seeded_store.create_member(
+        MemberCreate(name="Aoi", part="Medical", position="Support", contact=ContactInfo())
+    )
+    seeded_store.update_material(2, MaterialUpdate(quantity=25))
+    seeded_store.update_material(1, MaterialUpdate(part="Course"))
+    seeded_store.delete_material(3)
+
+    assert [(count.part, count.members) for count in seeded_store.member_part_counts()] == [
+        ("Course", 2),
+        ("Medical", 1),
+        ("Reception", 1),
+    ]
+    # 資材の無くなったパートは集計から消える
+    assert [
+        (total.part, total.materials, total.quantity)
+        for total in seeded_store.material_part_totals()
+    ] == [("Course", 2, 27)]
+    _assert_consistent(seeded_store)
+
+
+def test_task_counts_follow_writes(seeded_store: SQLiteStore, schedule_id: int) -> None:
+    other_id = seeded_store.create_schedule(
+        ScheduleCreate(name="二日目", event_date=date(2023, 10, 2))
+    ).id
+    first = seeded_store.create_task(schedule_id, _task("受付"))
+    seeded_store.create_task(schedule_id, _task("誘導"))
+    seeded_store.create_task(schedule_id, _task("表彰式", stage="Finish"))
+    seeded_store.create_task(other_id, _task("撤収"))
+
+    seeded_store.update_task_status(first.id, TaskStatus.IN_PROGRESS)
+    seeded_store.update_task(first.id, TaskUpdate(stage="Start"))
+
+    assert _task_counts(seeded_store, schedule_id) == [
+        (schedule_id, "Course", TaskStatus.PLANNED, 1),
+        (schedule_id, "Finish", TaskStatus.PLANNED, 1),
+        (schedule_id, "Start", TaskStatus.IN_PROGRESS, 1),
+    ]
+    assert _task_counts(seeded_store) == [
+        *_task_counts(seeded_store, schedule_id),
+        (other_id, "Course", TaskStatus.PLANNED, 1),
+    ]
+
+    seeded_store.delete_task(first.id)
+    # スケジュールの削除でカスケード削除されたタスクも集計から消える
+    seeded_store.delete_schedule(other_id)
+    assert [count.stage for count in seeded_store.task_status_counts()] == ["Course", "Finish"]
+    assert seeded_store.task_status_counts(other_id) == []
+    _assert_consistent(seeded_store)
+
+
+def test_bulk_writes_keep_aggregates_consistent(
+    seeded_store: SQLiteStore, schedule_id: int
+) -> None:
+    report = seeded_store.import_tasks(
+        schedule_id,
+        [
+            {
+                "name": f"給水 {index}",
+                "stage": "Course",
+                "start_time": "2023-10-01T08:00:00",
+                "end_time": "2023-10-01T09:00:00",
+                "status": "completed" if index % 3 == 0 else "planned",
+            }
+            for index in range(30)
+        ]
+        # 検証で弾かれる行は集計されない
+        + [{"name": "不正な行", "stage": "Course"}],
+    )
+    seeded_store.apply_batch(
+        [
+            BatchOperation(entity=BatchEntity.MEMBER, action=BatchAction.DELETE, ref_id=1),
+            BatchOperation(
+                entity=BatchEntity.MATERIAL,
+                action=BatchAction.UPDATE,
+                ref_id=2,
+                payload={"quantity": 0},
+            ),
+        ]
+    )
+
+    assert report.imported == 30
+    assert _task_counts(seeded_store, schedule_id) == [
+        (schedule_id, "Course", TaskStatus.COMPLETED, 10),
+        (schedule_id, "Course", TaskStatus.PLANNED, 20),
+    ]
+    assert [(count.part, count.members) for count in seeded_store.member_part_counts()] == [
+        ("Course", 1),
+        ("Reception", 1),
+    ]
+    assert seeded_store.material_part_totals()[0].quantity == 0
+    _assert_consistent(seeded_store)
+
+    seeded_store.reset()
+    assert seeded_store.member_part_counts() == []
+    assert seeded_store.task_status_counts() == []
+    _assert_consistent(seeded_store)
+
+
+def test_reads_touch_only_the_summary_tables(seeded_store: SQLiteStore, schedule_id: int) -> None:
+    seeded_store.create_task(schedule_id, _task("受付"))
+    seeded_store.configure_tracing(TraceSettings(slow_query_ms=0.000001))
+
+    seeded_store.member_part_counts()
+    seeded_store.material_part_totals()
+    seeded_store.task_status_counts(schedule_id)
+
+    queries = [
+        entry
+        for entry in seeded_store.trace_snapshot().slow_queries
+        if entry.sql.startswith("SELECT")
+    ]
+    assert [entry.sql.split(" FROM ")[1].split()[0] for entry in queries] == [
+        "member_part_counts",
+        "material_part_totals",
+        "task_status_counts",
+    ]
+    # 集計表の主キーで読む（元のテーブルや一時的な並べ替えを使わない）
+    assert all("members" not in " ".join(entry.plan) for entry in queries)
+    assert not any("TEMP B-TREE" in " ".join(entry.plan) for entry in queries)
+
+
+def test_check_detects_and_repairs_drift(seeded_store: SQLiteStore, schedule_id: int) -> None:
+    seeded_store.create_task(schedule_id, _task("受付"))
+    etag = seeded_store.version_token("materials")
+    # トリガーを通さずに集計表を壊す
+    with seeded_store._write() as conn:
+        conn.execute("UPDATE material_part_totals SET quantity = 99 WHERE part = 'Course'")
+        conn.execute("DELETE FROM task_status_counts")
+        conn.execute("INSERT INTO member_part_counts VALUES ('Ghost', 3)")
+
+    check = seeded_store.check_aggregates()
+
+    assert check.groups == 5
+    assert [
+        (mismatch.summary, mismatch.group, mismatch.expected, mismatch.stored)
+        for mismatch in check.mismatches
+    ] == [
+        ("member_part_counts", ["Ghost"], [0], [3]),
+        ("material_part_totals", ["Course"], [1, 20], [1, 99]),
+        ("task_status_counts", [schedule_id, "Course", "planned"], [1], [0]),
+    ]
+    assert not check.repaired
+    # 検査だけでは集計表を変えない
+    assert seeded_store.check_aggregates().mismatches == check.mismatches
+
+    repaired = seeded_store.check_aggregates(repair=True)
+
+    assert repaired.repaired
+    assert repaired.mismatches == check.mismatches
+    assert seeded_store.version_token("materials") != etag
+    assert seeded_store.material_part_totals()[0].quantity == 20
+    assert _task_counts(seeded_store) == [(schedule_id, "Course", TaskStatus.PLANNED, 1)]
+    _assert_consistent(seeded_store)
+
+
+def test_existing_rows_are_aggregated_on_upgrade(tmp_path: Path) -> None:
+    path = tmp_path / "legacy.db"
+    store = SQLiteStore(path)
+    store.create_member(
+        MemberCreate(name="Aoi", part="Medical", position="Support", contact=ContactInfo())
+    )
+    store.close()
+    with sqlite3.connect(path) as conn:
+        for (trigger,) in conn.execute(
+            "SELECT name FROM sqlite_master WHERE type = 'trigger' AND name LIKE '%_counts'"
+        ).fetchall():
+            conn.execute(f"DROP TRIGGER {trigger}")
+        conn.execute("DROP TABLE member_part_counts")
+
+    store = SQLiteStore(path)
+    try:
+        assert [(count.part, count.members) for count in store.member_part_counts()] == [
+            ("Medical", 1)
+        ]
+        _assert_consistent(store)
+    finally:
+        store.close()
+
+
+def test_dashboard_endpoints(client: TestClient) -> None:
+    schedule_id = client.post(
+        "/schedules", json={"name": "初日", "event_date": "2023-10-01"}
+    ).json()["id"]
+    client.post(
+        f"/schedules/{schedule_id}/tasks",
+        json={
+            "name": "計測",
+            "stage": "Finish",
+            "start_time": "2023-10-01T10:00:00",
+            "end_time": "2023-10-01T12:00:00",
+        },
+    )
+
+    members = client.get("/dashboard/members")
+    assert members.json() == [
+        {"part": "Course", "members": 1},
+        {"part": "Reception", "members": 2},
+    ]
+    assert (
+        client.get("/dashboard/members", headers={"If-None-Match": members.headers["ETag"]})
+    ).status_code == 304
+    assert client.get("/dashboard/materials").json()[1] == {
+        "part": "Reception",
+        "materials": 2,
+        "quantity": 7,
+    }
+    assert client.get("/dashboard/tasks", params={"schedule_id": schedule_id}).json() == [
+        {"schedule_id": schedule_id, "stage": "Finish", "status": "planned", "tasks": 1}
+    ]
+    assert client.get("/dashboard/tasks", params={"schedule_id": 999}).json() == []
+
+    check = client.get("/debug/aggregates")
+    assert check.status_code == 200
+    assert check.json() == {"groups": 5, "mismatches": [], "repaired": False}
+    assert client.post("/debug/aggregates/rebuild").json()["repaired"] is False
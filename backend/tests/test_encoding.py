@@ -0,0 +1,255 @@
+"""レスポンスの圧縮と MessagePack の列指向表現（``backend.encoding``）のテスト。"""
+
+from __future__ import annotations
+
+import asyncio
+import zlib
+
+import pytest
+from fastapi.testclient import TestClient
+
+from backend import main
+from backend.encoding import (
+    MSGPACK_MEDIA_TYPE,
+    CompressionMiddleware,
+    StreamDecoder,
+    columnar,
+    compress,
+    compress_chunks,
+    from_columnar,
+    negotiate_coding,
+    packb,
+    unpackb,
+)
+from backend.metrics import Message, Receive, Scope, Send
+from benchmarks.datagen import LARGE_EVENT
+from benchmarks.response_encoding import representations, run
+
+MSGPACK = {"Accept": MSGPACK_MEDIA_TYPE}
+
+
+@pytest.fixture()
+def many_materials(client: TestClient) -> None:
+    rows = [
+        {"name": f"Cone {index:03d}", "part": "Course", "quantity": index} for index in range(50)
+    ]
+    assert client.post("/materials/import", json=rows).json()["imported"] == 50
+
+
+def test_negotiate_coding() -> None:
+    both = ("zstd", "gzip")
+
+    assert negotiate_coding("gzip, deflate, br", both) == "gzip"
+    # q 値が同じならサーバーの優先順に従う
+    assert negotiate_coding("gzip, zstd", both) == "zstd"
+    assert negotiate_coding("zstd;q=0.5, gzip", both) == "gzip"
+    assert negotiate_coding("zstd;q=0, *", both) == "gzip"
+    assert negotiate_coding("*;q=0.1", ("gzip",)) == "gzip"
+    assert negotiate_coding("gzip;q=0", both) is None
+    assert negotiate_coding("identity", both) is None
+    assert negotiate_coding("", both) is None
+
+
+def test_large_lists_are_compressed(client: TestClient, many_materials: None) -> None:
+    plain = client.get("/materials", headers={"Accept-Encoding": "identity"})
+    response = client.get("/materials", headers={"Accept-Encoding": "gzip"})
+
+    assert "content-encoding" not in plain.headers
+    assert response.headers["content-encoding"] == "gzip"
+    assert "Accept-Encoding" in response.headers["vary"]
+    assert int(response.headers["content-length"]) < len(plain.content) / 3
+    assert response.json() == plain.json()
+    # 圧縮した表現は弱い ETag にするが、条件付き GET は元の ETag と同じく一致する
+    assert response.headers["etag"] == "W/" + plain.headers["etag"]
+    revalidated = client.get(
+        "/materials",
+        headers={"Accept-Encoding": "gzip", "If-None-Match": response.headers["etag"]},
+    )
+    assert revalidated.status_code == 304
+
+
+def test_small_bodies_and_event_streams_are_not_compressed(client: TestClient) -> None:
+    response = client.get("/members", headers={"Accept-Encoding": "gzip"})
+
+    assert len(response.content) < 1024
+    assert "content-encoding" not in response.headers
+    assert "Accept-Encoding" in response.headers["vary"]
+
+    version = client.get("/sync", params={"since": 1}).json()["version"]
+    events = client.get(
+        "/events", params={"since": version + 10}, headers={"Accept-Encoding": "gzip"}
+    )
+    assert events.headers["content-type"].startswith("text/event-stream")
+    assert "content-encoding" not in events.headers
+
+
+def test_streamed_chunks_can_be_decompressed_as_they_arrive() -> None:
+    chunks = [b'{"id":%d}\n' % index for index in range(3)]
+
+    async def stream(scope: Scope, receive: Receive, send: Send) -> None:
+        await send(
+            {
+                "type": "http.response.start",
+                "status": 200,
+                "headers": [(b"content-type", b"application/x-ndjson")],
+            }
+        )
+        for chunk in chunks:
+            await send({"type": "http.response.body", "body": chunk, "more_body": True})
+        await send({"type": "http.response.body", "body": b""})
+
+    sent: list[Message] = []
+
+    async def capture(message: Message) -> None:
+        sent.append(message)
+
+    async def receive() -> Message:  # pragma: no cover - 本文を読まないアプリ
+        return {"type": "http.request"}
+
+    scope = {"type": "http", "headers": [(b"accept-encoding", b"gzip")]}
+    asyncio.run(CompressionMiddleware(stream)(scope, receive, capture))
+
+    headers = dict(sent[0]["headers"])
+    assert headers[b"content-encoding"] == b"gzip"
+    # 長さの分からないストリーミングは小さくても圧縮し、Content-Length を付けない
+    assert b"content-length" not in headers
+    decompressor = zlib.decompressobj(16 + zlib.MAX_WBITS)
+    # 各チャンクは届いた時点でそのチャンクの分まで展開できる
+    for chunk, message in zip(chunks, sent[1:], strict=False):
+        assert decompressor.decompress(message["body"]) == chunk
+    assert decompressor.decompress(sent[-1]["body"]) == b""
+    assert decompressor.eof
+
+
+def test_zstd_is_used_when_available(client: TestClient, many_materials: None) -> None:
+    zstd = pytest.importorskip("compression.zstd")
+
+    plain = client.get("/materials", headers={"Accept-Encoding": "identity"})
+    with client.stream(
+        "GET", "/materials", headers={"Accept-Encoding": "gzip;q=0.5, zstd"}
+    ) as response:
+        body = b"".join(response.iter_raw())
+
+    assert response.headers["content-encoding"] == "zstd"
+    assert zstd.decompress(body) == plain.content
+    assert zstd.decompress(compress(b"x" * 4096, "zstd")) == b"x" * 4096
+
+
+def test_stream_decoder_detects_the_coding() -> None:
+    data = b"SQLite format 3\x00" + bytes(range(256)) * 64
+
+    def decode(body: bytes, step: int) -> tuple[bytes, str | None]:
+        decoder = StreamDecoder()
+        parts = [decoder.feed(body[start : start + step]) for start in range(0, len(body), step)]
+        return b"".join([*parts, decoder.finish()]), decoder.coding
+
+    gzipped = b"".join(compress_chunks([data[:100], data[100:]], "gzip"))
+    # 判定に必要な長さより細かく届いても、まとめて届いても同じ結果になる
+    for step in (1, 3, len(gzipped)):
+        assert decode(gzipped, step) == (data, "gzip")
+        assert decode(data, step) == (data, None)
+    assert decode(b"ab", 1) == (b"ab", None)
+    assert decode(b"", 1) == (b"", None)
+    with pytest.raises(ValueError, match="途中で終わっています"):
+        decode(gzipped[:-8], 64)
+    with pytest.raises(ValueError, match="展開できません"):
+        decode(gzipped[:10] + b"\xff" * 64, 64)
+
+
+def test_msgpack_wire_format_and_round_trip() -> None:
+    assert packb({"a": [1, -1, None, True, 1.5]}) == (
+        b"\x81\xa1a\x95\x01\xff\xc0\xc3\xcb\x3f\xf8\x00\x00\x00\x00\x00\x00"
+    )
+    assert packb(255) == b"\xcc\xff"
+    assert packb(-129) == b"\xd1\xff\x7f"
+    assert packb("あ" * 20) == b"\xd9\x3c" + ("あ" * 20).encode()
+    values = [
+        0,
+        2**64 - 1,
+        -(2**63),
+        "",
+        "x" * 70_000,
+        b"\x00\x01",
+        list(range(20)),
+        {str(index): index for index in range(20)},
+        {"nested": {"list": [None, False]}},
+    ]
+    for value in values:
+        assert unpackb(packb(value)) == value
+    with pytest.raises(TypeError):
+        packb({1, 2})
+    with pytest.raises(OverflowError):
+        packb(2**64)
+    with pytest.raises(ValueError):
+        unpackb(packb("truncated")[:-1])
+    with pytest.raises(ValueError):
+        unpackb(packb(1) + b"\x00")
+
+
+def test_columnar_nests_mappings() -> None:
+    rows = [
+        {"id": 1, "contact": {"phone": None, "email": "a@example.com"}, "note": None},
+        {"id": 2, "contact": {"phone": "090", "email": None}, "note": {"x": 1}},
+    ]
+
+    assert columnar(rows) == {
+        "id": [1, 2],
+        "contact": {"phone": [None, "090"], "email": ["a@example.com", None]},
+        # 一部の行だけマップの項目はそのまま並べる
+        "note": [None, {"x": 1}],
+    }
+    assert from_columnar(columnar(rows)) == rows
+    assert columnar([]) == {}
+    assert from_columnar({}) == []
+
+
+@pytest.mark.parametrize("sql_json", [True, False])
+def test_lists_can_be_requested_as_msgpack(
+    client: TestClient, monkeypatch: pytest.MonkeyPatch, sql_json: bool
+) -> None:
+    monkeypatch.setattr(main, "SQL_JSON_LISTS", sql_json)
+    schedule_id = client.post(
+        "/schedules", json={"name": "初日", "event_date": "2023-10-01"}
+    ).json()["id"]
+    client.post(
+        f"/schedules/{schedule_id}/tasks",
+        json={
+            "name": "計測",
+            "stage": "Finish",
+            "start_time": "2023-10-01T10:00:00",
+            "end_time": "2023-10-01T12:00:00",
+        },
+    )
+
+    for path in ["/members", "/materials", "/schedules", f"/schedules/{schedule_id}/tasks"]:
+        response = client.get(path, headers=MSGPACK)
+        assert response.headers["content-type"] == MSGPACK_MEDIA_TYPE, path
+        assert from_columnar(unpackb(response.content)) == client.get(path).json(), path
+    active = client.get("/tasks/active", params={"at": "2023-10-01T11:00:00"}, headers=MSGPACK)
+    assert unpackb(active.content)["name"] == ["計測"]
+
+    members = client.get("/members", headers=MSGPACK)
+    assert unpackb(members.content)["contact"]["phone"][0] == "090-0000-0001"
+    # JSON とは別の表現として ETag を分ける
+    assert members.headers["etag"] != client.get("/members").headers["etag"]
+    assert (
+        client.get("/members", headers={**MSGPACK, "If-None-Match": members.headers["etag"]})
+    ).status_code == 304
+    page = client.get("/members", params={"limit": 2}, headers=MSGPACK)
+    assert unpackb(page.content)["id"] == [1, 2]
+    assert page.headers["X-Next-After"] == "2"
+
+
+def test_benchmark_compares_every_representation() -> None:
+    results = run(size=LARGE_EVENT.scaled(0.002), iterations=2)
+
+    assert results["meta"]["size"]["tasks"] == 200
+    members = results["routes"]["/members"]
+    assert list(members) == [
+        fmt if coding is None else f"{fmt}+{coding}" for fmt, coding in representations()
+    ]
+    assert members["json"]["ratio"] == 1.0
+    assert members["json+gzip"]["compressed"]
+    assert members["json+gzip"]["bytes"] < members["json"]["bytes"]
+    assert members["msgpack"]["bytes"] < members["json"]["bytes"]
+    assert all(result["rows"] == 10 for result in members.values())
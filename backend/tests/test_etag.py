@@ -0,0 +1,104 @@
+"""ETag による条件付き GET のテスト。"""
+
+from __future__ import annotations
+
+from fastapi.testclient import TestClient
+
+from backend.models import MaterialCreate
+from backend.store import MATERIALS_SCOPE, MEMBERS_SCOPE, SQLiteStore
+
+
+def _create_task(client: TestClient, schedule_id: int) -> dict:
+    response = client.post(
+        f"/schedules/{schedule_id}/tasks",
+        json={
+            "name": "受付設営",
+            "stage": "Preparation",
+            "start_time": "2023-10-01T07:00:00",
+            "end_time": "2023-10-01T08:00:00",
+        },
+    )
+    return response.json()
+
+
+def test_matching_etag_returns_304_without_reading_rows(
+    client: TestClient, seeded_store: SQLiteStore
+) -> None:
+    first = client.get("/members")
+    etag = first.headers["ETag"]
+    assert etag.startswith('"members-')
+
+    statements: list[str] = []
+    seeded_store._connection().set_trace_callback(statements.append)
+    try:
+        cached = client.get("/members", headers={"If-None-Match": etag})
+    finally:
+        seeded_store._connection().set_trace_callback(None)
+    assert cached.status_code == 304
+    assert cached.content == b""
+    assert cached.headers["ETag"] == etag
+    if not seeded_store.concurrent_reads:
+        # 単一ロック構成では全ての問い合わせが書き込み接続を通る
+        assert statements == []
+
+    weak = client.get("/members/1", headers={"If-None-Match": f'"other", W/{etag}'})
+    assert weak.status_code == 304
+
+
+def test_write_changes_etag_of_its_table_only(client: TestClient) -> None:
+    members_etag = client.get("/members").headers["ETag"]
+    materials_etag = client.get("/materials").headers["ETag"]
+
+    client.put("/materials/1", json={"quantity": 7})
+
+    stale = client.get("/materials", headers={"If-None-Match": materials_etag})
+    assert stale.status_code == 200
+    assert stale.headers["ETag"] != materials_etag
+    assert stale.json()[0]["quantity"] == 7
+    assert client.get("/members", headers={"If-None-Match": members_etag}).status_code == 304
+
+
+def test_task_etags_are_scoped_per_schedule(client: TestClient) -> None:
+    first = client.post("/schedules", json={"name": "初日", "event_date": "2023-10-01"}).json()
+    second = client.post("/schedules", json={"name": "二日目", "event_date": "2023-10-02"}).json()
+    task = _create_task(client, first["id"])
+    first_url = f"/schedules/{first['id']}/tasks"
+    second_url = f"/schedules/{second['id']}/tasks"
+    first_etag = client.get(first_url).headers["ETag"]
+    second_etag = client.get(second_url).headers["ETag"]
+
+    client.delete(f"/tasks/{task['id']}")
+
+    assert client.get(first_url, headers={"If-None-Match": first_etag}).status_code == 200
+    assert client.get(second_url, headers={"If-None-Match": second_etag}).status_code == 304
+
+
+def test_ndjson_and_json_representations_have_distinct_etags(client: TestClient) -> None:
+    json_etag = client.get("/materials").headers["ETag"]
+    ndjson = client.get("/materials", headers={"Accept": "application/x-ndjson"})
+    assert ndjson.headers["ETag"] != json_etag
+    cached = client.get(
+        "/materials",
+        headers={"Accept": "application/x-ndjson", "If-None-Match": ndjson.headers["ETag"]},
+    )
+    assert cached.status_code == 304
+
+
+def test_version_token_ignores_rolled_back_writes(seeded_store: SQLiteStore) -> None:
+    before = seeded_store.version_token(MATERIALS_SCOPE)
+    try:
+        with seeded_store._write() as conn:
+            seeded_store._insert_material(
+                conn, MaterialCreate(name="Tent", part="Course", quantity=1)
+            )
+            raise RuntimeError("rollback")
+    except RuntimeError:
+        pass
+    assert seeded_store.version_token(MATERIALS_SCOPE) == before
+
+    seeded_store.create_material(MaterialCreate(name="Tent", part="Course", quantity=1))
+    assert seeded_store.version_token(MATERIALS_SCOPE) != before
+
+    members = seeded_store.version_token(MEMBERS_SCOPE)
+    seeded_store.reset()
+    assert seeded_store.version_token(MEMBERS_SCOPE) != members
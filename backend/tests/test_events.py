@@ -0,0 +1,192 @@
+"""変更通知の配信（``backend.events`` と ``GET /events``）のテスト。"""
+
+from __future__ import annotations
+
+import asyncio
+import json
+from collections.abc import AsyncIterator
+
+from fastapi import Request
+from fastapi.testclient import TestClient
+
+from backend.main import change_events
+from backend.models import ContactInfo, MaterialUpdate, MemberCreate
+from backend.store import SQLiteStore
+
+
+def _member(name: str) -> MemberCreate:
+    return MemberCreate(name=name, part="Course", position="Support", contact=ContactInfo())
+
+
+async def _next(frames: AsyncIterator[str]) -> tuple[str, dict]:
+    """次のフレームの (event, data) を返す。"""
+
+    frame = await asyncio.wait_for(anext(frames), 5)
+    fields = dict(line.split(": ", 1) for line in frame.strip().split("\n"))
+    return fields.get("event", ""), json.loads(fields.get("data", "null"))
+
+
+async def _open(store: SQLiteStore) -> AsyncIterator[str]:
+    subscription, _ = await store.aio.subscribe_changes()
+    frames = subscription.frames()
+    # 最初のフレームは再接続間隔の指定
+    assert (await anext(frames)).startswith("retry: ")
+    return frames
+
+
+def test_committed_writes_are_published(seeded_store: SQLiteStore) -> None:
+    async def scenario() -> list[tuple[str, dict]]:
+        frames = await _open(seeded_store)
+        member = await seeded_store.aio.create_member(_member("Aoi"))
+        await seeded_store.aio.delete_member(member.id)
+        received = [await _next(frames), await _next(frames)]
+        await frames.aclose()
+        return received
+
+    received = asyncio.run(scenario())
+
+    assert [(event, data["entity"], data["action"]) for event, data in received] == [
+        ("change", "member", "upsert"),
+        ("change", "member", "delete"),
+    ]
+    assert received[0][1]["id"] == received[1][1]["id"]
+    assert received[1][1]["version"] == seeded_store.current_version()
+    assert seeded_store.changes.subscriber_count == 0
+
+
+def test_failed_writes_are_not_published(seeded_store: SQLiteStore) -> None:
+    async def scenario() -> tuple[str, dict]:
+        frames = await _open(seeded_store)
+        try:
+            await seeded_store.aio.update_material(999, MaterialUpdate(quantity=1))
+        except KeyError:
+            pass
+        await seeded_store.aio.update_material(1, MaterialUpdate(quantity=1))
+        received = await _next(frames)
+        await frames.aclose()
+        return received
+
+    event, data = asyncio.run(scenario())
+
+    assert (event, data["entity"], data["id"]) == ("change", "material", 1)
+
+
+def test_one_frame_fans_out_to_every_subscriber(seeded_store: SQLiteStore) -> None:
+    async def scenario() -> list[str]:
+        streams = [await _open(seeded_store) for _ in range(300)]
+        await seeded_store.aio.create_member(_member("Aoi"))
+        received = await asyncio.gather(*(anext(frames) for frames in streams))
+        for frames in streams:
+            await frames.aclose()
+        return received
+
+    received = asyncio.run(scenario())
+
+    assert len(received) == 300
+    # フレームは購読者の数によらず 1 度だけ組み立てる
+    assert all(frame is received[0] for frame in received)
+    assert "event: change" in received[0]
+
+
+def test_slow_subscriber_is_told_to_resync(seeded_store: SQLiteStore) -> None:
+    seeded_store.changes.queue_size = 3
+    overflow = seeded_store.current_version() + 4
+
+    async def scenario() -> list[tuple[str, dict]]:
+        slow = await _open(seeded_store)
+        for quantity in range(5):
+            await seeded_store.aio.update_material(1, MaterialUpdate(quantity=quantity))
+        received = [await _next(slow)]
+        # resync の後は配信を終える
+        assert await anext(slow, None) is None
+        return received
+
+    # あふれた時点の変更のバージョンで打ち切る（以降は再接続時に Last-Event-ID から再送する）
+    assert asyncio.run(scenario()) == [("resync", {"version": overflow})]
+    assert seeded_store.changes.subscriber_count == 0
+
+
+def test_bulk_import_publishes_resync(seeded_store: SQLiteStore) -> None:
+    seeded_store.changes.queue_size = 3
+
+    async def scenario() -> tuple[str, dict]:
+        frames = await _open(seeded_store)
+        await seeded_store.aio.import_materials(
+            [{"name": f"Cone {index}", "part": "Course", "quantity": 1} for index in range(5)]
+        )
+        return await _next(frames)
+
+    assert asyncio.run(scenario()) == ("resync", {"version": seeded_store.current_version()})
+
+
+def test_reset_restarts_versions_with_resync(seeded_store: SQLiteStore) -> None:
+    async def scenario() -> tuple[str, dict]:
+        frames = await _open(seeded_store)
+        await seeded_store.aio.run_write(seeded_store.reset)
+        return await _next(frames)
+
+    assert asyncio.run(scenario()) == ("resync", {"version": 0})
+
+
+def test_change_events_replay_latest_change_per_row(seeded_store: SQLiteStore) -> None:
+    since = seeded_store.current_version()
+    seeded_store.update_material(1, MaterialUpdate(quantity=1))
+    seeded_store.update_material(2, MaterialUpdate(quantity=1))
+    seeded_store.update_material(1, MaterialUpdate(quantity=2))
+    until = seeded_store.current_version()
+
+    replay = seeded_store.change_events(since, until)
+
+    assert replay is not None
+    assert [(event.id, event.version) for event in replay] == [(2, until - 1), (1, until)]
+    assert seeded_store.change_events(since, until - 1) == replay[:1]
+    # データが初期化されていた場合や、再送しきれない場合は同期し直してもらう
+    assert seeded_store.change_events(until + 1, until) is None
+    seeded_store.changes.queue_size = 1
+    assert seeded_store.change_events(since, until) is None
+
+
+def test_endpoint_replays_from_last_event_id(seeded_store: SQLiteStore) -> None:
+    since = seeded_store.current_version()
+    seeded_store.update_material(1, MaterialUpdate(quantity=1))
+    request = Request(
+        {
+            "type": "http",
+            "method": "GET",
+            "path": "/events",
+            "query_string": b"",
+            "headers": [(b"last-event-id", str(since).encode())],
+        }
+    )
+
+    async def scenario() -> list[tuple[str, dict]]:
+        # クエリの since より Last-Event-ID を優先する
+        response = await change_events(request, seeded_store.aio, since=0)
+        frames = response.body_iterator
+        await anext(frames)
+        received = [await _next(frames)]
+        await seeded_store.aio.update_material(2, MaterialUpdate(quantity=1))
+        received.append(await _next(frames))
+        await frames.aclose()
+        return received
+
+    received = asyncio.run(scenario())
+
+    assert [(data["entity"], data["id"]) for _, data in received] == [
+        ("material", 1),
+        ("material", 2),
+    ]
+    assert seeded_store.changes.subscriber_count == 0
+
+
+def test_events_endpoint_resyncs_unknown_versions(client: TestClient) -> None:
+    client.post("/materials", json={"name": "Cone", "part": "Course", "quantity": 1})
+    version = client.get("/sync", params={"since": 1}).json()["version"]
+
+    response = client.get("/events", params={"since": version + 10})
+
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/event-stream")
+    assert response.text.endswith(
+        f'id: {version}\nevent: resync\ndata: {{"version":{version}}}\n\n'
+    )
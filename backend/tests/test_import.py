@@ -0,0 +1,126 @@
+"""一括インポート API のテスト。"""
+
+from __future__ import annotations
+
+import json
+
+from fastapi.testclient import TestClient
+
+from backend.importers import iter_ndjson_rows
+from backend.main import SCHEDULE_NOT_FOUND_DETAIL
+from backend.store import SQLiteStore
+
+
+def test_import_members_from_csv_reports_invalid_rows(client: TestClient) -> None:
+    body = (
+        "\ufeffname,part,position,contact.phone,contact.email\n"
+        "山田 花子,Finish,Leader,090-1111-2222,\n"
+        ",Finish,Support,,\n"
+        '"Multi\nLine",Course,Support,,multi@example.com\n'
+    )
+    response = client.post(
+        "/members/import",
+        content=body.encode("utf-8"),
+        headers={"Content-Type": "text/csv; charset=utf-8"},
+    )
+    assert response.status_code == 200
+    report = response.json()
+    assert report["imported"] == 2
+    assert report["error_count"] == 1
+    assert report["errors"][0]["row"] == 2
+
+    members = client.get("/members", params={"part": "finish"}).json()
+    assert [member["name"] for member in members] == ["山田 花子"]
+    assert members[0]["contact"]["phone"] == "090-1111-2222"
+    assert members[0]["contact"]["email"] is None
+
+
+def test_import_materials_from_json_skips_constraint_violations(client: TestClient) -> None:
+    rows = [
+        {"name": "Generator", "part": "Stage", "quantity": 2},
+        {"name": "Broken", "part": "Stage", "quantity": -1},
+        {"name": "Cable", "part": "Stage", "quantity": 10},
+    ]
+    response = client.post(
+        "/materials/import",
+        content=json.dumps(rows).encode(),
+        headers={"Content-Type": "application/json"},
+    )
+    report = response.json()
+    assert report["imported"] == 2
+    assert [error["row"] for error in report["errors"]] == [2]
+    stage = client.get("/materials", params={"part": "Stage"}).json()
+    assert [item["name"] for item in stage] == ["Generator", "Cable"]
+
+
+def test_import_tasks_from_ndjson(client: TestClient) -> None:
+    schedule = client.post("/schedules", json={"name": "初日", "event_date": "2023-10-01"}).json()
+    lines = [
+        {
+            "name": f"巡回 {index}",
+            "stage": "Course",
+            "start_time": f"2023-10-01T{8 + index:02d}:00:00",
+            "end_time": f"2023-10-01T{9 + index:02d}:00:00",
+        }
+        for index in range(3)
+    ]
+    response = client.post(
+        f"/schedules/{schedule['id']}/tasks/import",
+        content="\n".join(json.dumps(line, ensure_ascii=False) for line in lines).encode(),
+        headers={"Content-Type": "application/x-ndjson"},
+    )
+    assert response.json()["imported"] == 3
+    tasks = client.get(f"/schedules/{schedule['id']}/tasks").json()
+    assert [task["status"] for task in tasks] == ["planned"] * 3
+
+
+def test_ndjson_lines_split_only_on_line_feeds() -> None:
+    # U+2028 などは JSON の文字列にそのまま書けるため、行の区切りとして扱わない
+    names = ["a\u2028b", "c\u2029d", "e\x85f", "g\x0bh", "i\x0cj", "k\x1el"]
+    body = "\r\n".join(json.dumps({"name": name}, ensure_ascii=False) for name in names).encode()
+    # チャンクの境界が文字の途中に来ても同じ結果になる
+    chunks = [body[index : index + 7] for index in range(0, len(body), 7)]
+
+    assert [row["name"] for row in iter_ndjson_rows(chunks)] == names
+
+
+def test_import_tasks_for_missing_schedule_returns_404(client: TestClient) -> None:
+    response = client.post(
+        "/schedules/999/tasks/import",
+        content=b"[]",
+        headers={"Content-Type": "application/json"},
+    )
+    assert response.status_code == 404
+    assert response.json()["detail"] == SCHEDULE_NOT_FOUND_DETAIL
+
+
+def test_import_rejects_malformed_json_without_partial_writes(client: TestClient) -> None:
+    response = client.post(
+        "/materials/import",
+        content=b'[{"name": "Tent", "part": "Course", "quantity": 1}, {"name": ',
+        headers={"Content-Type": "application/json"},
+    )
+    assert response.status_code == 400
+    assert len(client.get("/materials").json()) == 3
+
+
+def test_import_rejects_unsupported_media_type(client: TestClient) -> None:
+    response = client.post(
+        "/members/import", content=b"name", headers={"Content-Type": "text/plain"}
+    )
+    assert response.status_code == 415
+
+
+def test_import_inserts_chunks_in_single_commit(seeded_store: SQLiteStore) -> None:
+    statements: list[str] = []
+    seeded_store._connection().set_trace_callback(statements.append)
+    try:
+        report = seeded_store.import_materials(
+            ({"name": f"Cone {index}", "part": "Course", "quantity": index} for index in range(25)),
+            chunk_size=10,
+        )
+    finally:
+        seeded_store._connection().set_trace_callback(None)
+    assert report.imported == 25
+    assert sum(1 for sql in statements if sql.strip().upper() == "COMMIT") == 1
+    assert len(seeded_store.list_materials(part="course")) == 26
@@ -0,0 +1,110 @@
+"""一覧フィルタ用インデックスのテスト。"""
+
+from __future__ import annotations
+
+import sqlite3
+from collections.abc import Callable, Iterator
+from pathlib import Path
+
+import pytest
+
+from backend.models import TaskStatus
+from backend.store import SQLiteStore
+
+
+@pytest.fixture()
+def store(tmp_path: Path) -> Iterator[SQLiteStore]:
+    store = SQLiteStore(tmp_path / "indexes.db")
+    try:
+        yield store
+    finally:
+        store.close()
+
+
+def _query_plan(store: SQLiteStore, call: Callable[[], object]) -> list[str]:
+    """``call`` が発行した SELECT の実行計画を返す。"""
+
+    statements: list[str] = []
+    conn = store._connection()
+    conn.set_trace_callback(statements.append)
+    try:
+        call()
+    finally:
+        conn.set_trace_callback(None)
+    selects = [sql for sql in statements if sql.lstrip().upper().startswith("SELECT")]
+    return [
+        row["detail"]
+        for sql in selects
+        for row in conn.execute(f"EXPLAIN QUERY PLAN {sql}").fetchall()
+    ]
+
+
+@pytest.mark.parametrize(
+    ("call", "index"),
+    [
+        (lambda store: store.list_members(part="Reception", limit=10), "idx_members_part"),
+        (lambda store: store.list_materials(part="course", after=1), "idx_materials_part"),
+        (lambda store: store.list_tasks(1, stage="course"), "idx_tasks_schedule_stage"),
+        (
+            lambda store: store.list_tasks(1, status=TaskStatus.PLANNED, limit=5),
+            "idx_tasks_schedule_status",
+        ),
+        (lambda store: store.list_tasks(1), "idx_tasks_schedule_start"),
+    ],
+    ids=["members_part", "materials_part", "tasks_stage", "tasks_status", "tasks"],
+)
+def test_filtered_lists_use_indexes_without_sorting(
+    store: SQLiteStore, call: Callable[[SQLiteStore], object], index: str
+) -> None:
+    with store._write() as conn:
+        conn.execute("INSERT INTO schedules (name, event_date) VALUES ('初日', '2023-10-01')")
+    plan = _query_plan(store, lambda: call(store))
+    assert any(index in detail for detail in plan), plan
+    assert not any("TEMP B-TREE" in detail for detail in plan), plan
+    assert not any(detail.startswith("SCAN") for detail in plan), plan
+
+
+def test_existing_database_is_upgraded_in_place(tmp_path: Path) -> None:
+    path = tmp_path / "legacy.db"
+    with sqlite3.connect(path) as conn:
+        conn.executescript(
+            """
+            CREATE TABLE members (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                name TEXT NOT NULL,
+                part TEXT NOT NULL,
+                position TEXT NOT NULL,
+                contact_phone TEXT,
+                contact_email TEXT,
+                contact_note TEXT
+            );
+            INSERT INTO members (name, part, position)
+            VALUES ('Kento Tanaka', 'Reception', 'Leader');
+            CREATE TABLE tasks (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                schedule_id INTEGER NOT NULL,
+                name TEXT NOT NULL,
+                stage TEXT NOT NULL,
+                start_time TEXT NOT NULL,
+                end_time TEXT NOT NULL,
+                location TEXT,
+                status TEXT NOT NULL,
+                note TEXT
+            );
+            CREATE INDEX idx_tasks_schedule ON tasks(schedule_id);
+            """
+        )
+    conn.close()
+
+    store = SQLiteStore(path)
+    try:
+        with store._read() as conn:
+            indexes = {
+                row["name"]
+                for row in conn.execute("SELECT name FROM sqlite_master WHERE type = 'index'")
+            }
+        assert "idx_tasks_schedule" not in indexes
+        assert {"idx_members_part", "idx_tasks_schedule_stage"} <= indexes
+        assert [member.name for member in store.list_members(part="reception")] == ["Kento Tanaka"]
+    finally:
+        store.close()
@@ -0,0 +1,83 @@
+"""SQLite で JSON を組み立てる一覧の高速経路のテスト。"""
+
+from __future__ import annotations
+
+import json
+
+import pytest
+from fastapi.testclient import TestClient
+
+from backend import main
+from backend.main import NEXT_AFTER_HEADER
+from backend.store import SQLiteStore
+
+
+def _seed_tricky_rows(client: TestClient) -> int:
+    """エスケープやタイムゾーンの扱いが分かれやすい値を登録する。"""
+
+    client.post(
+        "/members",
+        json={
+            "name": '山田 "花子"\n\t\\ \u0001\u007f 😀',
+            "part": "Finish",
+            "position": "Leader",
+            "contact": {"email": "hanako@example.com"},
+        },
+    )
+    client.post("/materials", json={"name": "Tent </script>", "part": "Finish", "quantity": 0})
+    schedule = client.post("/schedules", json={"name": "初日", "event_date": "2023-10-01"}).json()
+    for start, end in [
+        ("2023-10-01T08:00:00Z", "2023-10-01T09:00:00.250000+00:00"),
+        ("2023-10-01T09:30:00+09:00", "2023-10-01T10:00:00.000001-03:30"),
+        ("2023-10-01T11:00:00", "2023-10-01T12:00:00"),
+    ]:
+        client.post(
+            f"/schedules/{schedule['id']}/tasks",
+            json={
+                "name": "巡回",
+                "stage": "Course",
+                "start_time": start,
+                "end_time": end,
+                "note": "ok",
+            },
+        )
+    return schedule["id"]
+
+
+def test_fast_path_is_byte_compatible_with_models(
+    client: TestClient, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    schedule_id = _seed_tricky_rows(client)
+    requests = [
+        ("/members", {}),
+        ("/members", {"part": "finish"}),
+        ("/members", {"limit": 2, "after": 1}),
+        ("/materials", {}),
+        ("/schedules", {"limit": 1}),
+        (f"/schedules/{schedule_id}/tasks", {}),
+        (f"/schedules/{schedule_id}/tasks", {"status": "planned", "limit": 2}),
+        (f"/schedules/{schedule_id}/tasks", {"stage": "course", "after": 1}),
+    ]
+    for url, params in requests:
+        monkeypatch.setattr(main, "SQL_JSON_LISTS", True)
+        fast = client.get(url, params=params)
+        monkeypatch.setattr(main, "SQL_JSON_LISTS", False)
+        slow = client.get(url, params=params)
+        assert fast.status_code == slow.status_code == 200
+        assert fast.content == slow.content, url
+        for header in ("content-type", "content-length", "etag", NEXT_AFTER_HEADER.lower()):
+            assert fast.headers.get(header) == slow.headers.get(header), (url, header)
+
+
+def test_fast_path_keeps_error_responses(client: TestClient) -> None:
+    assert client.get("/schedules/999/tasks").status_code == 404
+    assert client.get("/schedules", params={"after": 999}).status_code == 400
+
+
+def test_store_json_rows_match_models(seeded_store: SQLiteStore) -> None:
+    rows = seeded_store.list_members_json(part="reception", limit=5)
+    models = seeded_store.list_members(part="reception", limit=5)
+    assert [row_id for row_id, _ in rows] == [member.id for member in models]
+    assert [json.loads(body) for _, body in rows] == [
+        member.model_dump(mode="json") for member in models
+    ]
@@ -0,0 +1,94 @@
+"""``GET /metrics`` と計測部品（``backend.metrics``）のテスト。"""
+
+from __future__ import annotations
+
+import pytest
+from fastapi.testclient import TestClient
+
+from backend.main import HTTP_METRICS
+from backend.metrics import CounterFamily, Histogram, render
+from backend.models import MaterialCreate
+from backend.store import SQLiteStore, _query_kind
+
+
+def _samples(text: str) -> dict[str, float]:
+    samples: dict[str, float] = {}
+    for line in text.splitlines():
+        if line and not line.startswith("#"):
+            name, value = line.rsplit(" ", 1)
+            samples[name] = float(value)
+    return samples
+
+
+def test_histogram_counts_are_cumulative_per_upper_bound() -> None:
+    histogram = Histogram(buckets=(0.1, 0.5, 1.0))
+    for value in (0.05, 0.1, 0.3, 0.7, 2.0):
+        histogram.observe(value)
+
+    cumulative, count, total = histogram.snapshot()
+
+    # 上限ちょうどの値はそのバケットに含める（Prometheus の le の意味）
+    assert cumulative == [2, 3, 4]
+    assert count == 5
+    assert total == pytest.approx(3.15)
+    assert histogram.stats().max_seconds == 2.0
+
+
+def test_metrics_endpoint_reports_route_templates(client: TestClient) -> None:
+    HTTP_METRICS.reset()
+    member_id = client.get("/members").json()[0]["id"]
+    client.get(f"/members/{member_id}")
+    client.get("/members/999999")
+    client.get("/no-such-path")
+
+    response = client.get("/metrics")
+
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/plain; version=0.0.4")
+    samples = _samples(response.text)
+    requests = "eventcompass_http_requests_total"
+    assert samples[f'{requests}{{method="GET",route="/members/{{member_id}}",status="200"}}'] == 1
+    assert samples[f'{requests}{{method="GET",route="/members/{{member_id}}",status="404"}}'] == 1
+    assert samples[f'{requests}{{method="GET",route="<unmatched>",status="404"}}'] == 1
+    duration = "eventcompass_http_request_duration_seconds"
+    labels = 'method="GET",route="/members",status="200"'
+    assert samples[f'{duration}_bucket{{{labels},le="+Inf"}}'] == 1
+    assert samples[f"{duration}_count{{{labels}}}"] == 1
+    # パスパラメータの値はラベルに現れない
+    assert f"/members/{member_id}" not in response.text
+
+
+def test_store_records_lock_and_query_times(seeded_store: SQLiteStore) -> None:
+    holds = seeded_store.metrics.lock_hold.labels().stats().count
+
+    seeded_store.create_material(MaterialCreate(name="Cone", part="Course", quantity=3))
+    seeded_store.list_materials()
+
+    assert seeded_store.metrics.lock_hold.labels().stats().count > holds
+    assert seeded_store.metrics.query.labels("insert_materials").stats().count == 4
+    assert seeded_store.metrics.query.labels("select_materials").stats().count >= 1
+    text = render(seeded_store.metrics.families())
+    assert 'eventcompass_store_query_seconds_count{kind="insert_materials"} 4' in text
+    assert "# TYPE eventcompass_store_lock_wait_seconds histogram" in text
+
+
+@pytest.mark.parametrize(
+    ("sql", "kind"),
+    [
+        ("SELECT id, name FROM members WHERE id = ?", "select_members"),
+        ("  insert into tasks (name) values (?)", "insert_tasks"),
+        ("UPDATE materials SET quantity = ? WHERE id = ? RETURNING id", "update_materials"),
+        ("DELETE FROM schedules WHERE id = ?", "delete_schedules"),
+        ("SAVEPOINT batch_operation", "savepoint"),
+        ("PRAGMA foreign_keys = ON", "pragma"),
+    ],
+)
+def test_query_kind_names_operation_and_table(sql: str, kind: str) -> None:
+    assert _query_kind(sql) == kind
+
+
+def test_label_values_are_escaped() -> None:
+    family = CounterFamily("example_total", "Example.", ("route",))
+    family.labels('a"b\\c\nd').inc()
+
+    assert 'example_total{route="a\\"b\\\\c\\nd"} 1' in render([family])
@@ -0,0 +1,247 @@
+"""同じデータベースを複数のプロセス（``uvicorn --workers``）から開く場合のテスト。
+
+SQLite から見ると、同じプロセス内の別の接続も別のプロセスの接続と区別が無いため、同じファイルを
+開いた 2 つの ``SQLiteStore`` を 2 つのワーカーとして扱う。
+"""
+
+from __future__ import annotations
+
+import asyncio
+import os
+import sqlite3
+import threading
+import time
+from collections.abc import Iterator
+from datetime import date, datetime
+from pathlib import Path
+
+import pytest
+
+from backend.models import ContactInfo, MemberCreate, ScheduleCreate, TaskCreate
+from backend.store import SQLiteStore
+from backend.tests.test_events import _next, _open
+from benchmarks import worker_scaling
+
+
+def _member(name: str) -> MemberCreate:
+    return MemberCreate(name=name, part="Medical", position="Support", contact=ContactInfo())
+
+
+def _names(store: SQLiteStore) -> list[str]:
+    return [member.name for member in store.list_members()]
+
+
+def _task(start: int, end: int) -> TaskCreate:
+    return TaskCreate(
+        name="受付",
+        stage="Reception",
+        start_time=datetime(2024, 5, 1, start),
+        end_time=datetime(2024, 5, 1, end),
+        location="本部テント",
+    )
+
+
+@pytest.fixture()
+def workers(tmp_path: Path) -> Iterator[tuple[SQLiteStore, SQLiteStore]]:
+    path = tmp_path / "shared.db"
+    stores = (
+        SQLiteStore(path, concurrent_reads=True, cache_size=64),
+        SQLiteStore(path, concurrent_reads=True, cache_size=64),
+    )
+    try:
+        yield stores
+    finally:
+        for store in stores:
+            store.close()
+
+
+def test_writes_invalidate_caches_and_etags_of_other_workers(
+    workers: tuple[SQLiteStore, SQLiteStore], tmp_path: Path
+) -> None:
+    first, second = workers
+    first.create_member(_member("Aoi"))
+    # もう一方のキャッシュに載せてから書き込む
+    assert _names(second) == ["Aoi"]
+    etag = second.version_token("members")
+    materials = second.version_token("materials")
+    # ETag はどのワーカーが返しても同じ
+    assert first.version_token("members") == etag
+
+    first.create_member(_member("Ren"))
+
+    assert second.version_token("members") != etag
+    assert _names(second) == ["Aoi", "Ren"]
+    assert second.version_token("members") == first.version_token("members")
+    # 書き込みが触れていないスコープの ETag は変わらない
+    assert second.version_token("materials") == materials
+    # バージョンはデータベースにあるため、開き直しても ETag は変わらない
+    reopened = SQLiteStore(tmp_path / "shared.db")
+    try:
+        assert reopened.version_token("members") == first.version_token("members")
+    finally:
+        reopened.close()
+
+
+def test_conflicts_follow_tasks_written_by_other_workers(
+    workers: tuple[SQLiteStore, SQLiteStore],
+) -> None:
+    first, second = workers
+    schedule = first.create_schedule(ScheduleCreate(name="当日", event_date=date(2024, 5, 1)))
+    first.create_task(schedule.id, _task(8, 9))
+    assert second.find_conflicts(schedule.id) == []
+
+    task = first.create_task(schedule.id, _task(8, 10))
+
+    conflicts = second.find_conflicts(schedule.id)
+    assert [conflict.location for conflict in conflicts] == ["本部テント"]
+    assert [overlap.second_task_id for overlap in conflicts[0].overlaps] == [task.id]
+
+
+def test_own_writes_do_not_hide_earlier_writes_of_other_workers(
+    workers: tuple[SQLiteStore, SQLiteStore],
+) -> None:
+    first, second = workers
+    schedule = first.create_schedule(ScheduleCreate(name="当日", event_date=date(2024, 5, 1)))
+    assert second.list_tasks(schedule.id) == []
+    etag = second.version_token("tasks", schedule.id)
+
+    # 他のワーカーの書き込みをまだ読んでいないうちに、別のスコープへ書き込む
+    task = first.create_task(schedule.id, _task(8, 9))
+    second.create_member(_member("Aoi"))
+
+    assert [item.id for item in second.list_tasks(schedule.id)] == [task.id]
+    assert second.version_token("tasks", schedule.id) != etag
+    assert second.version_token("tasks", schedule.id) == first.version_token("tasks", schedule.id)
+
+
+def test_restore_and_changes_reach_subscribers_of_other_workers(
+    workers: tuple[SQLiteStore, SQLiteStore], tmp_path: Path
+) -> None:
+    first, second = workers
+    first.create_member(_member("Aoi"))
+    snapshot = tmp_path / "snapshot.db"
+    first.write_snapshot(snapshot)
+    first.create_member(_member("Ren"))
+    assert _names(second) == ["Aoi", "Ren"]
+    etag = second.version_token("members")
+
+    async def scenario() -> list[tuple[str, dict]]:
+        frames = await _open(second)
+        # 他のワーカーの書き込みは監視スレッドが拾って配信する
+        await asyncio.to_thread(first.create_member, _member("Yui"))
+        received = [await _next(frames)]
+        await asyncio.to_thread(first.restore_snapshot, snapshot)
+        received.append(await _next(frames))
+        return received
+
+    change, resync = asyncio.run(scenario())
+
+    assert (change[0], change[1]["entity"], change[1]["action"]) == ("change", "member", "upsert")
+    assert resync == ("resync", {"version": first.current_version()})
+    assert _names(second) == ["Aoi"]
+    assert second.version_token("members") != etag
+    assert second.version_token("members") == first.version_token("members")
+
+
+def test_writers_wait_for_other_workers(tmp_path: Path) -> None:
+    path = tmp_path / "shared.db"
+    holder = SQLiteStore(path)
+    impatient = SQLiteStore(path, busy_timeout=0.05)
+    patient = SQLiteStore(path)
+    try:
+        with holder._write():
+            # 待ち時間を超えたら書き込みロックを取れずに失敗する
+            with pytest.raises(sqlite3.OperationalError, match="locked"):
+                impatient.create_member(_member("Aoi"))
+            writer = threading.Thread(target=patient.create_member, args=(_member("Ren"),))
+            writer.start()
+            time.sleep(0.1)
+            assert writer.is_alive()
+        writer.join()
+        assert _names(impatient) == ["Ren"]
+    finally:
+        for store in (holder, impatient, patient):
+            store.close()
+
+
+def test_scheduled_runs_are_claimed_by_one_worker(
+    workers: tuple[SQLiteStore, SQLiteStore],
+) -> None:
+    first, second = workers
+
+    assert first.claim_scheduled_run("backup", 60)
+    assert not second.claim_scheduled_run("backup", 60)
+    assert second.claim_scheduled_run("report", 60)
+    # 間隔が過ぎていればもう一度実行できる
+    assert second.claim_scheduled_run("backup", 0)
+
+
+def test_backup_restarts_when_another_worker_writes(
+    workers: tuple[SQLiteStore, SQLiteStore], tmp_path: Path
+) -> None:
+    first, second = workers
+    target = tmp_path / "backup.db"
+    progress: list[tuple[int, int]] = []
+
+    def step(copied: int, total: int) -> None:
+        # 別の接続からの書き込みはステップでのコピーを最初からやり直させる。写し直しは
+        # 読み取りトランザクションの中で進むため、その後の書き込みではやり直さない
+        if len(progress) in (0, 1, 2):
+            second.create_member(_member(["Aoi", "Ren", "Yui"][len(progress)]))
+        progress.append((copied, total))
+
+    copy = first.backup_online(target, step_pages=1, pause=0, progress=step)
+
+    # 写し直しも 1 ページずつ、ロックを取らずに進む
+    restarted = progress[1:]
+    assert len(restarted) == copy.pages
+    assert [copied for copied, _ in restarted] == list(range(1, copy.pages + 1))
+    # やり直しに気付いたステップは進み具合を報告しない
+    assert copy.steps == len(progress) + 1
+    assert copy.max_lock_hold < 1
+    with sqlite3.connect(target) as conn:
+        # 写し直しを始めた時点の内容になる
+        assert [row[0] for row in conn.execute("SELECT name FROM members")] == ["Aoi"]
+        assert conn.execute("PRAGMA integrity_check").fetchone()[0] == "ok"
+
+
+def test_backup_without_wal_stops_when_another_worker_writes(tmp_path: Path) -> None:
+    path = tmp_path / "shared.db"
+    first = SQLiteStore(path)
+    second = SQLiteStore(path)
+    written: list[bool] = []
+
+    def step(copied: int, total: int) -> None:
+        if not written:
+            second.create_member(_member("Aoi"))
+            written.append(True)
+
+    try:
+        # 単一ロック構成では書き込みロックを握ったまま写し直すことになるため、中断する
+        with pytest.raises(RuntimeError, match="やり直されました"):
+            first.backup_online(tmp_path / "backup.db", step_pages=1, pause=0, progress=step)
+        # 書き込みが無ければバックアップできる
+        copy = first.backup_online(tmp_path / "backup.db")
+        assert copy.steps == 1
+    finally:
+        first.close()
+        second.close()
+
+
+def test_worker_processes_stay_consistent() -> None:
+    result = worker_scaling.run(workers=2, duration=0.3, members=50, materials=20)
+
+    assert result["operations"] > 0
+    assert result["errors"] == 0
+    assert result["stale_workers"] == 0
+    assert result["etags_agree"]
+
+
+@pytest.mark.skipif(
+    (os.cpu_count() or 1) < 2, reason="CPU が 1 つではプロセスを増やしても速くならない"
+)
+def test_throughput_scales_with_worker_processes() -> None:
+    single = worker_scaling.run(workers=1, duration=1.0)
+    double = worker_scaling.run(workers=2, duration=1.0)
+
+    assert double["ops_per_sec"] >= 1.2 * single["ops_per_sec"]
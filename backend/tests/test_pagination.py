@@ -0,0 +1,83 @@
+"""一覧 API のページングと NDJSON ストリーミングのテスト。"""
+
+from __future__ import annotations
+
+import json
+
+from fastapi.testclient import TestClient
+
+from backend.main import NEXT_AFTER_HEADER
+from backend.store import SQLiteStore
+
+NDJSON_HEADERS = {"Accept": "application/x-ndjson"}
+
+
+def _create_tasks(client: TestClient, schedule_id: int, hours: list[int]) -> list[dict]:
+    created = []
+    for hour in hours:
+        response = client.post(
+            f"/schedules/{schedule_id}/tasks",
+            json={
+                "name": f"{hour} 時のタスク",
+                "stage": "Course",
+                "start_time": f"2023-10-01T{hour:02d}:00:00",
+                "end_time": f"2023-10-01T{hour:02d}:30:00",
+            },
+        )
+        created.append(response.json())
+    return created
+
+
+def test_members_keyset_pages_follow_next_after_header(client: TestClient) -> None:
+    first = client.get("/members", params={"limit": 2})
+    assert [item["id"] for item in first.json()] == [1, 2]
+    assert first.headers[NEXT_AFTER_HEADER] == "2"
+
+    second = client.get("/members", params={"limit": 2, "after": 2})
+    assert [item["id"] for item in second.json()] == [3]
+    assert NEXT_AFTER_HEADER not in second.headers
+
+
+def test_materials_pages_combine_with_part_filter(client: TestClient) -> None:
+    page = client.get("/materials", params={"part": "reception", "after": 1, "limit": 5})
+    assert [item["name"] for item in page.json()] == ["Transceiver"]
+
+
+def test_tasks_pages_follow_start_time_order(client: TestClient) -> None:
+    schedule = client.post("/schedules", json={"name": "初日", "event_date": "2023-10-01"}).json()
+    # 作成順と開始時刻の順序を入れ替えておく
+    tasks = _create_tasks(client, schedule["id"], [9, 7, 8])
+    url = f"/schedules/{schedule['id']}/tasks"
+
+    first = client.get(url, params={"limit": 2})
+    assert [item["id"] for item in first.json()] == [tasks[1]["id"], tasks[2]["id"]]
+    after = first.headers[NEXT_AFTER_HEADER]
+
+    rest = client.get(url, params={"limit": 2, "after": after})
+    assert [item["id"] for item in rest.json()] == [tasks[0]["id"]]
+
+    unknown = client.get(url, params={"after": 999})
+    assert unknown.status_code == 400
+
+
+def test_list_streams_ndjson_when_requested(client: TestClient) -> None:
+    response = client.get("/members", headers=NDJSON_HEADERS)
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("application/x-ndjson")
+    lines = [json.loads(line) for line in response.text.splitlines()]
+    assert [line["id"] for line in lines] == [1, 2, 3]
+    assert lines[0]["contact"]["email"] == "tanaka@example.com"
+
+    limited = client.get("/materials", params={"after": 1, "limit": 1}, headers=NDJSON_HEADERS)
+    assert [json.loads(line)["id"] for line in limited.text.splitlines()] == [2]
+
+
+def test_ndjson_stream_for_missing_schedule_returns_404(client: TestClient) -> None:
+    response = client.get("/schedules/999/tasks", headers=NDJSON_HEADERS)
+    assert response.status_code == 404
+
+
+def test_iter_members_reads_in_batches(seeded_store: SQLiteStore) -> None:
+    names = [member.name for member in seeded_store.iter_members(batch_size=2)]
+    assert names == ["Kento Tanaka", "Haruka Sato", "Sora Suzuki"]
+    assert [member.id for member in seeded_store.iter_members(after=1, batch_size=1)] == [2, 3]
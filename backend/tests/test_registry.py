@@ -0,0 +1,289 @@
+"""イベントごとのストアのレジストリ（``backend.registry``）のテスト。"""
+
+from __future__ import annotations
+
+import asyncio
+import threading
+import time
+from collections.abc import Iterator
+from pathlib import Path
+
+import pytest
+from fastapi.testclient import TestClient
+
+from backend.main import app, get_registry
+from backend.metrics import Message
+from backend.models import ContactInfo, MemberCreate
+from backend.registry import StoreRegistry
+from backend.store import SQLiteStore
+
+MEMBER = {"name": "Aoi", "part": "Medical", "position": "Support", "contact": {}}
+
+
+class _Opener:
+    """開いたストアを記録するストアの作成関数。"""
+
+    def __init__(self, delay: float = 0) -> None:
+        self.delay = delay
+        self.stores: list[SQLiteStore] = []
+
+    def __call__(self, path: Path) -> SQLiteStore:
+        time.sleep(self.delay)
+        store = SQLiteStore(path)
+        self.stores.append(store)
+        return store
+
+
+def _closed(store: SQLiteStore) -> bool:
+    return store._conn is None
+
+
+def _touch(registry: StoreRegistry, key: str, *, create: bool = False) -> SQLiteStore:
+    store = registry.acquire(key, create=create)
+    registry.release(key)
+    return store
+
+
+@pytest.fixture()
+def registry(tmp_path: Path) -> Iterator[StoreRegistry]:
+    registry = StoreRegistry(tmp_path / "events", max_open=2)
+    app.dependency_overrides[get_registry] = lambda: registry
+    try:
+        yield registry
+    finally:
+        app.dependency_overrides.pop(get_registry, None)
+        registry.close()
+
+
+def test_least_recently_used_stores_are_closed(tmp_path: Path) -> None:
+    opener = _Opener()
+    registry = StoreRegistry(tmp_path, open_store=opener, max_open=2)
+    spring = _touch(registry, "spring", create=True)
+    spring.create_member(
+        MemberCreate(name="Aoi", part="Medical", position="Support", contact=ContactInfo())
+    )
+    summer = _touch(registry, "summer", create=True)
+    # 開いているストアは開き直さない
+    assert _touch(registry, "spring") is spring
+    autumn = _touch(registry, "autumn", create=True)
+
+    # 最も長く使われていない summer が閉じられる
+    assert registry.stats().open == ["spring", "autumn"]
+    assert _closed(summer)
+    assert not _closed(spring) and not _closed(autumn)
+
+    _touch(registry, "summer")
+    _touch(registry, "winter", create=True)
+    reopened = _touch(registry, "spring")
+
+    # 閉じたストアを開き直してもデータは残っている
+    assert reopened is not spring and _closed(spring)
+    assert [member.name for member in reopened.list_members()] == ["Aoi"]
+    stats = registry.stats()
+    assert stats.open == ["winter", "spring"]
+    assert (stats.opened, stats.evicted, stats.leased) == (6, 4, 0)
+    assert sorted(path.name for path in tmp_path.iterdir()) == [
+        f"{key}.db" for key in ["autumn", "spring", "summer", "winter"]
+    ]
+    registry.close()
+    assert all(_closed(store) for store in opener.stores)
+
+
+def test_leased_stores_stay_open(tmp_path: Path) -> None:
+    registry = StoreRegistry(tmp_path, max_open=1)
+    spring = registry.acquire("spring", create=True)
+    summer = registry.acquire("summer", create=True)
+
+    # 貸し出し中は上限を超えても閉じない
+    assert registry.stats().open == ["spring", "summer"]
+    assert registry.stats().leased == 2
+    registry.release("spring")
+    assert registry.stats().open == ["summer"]
+    assert _closed(spring)
+    assert registry.close_idle() == 0
+    registry.release("summer")
+    assert not _closed(summer)
+    registry.close()
+
+
+def test_idle_stores_are_closed(tmp_path: Path) -> None:
+    registry = StoreRegistry(tmp_path, idle_timeout=0)
+    spring = _touch(registry, "spring", create=True)
+    summer = registry.acquire("summer", create=True)
+
+    assert registry.close_idle() == 1
+    assert _closed(spring)
+    assert registry.stats().open == ["summer"]
+    registry.release("summer")
+
+    # 定期的な確認でも閉じる
+    registry.start(0.01)
+    deadline = time.monotonic() + 5
+    while registry.stats().open and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert _closed(summer)
+    assert registry.stats().closed_idle == 2
+    registry.close()
+
+
+def test_unknown_and_invalid_keys_are_rejected(tmp_path: Path) -> None:
+    registry = StoreRegistry(tmp_path)
+
+    with pytest.raises(KeyError):
+        registry.acquire("spring")
+    for key in ["../spring", "Spring", "", "-spring", "spring.db", "a" * 65]:
+        with pytest.raises(ValueError):
+            registry.acquire(key, create=True)
+    assert list(tmp_path.iterdir()) == []
+    assert registry.stats().opened == 0
+    with pytest.raises(ValueError):
+        StoreRegistry(tmp_path, max_open=0)
+
+
+def test_concurrent_acquires_open_a_store_once(tmp_path: Path) -> None:
+    opener = _Opener(delay=0.05)
+    registry = StoreRegistry(tmp_path, open_store=opener)
+    _touch(registry, "spring", create=True)
+    registry.close()
+    opener.stores.clear()
+    registry = StoreRegistry(tmp_path, open_store=opener)
+    results: list[SQLiteStore] = []
+
+    def acquire() -> None:
+        results.append(registry.acquire("spring"))
+
+    threads = [threading.Thread(target=acquire) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert len(opener.stores) == 1
+    assert results == opener.stores * 8
+    assert registry.stats().leased == 1
+    registry.close()
+
+
+def test_failed_opens_do_not_leave_the_key_locked(tmp_path: Path) -> None:
+    opener = _Opener(delay=0.05)
+    failures = [OSError("disk I/O error"), OSError("disk I/O error")]
+
+    def open_store(path: Path) -> SQLiteStore:
+        # 最初の 2 回は失敗する。2 回目は待っている呼び出しがある間に失敗する
+        if failures:
+            time.sleep(0.05)
+            raise failures.pop()
+        return opener(path)
+
+    registry = StoreRegistry(tmp_path, open_store=open_store)
+    with pytest.raises(OSError):
+        registry.acquire("spring", create=True)
+    assert registry._opening == {}
+    results: list[SQLiteStore | Exception] = []
+
+    def acquire() -> None:
+        try:
+            results.append(registry.acquire("spring", create=True))
+        except OSError as exc:
+            results.append(exc)
+
+    threads = [threading.Thread(target=acquire) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    # 失敗したのは 1 つだけで、待っていた呼び出しは開き直した 1 つのストアを借りる
+    assert [type(result) for result in results].count(OSError) == 1
+    assert len(opener.stores) == 1
+    assert [result for result in results if isinstance(result, SQLiteStore)] == opener.stores * 3
+    assert registry._opening == {}
+    assert registry.stats().leased == 1
+    registry.close()
+
+
+def test_event_routes_use_their_own_database(client: TestClient, registry: StoreRegistry) -> None:
+    created = client.put("/events/spring-2024")
+    assert created.status_code == 201
+    assert created.json() == {"key": "spring-2024", "created": True}
+    assert client.put("/events/spring-2024").json()["created"] is False
+
+    assert client.post("/events/spring-2024/members", json=MEMBER).status_code == 201
+    members = client.get("/events/spring-2024/members")
+    assert [member["name"] for member in members.json()] == ["Aoi"]
+    # ヘッダーでの指定も同じデータベースを使う
+    by_header = client.get("/members", headers={"X-Event-Key": "spring-2024"})
+    assert by_header.json() == members.json()
+    # 既定のイベントは別のデータベース
+    default = client.get("/members")
+    assert len(default.json()) == 3
+    assert default.headers["ETag"] != members.headers["ETag"]
+    # 計測はルートのテンプレートで集計される
+    assert 'route="/members"' in client.get("/events/spring-2024/metrics").text
+    # 変更通知もイベントごとのバージョンで送る
+    events = client.get("/events/spring-2024/events", params={"since": 99})
+    assert 'event: resync\ndata: {"version":1}' in events.text
+
+    assert client.get("/events/autumn/members").status_code == 404
+    assert client.get("/events/Autumn/members").status_code == 400
+    assert client.put("/events/autumn.db").status_code == 400
+    stats = client.get("/debug/stores").json()
+    assert stats["open"] == ["spring-2024"]
+    # リクエストを終えたストアは貸し出し中ではない
+    assert stats["leased"] == 0
+
+
+def test_streamed_responses_keep_their_store_open(registry: StoreRegistry) -> None:
+    spring = _touch(registry, "spring", create=True)
+    spring.import_members(
+        {"name": f"Member {index}", "part": "Medical", "position": "Support", "contact": {}}
+        for index in range(1200)
+    )
+    lines: list[bytes] = []
+    leased: list[int] = []
+    finished = asyncio.Event()
+    requested: list[bool] = []
+
+    async def receive() -> Message:
+        if not requested:
+            requested.append(True)
+            return {"type": "http.request", "body": b"", "more_body": False}
+        # 本文を送り終えるまで切断しない
+        await finished.wait()
+        return {"type": "http.disconnect"}
+
+    async def send(message: Message) -> None:
+        if message["type"] != "http.response.body":
+            return
+        if message.get("body") and not leased:
+            leased.append(registry.stats().leased)
+            # 本文を送っている間に他のイベントを開き、上限（2）を超えさせる
+            _touch(registry, "summer", create=True)
+            _touch(registry, "autumn", create=True)
+        lines.extend(line for line in message.get("body", b"").split(b"\n") if line)
+        if not message.get("more_body"):
+            finished.set()
+
+    scope = {
+        "type": "http",
+        "asgi": {"version": "3.0"},
+        "http_version": "1.1",
+        "method": "GET",
+        "scheme": "http",
+        "path": "/events/spring/members",
+        "raw_path": b"/events/spring/members",
+        "query_string": b"",
+        "root_path": "",
+        "headers": [(b"host", b"testserver"), (b"accept", b"application/x-ndjson")],
+        "client": ("testclient", 50000),
+        "server": ("testserver", 80),
+    }
+    asyncio.run(app(scope, receive, send))
+
+    # 本文を送り終えるまで貸し出し中のため、上限を超えても閉じられずに最後まで読める
+    assert leased == [1]
+    assert len(lines) == 1200
+    assert not _closed(spring)
+    # 貸し出し中の spring の代わりに、次に古い summer が閉じられた
+    assert registry.stats().open == ["spring", "autumn"]
+    assert registry.stats().leased == 0
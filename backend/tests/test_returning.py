@@ -0,0 +1,98 @@
+"""書き込みが RETURNING 付きの 1 文で完結することのテスト。"""
+
+from __future__ import annotations
+
+from collections.abc import Callable
+from datetime import date, datetime
+
+import pytest
+
+from backend.models import (
+    MaterialCreate,
+    MaterialUpdate,
+    MemberUpdate,
+    ScheduleCreate,
+    ScheduleUpdate,
+    TaskCreate,
+    TaskStatus,
+    TaskUpdate,
+)
+from backend.store import SQLiteStore
+
+
+def _statements(store: SQLiteStore, call: Callable[[], object]) -> list[str]:
+    statements: list[str] = []
+    store._connection().set_trace_callback(statements.append)
+    try:
+        call()
+    finally:
+        store._connection().set_trace_callback(None)
+    # トリガーの実行時にも同じ文が通知されるため重複を除き、トランザクション制御の文と
+    # ETag のバージョンの記録も除く
+    return [
+        sql
+        for sql in dict.fromkeys(statements)
+        if sql.split()[0].upper() in {"SELECT", "INSERT", "UPDATE"} and "scope_versions" not in sql
+    ]
+
+
+@pytest.fixture()
+def task_id(seeded_store: SQLiteStore) -> int:
+    schedule = seeded_store.create_schedule(
+        ScheduleCreate(name="初日", event_date=date(2023, 10, 1))
+    )
+    task = seeded_store.create_task(
+        schedule.id,
+        TaskCreate(
+            name="受付",
+            stage="Reception",
+            start_time=datetime(2023, 10, 1, 8),
+            end_time=datetime(2023, 10, 1, 9),
+        ),
+    )
+    return task.id
+
+
+def test_update_task_status_is_single_statement(seeded_store: SQLiteStore, task_id: int) -> None:
+    results: list[object] = []
+    statements = _statements(
+        seeded_store,
+        lambda: results.append(seeded_store.update_task_status(task_id, TaskStatus.IN_PROGRESS)),
+    )
+    assert len(statements) == 1
+    assert "RETURNING" in statements[0]
+    assert results[0] == seeded_store.get_task(task_id)
+
+
+@pytest.mark.parametrize(
+    "write",
+    [
+        lambda store, task_id: store.update_member(1, MemberUpdate(position="Leader")),
+        lambda store, task_id: store.update_material(2, MaterialUpdate(quantity=3)),
+        lambda store, task_id: store.update_schedule(1, ScheduleUpdate(name="二日目")),
+        lambda store, task_id: store.update_task(task_id, TaskUpdate(note="雨天")),
+        lambda store, task_id: store.create_material(
+            MaterialCreate(name="Cone", part="Course", quantity=1)
+        ),
+    ],
+    ids=["member", "material", "schedule", "task", "create"],
+)
+def test_writes_return_the_written_row_without_select(
+    seeded_store: SQLiteStore,
+    task_id: int,
+    write: Callable[[SQLiteStore, int], object],
+) -> None:
+    results: list[object] = []
+    statements = _statements(seeded_store, lambda: results.append(write(seeded_store, task_id)))
+    assert [sql.split()[0].upper() for sql in statements] in (["UPDATE"], ["INSERT"])
+    assert "RETURNING" in statements[0]
+    written = results[0]
+    getter = getattr(seeded_store, f"get_{type(written).__name__.lower()}")
+    assert getter(written.id) == written
+
+
+def test_update_missing_row_raises_key_error(seeded_store: SQLiteStore) -> None:
+    with pytest.raises(KeyError):
+        seeded_store.update_task_status(999, TaskStatus.COMPLETED)
+    with pytest.raises(KeyError):
+        seeded_store.update_material(999, MaterialUpdate(quantity=1))
@@ -0,0 +1,193 @@
+"""全文検索（FTS5 の ``search_index``）のテスト。"""
+
+from __future__ import annotations
+
+import sqlite3
+from datetime import date, datetime
+from pathlib import Path
+
+import pytest
+from fastapi.testclient import TestClient
+
+from backend.models import (
+    BatchAction,
+    BatchEntity,
+    BatchOperation,
+    ContactInfo,
+    MaterialCreate,
+    MemberCreate,
+    MemberUpdate,
+    ScheduleCreate,
+    TaskCreate,
+    TaskUpdate,
+)
+from backend.store import SQLiteStore
+
+
+def _task(name: str, location: str | None = None, note: str | None = None) -> TaskCreate:
+    return TaskCreate(
+        name=name,
+        stage="Course",
+        start_time=datetime(2023, 10, 1, 8),
+        end_time=datetime(2023, 10, 1, 9),
+        location=location,
+        note=note,
+    )
+
+
+def _hits(results: list) -> list[tuple[str, str]]:
+    return [(result.entity, result.name) for result in results]
+
+
+@pytest.fixture()
+def schedule_id(seeded_store: SQLiteStore) -> int:
+    schedule = seeded_store.create_schedule(
+        ScheduleCreate(name="初日", event_date=date(2023, 10, 1))
+    )
+    seeded_store.create_member(
+        MemberCreate(
+            name="田中健人",
+            part="受付",
+            position="リーダー",
+            contact=ContactInfo(phone="090-1234-5678", note="救護班と兼任"),
+        )
+    )
+    seeded_store.create_material(MaterialCreate(name="救護テント", part="救護", quantity=1))
+    seeded_store.create_task(schedule.id, _task("救護待機", "本部テント"))
+    seeded_store.create_task(schedule.id, _task("受付", "本部テント", note="救護待機の交代"))
+    return schedule.id
+
+
+def test_partial_japanese_terms_match_across_entities(
+    seeded_store: SQLiteStore, schedule_id: int
+) -> None:
+    results = seeded_store.search("救護待")
+
+    assert _hits(results) == [("task", "救護待機"), ("task", "受付")]
+    # 名前に一致した行が先に並び、抜粋では一致箇所を囲む
+    assert results[0].snippet == "<mark>救護待</mark>機"
+    assert "<mark>救護待</mark>" in results[1].snippet
+    assert results[0].score > results[1].score
+    assert _hits(seeded_store.search("救護テ")) == [("material", "救護テント")]
+    assert _hits(seeded_store.search("1234-56")) == [("member", "田中健人")]
+
+
+def test_short_terms_match_by_substring(seeded_store: SQLiteStore, schedule_id: int) -> None:
+    results = seeded_store.search("田中")
+
+    assert _hits(results) == [("member", "田中健人")]
+    assert results[0].snippet == "<mark>田中</mark>健人"
+    assert results[0].score is None
+    # 名前に一致する行・名前の短い行が先に並ぶ
+    assert _hits(seeded_store.search("救護"))[:2] == [
+        ("task", "救護待機"),
+        ("material", "救護テント"),
+    ]
+    # 英字は大文字・小文字を区別しない
+    assert _hits(seeded_store.search("tA")) == [("member", "Kento Tanaka")]
+
+
+def test_all_terms_are_required(seeded_store: SQLiteStore, schedule_id: int) -> None:
+    assert _hits(seeded_store.search("本部テント 受付")) == [("task", "受付")]
+    assert _hits(seeded_store.search("本部テント 受")) == [("task", "受付")]
+    assert seeded_store.search("救護待機 田中") == []
+    assert len(seeded_store.search("本部テント", limit=1)) == 1
+
+
+def test_query_syntax_is_treated_as_text(seeded_store: SQLiteStore, schedule_id: int) -> None:
+    for query in ['"救護', "救護 OR 受付", "NEAR(救護待機)", "name:救護", "*救護*"]:
+        seeded_store.search(query)
+    with pytest.raises(ValueError):
+        seeded_store.search("   ")
+
+
+def test_index_follows_writes(seeded_store: SQLiteStore, schedule_id: int) -> None:
+    member_id = seeded_store.search("田中健人")[0].id
+    seeded_store.update_member(member_id, MemberUpdate(name="田中健太"))
+    assert _hits(seeded_store.search("田中健太")) == [("member", "田中健太")]
+    assert seeded_store.search("田中健人") == []
+
+    task_id = seeded_store.search("救護待機")[0].id
+    seeded_store.update_task(task_id, TaskUpdate(location="ゴール地点"))
+    assert _hits(seeded_store.search("ゴール地点")) == [("task", "救護待機")]
+    seeded_store.delete_task(task_id)
+    assert _hits(seeded_store.search("救護待機")) == [("task", "受付")]
+
+    seeded_store.apply_batch(
+        [
+            BatchOperation(
+                entity=BatchEntity.MEMBER,
+                action=BatchAction.DELETE,
+                ref_id=member_id,
+            )
+        ]
+    )
+    assert seeded_store.search("田中健太") == []
+    # スケジュールの削除でカスケード削除されたタスクも索引から消える
+    seeded_store.delete_schedule(schedule_id)
+    assert seeded_store.search("本部テント") == []
+
+
+def test_bulk_import_updates_index_once(seeded_store: SQLiteStore, schedule_id: int) -> None:
+    report = seeded_store.import_tasks(
+        schedule_id,
+        [
+            {
+                "name": f"給水 {index}",
+                "stage": "Course",
+                "start_time": "2023-10-01T08:00:00",
+                "end_time": "2023-10-01T09:00:00",
+                "location": "5km 給水所",
+            }
+            for index in range(30)
+        ],
+    )
+
+    assert report.imported == 30
+    assert len(seeded_store.search("給水所", limit=100)) == 30
+    with seeded_store._read() as conn:
+        assert conn.execute("SELECT count(*) FROM search_pending").fetchone()[0] == 0
+    # 索引の更新を後回しにした後も、1 行ずつの書き込みはトリガーで即座に反映される
+    seeded_store.create_task(schedule_id, _task("給水所の補充"))
+    assert len(seeded_store.search("給水所", limit=100)) == 31
+
+
+def test_existing_rows_are_indexed_on_upgrade(tmp_path: Path) -> None:
+    path = tmp_path / "legacy.db"
+    store = SQLiteStore(path)
+    store.create_material(MaterialCreate(name="救護テント", part="救護", quantity=1))
+    store.close()
+    with sqlite3.connect(path) as conn:
+        triggers = conn.execute(
+            "SELECT name FROM sqlite_master WHERE type = 'trigger' AND name LIKE '%search%'"
+        ).fetchall()
+        for (trigger,) in triggers:
+            conn.execute(f"DROP TRIGGER {trigger}")
+        conn.execute("DROP TABLE search_index")
+        conn.execute("DROP TABLE search_pending")
+
+    store = SQLiteStore(path)
+    try:
+        assert _hits(store.search("救護テ")) == [("material", "救護テント")]
+    finally:
+        store.close()
+
+
+def test_search_endpoint(client: TestClient) -> None:
+    client.post("/materials", json={"name": "救護テント", "part": "救護", "quantity": 1})
+
+    response = client.get("/search", params={"q": "救護テ"})
+    assert response.status_code == 200
+    assert response.json() == [
+        {
+            "entity": "material",
+            "id": 4,
+            "name": "救護テント",
+            "snippet": "<mark>救護テ</mark>ント",
+            "score": response.json()[0]["score"],
+        }
+    ]
+    assert len(client.get("/search", params={"q": "a", "limit": 2}).json()) == 2
+    assert client.get("/search", params={"q": " "}).status_code == 400
+    assert client.get("/search").status_code == 422
+    assert client.get("/search", params={"q": "a", "limit": 101}).status_code == 422
@@ -0,0 +1,179 @@
+"""スナップショットの書き出しと復元（``GET``／``POST /snapshot``）のテスト。"""
+
+from __future__ import annotations
+
+import asyncio
+import gzip
+import sqlite3
+import threading
+from pathlib import Path
+
+import pytest
+from fastapi.testclient import TestClient
+
+from backend.models import ContactInfo, MaterialUpdate, MemberCreate, ScheduleCreate, TaskCreate
+from backend.store import SQLITE_HEADER, SQLiteStore
+from backend.tests.test_events import _next, _open
+
+
+def _member(name: str) -> MemberCreate:
+    return MemberCreate(name=name, part="Medical", position="Support", contact=ContactInfo())
+
+
+def _names(store: SQLiteStore) -> list[str]:
+    return [member.name for member in store.list_members()]
+
+
+def test_restore_replaces_all_data(seeded_store: SQLiteStore, tmp_path: Path) -> None:
+    schedule = seeded_store.create_schedule(ScheduleCreate(name="初日", event_date="2023-10-01"))
+    seeded_store.create_task(
+        schedule.id,
+        TaskCreate(
+            name="救護待機",
+            stage="Course",
+            start_time="2023-10-01T08:00:00",
+            end_time="2023-10-01T09:00:00",
+        ),
+    )
+    snapshot = tmp_path / "snapshot.db"
+    seeded_store.write_snapshot(snapshot)
+    version = seeded_store.current_version()
+    # 読み取りキャッシュに載せてから変更する
+    assert len(_names(seeded_store)) == 3
+    seeded_store.create_member(_member("Aoi"))
+    seeded_store.update_material(1, MaterialUpdate(quantity=99))
+    seeded_store.delete_schedule(schedule.id)
+    etag = seeded_store.version_token("members")
+
+    summary = seeded_store.restore_snapshot(snapshot)
+
+    assert (summary.members, summary.materials, summary.schedules, summary.tasks) == (3, 3, 1, 1)
+    assert summary.version == version == seeded_store.current_version()
+    assert not snapshot.exists()
+    assert "Aoi" not in _names(seeded_store)
+    assert seeded_store.get_material(1).quantity == 2
+    assert [task.name for task in seeded_store.list_tasks(schedule.id)] == ["救護待機"]
+    # ETag は以前の版と一致しない
+    assert seeded_store.version_token("members") != etag
+    # 索引・集計表・重なりの計算も復元したデータに揃う
+    assert [result.name for result in seeded_store.search("救護待")] == ["救護待機"]
+    assert seeded_store.check_aggregates().mismatches == []
+    assert seeded_store.find_conflicts(schedule.id) == []
+    # 復元後も書き込める
+    seeded_store.create_member(_member("Sora"))
+    assert _names(seeded_store)[-1] == "Sora"
+    assert seeded_store.current_version() == version + 1
+
+
+def test_snapshot_does_not_wait_for_writers(seeded_store: SQLiteStore, tmp_path: Path) -> None:
+    if not seeded_store.concurrent_reads:
+        pytest.skip("単一ロック構成では読み取りと同じくロックを取る")
+    snapshot = tmp_path / "snapshot.db"
+    writer = threading.Thread(target=seeded_store.write_snapshot, args=(snapshot,))
+
+    # 書き込みがロックを握っている間もコピーを取れる
+    with seeded_store._locked():
+        writer.start()
+        writer.join(timeout=5)
+        assert not writer.is_alive()
+
+    with sqlite3.connect(snapshot) as conn:
+        assert conn.execute("SELECT count(*) FROM members").fetchone()[0] == 3
+        assert conn.execute("PRAGMA journal_mode").fetchone()[0] == "delete"
+
+
+def test_invalid_snapshots_are_rejected(seeded_store: SQLiteStore, tmp_path: Path) -> None:
+    text = tmp_path / "text.db"
+    text.write_text("members,materials\n")
+    empty = tmp_path / "empty.db"
+    sqlite3.connect(empty).execute("CREATE TABLE members (id INTEGER)").connection.close()
+    orphan = tmp_path / "orphan.db"
+    seeded_store.write_snapshot(orphan)
+    with sqlite3.connect(orphan) as conn:
+        conn.execute(
+            "INSERT INTO tasks (schedule_id, name, stage, start_time, end_time, status) VALUES"
+            " (99, '孤立', 'Course', '2023-10-01T08:00:00', '2023-10-01T09:00:00', 'planned')"
+        )
+    seeded_store.create_member(_member("Aoi"))
+
+    for path, message in [
+        (text, "SQLite のデータベースではありません"),
+        (empty, "テーブルがありません: materials, schedules, tasks"),
+        (orphan, "参照先の無い行"),
+    ]:
+        with pytest.raises(ValueError, match=message):
+            seeded_store.restore_snapshot(path)
+
+    # 元のデータはそのままで、検査用に移したファイルも残らない
+    assert _names(seeded_store)[-1] == "Aoi"
+    assert not list(tmp_path.glob("*.restore"))
+    with pytest.raises(ValueError):
+        SQLiteStore(":memory:").restore_snapshot(text)
+
+
+def test_older_snapshots_are_upgraded(seeded_store: SQLiteStore, tmp_path: Path) -> None:
+    snapshot = tmp_path / "snapshot.db"
+    seeded_store.write_snapshot(snapshot)
+    with sqlite3.connect(snapshot) as conn:
+        for (trigger,) in conn.execute(
+            "SELECT name FROM sqlite_master WHERE type = 'trigger' AND name LIKE '%_counts'"
+        ).fetchall():
+            conn.execute(f"DROP TRIGGER {trigger}")
+        conn.execute("DROP TABLE member_part_counts")
+
+    seeded_store.restore_snapshot(snapshot)
+
+    assert [(count.part, count.members) for count in seeded_store.member_part_counts()] == [
+        ("Course", 1),
+        ("Reception", 2),
+    ]
+    seeded_store.create_member(_member("Aoi"))
+    assert seeded_store.check_aggregates().mismatches == []
+
+
+def test_restore_tells_subscribers_to_resync(seeded_store: SQLiteStore, tmp_path: Path) -> None:
+    snapshot = tmp_path / "snapshot.db"
+    seeded_store.write_snapshot(snapshot)
+    version = seeded_store.current_version()
+    seeded_store.create_member(_member("Aoi"))
+
+    async def scenario() -> tuple[str, dict]:
+        frames = await _open(seeded_store)
+        await seeded_store.aio.restore_snapshot(snapshot)
+        return await _next(frames)
+
+    assert asyncio.run(scenario()) == ("resync", {"version": version})
+
+
+def test_snapshot_endpoints(client: TestClient) -> None:
+    etag = client.get("/members").headers["ETag"]
+
+    response = client.get("/snapshot")
+
+    assert response.status_code == 200
+    assert response.headers["content-type"] == "application/gzip"
+    assert response.headers["content-disposition"].startswith('attachment; filename="eventcompass-')
+    # 圧縮済みの形式は CompressionMiddleware で二重に圧縮しない
+    assert "content-encoding" not in response.headers
+    snapshot = response.content
+    assert gzip.decompress(snapshot).startswith(SQLITE_HEADER)
+
+    client.post(
+        "/members",
+        json={"name": "Aoi", "part": "Medical", "position": "Support", "contact": {}},
+    )
+    restored = client.post(
+        "/snapshot", content=snapshot, headers={"Content-Type": "application/gzip"}
+    )
+    assert restored.status_code == 200
+    assert restored.json()["members"] == 3
+    members = client.get("/members")
+    assert len(members.json()) == 3
+    assert members.headers["ETag"] != etag
+    # 圧縮していない SQLite のファイルも受け付ける
+    assert client.post("/snapshot", content=gzip.decompress(snapshot)).status_code == 200
+
+    for body in [snapshot[: len(snapshot) // 2], b"not a database", b""]:
+        rejected = client.post("/snapshot", content=body)
+        assert rejected.status_code == 400
+    assert len(client.get("/members").json()) == 3
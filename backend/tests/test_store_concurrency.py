@@ -0,0 +1,58 @@
+"""SQLiteStore の並列読み取りモードのテスト。"""
+
+from __future__ import annotations
+
+import threading
+from pathlib import Path
+
+import pytest
+
+from backend.models import MaterialCreate, MaterialUpdate
+from backend.store import SQLiteStore
+
+
+def test_concurrent_reads_enables_wal(tmp_path: Path) -> None:
+    store = SQLiteStore(tmp_path / "wal.db", concurrent_reads=True)
+    try:
+        with store._read() as conn:
+            mode = conn.execute("PRAGMA journal_mode").fetchone()[0]
+        assert mode == "wal"
+        assert store.concurrent_reads
+    finally:
+        store.close()
+
+
+def test_reads_do_not_wait_for_writer_lock(tmp_path: Path) -> None:
+    store = SQLiteStore(tmp_path / "wal.db", concurrent_reads=True)
+    store.create_material(MaterialCreate(name="Tent", part="Reception", quantity=2))
+    results: list[int] = []
+
+    def reader() -> None:
+        results.append(len(store.list_materials()))
+
+    try:
+        # 書き込みロックを握ったままでも読み取りが完了することを確認する
+        with store._lock:
+            thread = threading.Thread(target=reader)
+            thread.start()
+            thread.join(timeout=5)
+            assert not thread.is_alive()
+        assert results == [1]
+    finally:
+        store.close()
+
+
+def test_readers_see_committed_writes(tmp_path: Path) -> None:
+    store = SQLiteStore(tmp_path / "wal.db", concurrent_reads=True, reader_pool_size=2)
+    try:
+        created = store.create_material(MaterialCreate(name="Cone", part="Course", quantity=1))
+        store.update_material(created.id, MaterialUpdate(quantity=7))
+        assert store.get_material(created.id).quantity == 7
+        assert [item.quantity for item in store.list_materials(part="course")] == [7]
+    finally:
+        store.close()
+
+
+def test_concurrent_reads_rejects_in_memory_database() -> None:
+    with pytest.raises(ValueError):
+        SQLiteStore(":memory:", concurrent_reads=True)
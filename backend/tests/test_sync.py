@@ -0,0 +1,128 @@
+"""差分同期 API のテスト。"""
+
+from __future__ import annotations
+
+from pathlib import Path
+
+from fastapi.testclient import TestClient
+
+from backend.models import ContactInfo, MaterialCreate, MemberCreate
+from backend.store import SQLiteStore
+
+
+def test_sync_without_since_returns_full_dataset(client: TestClient) -> None:
+    response = client.get("/sync")
+    assert response.status_code == 200
+    body = response.json()
+    assert body["full"] is True
+    assert [item["id"] for item in body["members"]] == [1, 2, 3]
+    assert [item["id"] for item in body["materials"]] == [1, 2, 3]
+    assert body["version"] > 0
+
+
+def test_sync_returns_only_changes_after_version(client: TestClient) -> None:
+    version = client.get("/sync").json()["version"]
+
+    unchanged = client.get("/sync", params={"since": version}).json()
+    assert unchanged["full"] is False
+    assert unchanged["version"] == version
+    assert unchanged["members"] == []
+    assert unchanged["materials"] == []
+
+    client.put("/materials/2", json={"quantity": 30})
+    client.delete("/members/3")
+    created = client.post(
+        "/schedules", json={"name": "大会当日", "event_date": "2023-10-01"}
+    ).json()
+
+    delta = client.get("/sync", params={"since": version}).json()
+    assert delta["full"] is False
+    assert delta["version"] > version
+    assert [item["quantity"] for item in delta["materials"]] == [30]
+    assert delta["members"] == []
+    assert delta["deleted"]["members"] == [3]
+    assert [item["id"] for item in delta["schedules"]] == [created["id"]]
+
+
+def test_sync_reports_cascaded_task_deletions(client: TestClient) -> None:
+    schedule = client.post("/schedules", json={"name": "初日", "event_date": "2023-10-01"}).json()
+    task = client.post(
+        f"/schedules/{schedule['id']}/tasks",
+        json={
+            "name": "受付設営",
+            "stage": "Preparation",
+            "start_time": "2023-10-01T07:00:00",
+            "end_time": "2023-10-01T08:00:00",
+        },
+    ).json()
+    version = client.get("/sync").json()["version"]
+
+    client.delete(f"/schedules/{schedule['id']}")
+
+    delta = client.get("/sync", params={"since": version}).json()
+    assert delta["deleted"]["schedules"] == [schedule["id"]]
+    assert delta["deleted"]["tasks"] == [task["id"]]
+
+
+def test_sync_with_unknown_future_version_falls_back_to_full(client: TestClient) -> None:
+    body = client.get("/sync", params={"since": 10_000}).json()
+    assert body["full"] is True
+    assert len(body["members"]) == 3
+
+
+def test_sync_with_other_epoch_falls_back_to_full(client: TestClient) -> None:
+    synced = client.get("/sync").json()
+    params = {"since": synced["version"], "epoch": synced["epoch"]}
+    assert client.get("/sync", params=params).json()["full"] is False
+
+    body = client.get("/sync", params={**params, "epoch": "restored"}).json()
+    assert body["full"] is True
+    assert body["epoch"] == synced["epoch"]
+    assert len(body["members"]) == 3
+
+
+def test_sync_after_restore_returns_full_dataset(seeded_store: SQLiteStore, tmp_path: Path) -> None:
+    def create(name: str) -> None:
+        seeded_store.create_member(
+            MemberCreate(name=name, part="Course", position="Support", contact=ContactInfo())
+        )
+
+    snapshot = tmp_path / "snapshot.db"
+    seeded_store.write_snapshot(snapshot)
+    create("C")
+    create("E")
+    synced = seeded_store.changes_since(0)
+
+    seeded_store.restore_snapshot(snapshot)
+    for index in range(3):
+        create(f"X{index}")
+    # 復元でバージョンが巻き戻り、復元前に受け取ったバージョンより新しくなっている
+    assert seeded_store.current_version() > synced.version
+
+    delta = seeded_store.changes_since(synced.version, synced.epoch)
+
+    assert delta.full is True
+    assert delta.epoch != synced.epoch
+    names = [member.name for member in delta.members]
+    assert "C" not in names and "E" not in names
+    assert names[-3:] == ["X0", "X1", "X2"]
+    # 同じ世代なら差分を返す
+    assert seeded_store.changes_since(delta.version, delta.epoch).full is False
+
+
+def test_change_log_backfills_existing_database(tmp_path: Path) -> None:
+    path = tmp_path / "legacy.db"
+    store = SQLiteStore(path)
+    store.create_material(MaterialCreate(name="Tent", part="Reception", quantity=1))
+    # 変更履歴導入前のデータベースを再現する
+    with store._write() as conn:
+        conn.execute("DROP TABLE change_log")
+    store.close()
+
+    reopened = SQLiteStore(path)
+    try:
+        changes = reopened.changes_since(0)
+        assert [item.name for item in changes.materials] == ["Tent"]
+        assert reopened.current_version() == 1
+    finally:
+        reopened.close()
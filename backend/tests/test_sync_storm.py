@@ -0,0 +1,92 @@
+"""同期ストームの負荷生成ツール（``benchmarks.sync_storm``）と待ち時間の計測のテスト。"""
+
+from __future__ import annotations
+
+import asyncio
+import random
+import threading
+import time
+from pathlib import Path
+
+import httpx
+
+from backend.main import app, get_store
+from backend.models import MemberUpdate
+from backend.store import SQLiteStore
+from benchmarks.sync_storm import build_fleet, check_consistency, run, storm
+
+
+def test_storm_replays_every_queue_consistently() -> None:
+    result = run(clients=6, queue_size=8, stagger=0.01, interval=0.01, scale=0.002)
+
+    summary = result["summary"]
+    assert result["consistency_problems"] == []
+    assert summary["http_errors"] == 0
+    assert summary["failed_operations"] == 0
+    assert summary["unsynced_clients"] == 0
+    assert summary["operations"] == 48
+    assert summary["queue_wait"]["write"]["count"] >= 6
+    assert sum(row["requests"] for row in result["timeline"]) == summary["requests"]
+
+
+def test_consistency_check_detects_lost_update(seeded_store: SQLiteStore) -> None:
+    members = [member.id for member in seeded_store.list_members()]
+    materials = [material.id for material in seeded_store.list_materials()]
+    fleet = build_fleet(
+        random.Random(1),
+        clients=2,
+        queue_size=6,
+        member_ids=members,
+        material_ids=materials,
+        tag="test",
+        weights=(0.0, 1.0, 0.0),
+        stagger=0.0,
+    )
+    target = next(
+        key[1]
+        for client in fleet
+        for key, value in client.expected["member"].items()
+        if value is not None and "position" in value
+    )
+
+    async def scenario() -> tuple[list[str], list[str]]:
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as http:
+            await storm(http, fleet, since=seeded_store.current_version())
+            before = await check_consistency(http, fleet, tag="test")
+            # 端末の更新が失われた状態を作る
+            seeded_store.update_member(target, MemberUpdate(position="Lost"))
+            return before, await check_consistency(http, fleet, tag="test")
+
+    app.dependency_overrides[get_store] = lambda: seeded_store
+    try:
+        before, after = asyncio.run(scenario())
+    finally:
+        app.dependency_overrides.pop(get_store, None)
+    assert before == []
+    assert len(after) == 1
+    assert f"行 {target} の ['position']" in after[0]
+
+
+def test_lock_wait_is_recorded(tmp_path: Path) -> None:
+    store = SQLiteStore(tmp_path / "wait.db")
+    try:
+        before = store.lock_wait_stats()
+        holding = threading.Event()
+
+        def hold_lock() -> None:
+            with store._write():
+                holding.set()
+                time.sleep(0.05)
+
+        holder = threading.Thread(target=hold_lock)
+        holder.start()
+        holding.wait()
+        store.list_members()
+        holder.join()
+
+        after = store.lock_wait_stats()
+        assert after.count == before.count + 2
+        assert after.max_seconds >= 0.03
+    finally:
+        store.close()
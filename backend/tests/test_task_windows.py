@@ -0,0 +1,242 @@
+"""実施時間帯によるタスク検索（R*Tree の ``task_intervals``）のテスト。"""
+
+from __future__ import annotations
+
+import os
+import sqlite3
+import time
+from datetime import UTC, date, datetime, timedelta, timezone
+from pathlib import Path
+
+import pytest
+from fastapi.testclient import TestClient
+
+from backend.models import ScheduleCreate, TaskCreate, TaskStatus, TaskUpdate, TraceSettings
+from backend.store import SQLiteStore, TaskWindow
+
+JST = timezone(timedelta(hours=9))
+
+
+def _task(name: str, start: datetime, end: datetime, **fields: object) -> TaskCreate:
+    return TaskCreate(name=name, stage="Course", start_time=start, end_time=end, **fields)
+
+
+def _at(hour: int, minute: int = 0, second: int = 0) -> datetime:
+    return datetime(2023, 10, 1, hour, minute, second)
+
+
+def _names(tasks: list) -> list[str]:
+    return [task.name for task in tasks]
+
+
+@pytest.fixture()
+def schedule_id(seeded_store: SQLiteStore) -> int:
+    schedule = seeded_store.create_schedule(
+        ScheduleCreate(name="初日", event_date=date(2023, 10, 1))
+    )
+    for name, start, end in [
+        ("設営", _at(6), _at(8)),
+        ("受付", _at(7, 30), _at(9)),
+        ("誘導", _at(9), _at(10)),
+        ("撤収", _at(16), _at(18)),
+    ]:
+        seeded_store.create_task(schedule.id, _task(name, start, end))
+    return schedule.id
+
+
+def test_window_returns_overlapping_tasks(seeded_store: SQLiteStore, schedule_id: int) -> None:
+    def window(start: datetime | None, end: datetime | None) -> list[str]:
+        return _names(seeded_store.list_tasks(schedule_id, window=TaskWindow(start, end)))
+
+    assert window(_at(7), _at(9)) == ["設営", "受付"]
+    # 終了時刻ちょうどに始まる区間、開始時刻ちょうどで終わる区間は重ならない
+    assert window(_at(8), _at(9)) == ["受付"]
+    assert window(_at(10), _at(16)) == []
+    assert window(_at(15), None) == ["撤収"]
+    assert window(None, _at(7)) == ["設営"]
+
+
+def test_instant_window_includes_start_and_excludes_end(
+    seeded_store: SQLiteStore, schedule_id: int
+) -> None:
+    assert _names(seeded_store.list_tasks(schedule_id, window=TaskWindow.at(_at(9)))) == ["誘導"]
+    assert _names(seeded_store.list_tasks(schedule_id, window=TaskWindow.at(_at(8)))) == ["受付"]
+
+
+def test_boundaries_are_exact_within_index_rounding(
+    seeded_store: SQLiteStore, schedule_id: int
+) -> None:
+    # R*Tree の座標の丸め（分単位）より細かい差でも、境界は列の値で判定する
+    seeded_store.create_task(schedule_id, _task("計測", _at(12, 0, 30), _at(12, 0, 50)))
+
+    assert seeded_store.list_active_tasks(_at(12, 0, 10)) == []
+    assert _names(seeded_store.list_active_tasks(_at(12, 0, 30))) == ["計測"]
+    assert seeded_store.list_active_tasks(_at(12, 0, 50)) == []
+
+
+def test_active_tasks_span_schedules_with_filters_and_paging(
+    seeded_store: SQLiteStore, schedule_id: int
+) -> None:
+    other = seeded_store.create_schedule(
+        ScheduleCreate(name="同日別会場", event_date=date(2023, 10, 1))
+    )
+    seeded_store.create_task(
+        other.id, _task("給水", _at(7), _at(12), status=TaskStatus.IN_PROGRESS)
+    )
+    seeded_store.create_task(other.id, _task("救護待機", _at(8, 30), _at(8, 45)))
+
+    active = seeded_store.list_active_tasks(_at(8, 30))
+    assert _names(active) == ["給水", "受付", "救護待機"]
+    assert {task.schedule_id for task in active} == {schedule_id, other.id}
+    assert _names(seeded_store.list_active_tasks(_at(8, 30), status=TaskStatus.IN_PROGRESS)) == [
+        "給水"
+    ]
+    first_page = seeded_store.list_active_tasks(_at(8, 30), limit=2)
+    rest = seeded_store.list_active_tasks(_at(8, 30), after=first_page[-1].id)
+    assert _names(first_page + rest) == _names(active)
+    assert [row[0] for row in seeded_store.list_active_tasks_json(_at(8, 30))] == [
+        task.id for task in active
+    ]
+
+
+def test_index_follows_updates_and_deletes(seeded_store: SQLiteStore, schedule_id: int) -> None:
+    task = seeded_store.list_tasks(schedule_id, window=TaskWindow.at(_at(17)))[0]
+    seeded_store.update_task(task.id, TaskUpdate(start_time=_at(19), end_time=_at(20)))
+
+    assert seeded_store.list_active_tasks(_at(17)) == []
+    assert _names(seeded_store.list_active_tasks(_at(19, 30))) == ["撤収"]
+
+    seeded_store.delete_task(task.id)
+    assert seeded_store.list_active_tasks(_at(19, 30)) == []
+
+    # スケジュールの削除でカスケード削除されたタスクも索引から消える
+    seeded_store.delete_schedule(schedule_id)
+    assert seeded_store.list_active_tasks(_at(7, 45)) == []
+    with seeded_store._read() as conn:
+        assert conn.execute("SELECT count(*) FROM task_intervals").fetchone()[0] == 0
+
+
+def test_timezones_compare_as_instants(seeded_store: SQLiteStore, schedule_id: int) -> None:
+    seeded_store.create_task(
+        schedule_id,
+        _task(
+            "表彰式",
+            datetime(2023, 10, 1, 13, tzinfo=JST),
+            datetime(2023, 10, 1, 14, tzinfo=JST),
+        ),
+    )
+
+    # 日本時間 13:30 = UTC 4:30（タイムゾーンなしの値は UTC とみなす）
+    assert _names(seeded_store.list_active_tasks(datetime(2023, 10, 1, 4, 30, tzinfo=UTC))) == [
+        "表彰式"
+    ]
+    assert _names(seeded_store.list_active_tasks(_at(4, 30))) == ["表彰式"]
+
+
+def test_active_tasks_default_to_the_current_time_in_utc(
+    seeded_store: SQLiteStore, schedule_id: int
+) -> None:
+    now = datetime.now(UTC).replace(tzinfo=None, microsecond=0)
+    # タイムゾーンなしで保存した値は UTC とみなす
+    seeded_store.create_task(
+        schedule_id, _task("巡回", now - timedelta(minutes=30), now + timedelta(minutes=30))
+    )
+    assert _names(seeded_store.list_active_tasks(now)) == ["巡回"]
+    assert _names(seeded_store.list_active_tasks(now.replace(tzinfo=UTC).astimezone(JST))) == [
+        "巡回"
+    ]
+    assert seeded_store.list_active_tasks(now + timedelta(hours=9)) == []
+
+    # 既定の現在時刻はサーバーのタイムゾーンによらない
+    previous = os.environ.get("TZ")
+    os.environ["TZ"] = "Asia/Tokyo"
+    time.tzset()
+    try:
+        assert _names(seeded_store.list_active_tasks()) == ["巡回"]
+        assert [row[0] for row in seeded_store.list_active_tasks_json()] == [
+            task.id for task in seeded_store.list_active_tasks(now)
+        ]
+    finally:
+        if previous is None:
+            del os.environ["TZ"]
+        else:
+            os.environ["TZ"] = previous
+        time.tzset()
+
+
+def test_inverted_task_is_stored_but_never_active(
+    seeded_store: SQLiteStore, schedule_id: int
+) -> None:
+    task = seeded_store.create_task(schedule_id, _task("誤入力", _at(12), _at(11)))
+
+    assert seeded_store.get_task(task.id) == task
+    assert seeded_store.list_active_tasks(_at(11, 30)) == []
+
+
+def test_reversed_window_is_rejected(seeded_store: SQLiteStore, schedule_id: int) -> None:
+    with pytest.raises(ValueError):
+        seeded_store.list_tasks(schedule_id, window=TaskWindow(_at(10), _at(9)))
+
+
+def test_window_query_uses_interval_index(seeded_store: SQLiteStore, schedule_id: int) -> None:
+    # 読み取りは構成によって接続プールを使うため、実行計画はトレーサー経由で取得する
+    seeded_store.configure_tracing(TraceSettings(slow_query_ms=0.000001))
+    seeded_store.list_tasks(schedule_id, window=TaskWindow(_at(7), _at(9)))
+
+    plan = next(
+        entry.plan
+        for entry in seeded_store.trace_snapshot().slow_queries
+        if "task_intervals" in entry.sql
+    )
+    assert plan[0].startswith("SCAN task_intervals VIRTUAL TABLE INDEX"), plan
+    assert "SEARCH tasks USING INTEGER PRIMARY KEY (rowid=?)" in plan, plan
+
+
+def test_existing_tasks_are_indexed_on_upgrade(tmp_path: Path) -> None:
+    path = tmp_path / "legacy.db"
+    store = SQLiteStore(path)
+    schedule = store.create_schedule(ScheduleCreate(name="初日", event_date=date(2023, 10, 1)))
+    store.create_task(schedule.id, _task("設営", _at(6), _at(8)))
+    store.close()
+    with sqlite3.connect(path) as conn:
+        conn.execute("DROP TABLE task_intervals")
+
+    store = SQLiteStore(path)
+    try:
+        assert _names(store.list_active_tasks(_at(7))) == ["設営"]
+    finally:
+        store.close()
+
+
+def test_task_window_endpoints(client: TestClient) -> None:
+    schedule_id = client.post(
+        "/schedules", json={"name": "初日", "event_date": "2023-10-01"}
+    ).json()["id"]
+    for name, start, end in [("設営", "06:00", "08:00"), ("受付", "07:30", "09:00")]:
+        client.post(
+            f"/schedules/{schedule_id}/tasks",
+            json={
+                "name": name,
+                "stage": "Preparation",
+                "start_time": f"2023-10-01T{start}:00",
+                "end_time": f"2023-10-01T{end}:00",
+            },
+        )
+
+    response = client.get(
+        f"/schedules/{schedule_id}/tasks",
+        params={"from": "2023-10-01T08:00:00", "to": "2023-10-01T08:30:00"},
+    )
+    assert response.status_code == 200
+    assert [task["name"] for task in response.json()] == ["受付"]
+
+    response = client.get("/tasks/active", params={"at": "2023-10-01T07:45:00", "limit": 1})
+    assert [task["name"] for task in response.json()] == ["設営"]
+    assert response.headers["X-Next-After"] == str(response.json()[0]["id"])
+
+    assert client.get("/tasks/active").status_code == 200
+    response = client.get(
+        f"/schedules/{schedule_id}/tasks",
+        params={"from": "2023-10-01T09:00:00", "to": "2023-10-01T08:00:00"},
+    )
+    assert response.status_code == 400
@@ -0,0 +1,96 @@
+"""遅い SQL とロックの取得履歴のトレース（``backend.tracing``）のテスト。"""
+
+from __future__ import annotations
+
+import json
+import logging
+from pathlib import Path
+
+import pytest
+from fastapi.testclient import TestClient
+
+from backend.models import MemberUpdate, TraceSettings
+from backend.store import SQLiteStore
+
+
+def test_tracing_is_disabled_by_default(seeded_store: SQLiteStore) -> None:
+    seeded_store.list_members(part="reception")
+    seeded_store.update_member(1, MemberUpdate(position="Leader"))
+
+    snapshot = seeded_store.trace_snapshot()
+    assert snapshot.settings == TraceSettings()
+    assert snapshot.slow_queries == []
+    assert snapshot.lock_events == []
+
+
+def test_slow_queries_are_logged_with_shape_and_plan(
+    seeded_store: SQLiteStore, caplog: pytest.LogCaptureFixture
+) -> None:
+    # 閾値をごく小さくして、すべての文を「遅い」扱いにする
+    seeded_store.configure_tracing(TraceSettings(slow_query_ms=0.000001))
+
+    with caplog.at_level(logging.WARNING, logger="backend.tracing"):
+        seeded_store.list_members(part="reception")
+
+    entries = [
+        entry for entry in seeded_store.trace_snapshot().slow_queries if "members" in entry.sql
+    ]
+    assert entries
+    entry = entries[-1]
+    assert entry.method == "list_members"
+    assert entry.parameters[0] == "str"
+    # パラメーターの値そのものは残さない
+    assert "reception" not in entry.sql
+    assert "reception" not in " ".join(entry.parameters)
+    assert any("idx_members_part" in step for step in entry.plan)
+    assert any("slow query" in record.getMessage() for record in caplog.records)
+
+
+def test_slow_commits_are_traced(seeded_store: SQLiteStore) -> None:
+    seeded_store.configure_tracing(TraceSettings(slow_query_ms=0.000001))
+
+    seeded_store.update_member(1, MemberUpdate(position="Leader"))
+
+    methods = {(entry.sql, entry.method) for entry in seeded_store.trace_snapshot().slow_queries}
+    assert ("COMMIT", "update_member") in methods
+
+
+def test_lock_events_keep_recent_acquisitions(seeded_store: SQLiteStore) -> None:
+    seeded_store.configure_tracing(TraceSettings(lock_history=3))
+
+    for position in ("Leader", "Support", "Sub Leader", "Leader", "Support"):
+        seeded_store.update_member(1, MemberUpdate(position=position))
+
+    events = seeded_store.trace_snapshot().lock_events
+    assert len(events) == 3
+    assert {event.method for event in events} == {"update_member"}
+    assert all(event.hold_ms >= 0 and event.wait_ms >= 0 for event in events)
+    assert events[0].acquired_at <= events[-1].acquired_at
+
+    seeded_store.configure_tracing(TraceSettings())
+    assert seeded_store.trace_snapshot().lock_events == []
+
+
+def test_debug_trace_endpoint_configures_and_reports(client: TestClient) -> None:
+    assert client.put("/debug/trace", json={"lock_history": -1}).status_code == 422
+
+    response = client.put("/debug/trace", json={"slow_query_ms": 1000, "lock_history": 10})
+    assert response.json() == {"slow_query_ms": 1000.0, "lock_history": 10}
+    client.put("/members/1", json={"position": "Leader"})
+
+    trace = client.get("/debug/trace").json()
+    assert trace["settings"]["lock_history"] == 10
+    assert [event["method"] for event in trace["lock_events"]][-1] == "update_member"
+    assert trace["slow_queries"] == []
+
+
+def test_dump_trace_writes_json(seeded_store: SQLiteStore, tmp_path: Path) -> None:
+    seeded_store.configure_tracing(TraceSettings(lock_history=5))
+    seeded_store.update_member(1, MemberUpdate(position="Leader"))
+    path = tmp_path / "trace.json"
+
+    seeded_store.dump_trace(path)
+
+    dumped = json.loads(path.read_text(encoding="utf-8"))
+    assert dumped["settings"] == {"slow_query_ms": None, "lock_history": 5}
+    assert dumped["lock_events"][0]["method"] == "update_member"
@@ -0,0 +1,147 @@
+"""``SQLiteStore`` の遅い SQL とロックの取得状況を記録するトレーサー。
+
+既定では無効で、有効にしていない間は閾値の比較だけで何も記録しない。遅い SQL は
+ログ（``backend.tracing``）に出力し、直近の記録はロックの取得履歴と共にリングバッファに残す。
+"""
+
+from __future__ import annotations
+
+import json
+import logging
+import sqlite3
+from collections import deque
+from datetime import UTC, datetime, timedelta
+from pathlib import Path
+from threading import Lock, current_thread
+from typing import Any
+
+from .models import LockEvent, SlowQuery, TraceSettings, TraceSnapshot
+
+logger = logging.getLogger(__name__)
+
+# 遅い SQL を保持する件数
+SLOW_QUERY_HISTORY = 200
+
+
+def parameter_shape(parameters: Any) -> list[str]:
+    """パラメーターの値は残さず、型の並び（名前付きの場合は ``名前:型``）だけを返す。"""
+
+    if isinstance(parameters, dict):
+        return [f"{name}:{type(value).__name__}" for name, value in parameters.items()]
+    if isinstance(parameters, list | tuple):
+        return [type(value).__name__ for value in parameters]
+    return [type(parameters).__name__]
+
+
+def query_plan(conn: sqlite3.Connection, sql: str, parameters: Any) -> list[str]:
+    """``EXPLAIN QUERY PLAN`` の各行の説明を返す。取得できない文では空にする。
+
+    計測付きの ``execute`` を通さないよう、``sqlite3.Connection`` の実装を直接呼ぶ。
+    """
+
+    try:
+        rows = sqlite3.Connection.execute(conn, f"EXPLAIN QUERY PLAN {sql}", parameters)
+        return [row[-1] for row in rows.fetchall()]
+    except (sqlite3.Error, ValueError):
+        return []
+
+
+class StoreTracer:
+    """遅い SQL とロックの取得履歴を保持する。設定は ``configure`` で実行中に変更できる。"""
+
+    def __init__(self) -> None:
+        self._guard = Lock()
+        # 判定を速くするため、閾値は秒で持つ。None なら遅い SQL を記録しない
+        self.slow_query_seconds: float | None = None
+        self._slow_queries: deque[SlowQuery] = deque(maxlen=SLOW_QUERY_HISTORY)
+        # None ならロックの履歴を記録しない
+        self._lock_events: deque[LockEvent] | None = None
+
+    @property
+    def settings(self) -> TraceSettings:
+        seconds = self.slow_query_seconds
+        events = self._lock_events
+        return TraceSettings(
+            slow_query_ms=None if seconds is None else seconds * 1000,
+            lock_history=0 if events is None else events.maxlen or 0,
+        )
+
+    @property
+    def traces_locks(self) -> bool:
+        return self._lock_events is not None
+
+    def configure(self, settings: TraceSettings) -> None:
+        """設定を置き換える。ロックの履歴の件数を変えた場合、それまでの履歴は捨てる。"""
+
+        with self._guard:
+            slow_query_ms = settings.slow_query_ms
+            self.slow_query_seconds = None if slow_query_ms is None else slow_query_ms / 1000
+            events = self._lock_events
+            current = 0 if events is None else events.maxlen
+            if settings.lock_history != current:
+                self._lock_events = (
+                    deque(maxlen=settings.lock_history) if settings.lock_history else None
+                )
+
+    def record_slow_query(
+        self,
+        conn: sqlite3.Connection,
+        method: str,
+        sql: str,
+        parameters: Any,
+        seconds: float,
+        *,
+        many: bool = False,
+    ) -> None:
+        """閾値を超えた SQL を記録する。``many`` は ``executemany`` で実行した文。"""
+
+        entry = SlowQuery(
+            recorded_at=datetime.now(UTC),
+            method=method,
+            sql=" ".join(sql.split()),
+            parameters=["executemany"] if many else parameter_shape(parameters),
+            duration_ms=seconds * 1000,
+            plan=[] if many else query_plan(conn, sql, parameters),
+        )
+        with self._guard:
+            self._slow_queries.append(entry)
+        logger.warning(
+            "slow query: %.1f ms in %s: %s params=%s plan=%s",
+            entry.duration_ms,
+            method,
+            entry.sql,
+            entry.parameters,
+            " / ".join(entry.plan) or "-",
+        )
+
+    def record_lock(self, method: str, wait: float, hold: float) -> None:
+        """解放した時点で呼ぶ。取得時刻は保持時間から逆算する。"""
+
+        entry = LockEvent(
+            acquired_at=datetime.now(UTC) - timedelta(seconds=hold),
+            method=method,
+            thread=current_thread().name,
+            wait_ms=wait * 1000,
+            hold_ms=hold * 1000,
+        )
+        with self._guard:
+            events = self._lock_events
+            if events is not None:
+                events.append(entry)
+
+    def snapshot(self) -> TraceSnapshot:
+        with self._guard:
+            slow_queries = list(self._slow_queries)
+            lock_events = [] if self._lock_events is None else list(self._lock_events)
+        return TraceSnapshot(
+            settings=self.settings, slow_queries=slow_queries, lock_events=lock_events
+        )
+
+    def dump(self, path: str | Path) -> None:
+        """現在の記録を JSON ファイルに書き出す。"""
+
+        Path(path).write_text(
+            json.dumps(self.snapshot().model_dump(mode="json"), ensure_ascii=False, indent=2)
+            + "\n",
+            encoding="utf-8",
+        )
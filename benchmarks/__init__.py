@@ -0,0 +1 @@
+"""EventCompass バックエンドの性能計測スクリプト群。"""
@@ -0,0 +1,548 @@
+"""HTTP API の全ルートを大規模イベントのデータで計測するベンチマーク。
+
+アプリは httpx の ``ASGITransport`` でプロセス内から呼び出すため、ネットワークを介さずに
+ルーティング・検証・直列化・ストアの処理時間だけを測れる。結果は JSON で保存でき、
+``--baseline`` を指定すると前回の結果と比べて閾値を超えて遅くなったルートがあれば失敗する。
+
+使い方::
+
+    uv run python -m benchmarks.api_suite --output results.json
+    uv run python -m benchmarks.api_suite --baseline results.json --threshold 0.25
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import gzip
+import json
+import platform
+import random
+import sqlite3
+import statistics
+import sys
+import tempfile
+import time
+import weakref
+from collections.abc import Callable
+from datetime import UTC, datetime, timedelta
+from pathlib import Path
+from typing import Any, NamedTuple
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+import httpx
+from fastapi.routing import APIRoute
+
+from backend.encoding import GZIP_LEVEL
+from backend.main import APP_CACHE_SIZE, app, get_registry, get_store
+from backend.models import MaterialCreate, MemberCreate, ScheduleCreate, TaskCreate, TaskStatus
+from backend.registry import StoreRegistry
+from backend.store import SQLiteStore
+from benchmarks.datagen import (
+    FIRST_EVENT_DAY,
+    LARGE_EVENT,
+    EventSize,
+    SeededEvent,
+    material_row,
+    member_row,
+    seed_event,
+    task_row,
+)
+
+# 比較に使う指標と、既定の許容悪化率
+DEFAULT_METRIC = "p95_ms"
+DEFAULT_THRESHOLD = 0.25
+# ミリ秒未満の揺らぎで失敗しないよう、悪化量がこれ未満なら無視する
+DEFAULT_MIN_DELTA_MS = 0.5
+# 一括インポート・一括処理の 1 リクエストあたりの件数
+IMPORT_ROWS = 100
+BATCH_OPERATIONS = 20
+# 全文検索の検索語。trigram の索引を使う 3 文字以上の語と、全件を部分一致で調べる 2 文字の語を混ぜる
+SEARCH_QUERIES = ["救護待機", "給水所", "Traffic", "Member 0012", "設営", "受付 本部テント"]
+
+
+class Call(NamedTuple):
+    """計測する 1 回分のリクエスト。"""
+
+    method: str
+    url: str
+    params: dict[str, Any] | None = None
+    json: Any = None
+    content: bytes | None = None
+    headers: dict[str, str] | None = None
+
+
+class Fixture(NamedTuple):
+    store: SQLiteStore
+    event: SeededEvent
+    rng: random.Random
+
+
+# 計測前に呼び出し内容を用意する関数。削除対象の作成など、計測に含めない準備もここで行う
+Prepare = Callable[[Fixture], Call]
+
+
+def _pick(fixture: Fixture, ids: list[int]) -> int:
+    return fixture.rng.choice(ids)
+
+
+def _new_member(fixture: Fixture) -> int:
+    row = member_row(fixture.rng, fixture.rng.randrange(1_000_000))
+    return fixture.store.create_member(MemberCreate.model_validate(row)).id
+
+
+def _new_material(fixture: Fixture) -> int:
+    row = material_row(fixture.rng, fixture.rng.randrange(1_000_000))
+    return fixture.store.create_material(MaterialCreate.model_validate(row)).id
+
+
+def _new_schedule(fixture: Fixture) -> int:
+    schedule = fixture.store.create_schedule(
+        ScheduleCreate(name="臨時", event_date=datetime(2024, 6, 1).date())
+    )
+    for index in range(20):
+        row = task_row(fixture.rng, schedule.event_date, index)
+        fixture.store.create_task(schedule.id, TaskCreate.model_validate(row))
+    return schedule.id
+
+
+def _new_task(fixture: Fixture) -> int:
+    schedule_id = _pick(fixture, fixture.event.schedule_ids)
+    schedule = fixture.store.get_schedule(schedule_id)
+    row = task_row(fixture.rng, schedule.event_date, fixture.rng.randrange(1_000_000))
+    return fixture.store.create_task(schedule_id, TaskCreate.model_validate(row)).id
+
+
+def _json_lines(rows: list[dict[str, object]]) -> bytes:
+    return "\n".join(json.dumps(row, ensure_ascii=False) for row in rows).encode()
+
+
+def _import_call(url: str, rows: list[dict[str, object]]) -> Call:
+    return Call(
+        "POST", url, content=_json_lines(rows), headers={"Content-Type": "application/x-ndjson"}
+    )
+
+
+def _batch_call(fixture: Fixture) -> Call:
+    rng = fixture.rng
+    operations: list[dict[str, object]] = []
+    for index in range(BATCH_OPERATIONS):
+        if index % 4 == 0:
+            operations.append(
+                {
+                    "entity": "member",
+                    "action": "create",
+                    "ref_id": -(index + 1),
+                    "payload": member_row(rng, rng.randrange(1_000_000)),
+                }
+            )
+        elif index % 4 == 1:
+            operations.append(
+                {
+                    "entity": "material",
+                    "action": "update",
+                    "ref_id": _pick(fixture, fixture.event.material_ids),
+                    "payload": {"quantity": rng.randint(0, 200)},
+                }
+            )
+        else:
+            operations.append(
+                {
+                    "entity": "task",
+                    "action": "update",
+                    "ref_id": _pick(fixture, fixture.event.task_ids),
+                    "payload": {"status": rng.choice(list(TaskStatus)).value},
+                }
+            )
+    return Call("POST", "/batch", json={"operations": operations})
+
+
+def _tasks_of(fixture: Fixture) -> str:
+    return f"/schedules/{_pick(fixture, fixture.event.schedule_ids)}/tasks"
+
+
+def _event_moment(fixture: Fixture) -> str:
+    """生成したイベント期間中（各日 5〜20 時）のいずれかの時刻を返す。"""
+
+    day = fixture.rng.randrange(len(fixture.event.schedule_ids))
+    minutes = fixture.rng.randrange(5 * 60, 20 * 60)
+    moment = datetime.combine(FIRST_EVENT_DAY, datetime.min.time()) + timedelta(
+        days=day, minutes=minutes
+    )
+    return moment.isoformat()
+
+
+def _snapshot_call(fixture: Fixture) -> Call:
+    """最初に呼ばれた時点のスナップショットを取っておき、毎回それを復元する。
+
+    準備の段階では書き込まないため、計測中は同じ内容への復元を繰り返すことになる。
+    """
+
+    if fixture.store not in _SNAPSHOTS:
+        with tempfile.TemporaryDirectory() as tmp:
+            path = Path(tmp) / "snapshot.db"
+            fixture.store.write_snapshot(path)
+            body = gzip.compress(path.read_bytes(), compresslevel=GZIP_LEVEL)
+        _SNAPSHOTS[fixture.store] = body
+    return Call(
+        "POST",
+        "/snapshot",
+        content=_SNAPSHOTS[fixture.store],
+        headers={"Content-Type": "application/gzip"},
+    )
+
+
+_SNAPSHOTS: weakref.WeakKeyDictionary[SQLiteStore, bytes] = weakref.WeakKeyDictionary()
+
+
+# (メソッド, ルートのパス) ごとの計測シナリオ。アプリにルートを追加したらここにも追加する
+SCENARIOS: dict[tuple[str, str], Prepare] = {
+    ("GET", "/members"): lambda f: Call(
+        "GET", "/members", params={"part": f.rng.choice(["reception", "course"]), "limit": 200}
+    ),
+    ("POST", "/members"): lambda f: Call(
+        "POST", "/members", json=member_row(f.rng, f.rng.randrange(1_000_000))
+    ),
+    ("POST", "/members/import"): lambda f: _import_call(
+        "/members/import", [member_row(f.rng, index) for index in range(IMPORT_ROWS)]
+    ),
+    ("GET", "/members/{member_id}"): lambda f: Call(
+        "GET", f"/members/{_pick(f, f.event.member_ids)}"
+    ),
+    ("PUT", "/members/{member_id}"): lambda f: Call(
+        "PUT", f"/members/{_pick(f, f.event.member_ids)}", json={"position": "Leader"}
+    ),
+    ("DELETE", "/members/{member_id}"): lambda f: Call("DELETE", f"/members/{_new_member(f)}"),
+    ("GET", "/materials"): lambda f: Call(
+        "GET", "/materials", params={"after": _pick(f, f.event.material_ids), "limit": 200}
+    ),
+    ("POST", "/materials"): lambda f: Call(
+        "POST", "/materials", json=material_row(f.rng, f.rng.randrange(1_000_000))
+    ),
+    ("POST", "/materials/import"): lambda f: _import_call(
+        "/materials/import", [material_row(f.rng, index) for index in range(IMPORT_ROWS)]
+    ),
+    ("GET", "/materials/{material_id}"): lambda f: Call(
+        "GET", f"/materials/{_pick(f, f.event.material_ids)}"
+    ),
+    ("PUT", "/materials/{material_id}"): lambda f: Call(
+        "PUT",
+        f"/materials/{_pick(f, f.event.material_ids)}",
+        json={"quantity": f.rng.randint(0, 200)},
+    ),
+    ("DELETE", "/materials/{material_id}"): lambda f: Call(
+        "DELETE", f"/materials/{_new_material(f)}"
+    ),
+    ("GET", "/schedules"): lambda f: Call("GET", "/schedules"),
+    ("POST", "/schedules"): lambda f: Call(
+        "POST", "/schedules", json={"name": "追加日程", "event_date": "2024-07-01"}
+    ),
+    ("GET", "/schedules/{schedule_id}"): lambda f: Call(
+        "GET", f"/schedules/{_pick(f, f.event.schedule_ids)}"
+    ),
+    ("PUT", "/schedules/{schedule_id}"): lambda f: Call(
+        "PUT", f"/schedules/{_pick(f, f.event.schedule_ids)}", json={"name": "変更後"}
+    ),
+    ("DELETE", "/schedules/{schedule_id}"): lambda f: Call(
+        "DELETE", f"/schedules/{_new_schedule(f)}"
+    ),
+    ("GET", "/schedules/{schedule_id}/tasks"): lambda f: Call(
+        "GET", _tasks_of(f), params={"status": f.rng.choice(list(TaskStatus)).value}
+    ),
+    ("POST", "/schedules/{schedule_id}/tasks"): lambda f: Call(
+        "POST",
+        _tasks_of(f),
+        json=task_row(f.rng, datetime(2024, 4, 1).date(), f.rng.randrange(1_000_000)),
+    ),
+    ("GET", "/schedules/{schedule_id}/conflicts"): lambda f: Call(
+        "GET", f"/schedules/{_pick(f, f.event.schedule_ids)}/conflicts"
+    ),
+    ("POST", "/schedules/{schedule_id}/tasks/import"): lambda f: _import_call(
+        _tasks_of(f) + "/import",
+        [task_row(f.rng, datetime(2024, 4, 1).date(), index) for index in range(IMPORT_ROWS)],
+    ),
+    ("GET", "/tasks/active"): lambda f: Call(
+        "GET", "/tasks/active", params={"at": _event_moment(f), "limit": 200}
+    ),
+    ("GET", "/tasks/{task_id}"): lambda f: Call("GET", f"/tasks/{_pick(f, f.event.task_ids)}"),
+    ("PUT", "/tasks/{task_id}"): lambda f: Call(
+        "PUT", f"/tasks/{_pick(f, f.event.task_ids)}", json={"note": "計測"}
+    ),
+    ("PATCH", "/tasks/{task_id}/status"): lambda f: Call(
+        "PATCH",
+        f"/tasks/{_pick(f, f.event.task_ids)}/status",
+        json={"status": f.rng.choice(list(TaskStatus)).value},
+    ),
+    ("DELETE", "/tasks/{task_id}"): lambda f: Call("DELETE", f"/tasks/{_new_task(f)}"),
+    ("POST", "/batch"): _batch_call,
+    ("GET", "/metrics"): lambda f: Call("GET", "/metrics"),
+    ("GET", "/debug/trace"): lambda f: Call("GET", "/debug/trace"),
+    ("PUT", "/debug/trace"): lambda f: Call(
+        "PUT", "/debug/trace", json={"slow_query_ms": None, "lock_history": 0}
+    ),
+    ("GET", "/search"): lambda f: Call(
+        "GET", "/search", params={"q": f.rng.choice(SEARCH_QUERIES), "limit": 20}
+    ),
+    ("GET", "/dashboard/members"): lambda f: Call("GET", "/dashboard/members"),
+    ("GET", "/dashboard/materials"): lambda f: Call("GET", "/dashboard/materials"),
+    ("GET", "/dashboard/tasks"): lambda f: Call(
+        "GET", "/dashboard/tasks", params={"schedule_id": _pick(f, f.event.schedule_ids)}
+    ),
+    # 全件を集計し直すため重い。管理用の操作として計測する
+    ("GET", "/debug/aggregates"): lambda f: Call("GET", "/debug/aggregates"),
+    ("POST", "/debug/aggregates/rebuild"): lambda f: Call("POST", "/debug/aggregates/rebuild"),
+    ("GET", "/sync"): lambda f: Call(
+        "GET", "/sync", params={"since": max(1, f.store.current_version() - 200)}
+    ),
+    # 全データを書き出す・差し替えるため重い。管理用の操作として計測する
+    ("GET", "/snapshot"): lambda f: Call("GET", "/snapshot"),
+    ("POST", "/snapshot"): _snapshot_call,
+    ("GET", "/backups"): lambda f: Call("GET", "/backups"),
+    # 2 回目以降は既にあるデータベースを開くだけになる
+    ("PUT", "/events/{event_key}"): lambda f: Call("PUT", f"/events/bench-{f.rng.randrange(4)}"),
+    ("GET", "/debug/stores"): lambda f: Call("GET", "/debug/stores"),
+    ("POST", "/backups"): lambda f: Call("POST", "/backups"),
+    # サーバーより新しい since は resync を送ってすぐに閉じるため、購読の開始と終了を計測できる
+    ("GET", "/events"): lambda f: Call(
+        "GET", "/events", params={"since": f.store.current_version() + 1}
+    ),
+}
+
+
+def app_routes() -> list[tuple[str, str]]:
+    """アプリに登録されている (メソッド, パス) の一覧。"""
+
+    return sorted(
+        (method, route.path)
+        for route in app.routes
+        if isinstance(route, APIRoute)
+        for method in route.methods
+    )
+
+
+def missing_scenarios() -> list[tuple[str, str]]:
+    return [route for route in app_routes() if route not in SCENARIOS]
+
+
+def _percentile(samples: list[float], percent: int) -> float:
+    if len(samples) == 1:
+        return samples[0]
+    return statistics.quantiles(samples, n=100, method="inclusive")[percent - 1]
+
+
+async def _measure(
+    client: httpx.AsyncClient, calls: list[Call], concurrency: int
+) -> tuple[list[float], float, int]:
+    """``calls`` を ``concurrency`` 本の並行ワーカーで実行し、レイテンシと経過時間を返す。"""
+
+    queue = list(reversed(calls))
+    latencies: list[float] = []
+    errors = 0
+
+    async def worker() -> None:
+        nonlocal errors
+        while queue:
+            call = queue.pop()
+            started = time.perf_counter()
+            response = await client.request(
+                call.method,
+                call.url,
+                params=call.params,
+                json=call.json,
+                content=call.content,
+                headers=call.headers,
+            )
+            latencies.append(time.perf_counter() - started)
+            if response.status_code >= 400:
+                errors += 1
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    return latencies, time.perf_counter() - started, errors
+
+
+async def _run_routes(
+    fixture: Fixture,
+    routes: list[tuple[str, str]],
+    *,
+    iterations: int,
+    warmup: int,
+    concurrency: int,
+) -> dict[str, dict[str, float]]:
+    transport = httpx.ASGITransport(app=app)
+    results: dict[str, dict[str, float]] = {}
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        for method, path in routes:
+            prepare = SCENARIOS[(method, path)]
+            warmup_calls = [prepare(fixture) for _ in range(warmup)]
+            await _measure(client, warmup_calls, 1)
+            calls = [prepare(fixture) for _ in range(iterations)]
+            latencies, elapsed, errors = await _measure(client, calls, concurrency)
+            latencies_ms = sorted(latency * 1000 for latency in latencies)
+            results[f"{method} {path}"] = {
+                "iterations": len(latencies_ms),
+                "errors": errors,
+                "mean_ms": statistics.fmean(latencies_ms),
+                "p50_ms": _percentile(latencies_ms, 50),
+                "p95_ms": _percentile(latencies_ms, 95),
+                "p99_ms": _percentile(latencies_ms, 99),
+                "max_ms": latencies_ms[-1],
+                "throughput_rps": len(latencies_ms) / elapsed if elapsed else 0.0,
+            }
+    return results
+
+
+def run(
+    *,
+    size: EventSize = LARGE_EVENT,
+    seed: int = 0,
+    iterations: int = 200,
+    warmup: int = 10,
+    concurrency: int = 1,
+    cache: bool = True,
+    routes: list[tuple[str, str]] | None = None,
+) -> dict[str, Any]:
+    """データを生成して各ルートを計測し、JSON に書き出せる形の結果を返す。"""
+
+    missing = missing_scenarios()
+    if missing:
+        raise RuntimeError(f"計測シナリオが無いルートがあります: {missing}")
+    selected = app_routes() if routes is None else routes
+    with tempfile.TemporaryDirectory() as tmp:
+        store = SQLiteStore(
+            Path(tmp) / "bench.db",
+            concurrent_reads=True,
+            cache_size=APP_CACHE_SIZE if cache else 0,
+        )
+        # イベントのデータベースも一時ディレクトリに作る
+        registry = StoreRegistry(Path(tmp) / "events")
+        app.dependency_overrides[get_store] = lambda: store
+        app.dependency_overrides[get_registry] = lambda: registry
+        try:
+            seeding_started = time.perf_counter()
+            event = seed_event(store, size, seed=seed)
+            seeding_seconds = time.perf_counter() - seeding_started
+            fixture = Fixture(store, event, random.Random(seed))
+            results = asyncio.run(
+                _run_routes(
+                    fixture,
+                    selected,
+                    iterations=iterations,
+                    warmup=warmup,
+                    concurrency=concurrency,
+                )
+            )
+        finally:
+            app.dependency_overrides.pop(get_store, None)
+            app.dependency_overrides.pop(get_registry, None)
+            registry.close()
+            store.close()
+    return {
+        "meta": {
+            "created_at": datetime.now(UTC).isoformat(timespec="seconds"),
+            "python": platform.python_version(),
+            "sqlite": sqlite3.sqlite_version,
+            "platform": platform.platform(),
+            "size": size._asdict(),
+            "seed": seed,
+            "iterations": iterations,
+            "warmup": warmup,
+            "concurrency": concurrency,
+            "cache": cache,
+            "seeding_seconds": seeding_seconds,
+        },
+        "routes": results,
+    }
+
+
+def compare(
+    current: dict[str, Any],
+    baseline: dict[str, Any],
+    *,
+    metric: str = DEFAULT_METRIC,
+    threshold: float = DEFAULT_THRESHOLD,
+    min_delta_ms: float = DEFAULT_MIN_DELTA_MS,
+) -> list[str]:
+    """``baseline`` より ``threshold`` の割合を超えて悪化したルートの説明を返す。"""
+
+    regressions: list[str] = []
+    for route, result in current["routes"].items():
+        previous = baseline.get("routes", {}).get(route)
+        if previous is None:
+            continue
+        before, after = previous[metric], result[metric]
+        if after > before * (1 + threshold) and after - before >= min_delta_ms:
+            regressions.append(
+                f"{route}: {metric} {before:.2f} ms -> {after:.2f} ms (+{after / before - 1:.0%})"
+            )
+    return regressions
+
+
+def _print_table(results: dict[str, Any]) -> None:
+    print(
+        f"{'route':<46} {'p50':>8} {'p95':>8} {'p99':>8} {'rps':>9} {'err':>4}"
+        "   (ms / requests per second)"
+    )
+    for route, result in results["routes"].items():
+        print(
+            f"{route:<46} {result['p50_ms']:>8.2f} {result['p95_ms']:>8.2f}"
+            f" {result['p99_ms']:>8.2f} {result['throughput_rps']:>9.1f} {result['errors']:>4}"
+        )
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--scale", type=float, default=1.0, help="既定規模に掛ける倍率")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--iterations", type=int, default=200, help="ルートごとの計測回数")
+    parser.add_argument("--warmup", type=int, default=10)
+    parser.add_argument("--concurrency", type=int, default=1, help="同時に送るリクエスト数")
+    parser.add_argument("--no-cache", action="store_true", help="読み取りキャッシュを無効にする")
+    parser.add_argument(
+        "--route", action="append", default=None, help="計測するルート（例: 'GET /members'）"
+    )
+    parser.add_argument("--output", type=Path, help="結果の JSON を書き出すファイル")
+    parser.add_argument("--baseline", type=Path, help="比較対象の結果 JSON")
+    parser.add_argument("--metric", default=DEFAULT_METRIC)
+    parser.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD)
+    parser.add_argument("--min-delta-ms", type=float, default=DEFAULT_MIN_DELTA_MS)
+    args = parser.parse_args(argv)
+
+    routes = None
+    if args.route:
+        routes = [tuple(route.split(" ", 1)) for route in args.route]
+        unknown = [route for route in routes if route not in SCENARIOS]
+        if unknown:
+            parser.error(f"未知のルートです: {unknown}")
+    results = run(
+        size=LARGE_EVENT.scaled(args.scale),
+        seed=args.seed,
+        iterations=args.iterations,
+        warmup=args.warmup,
+        concurrency=args.concurrency,
+        cache=not args.no_cache,
+        routes=routes,
+    )
+    _print_table(results)
+    if args.output:
+        args.output.write_text(json.dumps(results, indent=2, ensure_ascii=False) + "\n")
+    if args.baseline:
+        regressions = compare(
+            results,
+            json.loads(args.baseline.read_text()),
+            metric=args.metric,
+            threshold=args.threshold,
+            min_delta_ms=args.min_delta_ms,
+        )
+        if regressions:
+            print("\n性能が悪化したルートがあります:")
+            for line in regressions:
+                print(f"  {line}")
+            return 1
+        print(f"\n{args.baseline} と比べて {args.threshold:.0%} を超える悪化はありません")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,119 @@
+"""計測用に大規模イベントのデータを生成する。
+
+同じ ``seed`` からは常に同じデータができるため、計測結果を実行間で比較できる。
+"""
+
+from __future__ import annotations
+
+import random
+from datetime import date, datetime, timedelta
+from typing import NamedTuple
+
+from backend.models import ScheduleCreate, TaskStatus
+from backend.store import SQLiteStore
+
+PARTS = ["Reception", "Course", "Finish", "Stage", "Logistics", "Medical", "Media", "Security"]
+POSITIONS = ["Leader", "Sub Leader", "Support"]
+STAGES = ["Preparation", "Reception", "Course", "Finish", "Cleanup"]
+LOCATIONS = ["本部テント", "スタート地点", "5km 給水所", "10km 給水所", "ゴール地点", None]
+MATERIAL_NAMES = ["Tent", "Traffic Cone", "Transceiver", "Table", "Chair", "Cable", "Barrier"]
+TASK_NAMES = ["設営", "受付", "誘導", "給水", "巡回", "記録", "撤収", "救護待機"]
+
+
+class EventSize(NamedTuple):
+    """生成するイベントの規模。"""
+
+    members: int = 5_000
+    materials: int = 2_000
+    schedules: int = 50
+    tasks: int = 100_000
+
+    def scaled(self, factor: float) -> EventSize:
+        """各件数に ``factor`` を掛けた規模を返す（最低 1 件）。"""
+
+        return EventSize(*(max(1, round(count * factor)) for count in self))
+
+
+# 既定の規模（大規模マラソン大会を想定）
+LARGE_EVENT = EventSize()
+# 1 つ目のスケジュールの開催日。以降のスケジュールは 1 日ずつずらす
+FIRST_EVENT_DAY = date(2024, 4, 1)
+
+
+class SeededEvent(NamedTuple):
+    """生成したデータの ID 範囲。"""
+
+    size: EventSize
+    member_ids: list[int]
+    material_ids: list[int]
+    schedule_ids: list[int]
+    task_ids: list[int]
+
+
+def member_row(rng: random.Random, index: int) -> dict[str, object]:
+    return {
+        "name": f"Member {index:05d}",
+        "part": rng.choice(PARTS),
+        "position": rng.choice(POSITIONS),
+        "contact": {
+            "phone": f"090-{rng.randint(0, 9999):04d}-{rng.randint(0, 9999):04d}",
+            "email": f"member{index}@example.com",
+        },
+    }
+
+
+def material_row(rng: random.Random, index: int) -> dict[str, object]:
+    return {
+        "name": f"{rng.choice(MATERIAL_NAMES)} {index:04d}",
+        "part": rng.choice(PARTS),
+        "quantity": rng.randint(0, 200),
+    }
+
+
+def task_row(rng: random.Random, event_date: date, index: int) -> dict[str, object]:
+    start = datetime.combine(event_date, datetime.min.time()) + timedelta(
+        minutes=rng.randrange(5 * 60, 20 * 60, 5)
+    )
+    return {
+        "name": f"{rng.choice(TASK_NAMES)} {index:06d}",
+        "stage": rng.choice(STAGES),
+        "start_time": start.isoformat(),
+        "end_time": (start + timedelta(minutes=rng.choice([15, 30, 60, 90]))).isoformat(),
+        "location": rng.choice(LOCATIONS),
+        "status": rng.choice(list(TaskStatus)).value,
+    }
+
+
+def _ids(store: SQLiteStore, table: str) -> list[int]:
+    with store._read() as conn:
+        return [row["id"] for row in conn.execute(f"SELECT id FROM {table} ORDER BY id")]
+
+
+def seed_event(store: SQLiteStore, size: EventSize = LARGE_EVENT, *, seed: int = 0) -> SeededEvent:
+    """``store`` に大規模イベントのデータを一括インポートで登録する。
+
+    タスクは各スケジュールにほぼ均等に割り振る。
+    """
+
+    rng = random.Random(seed)
+    store.import_members(member_row(rng, index) for index in range(size.members))
+    store.import_materials(material_row(rng, index) for index in range(size.materials))
+    for day in range(size.schedules):
+        event_date = FIRST_EVENT_DAY + timedelta(days=day)
+        schedule = store.create_schedule(
+            ScheduleCreate(name=f"Day {day + 1}", event_date=event_date)
+        )
+        # 端数は先頭のスケジュールから 1 件ずつ上乗せする
+        count = size.tasks // size.schedules + (1 if day < size.tasks % size.schedules else 0)
+        offset = day * (size.tasks // size.schedules) + min(day, size.tasks % size.schedules)
+        store.import_tasks(
+            schedule.id,
+            (task_row(rng, event_date, offset + index) for index in range(count)),
+        )
+    return SeededEvent(
+        size=size,
+        member_ids=_ids(store, "members"),
+        material_ids=_ids(store, "materials"),
+        schedule_ids=_ids(store, "schedules"),
+        task_ids=_ids(store, "tasks"),
+    )
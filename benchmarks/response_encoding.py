@@ -0,0 +1,210 @@
+"""一覧 API のレスポンスの表現（JSON／MessagePack の列指向 × 圧縮なし／gzip／zstd）の比較。
+
+大規模イベントのデータを生成し、各一覧を表現ごとに取得して、転送量・サーバーの応答時間・
+端末での復元（展開と解析）にかかる時間と、共有回線での推定転送時間を並べる。
+zstd は標準ライブラリの ``compression.zstd`` が使える Python でだけ計測する。
+
+使い方::
+
+    uv run python -m benchmarks.response_encoding --scale 0.5 --bandwidth-mbps 10
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import platform
+import statistics
+import sys
+import tempfile
+import time
+import zlib
+from collections.abc import Callable
+from datetime import UTC, datetime
+from pathlib import Path
+from typing import Any
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+import httpx
+
+from backend.encoding import AVAILABLE_CODINGS, MSGPACK_MEDIA_TYPE, from_columnar, unpackb
+from backend.main import APP_CACHE_SIZE, app, get_store
+from backend.store import SQLiteStore
+from benchmarks.datagen import LARGE_EVENT, EventSize, seed_event
+
+# 計測する一覧。{schedule_id} は 1 つ目のスケジュールに置き換える
+ROUTES = ("/members", "/materials", "/schedules", "/schedules/{schedule_id}/tasks")
+FORMATS = {"json": "application/json", "msgpack": MSGPACK_MEDIA_TYPE}
+# 会場で 1 台の LTE ルーターを共有したときの 1 端末あたりの実効帯域の目安
+DEFAULT_BANDWIDTH_MBPS = 10.0
+
+
+def representations() -> list[tuple[str, str | None]]:
+    """計測する (形式, 圧縮方式) の組。圧縮方式の ``None`` は圧縮なし。"""
+
+    return [(fmt, coding) for fmt in FORMATS for coding in (None, *AVAILABLE_CODINGS)]
+
+
+def _label(fmt: str, coding: str | None) -> str:
+    return fmt if coding is None else f"{fmt}+{coding}"
+
+
+def _decompress(body: bytes, coding: str | None) -> bytes:
+    if coding is None:
+        return body
+    if coding == "gzip":
+        return zlib.decompress(body, 16 + zlib.MAX_WBITS)
+    from compression import zstd
+
+    return zstd.decompress(body)
+
+
+_DECODERS: dict[str, Callable[[bytes], list[dict[str, Any]]]] = {
+    "json": json.loads,
+    "msgpack": lambda body: from_columnar(unpackb(body)),
+}
+
+
+async def _fetch(
+    client: httpx.AsyncClient, path: str, fmt: str, coding: str | None
+) -> tuple[bytes, str | None, float]:
+    """圧縮されたままの本文と実際の圧縮方式、最後のバイトを受け取るまでの秒数を返す。
+
+    小さな一覧は圧縮の下限に届かず、要求しても圧縮されないことがある。
+    """
+
+    headers = {"Accept": FORMATS[fmt], "Accept-Encoding": coding or "identity"}
+    started = time.perf_counter()
+    async with client.stream("GET", path, headers=headers) as response:
+        body = b"".join([chunk async for chunk in response.aiter_raw()])
+        elapsed = time.perf_counter() - started
+    response.raise_for_status()
+    return body, response.headers.get("content-encoding"), elapsed
+
+
+async def _measure(
+    paths: list[str], *, iterations: int, bandwidth_mbps: float
+) -> dict[str, dict[str, dict[str, float]]]:
+    transport = httpx.ASGITransport(app=app)
+    results: dict[str, dict[str, dict[str, float]]] = {}
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        for path in paths:
+            route: dict[str, dict[str, float]] = {}
+            rows: list[dict[str, Any]] | None = None
+            for fmt, coding in representations():
+                await _fetch(client, path, fmt, coding)
+                latencies: list[float] = []
+                decode_times: list[float] = []
+                for _ in range(iterations):
+                    body, applied, elapsed = await _fetch(client, path, fmt, coding)
+                    started = time.perf_counter()
+                    decoded = _DECODERS[fmt](_decompress(body, applied))
+                    decode_times.append(time.perf_counter() - started)
+                    latencies.append(elapsed)
+                # どの表現でも同じ行に戻ることを確かめる
+                if rows is None:
+                    rows = decoded
+                elif decoded != rows:
+                    raise RuntimeError(f"{path}: {_label(fmt, coding)} の内容が一致しません")
+                latencies.sort()
+                route[_label(fmt, coding)] = {
+                    "rows": len(decoded),
+                    "bytes": len(body),
+                    "compressed": applied is not None,
+                    "server_p50_ms": latencies[len(latencies) // 2] * 1000,
+                    "server_p95_ms": latencies[int(len(latencies) * 0.95)] * 1000,
+                    "decode_ms": statistics.median(decode_times) * 1000,
+                    "transfer_ms": len(body) * 8 / (bandwidth_mbps * 1e6) * 1000,
+                }
+            baseline = route["json"]["bytes"]
+            for result in route.values():
+                result["ratio"] = result["bytes"] / baseline if baseline else 1.0
+                result["total_ms"] = (
+                    result["server_p50_ms"] + result["transfer_ms"] + result["decode_ms"]
+                )
+            results[path] = route
+    return results
+
+
+def run(
+    *,
+    size: EventSize = LARGE_EVENT,
+    seed: int = 0,
+    iterations: int = 20,
+    bandwidth_mbps: float = DEFAULT_BANDWIDTH_MBPS,
+) -> dict[str, Any]:
+    """データを生成して各一覧を表現ごとに計測し、JSON に書き出せる形の結果を返す。"""
+
+    with tempfile.TemporaryDirectory() as tmp:
+        store = SQLiteStore(
+            Path(tmp) / "bench.db", concurrent_reads=True, cache_size=APP_CACHE_SIZE
+        )
+        app.dependency_overrides[get_store] = lambda: store
+        try:
+            event = seed_event(store, size, seed=seed)
+            paths = [path.format(schedule_id=event.schedule_ids[0]) for path in ROUTES]
+            results = asyncio.run(
+                _measure(paths, iterations=iterations, bandwidth_mbps=bandwidth_mbps)
+            )
+        finally:
+            app.dependency_overrides.pop(get_store, None)
+            store.close()
+    return {
+        "meta": {
+            "created_at": datetime.now(UTC).isoformat(timespec="seconds"),
+            "python": platform.python_version(),
+            "size": size._asdict(),
+            "seed": seed,
+            "iterations": iterations,
+            "bandwidth_mbps": bandwidth_mbps,
+        },
+        "routes": results,
+    }
+
+
+def _print_table(results: dict[str, Any]) -> None:
+    print(
+        f"{'route / representation':<34} {'bytes':>10} {'ratio':>6} {'server':>8}"
+        f" {'decode':>8} {'transfer':>9} {'total':>8}   (ms, p50)"
+    )
+    for path, route in results["routes"].items():
+        print(path)
+        for label, result in route.items():
+            print(
+                f"  {label:<32} {result['bytes']:>10,} {result['ratio']:>6.2f}"
+                f" {result['server_p50_ms']:>8.2f} {result['decode_ms']:>8.2f}"
+                f" {result['transfer_ms']:>9.1f} {result['total_ms']:>8.1f}"
+            )
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--scale", type=float, default=1.0, help="既定規模に掛ける倍率")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--iterations", type=int, default=20, help="表現ごとの計測回数")
+    parser.add_argument(
+        "--bandwidth-mbps",
+        type=float,
+        default=DEFAULT_BANDWIDTH_MBPS,
+        help="推定転送時間の計算に使う帯域",
+    )
+    parser.add_argument("--json", action="store_true", help="結果を JSON で出力する")
+    args = parser.parse_args(argv)
+
+    results = run(
+        size=LARGE_EVENT.scaled(args.scale),
+        seed=args.seed,
+        iterations=args.iterations,
+        bandwidth_mbps=args.bandwidth_mbps,
+    )
+    if args.json:
+        print(json.dumps(results, indent=2))
+    else:
+        _print_table(results)
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,151 @@
+"""SQLiteStore の単一ロック構成と WAL + 読み取りプール構成のスループット比較。
+
+使い方::
+
+    uv run python -m benchmarks.store_throughput --threads 16 --duration 3
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import random
+import sys
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from backend.models import ContactInfo, MaterialCreate, MaterialUpdate, MemberCreate
+from backend.store import SQLiteStore
+
+PARTS = ["Reception", "Course", "Finish", "Stage", "Logistics"]
+
+
+def _seed(store: SQLiteStore, members: int, materials: int) -> None:
+    for index in range(members):
+        store.create_member(
+            MemberCreate(
+                name=f"Member {index}",
+                part=PARTS[index % len(PARTS)],
+                position="Support",
+                contact=ContactInfo(email=f"member{index}@example.com"),
+            )
+        )
+    for index in range(materials):
+        store.create_material(
+            MaterialCreate(name=f"Material {index}", part=PARTS[index % len(PARTS)], quantity=1)
+        )
+
+
+def _worker(
+    store: SQLiteStore,
+    *,
+    seed: int,
+    write_ratio: float,
+    members: int,
+    materials: int,
+    deadline: float,
+    counts: list[int],
+) -> None:
+    rng = random.Random(seed)
+    done = 0
+    while time.perf_counter() < deadline:
+        roll = rng.random()
+        if roll < write_ratio:
+            store.update_material(
+                rng.randint(1, materials), MaterialUpdate(quantity=rng.randint(0, 50))
+            )
+        elif roll < write_ratio + (1 - write_ratio) / 3:
+            store.list_members(part=rng.choice(PARTS))
+        elif roll < write_ratio + 2 * (1 - write_ratio) / 3:
+            store.list_materials()
+        else:
+            store.get_member(rng.randint(1, members))
+        done += 1
+    counts.append(done)
+
+
+def run(
+    *,
+    concurrent_reads: bool,
+    threads: int,
+    duration: float,
+    write_ratio: float,
+    members: int,
+    materials: int,
+) -> dict[str, float]:
+    """指定構成でワークロードを実行し、1 秒あたりの処理件数を返す。"""
+
+    with tempfile.TemporaryDirectory() as tmp:
+        store = SQLiteStore(
+            Path(tmp) / "bench.db",
+            concurrent_reads=concurrent_reads,
+            reader_pool_size=threads,
+        )
+        try:
+            _seed(store, members, materials)
+            counts: list[int] = []
+            deadline = time.perf_counter() + duration
+            workers = [
+                threading.Thread(
+                    target=_worker,
+                    kwargs={
+                        "store": store,
+                        "seed": index,
+                        "write_ratio": write_ratio,
+                        "members": members,
+                        "materials": materials,
+                        "deadline": deadline,
+                        "counts": counts,
+                    },
+                )
+                for index in range(threads)
+            ]
+            started = time.perf_counter()
+            for worker in workers:
+                worker.start()
+            for worker in workers:
+                worker.join()
+            elapsed = time.perf_counter() - started
+        finally:
+            store.close()
+    total = sum(counts)
+    return {"operations": total, "seconds": elapsed, "ops_per_sec": total / elapsed}
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--threads", type=int, default=16)
+    parser.add_argument("--duration", type=float, default=3.0)
+    parser.add_argument("--write-ratio", type=float, default=0.1)
+    parser.add_argument("--members", type=int, default=500)
+    parser.add_argument("--materials", type=int, default=200)
+    parser.add_argument("--json", action="store_true", help="結果を JSON で出力する")
+    args = parser.parse_args(argv)
+
+    results = {
+        label: run(
+            concurrent_reads=concurrent,
+            threads=args.threads,
+            duration=args.duration,
+            write_ratio=args.write_ratio,
+            members=args.members,
+            materials=args.materials,
+        )
+        for label, concurrent in (("single_lock", False), ("concurrent_reads", True))
+    }
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return 0
+    baseline = results["single_lock"]["ops_per_sec"]
+    for label, result in results.items():
+        ratio = result["ops_per_sec"] / baseline if baseline else 0.0
+        print(f"{label:>16}: {result['ops_per_sec']:>10.1f} ops/s  (x{ratio:.2f})")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
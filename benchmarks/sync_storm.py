@@ -0,0 +1,655 @@
+"""オフラインだった端末が一斉に再接続したときの同期ストームを再現する負荷生成ツール。
+
+各仮想端末はオフライン中に溜めた作成・更新・削除の操作キューを持ち、再接続すると PWA の
+``syncPendingOperations``／``syncNow`` と同じ順で ``POST /batch`` → ``GET /sync`` を送る
+（``--refetch-lists`` で一覧の再取得も加える）。区間ごとのレイテンシ・エラー率と、プロセス内で
+動かす場合はストアのロック待ち・実行待ちの時間を集計し、最後にデータベースの状態が各端末の
+操作内容と一致するかを検査する。
+
+使い方::
+
+    uv run python -m benchmarks.sync_storm --clients 40 --queue-size 25
+    uv run python -m benchmarks.sync_storm --url http://127.0.0.1:8000
+
+``--url`` を指定した場合はサーバー上の既存データを更新・削除するため、本番データには使わないこと。
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import random
+import statistics
+import sys
+import tempfile
+import time
+import uuid
+from dataclasses import dataclass, field
+from datetime import UTC, datetime
+from pathlib import Path
+from typing import Any, NamedTuple
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+import httpx
+
+from backend.main import APP_CACHE_SIZE, app, get_store
+from backend.models import TraceSettings
+from backend.store import SQLiteStore
+from benchmarks.datagen import LARGE_EVENT, POSITIONS, material_row, member_row, seed_event
+
+# 操作の種類ごとの既定の割合（作成・更新・削除）
+DEFAULT_WEIGHTS = (0.3, 0.5, 0.2)
+ENTITIES = ("member", "material")
+# ``--url`` 指定時にサーバーの応答を待つ上限（秒）
+HTTP_TIMEOUT = 60.0
+
+# 期待する最終状態のキー。("existing", id) は既存の行、("temp", 仮 ID) は端末が作成した行
+RowKey = tuple[str, int]
+
+
+@dataclass
+class VirtualClient:
+    """オフライン中に操作を溜めた 1 台の端末。"""
+
+    index: int
+    reconnect_delay: float
+    operations: list[dict[str, Any]] = field(default_factory=list)
+    # エンティティごとの期待する最終状態。``None`` は削除済み
+    expected: dict[str, dict[RowKey, dict[str, Any] | None]] = field(
+        default_factory=lambda: {entity: {} for entity in ENTITIES}
+    )
+    # ``POST /batch`` が返したエンティティごとの仮 ID からサーバー採番 ID への対応
+    id_map: dict[str, dict[int, int]] = field(default_factory=dict)
+    synced_after: float | None = None
+
+
+class RequestRecord(NamedTuple):
+    """1 リクエストの結果。時刻はストーム開始からの経過秒。"""
+
+    client: int
+    kind: str
+    started: float
+    finished: float
+    status: int
+    failed_operations: int
+
+
+def build_fleet(
+    rng: random.Random,
+    *,
+    clients: int,
+    queue_size: int,
+    member_ids: list[int],
+    material_ids: list[int],
+    tag: str,
+    weights: tuple[float, float, float] = DEFAULT_WEIGHTS,
+    stagger: float = 0.5,
+) -> list[VirtualClient]:
+    """各端末の操作キューを作る。
+
+    端末どうしの操作の順序で結果が変わらないよう、既存の行は端末ごとに重ならないよう割り当てる。
+    """
+
+    owned = {
+        "member": [member_ids[k::clients] for k in range(clients)],
+        "material": [material_ids[k::clients] for k in range(clients)],
+    }
+    fleet: list[VirtualClient] = []
+    for k in range(clients):
+        client = VirtualClient(index=k, reconnect_delay=rng.uniform(0, stagger))
+        alive: dict[str, list[RowKey]] = {
+            entity: [("existing", row_id) for row_id in owned[entity][k]] for entity in ENTITIES
+        }
+        for n in range(queue_size):
+            entity = rng.choice(ENTITIES)
+            action = rng.choices(("create", "update", "delete"), weights)[0]
+            if action != "create" and not alive[entity]:
+                action = "create"
+            if action == "create":
+                temp_id = -(n + 1)
+                row = member_row if entity == "member" else material_row
+                payload = row(rng, n) | {"name": f"storm {tag} c{k} n{n}"}
+                client.operations.append(
+                    {"entity": entity, "action": "create", "ref_id": temp_id, "payload": payload}
+                )
+                client.expected[entity][("temp", temp_id)] = payload
+                alive[entity].append(("temp", temp_id))
+                continue
+            key = rng.choice(alive[entity])
+            ref_id = key[1]
+            if action == "update":
+                payload = (
+                    {"position": rng.choice(POSITIONS)}
+                    if entity == "member"
+                    else {"quantity": rng.randint(0, 200)}
+                )
+                client.operations.append(
+                    {"entity": entity, "action": "update", "ref_id": ref_id, "payload": payload}
+                )
+                client.expected[entity][key] = (client.expected[entity].get(key) or {}) | payload
+            else:
+                client.operations.append({"entity": entity, "action": "delete", "ref_id": ref_id})
+                client.expected[entity][key] = None
+                alive[entity].remove(key)
+        fleet.append(client)
+    return fleet
+
+
+async def _replay(
+    http: httpx.AsyncClient,
+    client: VirtualClient,
+    *,
+    since: int,
+    origin: float,
+    refetch_lists: bool,
+    records: list[RequestRecord],
+) -> None:
+    """再接続した端末の同期処理（保留操作の送信 → 差分取得）を行う。"""
+
+    await asyncio.sleep(client.reconnect_delay)
+    connected = time.perf_counter()
+
+    async def send(kind: str, method: str, url: str, **kwargs: Any) -> httpx.Response | None:
+        started = time.perf_counter()
+        try:
+            response = await http.request(method, url, **kwargs)
+        except httpx.HTTPError:
+            response = None
+        failed = 0
+        if response is not None and kind == "batch" and response.status_code == 200:
+            failed = sum(result["status"] != "ok" for result in response.json()["results"])
+        records.append(
+            RequestRecord(
+                client=client.index,
+                kind=kind,
+                started=started - origin,
+                finished=time.perf_counter() - origin,
+                status=0 if response is None else response.status_code,
+                failed_operations=failed,
+            )
+        )
+        return response
+
+    if client.operations:
+        response = await send("batch", "POST", "/batch", json={"operations": client.operations})
+        if response is None or response.status_code != 200:
+            return
+        client.id_map = {
+            entity: {int(temp): real for temp, real in mapping.items()}
+            for entity, mapping in response.json()["id_map"].items()
+        }
+    response = await send("sync", "GET", "/sync", params={"since": since})
+    if refetch_lists:
+        await send("list", "GET", "/members")
+        await send("list", "GET", "/materials")
+    if response is not None and response.status_code == 200:
+        client.synced_after = time.perf_counter() - connected
+
+
+async def storm(
+    http: httpx.AsyncClient,
+    fleet: list[VirtualClient],
+    *,
+    since: int,
+    refetch_lists: bool = False,
+    interval: float = 0.1,
+    store: SQLiteStore | None = None,
+) -> tuple[list[RequestRecord], list[dict[str, Any]], float]:
+    """全端末を同時に再接続させ、リクエスト結果・ストアの待ち時間の推移・所要時間を返す。
+
+    ``store`` を渡すと ``interval`` 秒ごとにロック待ちと実行待ちの累積値を記録する。
+    """
+
+    records: list[RequestRecord] = []
+    samples: list[dict[str, Any]] = []
+    origin = time.perf_counter()
+
+    def sample() -> None:
+        assert store is not None
+        queue = store.aio.queue_wait_stats()
+        samples.append(
+            {
+                "at": time.perf_counter() - origin,
+                "lock": store.lock_wait_stats(),
+                "read_queue": queue["read"],
+                "write_queue": queue["write"],
+            }
+        )
+
+    async def sampler() -> None:
+        while True:
+            sample()
+            await asyncio.sleep(interval)
+
+    sampling = asyncio.create_task(sampler()) if store is not None else None
+    try:
+        await asyncio.gather(
+            *(
+                _replay(
+                    http,
+                    client,
+                    since=since,
+                    origin=origin,
+                    refetch_lists=refetch_lists,
+                    records=records,
+                )
+                for client in fleet
+            )
+        )
+    finally:
+        if sampling is not None:
+            sampling.cancel()
+            sample()
+    return records, samples, time.perf_counter() - origin
+
+
+def _percentile(values: list[float], percent: int) -> float:
+    if len(values) < 2:
+        return values[0] if values else 0.0
+    return statistics.quantiles(values, n=100, method="inclusive")[percent - 1]
+
+
+def _wait_delta(before: Any, after: Any) -> dict[str, float]:
+    count = after.count - before.count
+    total = after.total_seconds - before.total_seconds
+    return {"count": count, "mean_ms": total / count * 1000 if count else 0.0}
+
+
+def timeline(
+    records: list[RequestRecord], samples: list[dict[str, Any]], *, interval: float
+) -> list[dict[str, Any]]:
+    """完了時刻で区切った区間ごとのリクエスト数・エラー率・レイテンシ・待ち時間を返す。"""
+
+    if not records:
+        return []
+    buckets = int(max(record.finished for record in records) // interval) + 1
+    rows: list[dict[str, Any]] = []
+    for bucket in range(buckets):
+        start, end = bucket * interval, (bucket + 1) * interval
+        done = [record for record in records if start <= record.finished < end]
+        latencies = [(record.finished - record.started) * 1000 for record in done]
+        errors = sum(record.status != 200 or record.failed_operations > 0 for record in done)
+        row: dict[str, Any] = {
+            "start_s": round(start, 3),
+            "requests": len(done),
+            "error_rate": errors / len(done) if done else 0.0,
+            "p50_ms": _percentile(latencies, 50),
+            "p95_ms": _percentile(latencies, 95),
+            "in_flight": sum(record.started < end and record.finished >= end for record in records),
+        }
+        # 区間をまたぐ直前・直後の標本の差分を取る（標本が間引かれた区間は前後に広げる）
+        before = [sample for sample in samples if sample["at"] <= start]
+        after = [sample for sample in samples if sample["at"] >= end]
+        first = before[-1] if before else (samples[0] if samples else None)
+        last = after[0] if after else (samples[-1] if samples else None)
+        if first is not None and last is not None and first is not last:
+            for name in ("lock", "read_queue", "write_queue"):
+                row[f"{name}_wait"] = _wait_delta(first[name], last[name])
+        rows.append(row)
+    return rows
+
+
+def summarize(
+    records: list[RequestRecord], fleet: list[VirtualClient], elapsed: float
+) -> dict[str, Any]:
+    summary: dict[str, Any] = {
+        "elapsed_s": elapsed,
+        "requests": len(records),
+        "throughput_rps": len(records) / elapsed if elapsed else 0.0,
+        "http_errors": sum(record.status != 200 for record in records),
+        "failed_operations": sum(record.failed_operations for record in records),
+        "operations": sum(len(client.operations) for client in fleet),
+        "unsynced_clients": sum(client.synced_after is None for client in fleet),
+    }
+    for kind in ("batch", "sync", "list"):
+        latencies = [
+            (record.finished - record.started) * 1000 for record in records if record.kind == kind
+        ]
+        if latencies:
+            summary[f"{kind}_p50_ms"] = _percentile(latencies, 50)
+            summary[f"{kind}_p95_ms"] = _percentile(latencies, 95)
+            summary[f"{kind}_p99_ms"] = _percentile(latencies, 99)
+    synced = [client.synced_after * 1000 for client in fleet if client.synced_after is not None]
+    if synced:
+        summary["time_to_synced_p50_ms"] = _percentile(synced, 50)
+        summary["time_to_synced_max_ms"] = max(synced)
+    return summary
+
+
+def _matches(actual: Any, expected: Any) -> bool:
+    """``expected`` に含まれる項目だけを比べる（入れ子の ``contact`` の省略項目は無視する）。"""
+
+    if isinstance(expected, dict):
+        return isinstance(actual, dict) and all(
+            _matches(actual.get(key), value) for key, value in expected.items()
+        )
+    return actual == expected
+
+
+async def check_consistency(
+    http: httpx.AsyncClient, fleet: list[VirtualClient], *, tag: str
+) -> list[str]:
+    """API から見た最終状態が、各端末の操作を適用した結果と一致するかを検査する。
+
+    問題の説明の一覧を返す（空なら一致）。
+    """
+
+    problems: list[str] = []
+    current: dict[str, dict[int, dict[str, Any]]] = {}
+    for entity, path in (("member", "/members"), ("material", "/materials")):
+        response = await http.get(path)
+        response.raise_for_status()
+        current[entity] = {row["id"]: row for row in response.json()}
+
+    for client in fleet:
+        for entity, rows in client.expected.items():
+            for (origin, ref_id), expected in rows.items():
+                row_id = client.id_map.get(entity, {}).get(ref_id) if origin == "temp" else ref_id
+                label = f"client {client.index} {entity} {origin} {ref_id}"
+                if row_id is None:
+                    problems.append(f"{label}: 作成した行の ID が返されていません")
+                    continue
+                actual = current[entity].get(row_id)
+                if expected is None:
+                    if actual is not None:
+                        problems.append(f"{label}: 削除したはずの行 {row_id} が残っています")
+                elif actual is None:
+                    problems.append(f"{label}: 行 {row_id} がありません")
+                else:
+                    mismatched = sorted(
+                        key for key, value in expected.items() if not _matches(actual[key], value)
+                    )
+                    if mismatched:
+                        problems.append(f"{label}: 行 {row_id} の {mismatched} が一致しません")
+
+    # 同じ操作が二重に適用されていれば、作成した行が期待より多くなる
+    prefix = f"storm {tag} "
+    for entity in ENTITIES:
+        created = sum(row["name"].startswith(prefix) for row in current[entity].values())
+        expected_created = sum(
+            origin == "temp" and value is not None
+            for client in fleet
+            for (origin, _), value in client.expected[entity].items()
+        )
+        if created != expected_created:
+            problems.append(
+                f"{entity}: 作成された行が {created} 件です（期待値 {expected_created}）"
+            )
+
+    # 全件同期の結果も一覧と一致しなければならない
+    response = await http.get("/sync", params={"since": 0})
+    response.raise_for_status()
+    changes = response.json()
+    for entity, key in (("member", "members"), ("material", "materials")):
+        synced_ids = {row["id"] for row in changes[key]}
+        if synced_ids != set(current[entity]):
+            problems.append(f"{entity}: /sync の全件と一覧の ID が一致しません")
+    return problems
+
+
+def _integrity_problems(store: SQLiteStore) -> list[str]:
+    with store._read() as conn:
+        integrity = conn.execute("PRAGMA integrity_check").fetchone()[0]
+        foreign_keys = conn.execute("PRAGMA foreign_key_check").fetchall()
+    problems = [] if integrity == "ok" else [f"integrity_check: {integrity}"]
+    if foreign_keys:
+        problems.append(f"foreign_key_check: {len(foreign_keys)} 件の違反")
+    return problems
+
+
+async def _run_against(
+    http: httpx.AsyncClient,
+    rng: random.Random,
+    *,
+    member_ids: list[int],
+    material_ids: list[int],
+    since: int,
+    clients: int,
+    queue_size: int,
+    weights: tuple[float, float, float],
+    stagger: float,
+    interval: float,
+    refetch_lists: bool,
+    trace: TraceSettings | None,
+    store: SQLiteStore | None,
+) -> dict[str, Any]:
+    tag = uuid.uuid4().hex[:8]
+    fleet = build_fleet(
+        rng,
+        clients=clients,
+        queue_size=queue_size,
+        member_ids=member_ids,
+        material_ids=material_ids,
+        tag=tag,
+        weights=weights,
+        stagger=stagger,
+    )
+    if trace is not None:
+        (await http.put("/debug/trace", json=trace.model_dump())).raise_for_status()
+    records, samples, elapsed = await storm(
+        http, fleet, since=since, refetch_lists=refetch_lists, interval=interval, store=store
+    )
+    traced = None
+    if trace is not None:
+        response = await http.get("/debug/trace")
+        response.raise_for_status()
+        traced = response.json()
+        await http.put("/debug/trace", json=TraceSettings().model_dump())
+    problems = await check_consistency(http, fleet, tag=tag)
+    if store is not None:
+        problems += _integrity_problems(store)
+    result: dict[str, Any] = {
+        "summary": summarize(records, fleet, elapsed),
+        "timeline": timeline(records, samples, interval=interval),
+        "consistency_problems": problems,
+    }
+    if store is not None:
+        result["summary"]["lock_wait"] = store.lock_wait_stats().model_dump()
+        result["summary"]["queue_wait"] = {
+            name: stats.model_dump() for name, stats in store.aio.queue_wait_stats().items()
+        }
+    if traced is not None:
+        result["trace"] = traced
+    return result
+
+
+def run(
+    *,
+    clients: int = 40,
+    queue_size: int = 25,
+    weights: tuple[float, float, float] = DEFAULT_WEIGHTS,
+    stagger: float = 0.5,
+    interval: float = 0.1,
+    refetch_lists: bool = False,
+    scale: float = 0.2,
+    seed: int = 0,
+    concurrent_reads: bool = True,
+    cache: bool = True,
+    url: str | None = None,
+    trace: TraceSettings | None = None,
+) -> dict[str, Any]:
+    """同期ストームを 1 回実行し、集計結果と整合性検査の結果を返す。
+
+    ``url`` を省略するとプロセス内のアプリに一時データベースを用意して実行する。
+    ``trace`` を指定するとストーム中だけ ``/debug/trace`` でトレースを有効にし、記録を結果に含める。
+    """
+
+    rng = random.Random(seed)
+    options = {
+        "clients": clients,
+        "queue_size": queue_size,
+        "weights": weights,
+        "stagger": stagger,
+        "interval": interval,
+        "refetch_lists": refetch_lists,
+        "trace": trace,
+    }
+    meta: dict[str, Any] = {
+        "created_at": datetime.now(UTC).isoformat(timespec="seconds"),
+        "target": url or "in-process",
+        "seed": seed,
+        **options,
+        "trace": None if trace is None else trace.model_dump(),
+    }
+    if url is not None:
+
+        async def against_server() -> dict[str, Any]:
+            async with httpx.AsyncClient(base_url=url, timeout=HTTP_TIMEOUT) as http:
+                response = await http.get("/sync", params={"since": 0})
+                response.raise_for_status()
+                snapshot = response.json()
+                return await _run_against(
+                    http,
+                    rng,
+                    member_ids=[row["id"] for row in snapshot["members"]],
+                    material_ids=[row["id"] for row in snapshot["materials"]],
+                    since=snapshot["version"],
+                    store=None,
+                    **options,
+                )
+
+        return {"meta": meta, **asyncio.run(against_server())}
+
+    size = LARGE_EVENT.scaled(scale)
+    meta |= {"size": size._asdict(), "concurrent_reads": concurrent_reads, "cache": cache}
+    with tempfile.TemporaryDirectory() as tmp:
+        store = SQLiteStore(
+            Path(tmp) / "storm.db",
+            concurrent_reads=concurrent_reads,
+            cache_size=APP_CACHE_SIZE if cache else 0,
+        )
+        app.dependency_overrides[get_store] = lambda: store
+        try:
+            event = seed_event(store, size, seed=seed)
+
+            async def in_process() -> dict[str, Any]:
+                transport = httpx.ASGITransport(app=app)
+                async with httpx.AsyncClient(transport=transport, base_url="http://storm") as http:
+                    return await _run_against(
+                        http,
+                        rng,
+                        member_ids=event.member_ids,
+                        material_ids=event.material_ids,
+                        since=store.current_version(),
+                        store=store,
+                        **options,
+                    )
+
+            return {"meta": meta, **asyncio.run(in_process())}
+        finally:
+            app.dependency_overrides.pop(get_store, None)
+            store.close()
+
+
+def _print_report(result: dict[str, Any]) -> None:
+    summary = result["summary"]
+    print(
+        f"{summary['requests']} requests in {summary['elapsed_s']:.2f} s"
+        f" ({summary['throughput_rps']:.1f} req/s), operations {summary['operations']},"
+        f" HTTP errors {summary['http_errors']}, failed operations {summary['failed_operations']}"
+    )
+    for kind in ("batch", "sync", "list"):
+        if f"{kind}_p50_ms" in summary:
+            print(
+                f"  {kind:<5} p50 {summary[f'{kind}_p50_ms']:>8.1f} ms"
+                f"  p95 {summary[f'{kind}_p95_ms']:>8.1f} ms"
+                f"  p99 {summary[f'{kind}_p99_ms']:>8.1f} ms"
+            )
+    if "time_to_synced_p50_ms" in summary:
+        print(
+            f"  time to synced: p50 {summary['time_to_synced_p50_ms']:.1f} ms,"
+            f" max {summary['time_to_synced_max_ms']:.1f} ms"
+        )
+    print(
+        f"\n{'t (s)':>6} {'req':>5} {'err%':>6} {'p50':>8} {'p95':>8} {'flight':>6}"
+        f" {'lock':>8} {'rqueue':>8} {'wqueue':>8}   (ms, wait = mean per interval)"
+    )
+    for row in result["timeline"]:
+        waits = "".join(
+            f" {row[name]['mean_ms']:>8.2f}" if name in row else f" {'-':>8}"
+            for name in ("lock_wait", "read_queue_wait", "write_queue_wait")
+        )
+        print(
+            f"{row['start_s']:>6.1f} {row['requests']:>5} {row['error_rate']:>6.1%}"
+            f" {row['p50_ms']:>8.1f} {row['p95_ms']:>8.1f} {row['in_flight']:>6}{waits}"
+        )
+    trace = result.get("trace")
+    if trace is not None:
+        slowest = sorted(trace["lock_events"], key=lambda event: -event["hold_ms"])[:5]
+        print(
+            f"\ntrace: {len(trace['slow_queries'])} slow queries,"
+            f" {len(trace['lock_events'])} lock events (longest holds below)"
+        )
+        for event in slowest:
+            print(
+                f"  {event['method']:<24} hold {event['hold_ms']:>8.2f} ms"
+                f"  wait {event['wait_ms']:>8.2f} ms  {event['thread']}"
+            )
+    problems = result["consistency_problems"]
+    print(f"\nconsistency: {'OK' if not problems else f'{len(problems)} problems'}")
+    for problem in problems[:20]:
+        print(f"  {problem}")
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--clients", type=int, default=40, help="同時に再接続する端末数")
+    parser.add_argument("--queue-size", type=int, default=25, help="端末ごとの保留操作数")
+    parser.add_argument(
+        "--mix",
+        default=",".join(str(weight) for weight in DEFAULT_WEIGHTS),
+        help="作成,更新,削除 の割合（例: 0.3,0.5,0.2）",
+    )
+    parser.add_argument("--stagger-ms", type=float, default=500, help="再接続時刻のばらつき")
+    parser.add_argument("--interval-ms", type=float, default=100, help="推移を集計する区間")
+    parser.add_argument(
+        "--refetch-lists", action="store_true", help="同期後にメンバー・資材の一覧も取り直す"
+    )
+    parser.add_argument("--scale", type=float, default=0.2, help="プロセス内実行時のデータ規模")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--single-lock", action="store_true", help="単一ロック構成で実行する")
+    parser.add_argument("--no-cache", action="store_true", help="読み取りキャッシュを無効にする")
+    parser.add_argument("--url", help="起動済みサーバーの URL（省略時はプロセス内で実行）")
+    parser.add_argument("--output", type=Path, help="結果の JSON を書き出すファイル")
+    parser.add_argument(
+        "--slow-query-ms", type=float, help="この時間を超えた SQL をトレースに記録する"
+    )
+    parser.add_argument(
+        "--lock-history", type=int, default=0, help="トレースに残すロックの取得履歴の件数"
+    )
+    args = parser.parse_args(argv)
+
+    try:
+        create, update, delete = (float(part) for part in args.mix.split(","))
+    except ValueError:
+        parser.error("--mix には 3 つの数値をカンマ区切りで指定してください")
+    result = run(
+        clients=args.clients,
+        queue_size=args.queue_size,
+        weights=(create, update, delete),
+        stagger=args.stagger_ms / 1000,
+        interval=args.interval_ms / 1000,
+        refetch_lists=args.refetch_lists,
+        scale=args.scale,
+        seed=args.seed,
+        concurrent_reads=not args.single_lock,
+        cache=not args.no_cache,
+        url=args.url,
+        trace=(
+            TraceSettings(slow_query_ms=args.slow_query_ms, lock_history=args.lock_history)
+            if args.slow_query_ms or args.lock_history
+            else None
+        ),
+    )
+    _print_report(result)
+    if args.output:
+        args.output.write_text(json.dumps(result, indent=2, ensure_ascii=False) + "\n")
+    summary = result["summary"]
+    failed = summary["http_errors"] or summary["failed_operations"]
+    return 1 if failed or result["consistency_problems"] else 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
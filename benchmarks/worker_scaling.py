@@ -0,0 +1,206 @@
+"""同じデータベースを開く複数のワーカープロセス（``uvicorn --workers``）のスループットと整合性。
+
+ワーカーごとにアプリと同じ構成の ``SQLiteStore``（WAL + 読み取りプール + 読み取りキャッシュ）を
+別のプロセスで開き、読み取り中心の操作を一定時間実行する。全ワーカーの書き込みが終わった後、
+各ワーカーのキャッシュ越しの一覧と ETag がデータベースの内容と一致するか（他のワーカーの
+書き込みに追従しているか）を確かめる。
+
+使い方::
+
+    uv run python -m benchmarks.worker_scaling --workers 1 2 4 --duration 3
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import multiprocessing
+import random
+import sqlite3
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Any
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from backend.models import ContactInfo, MaterialCreate, MaterialUpdate, MemberCreate
+from backend.store import SQLiteStore
+
+PARTS = ["Reception", "Course", "Finish", "Stage", "Logistics"]
+# ``backend.main`` のストアと同じ読み取りキャッシュの件数
+CACHE_SIZE = 1024
+
+
+def _open(path: Path) -> SQLiteStore:
+    return SQLiteStore(path, concurrent_reads=True, cache_size=CACHE_SIZE)
+
+
+def _seed(path: Path, members: int, materials: int) -> None:
+    store = _open(path)
+    try:
+        for index in range(members):
+            store.create_member(
+                MemberCreate(
+                    name=f"Member {index}",
+                    part=PARTS[index % len(PARTS)],
+                    position="Support",
+                    contact=ContactInfo(email=f"member{index}@example.com"),
+                )
+            )
+        for index in range(materials):
+            store.create_material(
+                MaterialCreate(name=f"Material {index}", part=PARTS[index % len(PARTS)], quantity=1)
+            )
+    finally:
+        store.close()
+
+
+def _worker(
+    path: Path,
+    index: int,
+    *,
+    duration: float,
+    write_ratio: float,
+    members: int,
+    materials: int,
+    started: Any,
+    finished: Any,
+    results: Any,
+) -> None:
+    """1 つのワーカープロセス。結果は ``results`` のキューに入れる。"""
+
+    store = _open(path)
+    try:
+        rng = random.Random(index)
+        operations = errors = 0
+        started.wait()
+        begin = time.perf_counter()
+        deadline = begin + duration
+        while time.perf_counter() < deadline:
+            roll = rng.random()
+            try:
+                if roll < write_ratio:
+                    store.update_material(
+                        rng.randint(1, materials), MaterialUpdate(quantity=rng.randint(0, 50))
+                    )
+                elif roll < write_ratio + (1 - write_ratio) / 3:
+                    store.list_members(part=rng.choice(PARTS))
+                elif roll < write_ratio + 2 * (1 - write_ratio) / 3:
+                    store.list_materials()
+                else:
+                    store.get_member(rng.randint(1, members))
+            except sqlite3.OperationalError:
+                # 他のワーカーの書き込みを待ちきれなかった（"database is locked"）
+                errors += 1
+            operations += 1
+        elapsed = time.perf_counter() - begin
+        # 全ワーカーの書き込みが終わってから、キャッシュ越しの内容を確かめる
+        finished.wait()
+        cached = [(material.id, material.quantity) for material in store.list_materials()]
+        with sqlite3.connect(path) as conn:
+            stored = conn.execute("SELECT id, quantity FROM materials ORDER BY id").fetchall()
+        results.put(
+            {
+                "operations": operations,
+                "errors": errors,
+                "seconds": elapsed,
+                "stale": cached != stored,
+                "etag": store.version_token("materials"),
+            }
+        )
+    finally:
+        store.close()
+
+
+def run(
+    *,
+    workers: int,
+    duration: float,
+    write_ratio: float = 0.1,
+    members: int = 500,
+    materials: int = 200,
+) -> dict[str, Any]:
+    """``workers`` 個のプロセスでワークロードを実行し、1 秒あたりの処理件数と整合性を返す。"""
+
+    # uvicorn のワーカーと同じく、親の状態を引き継がない新しいインタープリターで動かす
+    context = multiprocessing.get_context("spawn")
+    with tempfile.TemporaryDirectory() as tmp:
+        path = Path(tmp) / "bench.db"
+        _seed(path, members, materials)
+        started = context.Barrier(workers + 1)
+        finished = context.Barrier(workers)
+        results = context.Queue()
+        processes = [
+            context.Process(
+                target=_worker,
+                args=(path, index),
+                kwargs={
+                    "duration": duration,
+                    "write_ratio": write_ratio,
+                    "members": members,
+                    "materials": materials,
+                    "started": started,
+                    "finished": finished,
+                    "results": results,
+                },
+            )
+            for index in range(workers)
+        ]
+        for process in processes:
+            process.start()
+        # 全ワーカーがストアを開き終えてから同時に始める
+        started.wait()
+        reports = [results.get() for _ in processes]
+        for process in processes:
+            process.join()
+    total = sum(report["operations"] for report in reports)
+    seconds = max(report["seconds"] for report in reports)
+    return {
+        "workers": workers,
+        "operations": total,
+        "seconds": seconds,
+        "ops_per_sec": total / seconds,
+        "errors": sum(report["errors"] for report in reports),
+        "stale_workers": sum(report["stale"] for report in reports),
+        "etags_agree": len({report["etag"] for report in reports}) == 1,
+    }
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4])
+    parser.add_argument("--duration", type=float, default=3.0)
+    parser.add_argument("--write-ratio", type=float, default=0.1)
+    parser.add_argument("--members", type=int, default=500)
+    parser.add_argument("--materials", type=int, default=200)
+    parser.add_argument("--json", action="store_true", help="結果を JSON で出力する")
+    args = parser.parse_args(argv)
+
+    results = [
+        run(
+            workers=workers,
+            duration=args.duration,
+            write_ratio=args.write_ratio,
+            members=args.members,
+            materials=args.materials,
+        )
+        for workers in args.workers
+    ]
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return 0
+    baseline = results[0]["ops_per_sec"]
+    for result in results:
+        ratio = result["ops_per_sec"] / baseline if baseline else 0.0
+        print(
+            f"{result['workers']:>3} workers: {result['ops_per_sec']:>10.1f} ops/s  (x{ratio:.2f})"
+            f"  errors={result['errors']} stale={result['stale_workers']}"
+            f" etags_agree={result['etags_agree']}"
+        )
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
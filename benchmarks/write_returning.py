@@ -0,0 +1,123 @@
+"""``UPDATE ... RETURNING`` による書き込みと、従来の「更新後に読み直す」書き込みのレイテンシ比較。
+
+従来方式は更新をコミットしてからロックを取り直し、``get_task`` で行を読み直す
+（変更前の ``update_task_status`` と同じ手順）。
+
+使い方::
+
+    uv run python -m benchmarks.write_returning --iterations 5000
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import statistics
+import sys
+import tempfile
+import time
+from collections.abc import Callable
+from datetime import date, datetime, timedelta
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from backend.models import ScheduleCreate, TaskCreate, TaskStatus
+from backend.store import SQLiteStore
+
+STATUSES = list(TaskStatus)
+
+
+def _seed(store: SQLiteStore, tasks: int) -> list[int]:
+    schedule = store.create_schedule(ScheduleCreate(name="大会当日", event_date=date(2023, 10, 1)))
+    start = datetime(2023, 10, 1, 6)
+    return [
+        store.create_task(
+            schedule.id,
+            TaskCreate(
+                name=f"Task {index}",
+                stage="Course",
+                start_time=start + timedelta(minutes=index),
+                end_time=start + timedelta(minutes=index + 30),
+            ),
+        ).id
+        for index in range(tasks)
+    ]
+
+
+def _update_then_select(store: SQLiteStore, task_id: int, status: TaskStatus) -> None:
+    with store._write() as conn:
+        conn.execute("UPDATE tasks SET status = ? WHERE id = ?", (status.value, task_id))
+    store.get_task(task_id)
+
+
+def _update_returning(store: SQLiteStore, task_id: int, status: TaskStatus) -> None:
+    store.update_task_status(task_id, status)
+
+
+def _measure(
+    operation: Callable[[SQLiteStore, int, TaskStatus], None],
+    *,
+    iterations: int,
+    tasks: int,
+    concurrent_reads: bool,
+) -> dict[str, float]:
+    with tempfile.TemporaryDirectory() as tmp:
+        store = SQLiteStore(Path(tmp) / "bench.db", concurrent_reads=concurrent_reads)
+        try:
+            task_ids = _seed(store, tasks)
+            samples: list[float] = []
+            for index in range(iterations):
+                task_id = task_ids[index % len(task_ids)]
+                status = STATUSES[index % len(STATUSES)]
+                started = time.perf_counter()
+                operation(store, task_id, status)
+                samples.append(time.perf_counter() - started)
+        finally:
+            store.close()
+    samples.sort()
+    return {
+        "iterations": iterations,
+        "mean_us": statistics.fmean(samples) * 1e6,
+        "p50_us": samples[len(samples) // 2] * 1e6,
+        "p95_us": samples[int(len(samples) * 0.95)] * 1e6,
+    }
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--iterations", type=int, default=5000)
+    parser.add_argument("--tasks", type=int, default=500)
+    parser.add_argument(
+        "--concurrent-reads", action="store_true", help="WAL + 読み取りプール構成で計測する"
+    )
+    parser.add_argument("--json", action="store_true", help="結果を JSON で出力する")
+    args = parser.parse_args(argv)
+
+    results = {
+        label: _measure(
+            operation,
+            iterations=args.iterations,
+            tasks=args.tasks,
+            concurrent_reads=args.concurrent_reads,
+        )
+        for label, operation in (
+            ("update_then_select", _update_then_select),
+            ("update_returning", _update_returning),
+        )
+    }
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return 0
+    baseline = results["update_then_select"]["mean_us"]
+    for label, result in results.items():
+        ratio = baseline / result["mean_us"] if result["mean_us"] else 0.0
+        print(
+            f"{label:>18}: mean {result['mean_us']:>8.1f} us  p50 {result['p50_us']:>8.1f} us"
+            f"  p95 {result['p95_us']:>8.1f} us  (x{ratio:.2f})"
+        )
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -1,10 +1,15 @@
 import {
+  BatchOperation,
+  BatchResponse,
   Material,
   MaterialInput,
   MaterialUpdateInput,
   Member,
   MemberInput,
-  MemberUpdateInput
+  MemberUpdateInput,
+  PartMaterialTotal,
+  PartMemberCount,
+  SyncChanges
 } from '../types';
 
 const defaultBaseUrl = 'http://127.0.0.1:8000';
@@ -71,5 +76,30 @@ export const apiClient = {
     await request<void>(`/materials/${materialId}`, {
       method: 'DELETE'
     });
+  },
+  async batch(operations: BatchOperation[]): Promise<BatchResponse> {
+    return request<BatchResponse>('/batch', {
+      method: 'POST',
+      body: JSON.stringify({ operations })
+    });
+  },
+  // ダッシュボード用のパートごとの集計。サーバーの集計表から返るため全件を取得しなくてよい
+  async memberPartCounts(): Promise<PartMemberCount[]> {
+    return request<PartMemberCount[]>('/dashboard/members');
+  },
+  async materialPartTotals(): Promise<PartMaterialTotal[]> {
+    return request<PartMaterialTotal[]>('/dashboard/materials');
+  },
+  // epoch はサーバーのデータが復元などで丸ごと入れ替わると変わり、違えば全件が返る
+  async sync(since: number, epoch: string | null): Promise<SyncChanges> {
+    const params = new URLSearchParams({ since: String(since) });
+    if (epoch !== null) {
+      params.set('epoch', epoch);
+    }
+    return request<SyncChanges>(`/sync?${params}`);
+  },
+  // サーバーの変更通知（Server-Sent Events）を購読する。切断時はブラウザが自動で再接続する
+  changeEvents(since: number): EventSource {
+    return new EventSource(`${baseUrl}/events?since=${since}`);
   }
 };
@@ -2,9 +2,12 @@ import React, { createContext, useCallback, useContext, useEffect, useMemo, useS
 import { apiClient } from '../api/client';
 import { db } from '../storage/db';
 import {
+  ChangeEvent,
+  Material,
   MaterialInput,
   MaterialRecord,
   MaterialUpdateInput,
+  Member,
   MemberInput,
   MemberRecord,
   MemberUpdateInput,
@@ -36,6 +39,27 @@ const generateOperationId = (): string => {
   return Math.random().toString(36).slice(2);
 };
 
+const syncVersionKey = 'eventcompass-sync-version';
+const syncEpochKey = 'eventcompass-sync-epoch';
+// 変更通知を受けてから同期を始めるまでの待ち時間
+const changeSyncDelayMs = 300;
+
+const loadSyncVersion = (): number => {
+  const stored = typeof localStorage !== 'undefined' ? localStorage.getItem(syncVersionKey) : null;
+  const parsed = stored ? Number(stored) : 0;
+  return Number.isFinite(parsed) ? parsed : 0;
+};
+
+const loadSyncEpoch = (): string | null =>
+  typeof localStorage !== 'undefined' ? localStorage.getItem(syncEpochKey) : null;
+
+const saveSyncVersion = (version: number, epoch: string): void => {
+  if (typeof localStorage !== 'undefined') {
+    localStorage.setItem(syncVersionKey, String(version));
+    localStorage.setItem(syncEpochKey, epoch);
+  }
+};
+
 const isNavigatorOnline = () => (typeof navigator !== 'undefined' ? navigator.onLine : false);
 
 const sortMembers = (records: MemberRecord[]): MemberRecord[] =>
@@ -61,22 +85,33 @@ export function DataProvider({ children }: { children: React.ReactNode }): JSX.E
 
   const syncPendingOperations = useCallback(async () => {
     const operations = await db.operations.orderBy('createdAt').toArray();
-    const idRemap = new Map<number, number>();
-
-    for (const op of operations) {
-      const refId = idRemap.get(op.refId) ?? op.refId;
+    if (operations.length === 0) {
+      return;
+    }
 
-      try {
-        if (op.entity === 'member') {
-          await handleMemberOperation(op, refId, idRemap);
+    // 保留中の操作を 1 回のリクエストで送信し、サーバー側で 1 トランザクションとして適用する
+    const response = await apiClient.batch(
+      operations.map((op) => ({
+        entity: op.entity,
+        action: op.action,
+        ref_id: op.refId,
+        payload: op.payload
+      }))
+    );
+    await db.transaction('rw', db.members, db.materials, db.operations, async () => {
+      for (const result of response.results) {
+        const op = operations[result.index];
+        if (result.status === 'ok') {
+          await applyOperationResult(op, result.id, result.data);
         } else {
-          await handleMaterialOperation(op, refId, idRemap);
+          console.error('同期できない操作を破棄しました', op, result.detail);
+          if (op.action === 'delete' && result.status === 'not_found') {
+            await deleteLocalRecord(op.entity, op.refId);
+          }
         }
-      } catch (error) {
-        console.error('同期処理でエラーが発生しました', error);
-        throw error;
       }
-    }
+      await db.operations.bulkDelete(operations.map((op) => op.id));
+    });
   }, []);
 
   const syncNow = useCallback(async () => {
@@ -89,20 +124,24 @@ export function DataProvider({ children }: { children: React.ReactNode }): JSX.E
     setSyncState('syncing');
     try {
       await syncPendingOperations();
-      const [remoteMembers, remoteMaterials] = await Promise.all([
-        apiClient.listMembers(),
-        apiClient.listMaterials()
-      ]);
+      // 前回の同期以降に変わった行だけを受け取り、ローカルの IndexedDB に反映する
+      const changes = await apiClient.sync(loadSyncVersion(), loadSyncEpoch());
       await db.transaction('rw', db.members, db.materials, async () => {
-        await db.members.clear();
-        await db.materials.clear();
+        if (changes.full) {
+          await db.members.clear();
+          await db.materials.clear();
+        } else {
+          await db.members.bulkDelete(changes.deleted.members);
+          await db.materials.bulkDelete(changes.deleted.materials);
+        }
         await db.members.bulkPut(
-          remoteMembers.map((member) => ({ ...member, syncStatus: 'synced' as const }))
+          changes.members.map((member) => ({ ...member, syncStatus: 'synced' as const }))
         );
         await db.materials.bulkPut(
-          remoteMaterials.map((material) => ({ ...material, syncStatus: 'synced' as const }))
+          changes.materials.map((material) => ({ ...material, syncStatus: 'synced' as const }))
         );
       });
+      saveSyncVersion(changes.version, changes.epoch);
       await loadFromStorage();
       setLastSync(Date.now());
       setSyncState('idle');
@@ -127,6 +166,34 @@ export function DataProvider({ children }: { children: React.ReactNode }): JSX.E
     return () => window.removeEventListener('online', handleOnline);
   }, [syncNow]);
 
+  useEffect(() => {
+    if (typeof EventSource === 'undefined') {
+      return;
+    }
+    // 他の端末の変更通知を受けたら差分同期する。続けて届いた通知は 1 回の同期にまとめる
+    let timer: ReturnType<typeof setTimeout> | undefined;
+    const scheduleSync = () => {
+      clearTimeout(timer);
+      timer = setTimeout(() => void syncNow(), changeSyncDelayMs);
+    };
+    const source = apiClient.changeEvents(loadSyncVersion());
+    source.addEventListener('change', (event) => {
+      const change = JSON.parse((event as MessageEvent<string>).data) as ChangeEvent;
+      if (
+        (change.entity === 'member' || change.entity === 'material') &&
+        change.version > loadSyncVersion()
+      ) {
+        scheduleSync();
+      }
+    });
+    // 通知が追いつかなかった場合はサーバーが接続を閉じるため、同期し直す
+    source.addEventListener('resync', scheduleSync);
+    return () => {
+      clearTimeout(timer);
+      source.close();
+    };
+  }, [syncNow]);
+
   const enqueueOperation = useCallback(
     async (entity: OperationRecord['entity'], action: OperationAction, refId: number, payload: unknown) => {
       const operation: OperationRecord = {
@@ -335,92 +402,34 @@ export function useDataContext(): DataContextValue {
   return ctx;
 }
 
-async function handleMemberOperation(
-  operation: OperationRecord,
-  refId: number,
-  idRemap: Map<number, number>
-): Promise<void> {
-  if (operation.action === 'create') {
-    const created = await apiClient.createMember(operation.payload as MemberInput);
-    await db.transaction('rw', db.members, db.operations, async () => {
-      await db.members.delete(operation.refId);
-      await db.members.put({ ...created, syncStatus: 'synced' });
-      await db.operations.where('refId').equals(operation.refId).modify({ refId: created.id });
-      await db.operations.delete(operation.id);
-    });
-    idRemap.set(operation.refId, created.id);
-    return;
-  }
-
-  if (operation.action === 'update') {
-    const targetId = refId > 0 ? refId : idRemap.get(refId);
-    if (!targetId) {
-      await db.operations.delete(operation.id);
-      return;
-    }
-    const updated = await apiClient.updateMember(targetId, operation.payload as MemberUpdateInput);
-    await db.transaction('rw', db.members, db.operations, async () => {
-      await db.members.put({ ...updated, syncStatus: 'synced' });
-      await db.operations.delete(operation.id);
-    });
-    return;
-  }
-
-  if (operation.action === 'delete') {
-    const targetId = refId > 0 ? refId : idRemap.get(refId);
-    if (!targetId) {
-      await db.operations.delete(operation.id);
-      return;
-    }
-    await apiClient.deleteMember(targetId);
-    await db.transaction('rw', db.members, db.operations, async () => {
-      await db.members.delete(targetId);
-      await db.operations.delete(operation.id);
-    });
+async function deleteLocalRecord(entity: OperationRecord['entity'], id: number): Promise<void> {
+  if (entity === 'member') {
+    await db.members.delete(id);
+  } else {
+    await db.materials.delete(id);
   }
 }
 
-async function handleMaterialOperation(
+async function applyOperationResult(
   operation: OperationRecord,
-  refId: number,
-  idRemap: Map<number, number>
+  id: number | null,
+  data: Member | Material | null
 ): Promise<void> {
   if (operation.action === 'create') {
-    const created = await apiClient.createMaterial(operation.payload as MaterialInput);
-    await db.transaction('rw', db.materials, db.operations, async () => {
-      await db.materials.delete(operation.refId);
-      await db.materials.put({ ...created, syncStatus: 'synced' });
-      await db.operations.where('refId').equals(operation.refId).modify({ refId: created.id });
-      await db.operations.delete(operation.id);
-    });
-    idRemap.set(operation.refId, created.id);
-    return;
+    await deleteLocalRecord(operation.entity, operation.refId);
   }
-
-  if (operation.action === 'update') {
-    const targetId = refId > 0 ? refId : idRemap.get(refId);
-    if (!targetId) {
-      await db.operations.delete(operation.id);
-      return;
+  if (operation.action === 'delete') {
+    if (id !== null) {
+      await deleteLocalRecord(operation.entity, id);
     }
-    const updated = await apiClient.updateMaterial(targetId, operation.payload as MaterialUpdateInput);
-    await db.transaction('rw', db.materials, db.operations, async () => {
-      await db.materials.put({ ...updated, syncStatus: 'synced' });
-      await db.operations.delete(operation.id);
-    });
     return;
   }
-
-  if (operation.action === 'delete') {
-    const targetId = refId > 0 ? refId : idRemap.get(refId);
-    if (!targetId) {
-      await db.operations.delete(operation.id);
-      return;
-    }
-    await apiClient.deleteMaterial(targetId);
-    await db.transaction('rw', db.materials, db.operations, async () => {
-      await db.materials.delete(targetId);
-      await db.operations.delete(operation.id);
-    });
+  if (!data) {
+    return;
+  }
+  if (operation.entity === 'member') {
+    await db.members.put({ ...(data as Member), syncStatus: 'synced' });
+  } else {
+    await db.materials.put({ ...(data as Material), syncStatus: 'synced' });
   }
 }
@@ -38,10 +38,64 @@ export interface MaterialInput {
 
 export type MaterialUpdateInput = Partial<MaterialInput>;
 
+export interface SyncDeleted {
+  members: number[];
+  materials: number[];
+}
+
+export interface SyncChanges {
+  version: number;
+  epoch: string;
+  full: boolean;
+  members: Member[];
+  materials: Material[];
+  deleted: SyncDeleted;
+}
+
+export interface ChangeEvent {
+  entity: 'member' | 'material' | 'schedule' | 'task';
+  id: number;
+  action: 'upsert' | 'delete';
+  version: number;
+}
+
+export interface PartMemberCount {
+  part: string;
+  members: number;
+}
+
+export interface PartMaterialTotal {
+  part: string;
+  materials: number;
+  quantity: number;
+}
+
 export type EntityKind = 'member' | 'material';
 export type OperationAction = 'create' | 'update' | 'delete';
 export type SyncState = 'idle' | 'syncing' | 'error';
 
+export interface BatchOperation {
+  entity: EntityKind;
+  action: OperationAction;
+  ref_id: number;
+  payload: unknown;
+}
+
+export type BatchStatus = 'ok' | 'not_found' | 'invalid';
+
+export interface BatchOperationResult {
+  index: number;
+  status: BatchStatus;
+  id: number | null;
+  data: Member | Material | null;
+  detail: unknown;
+}
+
+export interface BatchResponse {
+  results: BatchOperationResult[];
+  id_map: Partial<Record<EntityKind, Record<string, number>>>;
+}
+
 export interface MemberRecord extends Member {
   syncStatus: 'synced' | 'pending';
 }
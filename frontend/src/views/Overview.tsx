@@ -1,6 +1,7 @@
-import { FormEvent, useMemo, useState } from 'react';
+import { FormEvent, useEffect, useMemo, useState } from 'react';
+import { apiClient } from '../api/client';
 import { useDataContext } from '../state/DataProvider';
-import { MaterialInput, MemberInput } from '../types';
+import { MaterialInput, MemberInput, PartMaterialTotal, PartMemberCount } from '../types';
 
 const emptyMember: MemberInput = {
   name: '',
@@ -31,6 +32,37 @@ export function Overview(): JSX.Element {
     };
   }, [members, materials]);
 
+  // サーバー側で集計したパートごとの件数。取得できない間（オフラインなど）はローカルの件数を表示する
+  const [partTotals, setPartTotals] = useState<{
+    members: PartMemberCount[];
+    materials: PartMaterialTotal[];
+  } | null>(null);
+
+  useEffect(() => {
+    let cancelled = false;
+    Promise.all([apiClient.memberPartCounts(), apiClient.materialPartTotals()])
+      .then(([memberCounts, materialTotals]) => {
+        if (!cancelled) {
+          setPartTotals({ members: memberCounts, materials: materialTotals });
+        }
+      })
+      .catch(() => {
+        if (!cancelled) {
+          setPartTotals(null);
+        }
+      });
+    return () => {
+      cancelled = true;
+    };
+  }, [lastSync]);
+
+  const memberTotal = partTotals
+    ? partTotals.members.reduce((sum, count) => sum + count.members, 0)
+    : members.length;
+  const materialTotal = partTotals
+    ? partTotals.materials.reduce((sum, total) => sum + total.materials, 0)
+    : materials.length;
+
   const [memberFormOpen, setMemberFormOpen] = useState(false);
   const [materialFormOpen, setMaterialFormOpen] = useState(false);
 
@@ -98,16 +130,26 @@ export function Overview(): JSX.Element {
             <span className="metric-label">乗員</span>
             <span className="metric-icon" />
           </header>
-          <p className="metric-value">{members.length}</p>
-          <p className="metric-footnote">登録済みのスタッフ数です。</p>
+          <p className="metric-value">{memberTotal}</p>
+          <p className="metric-footnote">
+            {partTotals && partTotals.members.length > 0
+              ? partTotals.members.map((count) => `${count.part} ${count.members}`).join(' ・ ')
+              : '登録済みのスタッフ数です。'}
+          </p>
         </article>
         <article className="metric-card">
           <header>
             <span className="metric-label">物資</span>
             <span className="metric-icon" />
           </header>
-          <p className="metric-value">{materials.length}</p>
-          <p className="metric-footnote">現在管理している資材の種類数です。</p>
+          <p className="metric-value">{materialTotal}</p>
+          <p className="metric-footnote">
+            {partTotals && partTotals.materials.length > 0
+              ? partTotals.materials
+                  .map((total) => `${total.part} ${total.materials}種 / ${total.quantity}点`)
+                  .join(' ・ ')
+              : '現在管理している資材の種類数です。'}
+          </p>
         </article>
       </section>
 